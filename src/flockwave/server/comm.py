@@ -3,11 +3,11 @@ communication between UAVs and a ground station via some communication
 link (e.g., standard 802.11 wifi).
 """
 
-from collections import defaultdict
-from collections.abc import Awaitable, Callable, Generator, Iterable, Iterator
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable, Generator, Iterable, Iterator, Sequence
 from contextlib import contextmanager
-from dataclasses import dataclass
-from enum import Enum
+from dataclasses import dataclass, field
+from enum import Enum, IntEnum
 from errno import (
     EADDRNOTAVAIL,
     EHOSTDOWN,
@@ -29,16 +29,24 @@ from flockwave.connections import (
 from trio import (
     BrokenResourceError,
     ClosedResourceError,
-    WouldBlock,
+    Event,
     open_memory_channel,
+    open_nursery,
     sleep,
+    sleep_forever,
 )
 from trio.abc import ReceiveChannel, SendChannel
 from trio_util import wait_all
 
 from .types import Disposer
 
-__all__ = ("BROADCAST", "CommunicationManager")
+__all__ = (
+    "BROADCAST",
+    "CommunicationManager",
+    "DropPolicy",
+    "OutboundQueue",
+    "TransmissionPriority",
+)
 
 
 AddressType = TypeVar("AddressType", covariant=True)
@@ -52,6 +60,12 @@ BROADCAST = object()
 communication channel with no specific destination address.
 """
 
+_BROADCAST_TO_ALL = object()
+"""Marker object used in the outbound queues to denote packets that are
+broadcast over all the communication channels. These are not followed by the
+broadcast delay of the communication manager.
+"""
+
 # TODO(ntamas): I think that the WSA* error codes do not need to be handled
 # separately; the source code of errnomodule.c in Python suggests that these
 # are transparently mapped to the appropriate errno codes.
@@ -69,6 +83,349 @@ WSAEHOSTUNREACH = 10065
 """Special Windows error code for "host unreachable" condition."""
 
 
+class TransmissionPriority(IntEnum):
+    """Priority classes of outbound packets. Packets with a lower numeric
+    priority value are sent first on each connection.
+    """
+
+    EMERGENCY = 0
+    """Emergency commands like landing, returning to home or stopping the
+    motors.
+    """
+
+    COMMAND = 1
+    """Regular commands and their acknowledgments; the default priority."""
+
+    CONFIGURATION = 2
+    """Configuration requests like show uploads or parameter changes."""
+
+    RTK = 3
+    """RTK correction data."""
+
+    TELEMETRY = 4
+    """Requests for configuring telemetry streams."""
+
+    HEARTBEAT = 5
+    """Heartbeats."""
+
+
+class DropPolicy(Enum):
+    """Policies that specify what happens when a packet is to be added to a
+    full outbound queue.
+    """
+
+    BLOCK = "block"
+    """The sender waits until there is space in the queue. Packets enqueued
+    without waiting are dropped.
+    """
+
+    DROP_NEWEST = "dropNewest"
+    """The new packet is dropped."""
+
+    DROP_OLDEST = "dropOldest"
+    """The oldest packet in the queue is dropped to make room for the new
+    one.
+    """
+
+
+DEFAULT_DROP_POLICIES: dict[TransmissionPriority, DropPolicy] = {
+    TransmissionPriority.EMERGENCY: DropPolicy.BLOCK,
+    TransmissionPriority.COMMAND: DropPolicy.BLOCK,
+    TransmissionPriority.CONFIGURATION: DropPolicy.BLOCK,
+    TransmissionPriority.RTK: DropPolicy.DROP_OLDEST,
+    TransmissionPriority.TELEMETRY: DropPolicy.DROP_NEWEST,
+    TransmissionPriority.HEARTBEAT: DropPolicy.DROP_OLDEST,
+}
+"""Default drop policies of the priority classes. Stale RTK corrections and
+heartbeats are worthless so the oldest ones are dropped first.
+"""
+
+DEFAULT_QUEUE_SIZES: dict[TransmissionPriority, int] = {
+    TransmissionPriority.EMERGENCY: 64,
+    TransmissionPriority.COMMAND: 256,
+    TransmissionPriority.CONFIGURATION: 256,
+    # RTK streams send messages in bursts so it's better to have a relatively
+    # large queue here
+    TransmissionPriority.RTK: 256,
+    TransmissionPriority.TELEMETRY: 64,
+    TransmissionPriority.HEARTBEAT: 4,
+}
+"""Default sizes of the outbound queues of the priority classes on each
+connection.
+"""
+
+DEFAULT_HEARTBEAT_SLOT_INTERVAL = 8
+"""Default maximum number of packets of other priority classes that are sent
+on a connection while a heartbeat is waiting in its outbound queue.
+"""
+
+
+class _ItemGroup(Generic[PacketType]):
+    """Group of items in an outbound queue that are kept together. The group
+    is dropped as a whole when the oldest items of the queue are dropped, and
+    the items of the group are served back to back within their priority
+    class.
+    """
+
+    __slots__ = ("items",)
+
+    items: deque[PacketType]
+    """The items of the group that were not served yet."""
+
+    def __init__(self, items: Iterable[PacketType]):
+        self.items = deque(items)
+
+
+class OutboundQueue(Generic[PacketType]):
+    """Outbound queue of a single connection, with separate bounded queues for
+    each priority class.
+
+    Items are served in the order of their priorities, with one exception:
+    heartbeats have a guaranteed slot so they are not starved by a sustained
+    load of more urgent packets. A waiting heartbeat is served after at most a
+    given number of packets from the other priority classes.
+
+    Items that make sense only together (e.g., the fragments of a single RTK
+    correction packet) can be added as a group; groups are never split by the
+    drop policies of the queue.
+    """
+
+    __slots__ = (
+        "_heartbeat_slot_interval",
+        "_items",
+        "_lengths",
+        "_not_empty",
+        "_not_full",
+        "_policies",
+        "_served_while_heartbeat_waits",
+        "_sizes",
+    )
+
+    _heartbeat_slot_interval: int
+    """Maximum number of packets of other priority classes that are served
+    while a heartbeat is waiting in the queue.
+    """
+
+    _items: list[deque[PacketType | _ItemGroup[PacketType]]]
+    """Queued items and item groups of each priority class, indexed by
+    priority.
+    """
+
+    _lengths: list[int]
+    """Number of queued items in each priority class, including the items in
+    the groups, indexed by priority.
+    """
+
+    _not_empty: Event
+    """Event that is set when an item is added to the queue."""
+
+    _not_full: Event
+    """Event that is set when an item is removed from the queue."""
+
+    _policies: list[DropPolicy]
+    """Drop policies of each priority class, indexed by priority."""
+
+    _served_while_heartbeat_waits: int
+    """Number of packets of other priority classes that were served since the
+    oldest heartbeat in the queue started waiting.
+    """
+
+    _sizes: list[int]
+    """Maximum number of items in each priority class, indexed by priority."""
+
+    def __init__(
+        self,
+        sizes: dict[TransmissionPriority, int] | None = None,
+        policies: dict[TransmissionPriority, DropPolicy] | None = None,
+        *,
+        heartbeat_slot_interval: int = DEFAULT_HEARTBEAT_SLOT_INTERVAL,
+    ):
+        """Constructor.
+
+        Parameters:
+            sizes: maximum number of items in each priority class; defaults to
+                `DEFAULT_QUEUE_SIZES`
+            policies: drop policies of each priority class; defaults to
+                `DEFAULT_DROP_POLICIES`
+            heartbeat_slot_interval: maximum number of packets of other
+                priority classes that are served while a heartbeat is waiting
+                in the queue
+        """
+        sizes = {**DEFAULT_QUEUE_SIZES, **(sizes or {})}
+        policies = {**DEFAULT_DROP_POLICIES, **(policies or {})}
+
+        self._heartbeat_slot_interval = max(int(heartbeat_slot_interval), 0)
+        self._items = [deque() for _ in TransmissionPriority]
+        self._lengths = [0 for _ in TransmissionPriority]
+        self._policies = [policies[priority] for priority in TransmissionPriority]
+        self._served_while_heartbeat_waits = 0
+        self._sizes = [max(sizes[priority], 1) for priority in TransmissionPriority]
+        self._not_empty = Event()
+        self._not_full = Event()
+
+    def __len__(self) -> int:
+        return sum(self._lengths)
+
+    def clear(self) -> None:
+        """Removes all the items from the queue."""
+        for items in self._items:
+            items.clear()
+        self._lengths = [0 for _ in TransmissionPriority]
+        self._served_while_heartbeat_waits = 0
+        self._notify_not_full()
+
+    async def get(self) -> PacketType:
+        """Removes and returns the item with the highest priority from the
+        queue, waiting for an item if the queue is empty. Items with the same
+        priority are returned in the order they were added.
+
+        A waiting heartbeat is returned ahead of the other items if too many
+        items were returned while it was waiting.
+        """
+        heartbeat = TransmissionPriority.HEARTBEAT
+        heartbeats = self._items[heartbeat]
+        while True:
+            if (
+                heartbeats
+                and self._served_while_heartbeat_waits >= self._heartbeat_slot_interval
+            ):
+                self._served_while_heartbeat_waits = 0
+                return self._pop(heartbeat)
+
+            for priority, items in enumerate(self._items):
+                if items:
+                    if items is heartbeats:
+                        self._served_while_heartbeat_waits = 0
+                    elif heartbeats:
+                        self._served_while_heartbeat_waits += 1
+                    return self._pop(priority)
+
+            await self._not_empty.wait()
+            self._not_empty = Event()
+
+    async def put(
+        self,
+        item: PacketType,
+        priority: TransmissionPriority = TransmissionPriority.COMMAND,
+    ) -> bool:
+        """Adds an item to the queue with the given priority, waiting for space
+        in the queue if the drop policy of the priority class says so.
+
+        Returns:
+            whether the item was added to the queue
+        """
+        if self._policies[priority] is DropPolicy.BLOCK:
+            while self._lengths[priority] >= self._sizes[priority]:
+                not_full = self._not_full
+                await not_full.wait()
+        return self.put_nowait(item, priority)
+
+    def put_nowait(
+        self,
+        item: PacketType,
+        priority: TransmissionPriority = TransmissionPriority.COMMAND,
+    ) -> bool:
+        """Adds an item to the queue with the given priority without waiting,
+        dropping an item if the priority class is full.
+
+        Returns:
+            whether the item was added to the queue
+        """
+        if self._lengths[priority] >= self._sizes[priority]:
+            if self._policies[priority] is DropPolicy.DROP_OLDEST:
+                self._drop_oldest(priority)
+            else:
+                return False
+
+        self._items[priority].append(item)
+        self._lengths[priority] += 1
+        self._not_empty.set()
+        return True
+
+    def put_group_nowait(
+        self,
+        items: Sequence[PacketType],
+        priority: TransmissionPriority = TransmissionPriority.COMMAND,
+    ) -> bool:
+        """Adds a group of items to the queue with the given priority without
+        waiting. The items of the group are added or dropped together; when
+        the drop policy of the priority class drops the oldest items, whole
+        items or groups are dropped until the new group fits.
+
+        Returns:
+            whether the group was added to the queue
+        """
+        count = len(items)
+        if count < 2:
+            return self.put_nowait(items[0], priority) if items else True
+
+        size = self._sizes[priority]
+        if count > size:
+            return False
+
+        if self._lengths[priority] + count > size:
+            if self._policies[priority] is DropPolicy.DROP_OLDEST:
+                while self._lengths[priority] + count > size:
+                    self._drop_oldest(priority)
+            else:
+                return False
+
+        self._items[priority].append(_ItemGroup(items))
+        self._lengths[priority] += count
+        self._not_empty.set()
+        return True
+
+    def _drop_oldest(self, priority: int) -> None:
+        """Drops the oldest item or group of items with the given priority."""
+        item = self._items[priority].popleft()
+        self._lengths[priority] -= (
+            len(item.items) if isinstance(item, _ItemGroup) else 1
+        )
+
+    def _notify_not_full(self) -> None:
+        self._not_full.set()
+        self._not_full = Event()
+
+    def _pop(self, priority: int) -> PacketType:
+        """Removes and returns the oldest item with the given priority. The
+        priority class must not be empty.
+        """
+        items = self._items[priority]
+        item = items[0]
+        if isinstance(item, _ItemGroup):
+            group = item.items
+            item = group.popleft()
+            if not group:
+                items.popleft()
+        else:
+            items.popleft()
+
+        self._lengths[priority] -= 1
+        self._notify_not_full()
+        return item
+
+
+@dataclass
+class UnicastDelivery:
+    """Bookkeeping object of a packet targeted to a single address that was
+    enqueued on one or more connections with the same name.
+    """
+
+    name: str
+    """The name of the communication channel (or alias) that the packet was
+    sent to.
+    """
+
+    pending: int
+    """Number of connections that have not attempted to send the packet yet."""
+
+    failed: bool = False
+    """Whether sending the packet failed on at least one connection."""
+
+    sent: bool = False
+    """Whether the packet was sent successfully on at least one connection."""
+
+
 class ErrorAction(Enum):
     SKIP_LOGGING = "skipLogging"
     LOG_AND_SUSPEND = "logAndSuspend"
@@ -106,6 +463,14 @@ class CommunicationManagerEntry(Generic[PacketType, AddressType]):
     ``None`` if the connection is closed.
     """
 
+    queue: OutboundQueue[tuple[PacketType, AddressType, UnicastDelivery | None]] = (
+        field(default_factory=OutboundQueue)
+    )
+    """Queue of outbound messages waiting to be sent on the connection, along
+    with their destination addresses and the bookkeeping objects of packets
+    targeted to a single address.
+    """
+
     _error_count: int = 0
     """Number of consecutive errors that have occurred recently. Sending a
     successful message on this entry will clear the error counter.
@@ -195,9 +560,10 @@ class CommunicationManager(Generic[PacketType, AddressType]):
     """
 
     broadcast_delay: float = 0
-    """Number of seconds to wait after each successful broadcast. This is a
-    hack that can be used to work around flow control problems when broadcasting
-    RTK corrections. Typically you should leave this at zero.
+    """Number of seconds to wait after each successful broadcast on a named
+    communication channel. Broadcasts to all channels are not delayed. This is
+    a hack that can be used to work around flow control problems when
+    broadcasting RTK corrections. Typically you should leave this at zero.
     """
 
     error_limit: int = 5
@@ -248,7 +614,7 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         self._entries_by_name = defaultdict(list)
         self._error_counters = defaultdict(int)
         self._running = False
-        self._outbound_tx_queue = None
+        self._transmitting = False
 
     def add(self, connection, *, name: str, can_send: bool | None = None):
         """Adds the given connection to the list of connections managed by
@@ -296,27 +662,29 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         *,
         destination: str | None = None,
         allow_failure: bool = False,
+        priority: TransmissionPriority = TransmissionPriority.COMMAND,
     ) -> None:
         """Requests the communication manager to broadcast the given message
         packet to all destinations, or to the broadcast address of a single
         destination.
 
-        Blocks until the packet is enqueued in the outbound queue, allowing
-        other tasks to run.
+        Blocks until the packet is enqueued in the outbound queues of the
+        affected connections if the drop policy of the priority class says so,
+        allowing other tasks to run.
 
         Parameters:
             packet: the packet to send
+            priority: the priority class of the packet
         """
-        queue = self._outbound_tx_queue
-        if not queue:
+        if not self._transmitting:
             if not allow_failure:
                 raise BrokenResourceError("Outbound message queue is closed")
             else:
                 return
 
-        address = BROADCAST if destination is None else (destination, BROADCAST)
-
-        await queue.send((packet, address))
+        address = BROADCAST if destination is not None else _BROADCAST_TO_ALL
+        for entry in self._iter_broadcast_entries(destination):
+            await entry.queue.put((packet, address, None), priority)
 
     def enqueue_broadcast_packet(
         self,
@@ -324,54 +692,108 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         *,
         destination: str | None = None,
         allow_failure: bool = False,
+        priority: TransmissionPriority = TransmissionPriority.COMMAND,
     ) -> None:
         """Requests the communication manager to broadcast the given message
         packet to all destinations and return immediately.
 
-        The packet may be dropped if the outbound queue is currently full.
+        The packet may be dropped if the outbound queue of a connection is
+        currently full.
 
         Parameters:
             packet: the packet to send
+            priority: the priority class of the packet
         """
-        queue = self._outbound_tx_queue
-        if not queue:
+        if not self._transmitting:
             if not allow_failure:
                 raise BrokenResourceError("Outbound message queue is closed")
             else:
                 return
 
-        address = BROADCAST if destination is None else (destination, BROADCAST)
+        address = BROADCAST if destination is not None else _BROADCAST_TO_ALL
+        for entry in self._iter_broadcast_entries(destination):
+            if not entry.queue.put_nowait((packet, address, None), priority):
+                if self.log:
+                    self.log.warning(
+                        "Dropping outbound broadcast packet; outbound message queue is full",
+                        extra={"id": entry.name},
+                    )
 
-        try:
-            queue.send_nowait((packet, address))
-        except WouldBlock:
-            if self.log:
-                self.log.warning(
-                    "Dropping outbound broadcast packet; outbound message queue is full"
-                )
+    def enqueue_broadcast_packets(
+        self,
+        packets: Sequence[PacketType],
+        *,
+        destination: str | None = None,
+        allow_failure: bool = False,
+        priority: TransmissionPriority = TransmissionPriority.COMMAND,
+        accept: Callable[[Connection], bool] | None = None,
+    ) -> None:
+        """Requests the communication manager to broadcast the given message
+        packets to all destinations as a single group and return immediately.
+
+        The packets of the group are sent back to back and they are kept or
+        dropped together when the outbound queue of a connection is full.
+        This is useful for packets that are useless without each other, such
+        as the fragments of a single RTK correction packet.
 
-    def enqueue_packet(self, packet: PacketType, destination: tuple[str, AddressType]):
+        Parameters:
+            packets: the packets to send
+            priority: the priority class of the packets
+            accept: optional function that is called with each connection that
+                the packets would be sent on, and that returns whether the
+                packets should be sent on that connection
+        """
+        if not self._transmitting:
+            if not allow_failure:
+                raise BrokenResourceError("Outbound message queue is closed")
+            else:
+                return
+
+        address = BROADCAST if destination is not None else _BROADCAST_TO_ALL
+        items = [(packet, address, None) for packet in packets]
+        for entry in self._iter_broadcast_entries(destination):
+            if accept is not None and not accept(entry.connection):
+                continue
+            if not entry.queue.put_group_nowait(items, priority):
+                if self.log:
+                    self.log.warning(
+                        "Dropping outbound broadcast packets; outbound message queue is full",
+                        extra={"id": entry.name},
+                    )
+
+    def enqueue_packet(
+        self,
+        packet: PacketType,
+        destination: tuple[str, AddressType],
+        *,
+        priority: TransmissionPriority = TransmissionPriority.COMMAND,
+    ):
         """Requests the communication manager to send the given message packet
         to the given destination and return immediately.
 
-        The packet may be dropped if the outbound queue is currently full.
+        The packet may be dropped if the outbound queue of a connection is
+        currently full.
 
         Parameters:
             packet: the packet to send
             destination: the name of the communication channel and the address
                 on that communication channel to send the packet to.
+            priority: the priority class of the packet
         """
-        queue = self._outbound_tx_queue
-        if not queue:
+        if not self._transmitting:
             raise BrokenResourceError("Outbound message queue is closed")
 
-        try:
-            queue.send_nowait((packet, destination))
-        except WouldBlock:
-            if self.log:
-                self.log.warning(
-                    "Dropping outbound packet; outbound message queue is full"
-                )
+        name, address = destination
+        entries = list(self._iter_unicast_entries(name))
+        delivery = UnicastDelivery(name, len(entries))
+        for entry in entries:
+            if not entry.queue.put_nowait((packet, address, delivery), priority):
+                self._notify_delivery_result(delivery, None)
+                if self.log:
+                    self.log.warning(
+                        "Dropping outbound packet; outbound message queue is full",
+                        extra={"id": entry.name},
+                    )
 
     def is_channel_open(self, name: str) -> bool:
         """Returns whether the channel with the given name is currently up and
@@ -435,24 +857,34 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         del self._aliases[alias]
 
     async def send_packet(
-        self, packet: PacketType, destination: tuple[str, AddressType]
+        self,
+        packet: PacketType,
+        destination: tuple[str, AddressType],
+        *,
+        priority: TransmissionPriority = TransmissionPriority.COMMAND,
     ) -> None:
         """Requests the communication manager to send the given message packet
         to the given destination.
 
-        Blocks until the packet is enqueued in the outbound queue, allowing
-        other tasks to run.
+        Blocks until the packet is enqueued in the outbound queues of the
+        affected connections if the drop policy of the priority class says so,
+        allowing other tasks to run.
 
         Parameters:
             packet: the packet to send
             destination: the name of the communication channel and the address
                 on that communication channel to send the packet to.
+            priority: the priority class of the packet
         """
-        queue = self._outbound_tx_queue
-        if not queue:
+        if not self._transmitting:
             raise BrokenResourceError("Outbound message queue is closed")
 
-        await queue.send((packet, destination))
+        name, address = destination
+        entries = list(self._iter_unicast_entries(name))
+        delivery = UnicastDelivery(name, len(entries))
+        for entry in entries:
+            if not await entry.queue.put((packet, address, delivery), priority):
+                self._notify_delivery_result(delivery, None)
 
     @contextmanager
     def with_alias(self, alias: str, *, targets: Iterable[str]):
@@ -555,122 +987,183 @@ class CommunicationManager(Generic[PacketType, AddressType]):
                 else:
                     self.log.info("Connection closed", extra=log_extra)
 
+    def _iter_broadcast_entries(
+        self, name: str | None = None
+    ) -> Iterator[CommunicationManagerEntry[PacketType, AddressType]]:
+        """Iterates over the open entries that a broadcast packet should be
+        sent on.
+
+        Parameters:
+            name: the name of the communication channel (or an alias) to
+                broadcast the packet on; ``None`` means all channels
+        """
+        if name is None:
+            for entry in self._iter_entries():
+                if entry.can_broadcast:
+                    yield entry
+        else:
+            for entry in self._resolve_entries(name):
+                if entry.can_broadcast and entry.can_send:
+                    yield entry
+
+    def _iter_unicast_entries(
+        self, name: str
+    ) -> Iterator[CommunicationManagerEntry[PacketType, AddressType]]:
+        """Iterates over the open entries that a packet targeted to a single
+        address should be sent on, logging a warning if there are none.
+
+        Parameters:
+            name: the name of the communication channel (or an alias) to send
+                the packet on
+        """
+        entries = self._resolve_entries(name)
+        found = False
+        for entry in entries:
+            if entry.is_open and entry.can_send:
+                found = True
+                yield entry
+
+        if found:
+            return
+
+        self._error_counters[name] += 1
+        if self._error_counters[name] <= self.error_limit and self.log:
+            self.log.warning(
+                "Dropping outbound message, no suitable connection",
+                extra={"id": name, "telemetry": "ignore"},
+            )
+
+    def _resolve_entries(
+        self, name: str
+    ) -> list[CommunicationManagerEntry[PacketType, AddressType]]:
+        """Returns the entries corresponding to the given communication
+        channel name or alias.
+        """
+        entries = self._entries_by_name.get(name)
+        if entries:
+            return entries
+
+        result = []
+        for target in self._aliases.get(name) or ():
+            result.extend(self._entries_by_name.get(target) or ())
+        return result
+
     async def _run_outbound_links(self):
-        # ephemeris RTK streams send messages in bursts so it's better to have
-        # a relatively large queue here
-        tx_queue, rx_queue = open_memory_channel(256)
-        async with tx_queue, rx_queue:
+        # Each connection has its own outbound queue and transmit task so a
+        # slow connection does not hold up the others
+        async with open_nursery() as nursery:
+            for entry in self._iter_entries():
+                nursery.start_soon(
+                    self._run_outbound_link,
+                    entry,
+                    name=f"comm-outbound-link:{entry.name or 'unknown'}",
+                )
+
             try:
-                self._outbound_tx_queue = tx_queue
-                await self._run_outbound_links_inner(rx_queue)
+                self._transmitting = True
+                await sleep_forever()
             finally:
-                self._outbound_tx_queue = None
-
-    async def _run_outbound_links_inner(self, queue):
-        # TODO(ntamas): a slow outbound link may block sending messages on other
-        # outbound links; revise if this causes a problem
-        async for message, destination in queue:
-            if destination is BROADCAST:
-                await self._send_message_to_all_channels(message)
-            else:
-                await self._send_message_to_single_channel(message, destination)
+                self._transmitting = False
 
-    async def _send_message_to_all_channels(self, message: PacketType):
-        for entries in self._entries_by_name.values():
-            for _index, entry in enumerate(entries):
-                channel = entry.channel
-                if not entry.can_broadcast:
-                    continue
+    async def _run_outbound_link(
+        self, entry: CommunicationManagerEntry[PacketType, AddressType]
+    ) -> None:
+        """Sends the messages in the outbound queue of a single connection,
+        in the order of their priorities.
+        """
+        index = self._entries_by_name[entry.name].index(entry)
+        queue = entry.queue
+        try:
+            while True:
+                message, address, delivery = await queue.get()
+                sent = await self._send_message_on_entry(message, address, entry, index)
+                if delivery is not None:
+                    self._notify_delivery_result(delivery, sent)
+        finally:
+            queue.clear()
 
-                channel = cast(BroadcastMessageChannel, channel)
-                try:
-                    await channel.broadcast((message, BROADCAST))
-                except Exception:
-                    # we are going to try all channels so it does not matter
-                    # if a few of them fail for whatever reason
-                    pass
-
-    async def _send_message_to_single_channel(
-        self, message: PacketType, destination: tuple[str, AddressType]
-    ):
-        name, address = destination
+    async def _send_message_on_entry(
+        self,
+        message: PacketType,
+        address: AddressType,
+        entry: CommunicationManagerEntry[PacketType, AddressType],
+        index: int,
+    ) -> bool:
+        """Sends a message on the channel of a single entry, handling
+        transmission errors.
 
-        entries = self._entries_by_name.get(name)
-        if not entries:
-            # try with an alias
-            targets = self._aliases.get(name)
-            if not targets:
-                return
-            elif len(targets) == 1:
-                name = targets[0]
-                entries = self._entries_by_name.get(name)
+        Returns:
+            whether the message was sent successfully
+        """
+        channel = entry.channel
+        if channel is None:
+            # Connection was closed since the message was enqueued
+            return False
+
+        try:
+            if address is BROADCAST or address is _BROADCAST_TO_ALL:
+                channel = cast(BroadcastMessageChannel, channel)
+                await channel.broadcast((message, BROADCAST))
+                if self.broadcast_delay > 0 and address is BROADCAST:
+                    await sleep(self.broadcast_delay)
             else:
-                for target in targets:
-                    if target in self._entries_by_name:
-                        await self._send_message_to_single_channel(
-                            message, (target, address)
-                        )
-                return
+                await channel.send((message, address))
+
+            if entry.reset_error_count():
+                self.log.info(
+                    "Connection resumed normal operation",
+                    extra={"id": f"{entry.name}[{index}]"},
+                )
 
-        sent = False
-        is_broadcast = address is BROADCAST
+            return True
 
-        if entries:
-            for index, entry in enumerate(entries):
-                if entry.is_open and entry.can_send:
-                    channel = entry.channel
-                    try:
-                        if is_broadcast:
-                            # This message should be broadcast on this channel;
-                            # let's check if the channel has a broadcast address
-                            if entry.can_broadcast:
-                                channel = cast(BroadcastMessageChannel, channel)
-                                await channel.broadcast((message, BROADCAST))
-                                if self.broadcast_delay > 0:
-                                    await sleep(self.broadcast_delay)
-                                sent = True
-                        else:
-                            assert channel is not None
-                            await channel.send((message, address))
-                            sent = True
-
-                        if sent:
-                            if entry.reset_error_count():
-                                formatted_id = f"{name}[{index}]"
-                                self.log.info(
-                                    "Connection resumed normal operation",
-                                    extra={"id": formatted_id},
-                                )
-
-                    except Exception as ex:
-                        try:
-                            self._handle_tx_error(ex, address, entry, index)
-                        except Exception:
-                            self.log.exception(
-                                "Error while handling error during message transmission",
-                                extra={"id": f"{name}[{index}]"},
-                            )
+        except Exception as ex:
+            try:
+                self._handle_tx_error(ex, address, entry, index)
+            except Exception:
+                self.log.exception(
+                    "Error while handling error during message transmission",
+                    extra={"id": f"{entry.name}[{index}]"},
+                )
 
+            return False
+
+    def _notify_delivery_result(
+        self, delivery: UnicastDelivery, sent: bool | None
+    ) -> None:
+        """Records the outcome of an attempt to send a packet targeted to a
+        single address on one of the connections it was enqueued on.
+
+        The error counter of the target communication channel is updated when
+        all the connections are done with the packet: it is cleared if the
+        packet was sent on at least one connection, and it is incremented if
+        sending failed on all of them.
+
+        Parameters:
+            delivery: the bookkeeping object of the packet
+            sent: whether the packet was sent successfully; ``None`` if it was
+                dropped from a full outbound queue before any attempt to send
+                it
+        """
         if sent:
+            delivery.sent = True
+        elif sent is not None:
+            delivery.failed = True
+
+        delivery.pending -= 1
+        if delivery.pending > 0:
+            return
+
+        name = delivery.name
+        if delivery.sent:
             self._error_counters[name] = 0
-        else:
+        elif delivery.failed:
             self._error_counters[name] += 1
-            error_counter = self._error_counters[name]
-
-            extra = {"id": name, "telemetry": "ignore"}
-
-            if not is_broadcast:
-                if error_counter <= self.error_limit:
-                    if entries:
-                        self.log.warning(
-                            "Dropping outbound message, sending failed on all suitable connections",
-                            extra=extra,
-                        )
-                    else:
-                        self.log.warning(
-                            "Dropping outbound message, no suitable connection",
-                            extra=extra,
-                        )
+            if self._error_counters[name] <= self.error_limit and self.log:
+                self.log.warning(
+                    "Dropping outbound message, sending failed on all suitable connections",
+                    extra={"id": name, "telemetry": "ignore"},
+                )
 
     def _handle_tx_error(
         self,
@@ -685,7 +1178,7 @@ class CommunicationManager(Generic[PacketType, AddressType]):
             return
 
         formatted_id = f"{entry.name}[{index}]"
-        is_broadcast = address is BROADCAST
+        is_broadcast = address is BROADCAST or address is _BROADCAST_TO_ALL
 
         try:
             if is_broadcast:
@@ -47,6 +47,10 @@ from flockwave.server.show import (
     get_light_program_from_show_specification,
     get_trajectory_from_show_specification,
 )
+from flockwave.server.show.kinematics import (
+    CRAZYFLIE_KINEMATIC_LIMITS,
+    check_kinematic_limits_of_show,
+)
 from flockwave.server.types import GCSLogMessageSender
 from flockwave.server.utils import color_to_rgb8_triplet, nop, optional_float
 
@@ -1070,6 +1074,14 @@ class CrazyflieUAV(UAVBase):
         if scale > 1:
             raise RuntimeError("Trajectory covers too large an area for a Crazyflie")
 
+        report = check_kinematic_limits_of_show(
+            show, CRAZYFLIE_KINEMATIC_LIMITS, max_violations=1
+        )
+        if not report.ok:
+            self.driver.log.warning(
+                report.violations[0].describe(), extra={"id": self.id}
+            )
+
         light_program = get_light_program_from_show_specification(show)
         try:
             await self._upload_light_program(light_program)
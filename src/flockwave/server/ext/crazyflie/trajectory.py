@@ -186,10 +186,8 @@ def encode_trajectory(
         result = b"".join(polynomial.encode() for polynomial in polynomials)
     else:
         encoder = SegmentEncoder(scale=1)
-        encoded = encoder.iter_encode_multiple_segments(
-            trajectory.iter_segments(max_length=65)
-        )
-        result = b"".join(encoded) + b"\x00\x00\x00"
+        encoded = encoder.encode_trajectory(trajectory, max_length=65)
+        result = encoded + b"\x00\x00\x00"
 
     return result
 
@@ -197,7 +195,7 @@ def encode_trajectory(
 def to_poly4d_sequence(trajectory: TrajectorySpecification) -> Sequence[Poly4D]:
     result = []
 
-    for segment in trajectory.iter_segments(max_length=65):
+    for segment in trajectory.get_segments(max_length=65):
         if segment.has_control_points:
             raise ValueError("control points are not implemented yet")
 
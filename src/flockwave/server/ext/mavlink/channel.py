@@ -4,12 +4,13 @@ objects to receive and send MAVLink messages.
 
 from __future__ import annotations
 
-from collections import defaultdict
 from collections.abc import Iterator
 from contextlib import contextmanager
 from time import time
 from typing import TYPE_CHECKING, Any, ClassVar, Protocol, cast
+from weakref import WeakKeyDictionary
 
+from crcmod import mkCrcFun as make_crc_function
 from flockwave.channels import (
     BroadcastMessageChannel,
     MessageChannel,
@@ -23,7 +24,11 @@ from flockwave.logger import Logger
 from flockwave.protocols.mavlink.introspection import import_dialect
 
 from .enums import MAVComponent
+from .link_stats import MAVLinkLinkStatistics
+from .parsers import MAVLinkParserTable
+from .prefilter import MAVLinkFrameFilter
 from .signing import MAVLinkSigningConfiguration, SignatureTimestampSynchronizer
+from .workers import defer_parsing
 
 if TYPE_CHECKING:
     from flockwave.protocols.mavlink.types import (
@@ -36,9 +41,15 @@ if TYPE_CHECKING:
 __all__ = (
     "create_mavlink_message_channel",
     "encode_mavlink_message_from_spec",
+    "get_parser_table",
     "use_mavlink_message_channel_factory",
 )
 
+_MAVLINK_V2_MAGIC = 0xFD
+
+_mavlink_crc = make_crc_function(0x11021, initCrc=0xFFFF, rev=True, xorOut=0)
+"""Checksum function of MAVLink frames (CRC-16/MCRF4XX)."""
+
 
 class Channel:
     """Enum class to contain string aliases for the channels where the primary
@@ -78,6 +89,9 @@ def create_mavlink_message_channel(
     system_id: int = 255,
     link_ids: dict[Connection, int] | None = None,
     signing: MAVLinkSigningConfiguration = MAVLinkSigningConfiguration.DISABLED,
+    parse_in_workers: bool = False,
+    frame_filter: MAVLinkFrameFilter | None = None,
+    link_statistics: dict[Connection, MAVLinkLinkStatistics] | None = None,
 ) -> MessageChannel[tuple[MAVLinkMessage, str], Any]:
     """Creates a bidirectional Trio-style channel that reads data from and
     writes data to the given connection, and does the parsing of MAVLink
@@ -96,6 +110,16 @@ def create_mavlink_message_channel(
             unsigned links
         signing: specifies whether outbound messages should be signed and
             inbound messages should be checked for a valid signature
+        parse_in_workers: whether the parsing of inbound messages is deferred
+            to worker processes. When this is ``True``, the channel yields
+            UnparsedMAVLinkData_ objects instead of MAVLink messages.
+        frame_filter: optional filter that drops unwanted MAVLink frames based
+            on their headers before they are parsed. Ignored when the parsing
+            is deferred to worker processes; the workers apply the filter on
+            their own in this case.
+        link_statistics: optional dictionary mapping connections to the
+            statistics objects that should count the packets and bytes sent on
+            them
     """
     if link_ids is not None:
         link_id = link_ids.get(connection, -1)
@@ -105,7 +129,13 @@ def create_mavlink_message_channel(
         link_id = 0
 
     mavlink_factory = _get_mavlink_factory(
-        dialect, system_id, link_id=link_id, signing=signing
+        dialect,
+        system_id,
+        link_id=link_id,
+        signing=signing,
+        parse_in_workers=parse_in_workers,
+        frame_filter=frame_filter,
+        statistics=link_statistics.get(connection) if link_statistics else None,
     )
 
     log_extra = {"id": network_id}
@@ -218,13 +248,32 @@ def encode_mavlink_message_from_spec(
 
     This function is essentially a building block for message channel factories
     where it can be used in the encoder function.
+
+    Message specifications may carry an ``_encoded`` dictionary that caches
+    the encoded frames and the CRC seeds of their message types, keyed by the
+    source system ID, the source component ID and the MAVLink version.
+    Specifications shared between several connections (like RTK correction
+    packets) use it to pack the message only once per key; frames taken from
+    the cache get the sequence number of the MAVLink object and a new
+    checksum. The cache is bypassed when outbound messages are signed.
     """
     type, kwds = spec
 
-    mavlink_version = kwds.pop("_mavlink_version", 2)
+    mavlink_version = kwds.get("_mavlink_version", 2)
+    encoded: dict[tuple[int, int, int], tuple[bytes, int]] | None = kwds.get("_encoded")
 
-    message = _create_mavlink_message(mavlink, type, **kwds)
-    result: bytes = message.pack(mavlink, force_mavlink1=mavlink_version < 2)
+    if encoded is not None and not mavlink.signing.sign_outgoing:
+        key = (mavlink.srcSystem, mavlink.srcComponent, mavlink_version)
+        cached = encoded.get(key)
+        if cached is None:
+            encoded[key] = cached = _pack_mavlink_message(
+                mavlink, type, kwds, mavlink_version
+            )
+            result = cached[0]
+        else:
+            result = _replace_sequence_number(*cached, mavlink.seq)
+    else:
+        result, _ = _pack_mavlink_message(mavlink, type, kwds, mavlink_version)
 
     # Bookkeeping copied from the MAVLink.send() method
     mavlink.seq = (mavlink.seq + 1) % 256
@@ -234,6 +283,17 @@ def encode_mavlink_message_from_spec(
     return result
 
 
+def get_parser_table(connection: Connection) -> MAVLinkParserTable | None:
+    """Returns the table of the MAVLink objects that the message channel of the
+    given datagram-based connection uses for the addresses it talks to.
+
+    Returns:
+        the table of the MAVLink objects, or ``None`` if no datagram-based
+        message channel was created for the connection
+    """
+    return _parser_tables.get(connection)
+
+
 def _create_stream_based_mavlink_message_channel(
     connection: Connection,
     log: Logger,
@@ -330,7 +390,14 @@ def _create_datagram_based_mavlink_message_channel(
     # we have a singleton timestamp synchronizer object at the top level of this
     # module that is then patched into each MAVLink object created here.
 
-    mavlink_by_address = defaultdict(mavlink_factory)
+    #
+    # The MAVLink objects are kept in a bounded table that evicts the objects
+    # of idle addresses so the table does not grow without bounds when the
+    # addresses of the drones change over time.
+
+    mavlink_by_address = _parser_tables[connection] = MAVLinkParserTable(
+        mavlink_factory
+    )
 
     # Connection is a datagram-based connection so we will be receiving
     # full messages along with the addresses they were sent from
@@ -368,6 +435,12 @@ _message_channel_factories: list[MAVLinkMessageChannelFactory] = [
 """List of registered MAVLink message channel factories."""
 
 
+_parser_tables: WeakKeyDictionary[Connection, MAVLinkParserTable] = WeakKeyDictionary()
+"""Tables of the MAVLink objects of the datagram-based connections, keyed by
+the connections themselves.
+"""
+
+
 _signature_timestamp_synchronizer = SignatureTimestampSynchronizer()
 """Object to synchronize MAVLink signing timestamps created between different
 MAVLink networks.
@@ -399,6 +472,44 @@ def _create_mavlink_message(
     return func(*args, **kwds)
 
 
+def _pack_mavlink_message(
+    link: MinimalMAVLinkInterface,
+    type: str,
+    kwds: dict[str, Any],
+    mavlink_version: int,
+) -> tuple[bytes, int]:
+    """Packs a MAVLink message into bytes using the given low-level MAVLink
+    object, ignoring the keyword arguments starting with an underscore.
+
+    Returns:
+        the packed frame and the CRC seed ("CRC extra") of the message type
+    """
+    if "_mavlink_version" in kwds or "_encoded" in kwds:
+        kwds = {key: value for key, value in kwds.items() if key[0] != "_"}
+    message = _create_mavlink_message(link, type, **kwds)
+    return message.pack(link, force_mavlink1=mavlink_version < 2), message.crc_extra
+
+
+def _replace_sequence_number(frame: bytes, crc_extra: int, seq: int) -> bytes:
+    """Returns a copy of an unsigned MAVLink frame with its sequence number
+    replaced, recalculating the checksum of the frame.
+
+    Parameters:
+        frame: the frame to modify
+        crc_extra: the CRC seed of the message type of the frame
+        seq: the new sequence number
+    """
+    index = 4 if frame[0] == _MAVLINK_V2_MAGIC else 2
+    if frame[index] == seq:
+        return frame
+
+    data = bytearray(frame)
+    data[index] = seq
+    crc = _mavlink_crc(bytes((crc_extra,)), _mavlink_crc(bytes(data[1:-2])))
+    data[-2:] = crc.to_bytes(2, "little")
+    return bytes(data)
+
+
 def _get_mavlink_factory(
     dialect: str = "ardupilotmega",
     system_id: int = 255,
@@ -406,6 +517,9 @@ def _get_mavlink_factory(
     *,
     link_id: int = 0,
     signing: MAVLinkSigningConfiguration = MAVLinkSigningConfiguration.DISABLED,
+    parse_in_workers: bool = False,
+    frame_filter: MAVLinkFrameFilter | None = None,
+    statistics: MAVLinkLinkStatistics | None = None,
 ) -> MinimalMAVLinkFactory:
     """Constructs a function that can be called with no arguments and that will
     construct a new MAVLink parser and message factory.
@@ -419,6 +533,17 @@ def _get_mavlink_factory(
             channels.
         signing: whether outbound messages should be signed and inbound messages
             should be rejectd when unsigned
+        parse_in_workers: whether the MAVLink objects created by the factory
+            should defer the parsing of inbound data to worker processes. The
+            `parse_buffer()` method of such objects returns the raw data wrapped
+            in an UnparsedMAVLinkData_ object.
+        frame_filter: optional filter that drops unwanted MAVLink frames based
+            on their headers before they reach the parser of the MAVLink
+            objects created by the factory. Ignored if `parse_in_workers` is
+            ``True``.
+        statistics: optional statistics object that should count the packets
+            and bytes sent by the MAVLink objects created by the factory, and
+            the inbound frames dropped by the frame filter
     """
     module = import_dialect(dialect)
 
@@ -443,6 +568,16 @@ def _get_mavlink_factory(
             )
             _signature_timestamp_synchronizer.patch(link)
 
+        if parse_in_workers:
+            link.parse_buffer = defer_parsing  # type: ignore
+        elif frame_filter is not None:
+            frame_filter.patch(
+                link, statistics.notify_dropped if statistics is not None else None
+            )
+
+        if statistics is not None:
+            statistics.attach(link)
+
         return link
 
     return factory
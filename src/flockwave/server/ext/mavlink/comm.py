@@ -17,6 +17,8 @@ from flockwave.networking import format_socket_address
 from flockwave.server.comm import CommunicationManager
 
 from .channel import create_mavlink_message_channel
+from .link_stats import MAVLinkLinkStatistics
+from .prefilter import MAVLinkFrameFilter
 from .signing import MAVLinkSigningConfiguration
 from .types import MAVLinkMessageSpecification
 
@@ -40,6 +42,9 @@ def create_communication_manager(
     system_id: int = 255,
     signing: MAVLinkSigningConfiguration = MAVLinkSigningConfiguration.DISABLED,
     use_broadcast_rate_limiting: bool = False,
+    parse_in_workers: bool = False,
+    frame_filter: MAVLinkFrameFilter | None = None,
+    link_statistics: dict[Connection, MAVLinkLinkStatistics] | None = None,
 ) -> CommunicationManager[MAVLinkMessageSpecification, Any]:
     """Creates a communication manager instance for a single network managed
     by the extension.
@@ -56,6 +61,14 @@ def create_communication_manager(
             rate limiting problems if there are any. Typically you can leave
             this setting at `False` unless you see lots of lost broadcast
             packets.
+        parse_in_workers: whether the parsing of inbound MAVLink messages is
+            deferred to worker processes. The channels of the communication
+            manager will yield unparsed data in this case.
+        frame_filter: optional filter that drops unwanted inbound MAVLink
+            frames based on their headers before they are parsed
+        link_statistics: optional dictionary mapping connections to the
+            statistics objects that should count the packets and bytes sent on
+            them
     """
     # Create a dictionary to cache link IDs to existing connections so we can
     # keep on using the same link ID for the same connection even if it is
@@ -67,6 +80,9 @@ def create_communication_manager(
         link_ids=link_ids,
         network_id=network_id,
         system_id=system_id,
+        parse_in_workers=parse_in_workers,
+        frame_filter=frame_filter,
+        link_statistics=link_statistics,
     )
 
     if packet_loss > 0:
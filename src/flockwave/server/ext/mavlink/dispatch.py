@@ -0,0 +1,177 @@
+"""Precompiled dispatch table for inbound MAVLink messages.
+
+The inbound message loop of a MAVLink network is the innermost hot loop of the
+server when it manages a large number of MAVLink-based drones. The classes in
+this module allow the loop to look up everything it needs to know about a
+given message type (which components are allowed to send it, whether anyone
+is waiting for it, which handler to call and whether the handler needs the
+UAV that sent the message) with a single dictionary lookup based on the
+numeric message ID, and to keep track of the time spent on processing each
+message type.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from .driver import MAVLinkUAV
+    from .types import MAVLinkMessage
+
+__all__ = (
+    "MAVLinkMessageDispatchEntry",
+    "MAVLinkMessageDispatchTable",
+    "MAVLinkMessageProcessingStatistics",
+)
+
+
+MessageFilter = Callable[["MAVLinkMessage"], bool]
+"""Type specification for predicates that decide whether a MAVLink message
+should be forwarded to its handler.
+"""
+
+NetworkMessageHandler = Callable[..., None]
+"""Type specification for message handlers that are called with a MAVLink
+message and the `connection_id` and `address` keyword arguments.
+"""
+
+UAVMessageHandler = Callable[["MAVLinkUAV", "MAVLinkMessage"], None]
+"""Type specification for message handlers that are called with the UAV that
+sent the message and the message itself.
+"""
+
+
+class MAVLinkMessageProcessingStatistics(NamedTuple):
+    """Processing statistics of a single MAVLink message type."""
+
+    type: str
+    """The type of the MAVLink message."""
+
+    count: int
+    """Number of messages of this type that were processed."""
+
+    elapsed: float
+    """Total time spent on processing messages of this type, in seconds."""
+
+    @property
+    def mean(self) -> float:
+        """Average processing time of a single message, in seconds."""
+        return self.elapsed / self.count if self.count else 0.0
+
+
+class MAVLinkMessageDispatchEntry:
+    """Entry in the dispatch table of a MAVLink network that describes how to
+    process inbound messages of a single MAVLink message type.
+    """
+
+    __slots__ = (
+        "components",
+        "count",
+        "elapsed",
+        "filter",
+        "handler",
+        "matchers",
+        "to_uav",
+        "type",
+    )
+
+    type: str
+    """The type of the MAVLink message."""
+
+    components: frozenset[int]
+    """Set of MAVLink component IDs from which we accept messages of this type."""
+
+    filter: MessageFilter | None
+    """Optional predicate that is called with the message before the handler;
+    the handler is skipped if the predicate returns ``False``.
+    """
+
+    handler: NetworkMessageHandler | UAVMessageHandler | None
+    """Handler to call for messages of this type; ``None`` if the message
+    type needs no handling apart from resolving the futures waiting for it.
+    """
+
+    matchers: list[Any]
+    """List of matchers (system ID, matcher, future) waiting for a message of
+    this type. This list is shared with the matcher registry of the network so
+    it is updated automatically when a new matcher is registered.
+    """
+
+    to_uav: bool
+    """Whether the handler must be called with the UAV that sent the message
+    and the message itself (``True``) or with the message and the connection
+    ID and address as keyword arguments (``False``).
+    """
+
+    count: int
+    """Number of messages that were processed with this entry."""
+
+    elapsed: float
+    """Total time spent on processing messages with this entry, in seconds."""
+
+    def __init__(
+        self,
+        type: str,
+        *,
+        components: Iterable[int],
+        matchers: list[Any],
+        handler: NetworkMessageHandler | UAVMessageHandler | None = None,
+        filter: MessageFilter | None = None,
+        to_uav: bool = False,
+    ):
+        """Constructor.
+
+        Parameters:
+            type: the type of the MAVLink message
+            components: the MAVLink component IDs from which we accept messages
+                of this type
+            matchers: the list of matchers waiting for a message of this type
+            handler: the handler to call for messages of this type
+            filter: optional predicate to call before the handler
+            to_uav: whether the handler expects the UAV that sent the message
+        """
+        self.type = type
+        self.components = frozenset(components)
+        self.filter = filter
+        self.handler = handler
+        self.matchers = matchers
+        self.to_uav = bool(to_uav)
+        self.count = 0
+        self.elapsed = 0.0
+
+    @property
+    def is_idle(self) -> bool:
+        """Returns whether messages of this type can be dropped without further
+        processing because there is no handler for them and nobody is waiting
+        for them.
+        """
+        return self.handler is None and not self.matchers
+
+    @property
+    def statistics(self) -> MAVLinkMessageProcessingStatistics:
+        """Returns the processing statistics of this message type."""
+        return MAVLinkMessageProcessingStatistics(self.type, self.count, self.elapsed)
+
+
+class MAVLinkMessageDispatchTable(dict[int, MAVLinkMessageDispatchEntry]):
+    """Dispatch table of a MAVLink network, mapping numeric MAVLink message IDs
+    to the corresponding dispatch entries.
+
+    Entries are compiled lazily by the inbound message loop the first time a
+    message with a given ID is seen.
+    """
+
+    def get_statistics(self) -> list[MAVLinkMessageProcessingStatistics]:
+        """Returns the processing statistics of all the message types seen so
+        far, sorted by the total processing time in decreasing order.
+        """
+        result = [entry.statistics for entry in self.values() if entry.count]
+        result.sort(key=lambda item: item.elapsed, reverse=True)
+        return result
+
+    def reset_statistics(self) -> None:
+        """Resets the processing statistics of all the message types."""
+        for entry in self.values():
+            entry.count = 0
+            entry.elapsed = 0.0
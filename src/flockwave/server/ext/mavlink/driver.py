@@ -3,15 +3,17 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from collections.abc import AsyncIterator, Awaitable, Callable
-from contextlib import aclosing, asynccontextmanager
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import aclosing, asynccontextmanager, contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from functools import partial
 from logging import Logger
 from math import inf, isfinite
+from pathlib import Path
 from time import monotonic
 from typing import Any, Sequence
+from urllib.parse import quote
 
 from colour import Color
 from deprecated import deprecated
@@ -20,7 +22,17 @@ from flockwave.ext.errors import NoSuchExtension
 from flockwave.gps.time import datetime_to_gps_time_of_week, gps_time_of_week_to_utc
 from flockwave.gps.vectors import GPSCoordinate, VelocityNED
 from flockwave.spec.errors import FlockwaveErrorCode
-from trio import Event, TooSlowError, fail_after, move_on_after, sleep
+from trio import (
+    Event,
+    MemoryReceiveChannel,
+    MemorySendChannel,
+    TooSlowError,
+    WouldBlock,
+    fail_after,
+    move_on_after,
+    open_memory_channel,
+    sleep,
+)
 from trio_util import periodic
 
 from flockwave.server.command_handlers import (
@@ -39,7 +51,7 @@ from flockwave.server.model.commands import (
     ProgressEvents,
     ProgressEventsWithSuspension,
 )
-from flockwave.server.model.devices import DeviceTreeMutator
+from flockwave.server.model.devices import ChannelNode, DeviceTreeMutator, ObjectNode
 from flockwave.server.model.geofence import GeofenceConfigurationRequest, GeofenceStatus
 from flockwave.server.model.gps import GPSFix
 from flockwave.server.model.gps import GPSFixType as OurGPSFixType
@@ -56,12 +68,16 @@ from flockwave.server.model.uav import (
 from flockwave.server.show import (
     ShowSpecification,
     get_altitude_reference_from_show_specification,
-    get_coordinate_system_from_show_specification,
-    get_geofence_configuration_from_show_specification,
-    get_light_program_from_show_specification,
-    get_trajectory_from_show_specification,
 )
-from flockwave.server.show.formats import SkybrushBinaryShowFile
+from flockwave.server.show.cache import ShowFileCache
+from flockwave.server.show.formats import (
+    SkybrushBinaryShowFile,
+    SkybrushBinaryShowFileDigest,
+)
+from flockwave.server.show.kinematics import (
+    MAVLINK_KINEMATIC_LIMITS,
+    check_kinematic_limits_of_show,
+)
 from flockwave.server.types import GCSLogMessageSender
 from flockwave.server.utils import color_to_rgb8_triplet, to_uppercase_string
 from flockwave.server.utils.generic import nop
@@ -90,7 +106,13 @@ from .enums import (
     RebootShutdownConditions,
     SkybrushUserCommand,
 )
-from .ftp import MAVFTP
+from .ftp import (
+    MAVFTP,
+    MAVFTPBurstTransferInProgressError,
+    OperationNotAcknowledgedError,
+)
+from .link_stats import MAVLinkLinkStatistics
+from .liveness import UAVLivenessTracker
 from .log_download import MAVLinkLogDownloader
 from .packets import (
     DroneShowExecutionStage,
@@ -100,6 +122,8 @@ from .packets import (
     create_rc_override_packet,
 )
 from .rssi import RSSIMode, rtcm_counter_to_rssi
+from .rtt import RTTEstimator
+from .show_upload import ShowUploadScheduler
 from .types import MAVLinkMessage, PacketBroadcasterFn, PacketSenderFn, spec
 from .utils import (
     can_communicate_infer_from_heartbeat,
@@ -121,6 +145,14 @@ nan = float("nan")
 """"Not a number" constant, used in some MAVLink messages to indicate a default
 value."""
 
+SHOW_FILE_PATH = "/collmot/show.skyb"
+"""Path of the show file on the UAV."""
+
+SHOW_FILE_FORMAT_VERSION = 2
+"""Version of the Skybrush binary file format that show files are encoded
+into before they are uploaded to the UAV.
+"""
+
 
 def transport_options_to_channel(options: TransportOptions | None) -> str:
     """Converts a transport options object sent by the user to a specific
@@ -182,6 +214,41 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
     destination address in that medium.
     """
 
+    log_download_folder: Path | None = None
+    """Folder where the logs being downloaded from the UAVs are stored until
+    the download completes, so interrupted downloads can be resumed;
+    ``None`` if interrupted downloads have to start from scratch.
+    """
+
+    liveness_tracker: UAVLivenessTracker | None = None
+    """Tracker that is notified about the heartbeats of the UAVs and that marks
+    UAVs as disconnected when their heartbeats cease; ``None`` if the driver
+    is not connected to a tracker.
+    """
+
+    show_file_cache: ShowFileCache
+    """Cache of encoded show files, keyed by the show specification they were
+    encoded from.
+    """
+
+    show_upload_scheduler: ShowUploadScheduler
+    """Scheduler that limits the number of concurrent show uploads, retries
+    failed uploads and keeps track of the progress of the uploads in the fleet.
+    """
+
+    incremental_show_uploads: bool = True
+    """Whether to transfer only the blocks of the show file that have changed
+    since the last show upload to a UAV if the UAV still has the show file
+    from the last upload. Falls back to a full transfer if the firmware does
+    not support modifying the show file in place.
+    """
+
+    skip_unchanged_show_uploads: bool = False
+    """Whether to skip the transfer of the show file to a UAV if the UAV
+    already has a show file with the same CRC32 checksum. The show origin,
+    orientation and geofence are configured even if the transfer is skipped.
+    """
+
     use_bulk_parameter_uploads: bool = False
     """Whether to use bulk parameter uploads instead of individual uploads if
     the autopilot supports bulk uploads.
@@ -204,6 +271,8 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
         self.mandatory_custom_mode = None
         self.run_in_background = None  # type: ignore
         self.send_packet = None  # type: ignore
+        self.show_file_cache = ShowFileCache()
+        self.show_upload_scheduler = ShowUploadScheduler()
 
         self._default_timeout = 2
         self._default_retries = 10
@@ -348,6 +417,12 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
     )
     handle_command_version = create_version_command_handler()
 
+    async def handle_command_linkstats(self, uav: "MAVLinkUAV"):
+        """Returns a summary of the statistics of the MAVLink traffic of the
+        UAV.
+        """
+        return uav.link_statistics.describe()
+
     async def handle_command_mode(self, uav: "MAVLinkUAV", mode: str | None = None):
         """Returns or sets the (custom) flight mode of the UAV.
 
@@ -392,17 +467,22 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
 
     async def handle_command___show_upload(
         self, uav: "MAVLinkUAV", *, show: ShowSpecification
-    ):
+    ) -> ProgressEvents[None]:
         """Handles a drone show upload request for the given UAV.
 
         This is a temporary solution until we figure out something that is
         more sustainable in the long run.
 
+        The upload is coordinated with the uploads to other UAVs by the show
+        upload scheduler of the driver.
+
         Parameters:
             show: the show data for a single UAV
         """
         try:
-            await uav.upload_show(show)
+            async with self.show_upload_scheduler.upload(uav, show) as events:
+                async for event in events:
+                    yield event
         except TooSlowError as ex:
             self.log.error(str(ex), extra={"id": log_id_for_uav(uav)})
             raise
@@ -439,9 +519,12 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
             y: the sixth parameter of the command
             z: the seventh parameter of the command
             frame: the reference frame of the coordinates transmitted in the command
-            timeout: command timeout in seconds; `None` means to use the default
-                timeout for the driver. Retries will be attempted if no response
-                arrives to the command within the given time interval
+            timeout: command timeout in seconds; `None` means to use a timeout
+                derived from the round-trip time of the link to the UAV, backing
+                off exponentially with each retry, but never shorter than the
+                default timeout of the driver because commands are not
+                idempotent. Retries will be attempted if no response arrives to
+                the command within the given time interval
             retries: maximum number of retries for the command (not counting the
                 initial attempt); `None` means to use the default retry count
                 for the driver.
@@ -459,16 +542,20 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
             NotSupportedError: if the command is not supported by the UAV (i.e.
                 we received a response with `MAV_RESULT_UNSUPPORTED`)
         """
-        if timeout is None or timeout <= 0:
-            timeout = self._default_timeout
+        estimator = target.get_rtt_estimator()
+        adaptive = timeout is None or timeout <= 0
+        if adaptive:
+            timeout = max(estimator.timeout, self._default_timeout)
         if retries is None or retries < 0:
             retries = self._default_retries
 
         result = None
+        retransmitted = False
 
         while retries >= 0:
             try:
                 with fail_after(timeout):
+                    sent_at = monotonic()
                     message = spec.command_int(
                         frame=frame,
                         command=command_id,
@@ -488,10 +575,15 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
                         wait_for_response=("COMMAND_ACK", {"command": command_id}),
                     )
                     assert response is not None
+                    if not retransmitted:
+                        estimator.add_sample(monotonic() - sent_at)
                     result = response.result
                     break
             except TooSlowError:
                 retries -= 1
+                retransmitted = True
+                if adaptive:
+                    timeout = max(estimator.back_off(), self._default_timeout)
 
         if result is None:
             raise TooSlowError(f"No response received for command {command_id} in time")
@@ -529,9 +621,12 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
             param5: the fifth parameter of the command
             param6: the sixth parameter of the command
             param7: the seventh parameter of the command
-            timeout: command timeout in seconds; `None` means to use the default
-                timeout for the driver. Retries will be attempted if no response
-                arrives to the command within the given time interval
+            timeout: command timeout in seconds; `None` means to use a timeout
+                derived from the round-trip time of the link to the UAV, backing
+                off exponentially with each retry, but never shorter than the
+                default timeout of the driver because commands are not
+                idempotent. Retries will be attempted if no response arrives to
+                the command within the given time interval
             retries: maximum number of retries for the command (not counting the
                 initial attempt); `None` means to use the default retry count
                 for the driver.
@@ -573,8 +668,10 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
             # Pretend that we have received an ACK
             return True
 
-        if timeout is None or timeout <= 0:
-            timeout = self._default_timeout
+        estimator = target.get_rtt_estimator(channel)
+        adaptive = timeout is None or timeout <= 0
+        if adaptive:
+            timeout = max(estimator.timeout, self._default_timeout)
         if retries is None or retries < 0:
             retries = self._default_retries
 
@@ -584,6 +681,7 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
         while retries >= 0:
             try:
                 with fail_after(timeout):
+                    sent_at = monotonic()
                     message = spec.command_long(
                         command=command_id,
                         param1=param1,
@@ -602,11 +700,15 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
                         channel=channel,
                     )
                     assert response is not None
+                    if not confirmation:
+                        estimator.add_sample(monotonic() - sent_at)
                     result = response.result
                     break
             except TooSlowError:
                 retries -= 1
                 confirmation = 1
+                if adaptive:
+                    timeout = max(estimator.back_off(), self._default_timeout)
 
         if result is None:
             raise TooSlowError(f"No response received for command {command_id} in time")
@@ -708,9 +810,10 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
                 this argument to accept it as a response. The source system of
                 the MAVLink message must also be equal to the system ID of the
                 UAV where this message was sent.
-            timeout: timeout in seconds; `None` means to use the default
-                timeout for the driver. Retries will be attempted if no response
-                arrives to the packet within the given time interval
+            timeout: timeout in seconds; `None` means to use a timeout
+                derived from the round-trip time of the link to the UAV, backing
+                off exponentially with each retry. Retries will be attempted if
+                no response arrives to the packet within the given time interval
             retries: maximum number of retries for the packet (not counting the
                 initial attempt); `None` means to use the default retry count
                 for the driver.
@@ -719,16 +822,20 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
         Raises:
             TooSlowError: if the UAV failed to respond in time
         """
-        if timeout is None or timeout <= 0:
-            timeout = self._default_timeout
+        estimator = target.get_rtt_estimator(channel)
+        adaptive = timeout is None or timeout <= 0
+        if adaptive:
+            timeout = estimator.timeout
         if retries is None or retries < 0:
             retries = self._default_retries
 
         response = None
+        retransmitted = False
 
         while retries >= 0:
             try:
                 with fail_after(timeout):
+                    sent_at = monotonic()
                     if wait_for_response is not None:
                         response = await self.send_packet(
                             spec,
@@ -748,9 +855,13 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
                             "At least one of 'wait_for_response' and 'wait_for_one_of' "
                             "must be provided"
                         )
+                    if not retransmitted:
+                        estimator.add_sample(monotonic() - sent_at)
                     break
             except TooSlowError:
                 retries -= 1
+                retransmitted = True
+                timeout = estimator.back_off() if adaptive else timeout
 
         if response is None:
             raise TooSlowError("No response received for the outbound packet in time")
@@ -789,7 +900,14 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
         except ValueError:
             raise RuntimeError(f"Invalid log ID: {log_id!r}") from None
 
-        async for maybe_log_or_progress in uav.log_downloader.get_log(log_number):
+        folder = self.log_download_folder
+        path = (
+            folder / quote(uav.id, safe="") / f"{log_number}.bin"
+            if folder is not None
+            else None
+        )
+
+        async for maybe_log_or_progress in uav.log_downloader.get_log(log_number, path):
             if maybe_log_or_progress is None:
                 raise RuntimeError(f"No log with the given ID: {log_number!r}")
             else:
@@ -1076,6 +1194,11 @@ class MAVLinkMessageRecord:
 class MAVLinkUAV(UAVBase[MAVLinkDriver]):
     """Subclass for UAVs created by the driver for MAVLink-based drones."""
 
+    link_statistics: MAVLinkLinkStatistics
+    """Rolling statistics of the MAVLink traffic of the drone. Shared with the
+    MAVLink network of the drone once the drone is assigned to a network.
+    """
+
     notify_updated: Callable[[], None]
     send_log_message_to_gcs: GCSLogMessageSender
 
@@ -1115,6 +1238,11 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
     _connection_state: ConnectionState = ConnectionState.DISCONNECTED
     """State of the connection to this drone."""
 
+    _ftp_message_channel: MemorySendChannel[MAVLinkMessage] | None = None
+    """Trio channel on which we feed the MAVFTP burst read currently in
+    progress with FILE_TRANSFER_PROTOCOL messages received from the drone.
+    """
+
     _gps_fix: GPSFix
     """Current GPS fix status and position accuracy of the drone."""
 
@@ -1127,6 +1255,11 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
 
     _last_skybrush_status_info: DroneShowStatus | None = None
 
+    _link_statistics_channels: dict[str, ChannelNode]
+    """Channel nodes in the device tree of the drone where the link
+    statistics are published.
+    """
+
     _log_downloader: MAVLinkLogDownloader | None = None
     """Log downloader for the drone, constructed lazily.
 
@@ -1172,6 +1305,11 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
     the last time. Used to avoid frequent reconfiguration attempts.
     """
 
+    _last_show_file_digest: SkybrushBinaryShowFileDigest | None = None
+    """Digest of the last show file uploaded to the drone; used to transfer only
+    the changed blocks of the show file in the next upload.
+    """
+
     _last_skybrush_status_info: DroneShowStatus | None = None
     """The last Skybrush-specific status packet received from the UAV if it ever
     sent one.
@@ -1188,6 +1326,11 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
     should be calculated.
     """
 
+    _rtt_estimators: dict[str, RTTEstimator]
+    """Round-trip time estimators of the links to the UAV, keyed by the
+    channels they belong to.
+    """
+
     _scheduled_takeoff_authorization_scope: AuthorizationScope = AuthorizationScope.NONE
     """The current authorization scope of the scheduled takeoff of the drone."""
 
@@ -1215,8 +1358,10 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
         self._preflight_status = PreflightCheckInfo()
         self._position = GPSCoordinate()
         self._rssi_mode = RSSIMode.NONE
+        self._rtt_estimators = {}
         self._velocity = VelocityNED()
 
+        self.link_statistics = MAVLinkLinkStatistics()
         self.notify_updated = None  # type: ignore
         self.send_log_message_to_gcs = nop
 
@@ -1402,6 +1547,15 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
         """Returns the status of the geofence of the UAV."""
         return await self._autopilot.get_geofence_status(self)
 
+    def get_rtt_estimator(self, channel: str = Channel.PRIMARY) -> RTTEstimator:
+        """Returns the round-trip time estimator of the link to the UAV on the
+        given channel, creating it if needed.
+        """
+        estimator = self._rtt_estimators.get(channel)
+        if estimator is None:
+            estimator = self._rtt_estimators[channel] = RTTEstimator()
+        return estimator
+
     def get_last_message(self, type: int) -> MAVLinkMessage | None:
         """Returns the last MAVLink message that was observed with the given
         type or `None` if we have not observed such a message yet.
@@ -1720,8 +1874,10 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
                 filename, contents = self._autopilot.prepare_mavftp_parameter_upload(
                     parameters
                 )
+                # The autopilot processes the parameter file as it is being
+                # written so the chunks are sent one by one, in order
                 # TODO(ntamas): handle error code when closing the file
-                await ftp.put(contents, filename, skip_crc_check=True)
+                await ftp.put(contents, filename, skip_crc_check=True, window=1)
 
         else:
             # No support for bulk uploads, or we only have a single parameter,
@@ -1910,6 +2066,10 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
         # Store a copy of the heartbeat
         self._store_message(message)
 
+        tracker = self.driver.liveness_tracker
+        if tracker is not None:
+            tracker.notify_heartbeat(self)
+
         # Determine whether the heartbeat indicates that it makes sense trying
         # to initiate communication with the UAV. Heartbeats that indicate that
         # the UAV is powering down or is completely powered down will not trigger
@@ -1922,6 +2082,8 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
         # communication but just keep track of whatever we've found in the
         # heartbeat
         if not can_communicate:
+            if not self.is_connected:
+                self.notify_reconnection(message)
             self._update_errors_from_inactive_state()
             self.update_status(mode="off", gps=OurGPSFixType.NO_FIX)
             self.notify_updated()
@@ -1972,6 +2134,14 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
 
         self.notify_updated()
 
+    def handle_message_file_transfer_protocol(self, message: MAVLinkMessage):
+        if self._ftp_message_channel:
+            try:
+                self._ftp_message_channel.send_nowait(message)
+            except WouldBlock:
+                # Lost messages of a burst read are requested again anyway
+                pass
+
     def handle_message_global_position_int(self, message: MAVLinkMessage):
         # TODO(ntamas): reboot detection with time_boot_ms
 
@@ -2304,6 +2474,50 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
         """Returns whether the UAV supports scheduled takeoffs."""
         return self._autopilot.supports_scheduled_takeoff
 
+    def update_link_statistics_in_device_tree(self, mutator: DeviceTreeMutator) -> None:
+        """Publishes the current link statistics of the UAV in its device
+        tree.
+
+        Parameters:
+            mutator: the mutator object to use to update the device tree
+        """
+        stats = self.link_statistics
+        channels = self._link_statistics_channels
+        mutator.update(channels["rx_rate"], round(stats.rx_rate, 1))
+        mutator.update(channels["tx_rate"], round(stats.tx_rate, 1))
+        mutator.update(channels["packet_loss"], round(stats.packet_loss * 100, 1))
+        mutator.update(channels["statistics"], stats.json)
+
+    @contextmanager
+    def receive_mavftp_messages(
+        self, max_buffer_size: int = 256
+    ) -> Iterator[MemoryReceiveChannel[MAVLinkMessage]]:
+        """Context manager that opens a channel yielding all the MAVFTP
+        messages received from the UAV while the execution is in the context.
+
+        Only one such channel may be open for a UAV at any given time.
+
+        Parameters:
+            max_buffer_size: maximum number of messages to buffer in the channel;
+                messages arriving when the buffer is full are dropped
+
+        Raises:
+            MAVFTPBurstTransferInProgressError: if another channel is already
+                open for the UAV
+        """
+        if self._ftp_message_channel is not None:
+            raise MAVFTPBurstTransferInProgressError(
+                "Another MAVFTP burst transfer is in progress"
+            )
+
+        tx, rx = open_memory_channel[MAVLinkMessage](max_buffer_size)
+        self._ftp_message_channel = tx
+        try:
+            with tx, rx:
+                yield rx
+        finally:
+            self._ftp_message_channel = None
+
     async def set_authorization_scope(self, scope: AuthorizationScope) -> None:
         """Sets or clears whether the UAV has authorization to perform an
         automatic takeoff.
@@ -2659,24 +2873,56 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
         if not success:
             raise RuntimeError("Failed to trigger camera shutter")
 
-    async def upload_show(self, show: ShowSpecification) -> None:
-        coordinate_system = get_coordinate_system_from_show_specification(show)
+    async def upload_show(
+        self,
+        show: ShowSpecification,
+        *,
+        progress: Callable[[int], None] | None = None,
+    ) -> None:
+        """Uploads a show to the UAV and configures the show origin, orientation
+        and geofence.
+
+        Parameters:
+            show: the show data for this UAV
+            progress: optional function to call with the percentage of the show
+                file transferred so far
+        """
+        # The parts of the show that are shared by the fleet are parsed only
+        # once per upload session, and the per-drone parts only once even if
+        # the upload is retried
+        cache = self.driver.show_upload_scheduler.parse_cache
+
+        coordinate_system = cache.get_coordinate_system(show)
         if coordinate_system.type != "nwu":
             raise RuntimeError("Only NWU coordinate systems are supported")
 
         altitude_reference = get_altitude_reference_from_show_specification(show)
-        light_program = get_light_program_from_show_specification(show)
-        trajectory = get_trajectory_from_show_specification(show)
-        geofence = get_geofence_configuration_from_show_specification(show)
+        geofence = cache.get_geofence_configuration(show)
+
+        # Warn about trajectories that the drone is unlikely to be able to
+        # follow; the show was validated by the client already, this is
+        # only a safety net
+        report = cache.get(
+            "kinematics",
+            show,
+            partial(
+                check_kinematic_limits_of_show,
+                default=MAVLINK_KINEMATIC_LIMITS,
+                max_violations=1,
+            ),
+        )
+        if not report.ok:
+            self.driver.log.warning(
+                report.violations[0].describe(), extra={"id": log_id_for_uav(self)}
+            )
 
-        pyro_program = None
-        rth_plan = None
-        yaw_setpoints = None
+        show_pro_api = None
         pro_keys = set(show.keys()).intersection(["pyro", "rthPlan", "yawControl"])
         if pro_keys:
             try:
-                api = self.driver.app.import_api("show_pro")
-                if not api.loaded:
+                show_pro_api = self.driver.app.import_api("show_pro")
+                if not show_pro_api.loaded:
+                    show_pro_api = None
                     raise RuntimeError(
                         f"Show pro extension is not loaded, neglecting {'and'.join(pro_keys)} from the show"
                     )
@@ -2686,26 +2932,31 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
                 )
             except RuntimeError as ex:
                 self.driver.log.warning(str(ex))
-            else:
-                pyro_program = api.encode_pyro(show)
-                rth_plan = api.encode_rth_plan(show)
-                yaw_setpoints = api.encode_yaw(show)
 
-        async with SkybrushBinaryShowFile.create_in_memory() as show_file:
-            await show_file.add_trajectory(trajectory)
-            await show_file.add_encoded_light_program(light_program)
-            if pyro_program:
-                await show_file.add_encoded_event_list(pyro_program)
-            if rth_plan:
-                await show_file.add_encoded_rth_plan(rth_plan)
-            if yaw_setpoints:
-                await show_file.add_encoded_yaw_setpoints(yaw_setpoints)
-            await show_file.finalize()
-            data = show_file.get_contents()
+        # Encoding the show file is expensive so we reuse the result of an
+        # earlier encoding of the same show specification if possible. The
+        # output of the show_pro extension depends on its version so the
+        # version is part of the cache key; show files of unknown versions of
+        # the extension are not cached at all.
+        encoder = partial(self._encode_show_file, show, show_pro_api)
+        show_pro_version = (
+            self.driver.app.extension_manager.get_version_of_extension("show_pro")
+            if show_pro_api
+            else None
+        )
+        if show_pro_api and show_pro_version is None:
+            data = await encoder()
+        else:
+            data = await self.driver.show_file_cache.get_or_create(
+                show,
+                encoder,
+                version=SHOW_FILE_FORMAT_VERSION,
+                extra=(f"show_pro:{show_pro_version}" if show_pro_api else "",),
+            )
 
-        # Upload show file
+        # Upload show file unless the UAV already has an identical copy
         async with aclosing(MAVFTP.for_uav(self)) as ftp:
-            await ftp.put(data, "/collmot/show.skyb")
+            await self._upload_show_file(ftp, data, progress)
 
         # We give some time for the filesystem to flush caches etc before
         # asking the drone to reload the show file. There were some reports
@@ -2775,6 +3026,126 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
         if self._connection_state is not ConnectionState.CONNECTED:
             await self._connected_event.wait()
 
+    async def _encode_show_file(
+        self, show: ShowSpecification, show_pro_api: Any | None = None
+    ) -> bytes:
+        """Encodes the given show specification into a Skybrush binary show
+        file.
+
+        Parameters:
+            show: the show data for this UAV
+            show_pro_api: the API of the ``show_pro`` extension if the pyro
+                program, the RTH plan and the yaw setpoints should be encoded
+                into the show file; ``None`` otherwise
+
+        Returns:
+            the contents of the encoded show file
+        """
+        cache = self.driver.show_upload_scheduler.parse_cache
+        light_program = cache.get_light_program(show)
+        trajectory = cache.get_trajectory(show)
+
+        pyro_program = None
+        rth_plan = None
+        yaw_setpoints = None
+        if show_pro_api:
+            pyro_program = show_pro_api.encode_pyro(show)
+            rth_plan = show_pro_api.encode_rth_plan(show)
+            yaw_setpoints = show_pro_api.encode_yaw(show)
+
+        async with SkybrushBinaryShowFile.create_in_memory(
+            version=SHOW_FILE_FORMAT_VERSION
+        ) as show_file:
+            await show_file.add_trajectory(trajectory)
+            await show_file.add_encoded_light_program(light_program)
+            if pyro_program:
+                await show_file.add_encoded_event_list(pyro_program)
+            if rth_plan:
+                await show_file.add_encoded_rth_plan(rth_plan)
+            if yaw_setpoints:
+                await show_file.add_encoded_yaw_setpoints(yaw_setpoints)
+            await show_file.finalize()
+            return show_file.get_contents()
+
+    async def _upload_show_file(
+        self,
+        ftp: MAVFTP,
+        data: bytes,
+        progress: Callable[[int], None] | None = None,
+    ) -> None:
+        """Uploads an encoded show file to the UAV.
+
+        The transfer is skipped if the UAV already has an identical show file
+        and the driver is configured to skip unchanged show files. If the UAV
+        still has the show file from the last upload, only the blocks that
+        changed since then are transferred, falling back to a full transfer
+        if the firmware does not support modifying the show file in place.
+
+        Parameters:
+            ftp: the MAVFTP connection to the UAV
+            data: the encoded show file
+            progress: optional function to call with the percentage of the show
+                file transferred so far
+        """
+        previous = self._last_show_file_digest
+        digest = SkybrushBinaryShowFileDigest.from_bytes(data)
+
+        # Forget the last show file; it is uncertain what the UAV has if the
+        # transfer below fails
+        self._last_show_file_digest = None
+
+        incremental = self.driver.incremental_show_uploads and previous is not None
+        if incremental or self.driver.skip_unchanged_show_uploads:
+            try:
+                current_crc = await ftp.crc32(SHOW_FILE_PATH)
+            except OperationNotAcknowledgedError:
+                current_crc = None
+        else:
+            current_crc = None
+
+        if current_crc == digest.crc32 and self.driver.skip_unchanged_show_uploads:
+            self.driver.log.debug(
+                "Show file is unchanged, skipping upload",
+                extra={"id": log_id_for_uav(self)},
+            )
+            self._last_show_file_digest = digest
+            return
+
+        if incremental and previous and current_crc == previous.crc32:
+            ranges = digest.get_changed_ranges(previous)
+            num_bytes = sum(end - start for start, end in ranges)
+            try:
+                await ftp.patch(
+                    data,
+                    SHOW_FILE_PATH,
+                    ranges,
+                    truncate=digest.size < previous.size,
+                    progress=progress,
+                )
+            except RuntimeError as ex:
+                # MAVFTP errors and CRC mismatches are both RuntimeErrors
+                self.driver.log.debug(
+                    f"Partial show file upload failed, uploading the entire file: {ex}",
+                    extra={"id": log_id_for_uav(self)},
+                )
+            else:
+                self.driver.log.debug(
+                    f"Uploaded {num_bytes} changed bytes of the show file",
+                    extra={"id": log_id_for_uav(self)},
+                )
+                self._last_show_file_digest = digest
+                return
+
+        if progress is None:
+            await ftp.put(data, SHOW_FILE_PATH)
+        else:
+            async with ftp.put_gen(data, SHOW_FILE_PATH) as events:
+                async for event in events:
+                    if event.percentage is not None:
+                        progress(event.percentage)
+
+        self._last_show_file_digest = digest
+
     def _configure_data_streams_soon(self, force: bool = False) -> None:
         """Schedules a call to configure the data streams that we want to receive
         from the UAV, as soon as possible.
@@ -3055,6 +3426,15 @@ class MAVLinkUAV(UAVBase[MAVLinkDriver]):
             self._connected_event = Event()
             event.set()
 
+    def _initialize_device_tree_node(self, node: ObjectNode) -> None:
+        device = node.add_device("link")
+        self._link_statistics_channels = {
+            "rx_rate": device.add_channel("rx_rate", type=object, unit="packets/s"),
+            "tx_rate": device.add_channel("tx_rate", type=object, unit="packets/s"),
+            "packet_loss": device.add_channel("packet_loss", type=object, unit="%"),
+            "statistics": device.add_channel("statistics", type=object),
+        }
+
     def _store_message(self, message: MAVLinkMessage) -> None:
         """Stores the given MAVLink message in the dictionary that maps
         MAVLink message types to their most recent versions that were seen
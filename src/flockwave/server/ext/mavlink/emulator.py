@@ -0,0 +1,908 @@
+"""Loopback emulator of a fleet of MAVLink-based drones for load testing.
+
+The emulator runs many emulated drones in a single process, each with its own
+MAVLink system ID, and talks to the Skybrush server over UDP the same way as a
+fleet of drones running ArduPilot with the Skybrush extensions would. It sends
+HEARTBEAT, SYS_STATUS, GLOBAL_POSITION_INT, GPS_RAW_INT and Skybrush-specific
+drone show status packets periodically, and answers parameter requests,
+commands and MAVFTP requests so the show upload path can be exercised as well.
+
+The emulated drones do not fly; they are meant to measure the cost of the
+MAVLink path of the server (parsing, dispatching, UAV status updates and
+UAV-INF messages) with large fleets, without SITL instances.
+
+The server identifies the drones of a MAVLink network by their system IDs,
+so a single MAVLink network can hold at most ``network_size`` drones (250 by
+default), and the system ID of the server itself is never assigned to a
+drone. Larger fleets need multiple MAVLink networks on the server side, each
+with its own connection. The emulator can talk to all of them at once; it
+fills the networks one after another, each with its own block of system IDs.
+
+Usage with the default ``udp-listen://:14550?broadcast_port=14555``
+connection of the MAVLink extension::
+
+    python -m flockwave.server.ext.mavlink.emulator --count 250
+
+Usage with two MAVLink networks listening on ports 14550 and 14560::
+
+    python -m flockwave.server.ext.mavlink.emulator --count 500 \\
+        --server 127.0.0.1:14550 --broadcast-port 14555 \\
+        --server 127.0.0.1:14560 --broadcast-port 14565
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from math import ceil, sqrt
+from pathlib import PurePosixPath
+from struct import Struct
+from time import monotonic, time
+from typing import TYPE_CHECKING, Any
+
+import click
+from flockwave.gps.vectors import (
+    FlatEarthCoordinate,
+    FlatEarthToGPSCoordinateTransformation,
+    GPSCoordinate,
+)
+from flockwave.protocols.mavlink.introspection import import_dialect
+from trio import open_nursery, run, socket
+from trio_util import periodic
+
+from flockwave.server.show.utils import crc32_mavftp
+
+from .autopilots import ArduPilotWithSkybrush
+from .channel import encode_mavlink_message_from_spec
+from .driver import SHOW_FILE_PATH
+from .enums import (
+    GPSFixType,
+    MAVAutopilot,
+    MAVCommand,
+    MAVComponent,
+    MAVModeFlag,
+    MAVParamType,
+    MAVResult,
+    MAVState,
+    MAVSysStatusSensor,
+    MAVType,
+)
+from .ftp import MAVFTPErrorCode, MAVFTPMessage, MAVFTPOpCode
+from .packets import DroneShowStatus, DroneShowStatusFlag
+from .types import (
+    MAVLinkMessage,
+    MAVLinkMessageSpecification,
+    MAVLinkNetworkSpecification,
+    spec,
+)
+
+if TYPE_CHECKING:
+    from flockwave.protocols.mavlink.types import MinimalMAVLinkInterface
+
+__all__ = (
+    "EmulatedDrone",
+    "EmulatedMAVFTPServer",
+    "EmulatedNetwork",
+    "MAVLinkFleetEmulator",
+)
+
+
+_MAVFTP_CHUNK_SIZE = 239
+"""Maximum number of bytes in the data section of a MAVFTP reply."""
+
+_SHOW_CUSTOM_MODE = 127
+"""Custom mode number of the show mode of ArduPilot with Skybrush extensions."""
+
+_AUTOPILOT_VERSION_MESSAGE_ID = 148
+"""MAVLink message ID of the AUTOPILOT_VERSION message."""
+
+_REQUEST_MESSAGE_COMMAND = 512
+"""Numeric ID of the MAV_CMD_REQUEST_MESSAGE MAVLink command."""
+
+_SENSORS = (
+    MAVSysStatusSensor.GYRO_3D
+    | MAVSysStatusSensor.ACCEL_3D
+    | MAVSysStatusSensor.MAG_3D
+    | MAVSysStatusSensor.ABSOLUTE_PRESSURE
+    | MAVSysStatusSensor.GPS
+    | MAVSysStatusSensor.AHRS
+    | MAVSysStatusSensor.BATTERY
+    | MAVSysStatusSensor.PREARM_CHECK
+)
+"""Sensors reported as present, enabled and healthy by the emulated drones."""
+
+_FLIGHT_SW_VERSION = (4 << 24) | (3 << 16) | (7 << 8) | 255
+"""Firmware version reported by the emulated drones (ArduCopter 4.3.7)."""
+
+_TARGETED_REPLY_TYPES = frozenset(("COMMAND_ACK", "FILE_TRANSFER_PROTOCOL"))
+"""Types of the replies that are addressed to the sender of the request."""
+
+_show_status_struct = Struct("<IHBBBBhBB")
+"""Structure of the Skybrush-specific drone show status packets."""
+
+
+class EmulatedMAVFTPServer:
+    """In-memory MAVFTP server of a single emulated drone."""
+
+    directories: set[str]
+    """Paths of the directories on the emulated filesystem."""
+
+    files: dict[str, bytearray]
+    """Contents of the files on the emulated filesystem, keyed by path."""
+
+    _next_session_id: int
+    """The session ID to assign to the next session that is opened."""
+
+    _sessions: dict[int, str]
+    """Paths of the files open in each session, keyed by session ID."""
+
+    def __init__(self):
+        self.directories = {"/"}
+        self.files = {}
+
+        self._next_session_id = 0
+        self._sessions = {}
+
+    def handle(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        """Handles a MAVFTP request and returns the replies to send back.
+
+        Parameters:
+            request: the request to handle
+
+        Returns:
+            the replies to the request; burst reads yield multiple replies, all
+            other requests yield a single ACK or NAK
+        """
+        handler = getattr(self, f"_handle_{MAVFTPOpCode(request.opcode).name}", None)
+        if handler is None:
+            return [_nak(request, MAVFTPErrorCode.UNKNOWN_COMMAND)]
+
+        try:
+            return handler(request)
+        except KeyError:
+            return [_nak(request, MAVFTPErrorCode.FILE_NOT_FOUND)]
+
+    def _handle_BURST_READ_FILE(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        data = self.files[self._sessions[request.session_id]]
+        if request.offset >= len(data):
+            return [_nak(request, MAVFTPErrorCode.EOF)]
+
+        offsets = range(request.offset, len(data), _MAVFTP_CHUNK_SIZE)
+        return [
+            _ack(
+                request,
+                offset=offset,
+                data=bytes(data[offset : offset + _MAVFTP_CHUNK_SIZE]),
+                burst_complete=offset + _MAVFTP_CHUNK_SIZE >= len(data),
+            )
+            for offset in offsets
+        ]
+
+    def _handle_CALC_FILE_CRC32(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        data = self.files[_to_path(request.data)]
+        return [_ack(request, data=crc32_mavftp(bytes(data)).to_bytes(4, "little"))]
+
+    def _handle_CREATE_DIRECTORY(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        path = _to_path(request.data)
+        if path in self.directories:
+            return [_nak(request, MAVFTPErrorCode.FILE_EXISTS)]
+        self.directories.add(path)
+        return [_ack(request)]
+
+    def _handle_CREATE_FILE(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        path = _to_path(request.data)
+        self.files[path] = bytearray()
+        return [_ack(request, session_id=self._open_session(path))]
+
+    def _handle_LIST_DIRECTORY(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        path = PurePosixPath(_to_path(request.data))
+        entries = [
+            f"D{PurePosixPath(name).name}".encode("utf-8")
+            for name in sorted(self.directories)
+            if name != "/" and PurePosixPath(name).parent == path
+        ]
+        entries.extend(
+            f"F{PurePosixPath(name).name}\t{len(data)}".encode("utf-8")
+            for name, data in sorted(self.files.items())
+            if PurePosixPath(name).parent == path
+        )
+
+        if request.offset >= len(entries):
+            return [_nak(request, MAVFTPErrorCode.EOF)]
+
+        result = b""
+        for entry in entries[request.offset :]:
+            if len(result) + len(entry) + 1 > _MAVFTP_CHUNK_SIZE:
+                break
+            result += entry + b"\x00"
+        return [_ack(request, data=result)]
+
+    def _handle_OPEN_FILE_RO(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        path = _to_path(request.data)
+        size = len(self.files[path])
+        return [
+            _ack(
+                request,
+                session_id=self._open_session(path),
+                data=size.to_bytes(4, "little"),
+            )
+        ]
+
+    def _handle_OPEN_FILE_WO(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        path = _to_path(request.data)
+        self.files.setdefault(path, bytearray())
+        return [_ack(request, session_id=self._open_session(path))]
+
+    def _handle_READ_FILE(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        data = self.files[self._sessions[request.session_id]]
+        if request.offset >= len(data):
+            return [_nak(request, MAVFTPErrorCode.EOF)]
+
+        size = min(request.size or _MAVFTP_CHUNK_SIZE, _MAVFTP_CHUNK_SIZE)
+        chunk = bytes(data[request.offset : request.offset + size])
+        return [_ack(request, data=chunk)]
+
+    def _handle_REMOVE_DIRECTORY(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        self.directories.remove(_to_path(request.data))
+        return [_ack(request)]
+
+    def _handle_REMOVE_FILE(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        del self.files[_to_path(request.data)]
+        return [_ack(request)]
+
+    def _handle_RESET_SESSIONS(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        self._sessions.clear()
+        return [_ack(request)]
+
+    def _handle_TERMINATE_SESSION(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        self._sessions.pop(request.session_id, None)
+        return [_ack(request)]
+
+    def _handle_TRUNCATE_FILE(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        del self.files[_to_path(request.data)][request.offset :]
+        return [_ack(request)]
+
+    def _handle_WRITE_FILE(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        data = self.files[self._sessions[request.session_id]]
+        end = request.offset + len(request.data)
+        if len(data) < end:
+            data.extend(bytes(end - len(data)))
+        data[request.offset : end] = request.data
+        return [_ack(request)]
+
+    def _open_session(self, path: str) -> int:
+        session_id = self._next_session_id
+        self._next_session_id = (session_id + 1) % 256
+        self._sessions[session_id] = path
+        return session_id
+
+
+class EmulatedDrone:
+    """A single emulated MAVLink drone running ArduPilot with the Skybrush
+    extensions.
+    """
+
+    armed: bool
+    """Whether the motors of the drone are armed."""
+
+    custom_mode: int
+    """The ArduPilot flight mode of the drone."""
+
+    ftp: EmulatedMAVFTPServer
+    """The MAVFTP server of the drone."""
+
+    params: dict[str, float]
+    """The parameters of the drone."""
+
+    position: GPSCoordinate
+    """The position of the drone."""
+
+    system_id: int
+    """The MAVLink system ID of the drone."""
+
+    _booted_at: float
+    """Timestamp of the boot of the drone, from a monotonic clock."""
+
+    _link: MinimalMAVLinkInterface
+    """Low-level MAVLink object that encodes the packets of the drone and keeps
+    track of its sequence numbers.
+    """
+
+    def __init__(
+        self,
+        system_id: int,
+        position: GPSCoordinate,
+        *,
+        dialect: str = "ardupilotmega",
+    ):
+        """Constructor.
+
+        Parameters:
+            system_id: the MAVLink system ID of the drone
+            position: the position of the drone
+            dialect: the MAVLink dialect to use for encoding packets
+        """
+        self.armed = False
+        self.custom_mode = _SHOW_CUSTOM_MODE
+        self.ftp = EmulatedMAVFTPServer()
+        self.params = {"SYSID_THISMAV": float(system_id)}
+        self.position = position
+        self.system_id = system_id
+
+        self._booted_at = monotonic()
+        self._link = import_dialect(dialect).MAVLink(
+            None, srcSystem=system_id, srcComponent=MAVComponent.AUTOPILOT1
+        )
+
+    def encode(self, spec: MAVLinkMessageSpecification) -> bytes:
+        """Encodes a MAVLink message sent by the drone."""
+        return encode_mavlink_message_from_spec(spec, self._link)
+
+    def get_telemetry(self) -> list[bytes]:
+        """Returns the encoded telemetry packets that the drone sends
+        periodically.
+        """
+        time_boot_ms = int((monotonic() - self._booted_at) * 1000) & 0xFFFFFFFF
+        lat = int(self.position.lat * 1e7)
+        lon = int(self.position.lon * 1e7)
+        amsl_mm = int((self.position.amsl or 0) * 1000)
+        system_status = MAVState.ACTIVE if self.armed else MAVState.STANDBY
+
+        return [
+            self.encode(
+                spec.heartbeat(
+                    type=MAVType.QUADROTOR,
+                    autopilot=MAVAutopilot.ARDUPILOTMEGA,
+                    base_mode=MAVModeFlag.CUSTOM_MODE_ENABLED
+                    | (MAVModeFlag.SAFETY_ARMED if self.armed else 0),
+                    custom_mode=self.custom_mode,
+                    system_status=system_status,
+                    mavlink_version=3,
+                )
+            ),
+            self.encode(
+                spec.sys_status(
+                    onboard_control_sensors_present=_SENSORS,
+                    onboard_control_sensors_enabled=_SENSORS,
+                    onboard_control_sensors_health=_SENSORS,
+                    load=100,
+                    voltage_battery=16200,
+                    current_battery=150 if self.armed else 10,
+                    battery_remaining=90,
+                    drop_rate_comm=0,
+                    errors_comm=0,
+                    errors_count1=0,
+                    errors_count2=0,
+                    errors_count3=0,
+                    errors_count4=0,
+                )
+            ),
+            self.encode(
+                spec.global_position_int(
+                    time_boot_ms=time_boot_ms,
+                    lat=lat,
+                    lon=lon,
+                    alt=amsl_mm,
+                    relative_alt=0,
+                    vx=0,
+                    vy=0,
+                    vz=0,
+                    hdg=0,
+                )
+            ),
+            self.encode(
+                spec.gps_raw_int(
+                    time_usec=int(time() * 1e6),
+                    fix_type=GPSFixType.RTK_FIXED,
+                    lat=lat,
+                    lon=lon,
+                    alt=amsl_mm,
+                    eph=70,
+                    epv=120,
+                    vel=0,
+                    cog=0,
+                    satellites_visible=24,
+                )
+            ),
+            self.encode(self._create_show_status_packet()),
+        ]
+
+    def handle_message(
+        self, message: MAVLinkMessage, *, broadcast: bool = False
+    ) -> list[bytes]:
+        """Handles a MAVLink message sent to the drone.
+
+        Parameters:
+            message: the message to handle
+            broadcast: whether the message was sent to all the drones. Replies
+                to broadcast messages are suppressed.
+
+        Returns:
+            the encoded replies to send back
+        """
+        handler = getattr(self, f"_handle_{message.get_type()}", None)
+        if handler is None:
+            return []
+
+        replies: list[MAVLinkMessageSpecification] = handler(message)
+        if broadcast:
+            return []
+
+        for type, fields in replies:
+            if type not in _TARGETED_REPLY_TYPES:
+                continue
+            fields.setdefault("target_system", message.get_srcSystem())
+            fields.setdefault("target_component", message.get_srcComponent())
+        return [self.encode(reply) for reply in replies]
+
+    def _create_show_status_packet(self) -> MAVLinkMessageSpecification:
+        flags = DroneShowStatusFlag.HAS_ORIGIN | DroneShowStatusFlag.HAS_ORIENTATION
+        if SHOW_FILE_PATH in self.ftp.files:
+            flags |= DroneShowStatusFlag.HAS_SHOW_FILE
+
+        payload = _show_status_struct.pack(
+            0xFFFFFFFF,  # no start time
+            0,  # light color, RGB565
+            flags & 0xFF,
+            0,  # execution stage
+            (24 << 3) | GPSFixType.RTK_FIXED,
+            0,  # flags3
+            0,  # elapsed time
+            0,  # RTCM counters
+            0,
+        )
+        return spec.data16(
+            type=DroneShowStatus.TYPE,
+            len=len(payload),
+            data=payload.ljust(16, b"\x00"),
+        )
+
+    def _create_param_value(self, name: str) -> MAVLinkMessageSpecification:
+        names = sorted(self.params)
+        return spec.param_value(
+            param_id=name.encode("utf-8"),
+            param_value=self.params[name],
+            param_type=MAVParamType.REAL32,
+            param_count=len(names),
+            param_index=names.index(name),
+        )
+
+    def _handle_command(
+        self, command: int, params: list[float]
+    ) -> list[MAVLinkMessageSpecification]:
+        result: list[MAVLinkMessageSpecification] = []
+
+        if command == MAVCommand.COMPONENT_ARM_DISARM:
+            self.armed = params[0] >= 0.5
+        elif command == MAVCommand.DO_SET_MODE:
+            self.custom_mode = int(params[1])
+        elif command == MAVCommand.REQUEST_AUTOPILOT_CAPABILITIES or (
+            command == _REQUEST_MESSAGE_COMMAND
+            and int(params[0]) == _AUTOPILOT_VERSION_MESSAGE_ID
+        ):
+            result.append(self._create_autopilot_version())
+
+        result.insert(0, spec.command_ack(command=command, result=MAVResult.ACCEPTED))
+        return result
+
+    def _create_autopilot_version(self) -> MAVLinkMessageSpecification:
+        return spec.autopilot_version(
+            capabilities=ArduPilotWithSkybrush.CAPABILITY_MASK,
+            flight_sw_version=_FLIGHT_SW_VERSION,
+            middleware_sw_version=0,
+            os_sw_version=0,
+            board_version=0,
+            flight_custom_version=[0] * 8,
+            middleware_custom_version=[0] * 8,
+            os_custom_version=[0] * 8,
+            vendor_id=0,
+            product_id=0,
+            uid=self.system_id,
+        )
+
+    def _handle_COMMAND_INT(self, message: MAVLinkMessage):
+        params = [
+            message.param1,
+            message.param2,
+            message.param3,
+            message.param4,
+            message.x,
+            message.y,
+            message.z,
+        ]
+        return self._handle_command(message.command, params)
+
+    def _handle_COMMAND_LONG(self, message: MAVLinkMessage):
+        params = [
+            message.param1,
+            message.param2,
+            message.param3,
+            message.param4,
+            message.param5,
+            message.param6,
+            message.param7,
+        ]
+        return self._handle_command(message.command, params)
+
+    def _handle_FILE_TRANSFER_PROTOCOL(self, message: MAVLinkMessage):
+        payload = bytes(message.payload)
+        seq_no = payload[0] + (payload[1] << 8)
+        request = MAVFTPMessage.decode(payload)
+        return [
+            spec.file_transfer_protocol(
+                target_network=0,
+                payload=reply.encode((seq_no + index + 1) & 0xFFFF).ljust(251, b"\x00"),
+            )
+            for index, reply in enumerate(self.ftp.handle(request))
+        ]
+
+    def _handle_PARAM_REQUEST_LIST(self, message: MAVLinkMessage):
+        return [self._create_param_value(name) for name in sorted(self.params)]
+
+    def _handle_PARAM_REQUEST_READ(self, message: MAVLinkMessage):
+        name = message.param_id
+        if message.param_index >= 0:
+            names = sorted(self.params)
+            if message.param_index >= len(names):
+                return []
+            name = names[message.param_index]
+
+        # Unknown parameters are created on the fly so the server does not
+        # need to wait for a timeout
+        self.params.setdefault(name, 0.0)
+        return [self._create_param_value(name)]
+
+    def _handle_PARAM_SET(self, message: MAVLinkMessage):
+        self.params[message.param_id] = float(message.param_value)
+        return [self._create_param_value(message.param_id)]
+
+    def _handle_SET_MODE(self, message: MAVLinkMessage):
+        self.custom_mode = message.custom_mode
+        return []
+
+
+class EmulatedNetwork:
+    """Block of emulated drones that talk to a single MAVLink connection of
+    the server. The system IDs of the drones are distinct within the block.
+    """
+
+    drones: dict[int, EmulatedDrone]
+    """The emulated drones, keyed by their MAVLink system IDs."""
+
+    broadcast_port: int
+    """Port on which the drones receive broadcast packets from the server;
+    zero if broadcast packets are not received.
+    """
+
+    server_address: tuple[str, int]
+    """Address of the MAVLink connection of the server."""
+
+    def __init__(self, server_address: tuple[str, int], broadcast_port: int = 0):
+        """Constructor.
+
+        Parameters:
+            server_address: address of the MAVLink connection of the server
+            broadcast_port: port on which the drones receive broadcast
+                packets from the server; zero to ignore broadcasts
+        """
+        self.broadcast_port = int(broadcast_port)
+        self.drones = {}
+        self.server_address = server_address
+
+    def dispatch(self, message: MAVLinkMessage) -> Iterable[tuple[int, bytes]]:
+        """Dispatches a MAVLink message received from the server to the
+        drones it is addressed to.
+
+        Returns:
+            the system IDs of the drones sending replies and the encoded
+            replies themselves
+        """
+        target = getattr(message, "target_system", 0)
+        if target:
+            drone = self.drones.get(target)
+            if drone:
+                for reply in drone.handle_message(message):
+                    yield target, reply
+        else:
+            for drone in self.drones.values():
+                drone.handle_message(message, broadcast=True)
+
+
+class MAVLinkFleetEmulator:
+    """Emulator of a fleet of MAVLink drones that talk to the server over UDP.
+
+    The drones are split into blocks, one for each MAVLink connection of the
+    server that the emulator talks to. Each block uses its own range of
+    system IDs, so a single emulator can feed multiple MAVLink networks of the
+    server when the fleet does not fit into one.
+    """
+
+    networks: list[EmulatedNetwork]
+    """The blocks of emulated drones, one for each MAVLink connection of the
+    server.
+    """
+
+    num_sockets: int
+    """Number of UDP sockets that the drones of each block are distributed
+    across. Each socket appears as a separate address to the server.
+    """
+
+    telemetry_rate: float
+    """Number of telemetry packet bundles sent by each drone per second."""
+
+    _dialect: Any
+    """The MAVLink dialect module used for parsing inbound packets."""
+
+    def __init__(
+        self,
+        count: int,
+        *,
+        server_addresses: Sequence[tuple[str, int]] = (("127.0.0.1", 14550),),
+        broadcast_ports: Sequence[int] = (14555,),
+        first_system_id: int = 1,
+        network_size: int = MAVLinkNetworkSpecification.network_size,
+        gcs_system_id: int = MAVLinkNetworkSpecification.system_id,
+        num_sockets: int = 1,
+        origin: GPSCoordinate | None = None,
+        spacing: float = 5,
+        telemetry_rate: float = 1,
+        dialect: str = "ardupilotmega",
+    ):
+        """Constructor.
+
+        Parameters:
+            count: the number of drones to emulate
+            server_addresses: addresses of the MAVLink connections of the
+                server, each one belonging to a different MAVLink network.
+                The drones are assigned to the connections in blocks; a
+                block is filled before the next one is started.
+            broadcast_ports: ports on which the emulator receives broadcast
+                packets from the server, one for each server address; blocks
+                without a port (or with a zero port) ignore broadcasts
+            first_system_id: MAVLink system ID of the first drone in each
+                block. The remaining drones of the block get consecutive
+                system IDs up to ``network_size``.
+            network_size: the number of system IDs reserved for drones in each
+                MAVLink network of the server
+            gcs_system_id: MAVLink system ID of the server; never assigned to
+                a drone
+            num_sockets: number of UDP sockets that the drones of each block
+                are distributed across
+            origin: position of the first drone; the drones are placed on a
+                square grid towards North and East from here
+            spacing: distance between adjacent drones on the grid, in meters
+            telemetry_rate: number of telemetry packet bundles sent by each
+                drone per second
+            dialect: the MAVLink dialect to use
+
+        Raises:
+            ValueError: if the drones do not fit into the system ID ranges of
+                the given MAVLink connections
+        """
+        if network_size < 1 or network_size > 255:
+            raise ValueError("network_size must be between 1 and 255")
+        if first_system_id < 1 or first_system_id > network_size:
+            raise ValueError(f"first_system_id must be between 1 and {network_size}")
+        if not server_addresses:
+            raise ValueError("at least one server address is needed")
+
+        system_ids = [
+            system_id
+            for system_id in range(first_system_id, network_size + 1)
+            if system_id != gcs_system_id
+        ]
+        capacity = len(system_ids) * len(server_addresses)
+        if count < 1 or count > capacity:
+            raise ValueError(f"count must be between 1 and {capacity}")
+
+        self.num_sockets = max(int(num_sockets), 1)
+        self.telemetry_rate = max(float(telemetry_rate), 0.01)
+
+        self._dialect = import_dialect(dialect)
+
+        origin = origin or GPSCoordinate(lat=47.486305, lon=18.915125, amsl=215)
+        trans = FlatEarthToGPSCoordinateTransformation(origin=origin)
+        columns = ceil(sqrt(count))
+
+        self.networks = [
+            EmulatedNetwork(
+                address,
+                broadcast_ports[index] if index < len(broadcast_ports) else 0,
+            )
+            for index, address in enumerate(server_addresses)
+        ]
+        for index in range(count):
+            block, offset = divmod(index, len(system_ids))
+            system_id = system_ids[offset]
+            row, column = divmod(index, columns)
+            position = trans.to_gps(
+                FlatEarthCoordinate(
+                    x=row * spacing, y=-column * spacing, amsl=origin.amsl
+                )
+            )
+            self.networks[block].drones[system_id] = EmulatedDrone(
+                system_id, position, dialect=dialect
+            )
+
+        # Do not keep blocks without drones
+        self.networks = [network for network in self.networks if network.drones]
+
+    @property
+    def num_drones(self) -> int:
+        """Returns the total number of emulated drones in all blocks."""
+        return sum(len(network.drones) for network in self.networks)
+
+    async def run(self) -> None:
+        """Runs the emulator until cancelled."""
+        async with open_nursery() as nursery:
+            for network in self.networks:
+                nursery.start_soon(self._run_network, network)
+
+    async def _run_network(self, network: EmulatedNetwork) -> None:
+        """Runs a single block of emulated drones until cancelled."""
+        sockets = []
+        for _ in range(self.num_sockets):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            await sock.bind(("0.0.0.0", 0))
+            sockets.append(sock)
+
+        drone_sockets = {
+            system_id: sockets[index % len(sockets)]
+            for index, system_id in enumerate(network.drones)
+        }
+
+        async with open_nursery() as nursery:
+            for sock in sockets:
+                nursery.start_soon(self._receive, network, sock, drone_sockets)
+
+            if network.broadcast_port > 0:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                await sock.bind(("0.0.0.0", network.broadcast_port))
+                nursery.start_soon(self._receive, network, sock, drone_sockets)
+
+            nursery.start_soon(self._send_telemetry, network, drone_sockets)
+
+    async def _receive(
+        self, network: EmulatedNetwork, sock, drone_sockets: dict[int, Any]
+    ) -> None:
+        """Receives packets from the server on the given socket and sends the
+        replies of the drones of the given block.
+        """
+        parser = self._dialect.MAVLink(None)
+        parser.robust_parsing = True
+
+        while True:
+            data, address = await sock.recvfrom(65536)
+            for message in parser.parse_buffer(data) or ():
+                if message.get_type() == "BAD_DATA":
+                    continue
+                for system_id, reply in network.dispatch(message):
+                    await drone_sockets[system_id].sendto(reply, network.server_address)
+
+    async def _send_telemetry(
+        self, network: EmulatedNetwork, drone_sockets: dict[int, Any]
+    ) -> None:
+        """Sends the telemetry packets of the drones of the given block
+        periodically, spreading the drones evenly over the period.
+        """
+        slots = 10
+        drones = list(network.drones.values())
+        groups = [drones[slot::slots] for slot in range(slots)]
+        address = network.server_address
+
+        async for index in _count_periodically(1 / (self.telemetry_rate * slots)):
+            for drone in groups[index % slots]:
+                sock = drone_sockets[drone.system_id]
+                for packet in drone.get_telemetry():
+                    await sock.sendto(packet, address)
+
+
+async def _count_periodically(period: float):
+    index = 0
+    async for _ in periodic(period):
+        yield index
+        index += 1
+
+
+def _ack(request: MAVFTPMessage, **kwds) -> MAVFTPMessage:
+    kwds.setdefault("session_id", request.session_id)
+    kwds.setdefault("offset", request.offset)
+    return MAVFTPMessage(MAVFTPOpCode.ACK, req_opcode=request.opcode, **kwds)
+
+
+def _nak(request: MAVFTPMessage, code: MAVFTPErrorCode) -> MAVFTPMessage:
+    return MAVFTPMessage(
+        MAVFTPOpCode.NAK,
+        session_id=request.session_id,
+        req_opcode=request.opcode,
+        data=bytes([code]),
+    )
+
+
+def _to_path(data: bytes) -> str:
+    path = data.rstrip(b"\x00").decode("utf-8")
+    return str(PurePosixPath("/", path.lstrip("./") or "/"))
+
+
+@click.command()
+@click.option("-n", "--count", default=10, help="Number of drones to emulate")
+@click.option(
+    "--server",
+    "servers",
+    multiple=True,
+    default=("127.0.0.1:14550",),
+    help=(
+        "Address of a MAVLink connection of the server; may be repeated to "
+        "split the drones across multiple MAVLink networks"
+    ),
+)
+@click.option(
+    "--broadcast-port",
+    "broadcast_ports",
+    multiple=True,
+    default=(14555,),
+    type=int,
+    help=(
+        "Port to receive broadcast packets on, one for each server; 0 to "
+        "ignore broadcasts"
+    ),
+)
+@click.option(
+    "--first-id", default=1, help="System ID of the first drone in each network"
+)
+@click.option(
+    "--network-size",
+    default=MAVLinkNetworkSpecification.network_size,
+    help="Number of system IDs reserved for drones in each MAVLink network",
+)
+@click.option(
+    "--sockets", default=1, help="Number of UDP sockets to spread the drones on"
+)
+@click.option("--rate", default=1.0, help="Telemetry rate of each drone, in Hz")
+@click.option("--spacing", default=5.0, help="Distance between the drones, in meters")
+def main(
+    count: int,
+    servers: tuple[str, ...],
+    broadcast_ports: tuple[int, ...],
+    first_id: int,
+    network_size: int,
+    sockets: int,
+    rate: float,
+    spacing: float,
+) -> None:
+    """Emulates a fleet of MAVLink drones for load testing the server."""
+    server_addresses = []
+    for server in servers:
+        host, _, port = server.rpartition(":")
+        server_addresses.append((host or "127.0.0.1", int(port)))
+
+    try:
+        emulator = MAVLinkFleetEmulator(
+            count,
+            server_addresses=server_addresses,
+            broadcast_ports=broadcast_ports,
+            first_system_id=first_id,
+            network_size=network_size,
+            num_sockets=sockets,
+            spacing=spacing,
+            telemetry_rate=rate,
+        )
+    except ValueError as ex:
+        raise click.BadParameter(str(ex)) from None
+
+    for network in emulator.networks:
+        host, port = network.server_address
+        click.echo(
+            f"Emulating {len(network.drones)} drone(s), sending telemetry to "
+            f"{host}:{port}"
+        )
+
+    try:
+        run(emulator.run)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -170,6 +170,7 @@ class MAVMessageType(IntEnum):
     COMMAND_LONG = 76
     COMMAND_ACK = 77
     SET_POSITION_TARGET_GLOBAL_INT = 86
+    RADIO_STATUS = 109
     SCALED_IMU2 = 116
     SCALED_IMU3 = 129
     BATTERY_STATUS = 147
@@ -24,10 +24,12 @@ from .channel import use_mavlink_message_channel_factory
 from .driver import MAVLinkDriver, MAVLinkUAV
 from .errors import InvalidSigningKeyError
 from .led_lights import LEDLightConfigurationSignalDispatcher
+from .liveness import UAVLivenessTracker
 from .network import MAVLinkNetwork
 from .packets import create_rc_override_packet
 from .rssi import RSSIMode
-from .rtk import RTKCorrectionPacketSignalManager
+from .rtk import RTKCorrectionPacketSignalManager, SharedRTKCorrectionPacketEncoder
+from .show_upload import ShowUploadSummary
 from .takeoff import ScheduledTakeoffSignalDispatcher
 from .tasks import check_uavs_alive
 from .time import TimeAxisConfigurationSignalDispatcher
@@ -73,6 +75,16 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
     of the drones in this extension changes.
     """
 
+    _rtk_correction_packet_encoder: SharedRTKCorrectionPacketEncoder
+    """Encoder that encodes each RTK correction packet only once for all the
+    networks managed by this extension.
+    """
+
+    _rtk_correction_packet_signal_manager: RTKCorrectionPacketSignalManager
+    """Object responsible for distributing the encoded RTK correction packets
+    to other extensions that are interested in them.
+    """
+
     _takeoff_signal_dispatcher: ScheduledTakeoffSignalDispatcher
     """Object responsible for dispatching a signal when the takeoff configuration
     of the drones in this extension changes.
@@ -89,6 +101,8 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
         self._led_light_configuration_signal_dispatcher = (
             LEDLightConfigurationSignalDispatcher()
         )
+        self._rtk_correction_packet_encoder = SharedRTKCorrectionPacketEncoder()
+        self._rtk_correction_packet_signal_manager = RTKCorrectionPacketSignalManager()
         self._takeoff_signal_dispatcher = ScheduledTakeoffSignalDispatcher()
         self._time_axis_configuration_signal_dispatcher = (
             TimeAxisConfigurationSignalDispatcher()
@@ -144,22 +158,82 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
         if use_bulk_parameter_uploads:
             self.log.info("Using bulk parameter uploads (experimental)")
 
+        skip_unchanged_show_uploads = bool(
+            configuration.get("skip_unchanged_show_uploads", False)
+        )
+        if skip_unchanged_show_uploads:
+            self.log.info("Show files will be uploaded only if they have changed")
+
+        incremental_show_uploads = bool(
+            configuration.get("incremental_show_uploads", True)
+        )
+
+        max_concurrent_show_uploads = optional_int(
+            configuration.get("max_concurrent_show_uploads", 20)
+        )
+        if max_concurrent_show_uploads is None or max_concurrent_show_uploads < 0:
+            max_concurrent_show_uploads = 0
+
+        cache_show_files_on_disk = bool(
+            configuration.get("cache_show_files_on_disk", True)
+        )
+        driver.show_file_cache.folder = (
+            self.get_cache_dir() / "shows" if cache_show_files_on_disk else None
+        )
+        driver.log_download_folder = self.get_cache_dir() / "logs"
+
+        prune_disconnected_uavs_after = float(
+            configuration.get("prune_disconnected_uavs_after", 0) or 0
+        )
+        if prune_disconnected_uavs_after > 0:
+            self.log.info(
+                f"UAVs silent for {prune_disconnected_uavs_after:g} seconds "
+                "will be removed"
+            )
+
+        show_upload_scheduler = driver.show_upload_scheduler
+        show_upload_scheduler.log = self.log
+        show_upload_scheduler.max_concurrent_uploads = max_concurrent_show_uploads
+
         driver.assume_data_streams_configured = assume_data_streams_configured
         driver.autopilot_factory = autopilot_factory
         driver.broadcast_packet = self._broadcast_packet
         driver.create_device_tree_mutator = self.create_device_tree_mutation_context
+        driver.liveness_tracker = UAVLivenessTracker(
+            prune_after=prune_disconnected_uavs_after, on_prune=self._prune_uav
+        )
+        driver.incremental_show_uploads = incremental_show_uploads
         driver.log = self.log
         driver.mandatory_custom_mode = optional_int(configuration.get("custom_mode"))
         driver.run_in_background = self.run_in_background
         driver.send_packet = self._send_packet
+        driver.skip_unchanged_show_uploads = skip_unchanged_show_uploads
         driver.use_bulk_parameter_uploads = use_bulk_parameter_uploads
 
     def exports(self) -> dict[str, Any]:
         return {
             "find_network_by_id": self._find_network_by_id,
+            "get_link_statistics": self._get_link_statistics,
+            "get_show_upload_summary": self._get_show_upload_summary,
             "use_mavlink_message_channel_factory": use_mavlink_message_channel_factory,
         }
 
+    def _get_link_statistics(self) -> dict[str, Any]:
+        """Returns a summary of the rolling statistics of the connections of
+        each MAVLink network managed by the extension and of the MAVLink
+        systems seen in them, keyed by network ID.
+        """
+        return {
+            network_id: network.get_link_statistics().json
+            for network_id, network in self._networks.items()
+        }
+
+    def _get_show_upload_summary(self) -> ShowUploadSummary | None:
+        """Returns a summary of the show uploads that are in progress or that
+        have finished since the last batch of uploads started.
+        """
+        return self._driver.show_upload_scheduler.summary if self._driver else None
+
     def _find_network_by_id(self, network_id: str) -> MAVLinkNetwork | None:
         """Finds a MAVLink network managed by this extension by its ID.
 
@@ -199,10 +273,6 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
             "use_connection": app.connection_registry.use,
         }
 
-        # Create an object responsible for distributing RTK correction packets
-        # to other extensions that are interested in them
-        rtk_correction_packet_signal_manager = RTKCorrectionPacketSignalManager()
-
         # Create a cleanup context and run the extension
         with ExitStack() as stack:
             stack.enter_context(overridden(self, _uavs=uavs, _networks=networks))
@@ -225,7 +295,7 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
             # so it knows which signal to dispatch when a new RTK correction
             # packet is to be forwarded to other extensions
             stack.enter_context(
-                rtk_correction_packet_signal_manager.use(signals, log=self.log)
+                self._rtk_correction_packet_signal_manager.use(signals, log=self.log)
             )
 
             # Set up the takeoff signal dispatcher so it dispatches a signal whenever
@@ -274,6 +344,18 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
             # this network.
             self._update_show_light_configuration_in_networks()
 
+            # Let the show extension validate the shows of each batch of show
+            # uploads before the transfers start
+            if self._driver is not None:
+                stack.enter_context(
+                    overridden(
+                        self._driver.show_upload_scheduler,
+                        validator=app.import_api(
+                            "show", ShowExtensionAPI
+                        ).get_show_validator(),
+                    )
+                )
+
             try:
                 async with self.use_nursery() as nursery:
                     # Create one task for each network
@@ -289,12 +371,18 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
                         self._time_axis_configuration_signal_dispatcher.run
                     )
 
-                    # Create an additional task that periodically checks whether the UAVs
-                    # registered in the extension are still alive, and that sends
-                    # status summary signals to interested consumers (typically
-                    # the sidekick extension)
+                    # Create an additional task that marks UAVs as disconnected
+                    # when their heartbeats cease, and that sends status summary
+                    # signals to interested consumers (typically the sidekick
+                    # extension)
                     nursery.start_soon(
-                        check_uavs_alive, uavs, status_summary_signal, self.log
+                        partial(
+                            check_uavs_alive,
+                            uavs,
+                            status_summary_signal,
+                            self.log,
+                            tracker=self._driver.liveness_tracker,
+                        )
                     )
             finally:
                 for uav in uavs:
@@ -440,13 +528,19 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
             packet: the raw RTK correction packet to forward to the drones in
                 all the networks belonging to the extension
         """
-        if not self._networks:
+        # Encode the packet only once; the encoded MAVLink frames are shared
+        # between all the networks and connections, and with the other
+        # extensions that are interested in them
+        messages = self._rtk_correction_packet_encoder.encode(packet)
+        if not messages:
             return
 
+        self._rtk_correction_packet_signal_manager.send(messages)
+
         # Forward the packet to all networks
         for name, network in self._networks.items():
             try:
-                network.enqueue_rtk_correction_packet(packet)
+                network.enqueue_rtk_correction_messages(messages)
             except Exception:
                 if self.log:
                     self.log.warning(
@@ -507,6 +601,26 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
         # Send the configuration to all the networks
         self._update_show_time_axis_configuration_in_networks(config)
 
+    def _prune_uav(self, uav: MAVLinkUAV) -> None:
+        """Removes a UAV that has not sent a heartbeat for a long time from the
+        object registry of the application and from its MAVLink network.
+        """
+        assert self.app is not None
+
+        if self.log:
+            self.log.info(
+                f"Removing UAV {uav.id} after a long period of inactivity",
+                extra={"id": uav.network_id},
+            )
+
+        self.app.object_registry.remove(uav)
+        if self._uavs is not None and uav in self._uavs:
+            self._uavs.remove(uav)
+
+        network = self._networks.get(uav.network_id)
+        if network is not None:
+            network.remove_uav(uav)
+
     def _register_uav(self, uav: UAV) -> None:
         """Registers a new UAV object in the object registry of the application
         in a manner that ensures that the UAV is unregistered when the extension
@@ -2,17 +2,32 @@
 
 from __future__ import annotations
 
-from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Iterable, Iterator
-from contextlib import aclosing, asynccontextmanager
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+)
+from contextlib import (
+    AbstractContextManager,
+    ExitStack,
+    aclosing,
+    asynccontextmanager,
+    contextmanager,
+)
 from dataclasses import dataclass
 from enum import Enum, IntEnum
 from errno import ENOSPC
 from functools import partial
 from io import BytesIO
 from itertools import cycle, islice
+from math import inf
 from pathlib import PurePosixPath
 from random import randint
 from struct import Struct
+from time import monotonic
 from typing import TYPE_CHECKING, Protocol
 
 from flockwave.concurrency import (
@@ -22,11 +37,16 @@ from flockwave.concurrency import (
 )
 from trio import (
     BrokenResourceError,
+    Semaphore,
     TooSlowError,
     as_safe_channel,
+    current_time,
     move_on_after,
+    open_memory_channel,
+    open_nursery,
     wrap_file,
 )
+from trio.abc import ReceiveChannel, SendChannel
 
 from flockwave.server.model.commands import Progress
 from flockwave.server.show.utils import crc32_mavftp as crc32
@@ -35,8 +55,9 @@ from .types import MAVLinkMessage, UAVBoundPacketSenderFn, spec
 
 if TYPE_CHECKING:
     from .driver import MAVLinkUAV
+    from .rtt import RTTEstimator
 
-__all__ = ("MAVFTP",)
+__all__ = ("MAVFTP", "MAVFTPBurstTransferInProgressError")
 
 
 FTPPath = str | bytes
@@ -45,6 +66,31 @@ FTPPath = str | bytes
 _MAVFTP_CHUNK_SIZE = 239
 """Maximum number of bytes allowed in a single read/write operation."""
 
+_MAVFTP_WRITE_WINDOW = 5
+"""Default number of write requests that may be in flight at the same time
+during an upload.
+"""
+
+_MAVFTP_BURST_TIMEOUT = 1.0
+"""Number of seconds to wait for the next packet of a burst read before
+requesting the missing data again or, at the end of a download, before
+assuming that the drone has stopped streaming the file.
+"""
+
+_MAVFTP_BURST_MAX_RETRIES = 10
+"""Number of consecutive burst read requests that may fail to make progress
+before the download is aborted.
+"""
+
+MAVFTPMessageReceiver = Callable[
+    [], AbstractContextManager[ReceiveChannel[MAVLinkMessage]]
+]
+"""Type specification for functions that open a channel that yields all the
+FILE_TRANSFER_PROTOCOL messages received from the drone while the context is
+active. Entering the context must raise `MAVFTPBurstTransferInProgressError`
+if another channel is already open for the same drone.
+"""
+
 
 class MAVFTPOpCode(IntEnum):
     """Opcodes for the MAVFTP sub-protocol of MAVLink."""
@@ -185,6 +231,15 @@ class OperationNotAcknowledgedError(MAVFTPError):
         self.opcode = operation
 
 
+class MAVFTPBurstTransferInProgressError(MAVFTPError):
+    """Exception raised when a channel for the replies of a burst read is
+    requested while another burst read is already in progress with the same
+    drone.
+    """
+
+    pass
+
+
 class SequenceNumberMismatch(MAVFTPError):
     """Exception raised by MAVFTPMessage.decode() if the sequence ID of the
     received packet does not match the one we expect.
@@ -202,6 +257,8 @@ class MAVFTPMessage:
     offset: int = 0
     data: bytes = b""
     size: int | None = None
+    req_opcode: int = 0
+    burst_complete: bool = False
 
     @classmethod
     def decode(cls, payload: bytes, expected_seq_no: int | None = None):
@@ -236,6 +293,8 @@ class MAVFTPMessage:
                 offset=offset,
                 data=bytes(data[:size]),
                 size=size,
+                req_opcode=req_opcode,
+                burst_complete=bool(burst_complete),
             )
         else:
             raise SequenceNumberMismatch()
@@ -258,6 +317,30 @@ class MAVFTPMessage:
             payload[0] + (payload[1] << 8) == seq_no
         )
 
+    @classmethod
+    def matches_reply_to(
+        cls, seq_no: int, opcode: int, message: MAVLinkMessage
+    ) -> bool:
+        """Returns whether the payload of the given raw MAVLink
+        FILE_TRANSFER_PROTOCOL message is a reply with the given sequence
+        number to a request with the given opcode.
+
+        Checking the opcode of the request prevents the replies of a burst
+        read from being mistaken for the reply to another request, even if
+        their sequence numbers happen to be the same.
+
+        Parameters:
+            seq_no: the sequence number to expect in the payload
+            opcode: the opcode of the request that the message should reply to
+            message: the message to decode
+
+        Returns:
+            whether the message is a MAVLink FILE_TRANSFER_PROTOCOL message with
+            the given expected sequence number that replies to a request with
+            the given opcode
+        """
+        return cls.matches_sequence_no(seq_no, message) and message.payload[5] == opcode
+
     def encode(self, seq_no: int) -> bytes:
         """Encodes the message in a format that is suitable to be sent over a
         MAVLink connection, given its MAVFTP sequence number.
@@ -270,7 +353,13 @@ class MAVFTPMessage:
         size = self.size if self.size is not None else len(self.data)
         return (
             _MAVFTPMessageStruct.pack(
-                seq_no, self.session_id, self.opcode, size, 0, 0, self.offset
+                seq_no,
+                self.session_id,
+                self.opcode,
+                size,
+                self.req_opcode,
+                int(self.burst_complete),
+                self.offset,
             )
             + self.data
         )
@@ -421,6 +510,41 @@ class MAVFTPSession:
         await self._sender(message)
         return len(data)
 
+    async def write_many(
+        self,
+        chunks: Iterable[tuple[int, bytes]],
+        acked: SendChannel[int],
+        *,
+        window: int = _MAVFTP_WRITE_WINDOW,
+    ) -> None:
+        """Writes multiple chunks of data to the session, keeping at most a
+        given number of write requests in flight at the same time.
+
+        Each write request is retried on its own until it is acknowledged, so
+        a lost request or reply only delays the chunk it belongs to while the
+        remaining chunks keep on flowing.
+
+        Parameters:
+            chunks: the offsets and contents of the chunks to write
+            acked: channel on which the number of bytes in each chunk is sent
+                when the chunk is acknowledged. The channel is closed when all
+                the chunks were written.
+            window: maximum number of write requests in flight
+        """
+        self._ensure_open()
+        semaphore = Semaphore(max(int(window), 1))
+
+        async def write_chunk(offset: int, chunk: bytes) -> None:
+            try:
+                await acked.send(await self.write(chunk, offset))
+            finally:
+                semaphore.release()
+
+        async with acked, open_nursery() as nursery:
+            for offset, chunk in chunks:
+                await semaphore.acquire()
+                nursery.start_soon(write_chunk, offset, chunk)
+
 
 class MAVFTP:
     """A single MAVFTP connection to a PixHawk over a MAVLink connection."""
@@ -431,11 +555,22 @@ class MAVFTP:
     _closing: bool
     """Stores whether the MAVFTP connection is being closed."""
 
+    _receiver: MAVFTPMessageReceiver | None
+    """A function that opens a channel yielding all the MAVFTP messages received
+    from the drone; used for burst reads. ``None`` if burst reads are not
+    supported by the connection.
+    """
+
     _retry_policy: RetryPolicy
     """The retry policy to use for sending MAVFTP messages within the context of
     this connection.
     """
 
+    _rtt_estimator: RTTEstimator | None
+    """Round-trip time estimator of the link to the drone; ``None`` if the
+    round-trip time is not being estimated.
+    """
+
     _sender: UAVBoundPacketSenderFn
     """A function that can be called to send a MAVFTP message associated to
     this MAVFTP object.
@@ -448,12 +583,36 @@ class MAVFTP:
     def for_uav(cls, uav: MAVLinkUAV):
         """Constructs a MAVFTP connection object to the given UAV."""
         sender: UAVBoundPacketSenderFn = partial(uav.driver.send_packet, target=uav)  # ty:ignore[invalid-assignment]
-        return cls(sender)
+        return cls(
+            sender,
+            receiver=uav.receive_mavftp_messages,
+            rtt_estimator=uav.get_rtt_estimator(),
+        )
+
+    def __init__(
+        self,
+        sender: UAVBoundPacketSenderFn,
+        *,
+        receiver: MAVFTPMessageReceiver | None = None,
+        rtt_estimator: RTTEstimator | None = None,
+    ):
+        """Constructor.
 
-    def __init__(self, sender: UAVBoundPacketSenderFn):
-        """Constructor."""
+        Parameters:
+            sender: function that can be called to send a MAVLink message to
+                the drone and optionally wait for a reply
+            receiver: function that opens a channel yielding all the MAVFTP
+                messages received from the drone. Required for burst reads;
+                downloads fall back to reading the file chunk by chunk if it
+                is not provided.
+            rtt_estimator: optional round-trip time estimator of the link to
+                the drone that is updated from the replies to the requests
+                that were not retransmitted
+        """
         self._closed = False
         self._closing = False
+        self._receiver = receiver
+        self._rtt_estimator = rtt_estimator
 
         self._retry_policy = AdaptiveExponentialBackoffPolicy(
             max_retries=600,
@@ -497,7 +656,9 @@ class MAVFTP:
         reply = await self._send_and_wait(message)
         return int.from_bytes(reply.data, byteorder="little")
 
-    async def get(self, remote_path: FTPPath, fp=None) -> bytes | None:
+    async def get(
+        self, remote_path: FTPPath, fp=None, *, burst: bool = True
+    ) -> bytes | None:
         """Downloads a file at a given remote path.
 
         Parameters:
@@ -505,6 +666,9 @@ class MAVFTP:
             fp: optional async file-like object to write the downloaded file to.
                 When it is None, the file will be downloaded into memory and
                 returned
+            burst: whether to use burst reads if the connection supports them.
+                Burst reads let the drone stream the file without waiting for
+                a separate request for each chunk.
 
         Returns:
             the contents of the downloaded file if `fp` was not `None`, `None`
@@ -514,13 +678,27 @@ class MAVFTP:
 
         if fp is None:
             buffer = BytesIO()
-            await self.get(remote_path, wrap_file(buffer))
+            await self.get(remote_path, wrap_file(buffer), burst=burst)
             return buffer.getvalue()
 
         message = MAVFTPMessage(MAVFTPOpCode.OPEN_FILE_RO, data=remote_path)
         reply = await self._send_and_wait(message)
 
+        # The reply to OPEN_FILE_RO contains the size of the file; we need it
+        # for burst reads to know when we are done
+        size = (
+            int.from_bytes(reply.data[:4], byteorder="little")
+            if len(reply.data) >= 4
+            else None
+        )
+
         async with self._open_session(reply.session_id) as session:
+            if burst and size is not None:
+                with self._open_burst_receiver() as messages:
+                    if messages is not None:
+                        await self._read_burst(reply.session_id, fp, size, messages)
+                        return
+
             offset = 0
             got_eof = False
             while not got_eof:
@@ -596,6 +774,7 @@ class MAVFTP:
         *,
         parents: bool = False,
         skip_crc_check: bool = False,
+        window: int = _MAVFTP_WRITE_WINDOW,
     ) -> None:
         """Uploads a file at a local path to the given remote path.
 
@@ -608,9 +787,16 @@ class MAVFTP:
                 This is useful when uploading "virtual files" like ArduPilot's
                 `@PARAM/param.pck` where the content of the file after the
                 upload is not expected to match the uploaded content.
+            window: maximum number of write requests in flight at the same
+                time; 1 means that each chunk is acknowledged before the next
+                one is sent
         """
         async with self.put_gen(
-            data, remote_path, parents=parents, skip_crc_check=skip_crc_check
+            data,
+            remote_path,
+            parents=parents,
+            skip_crc_check=skip_crc_check,
+            window=window,
         ) as progress:
             # This is a generator, so we need to consume it to actually
             # upload the file
@@ -625,6 +811,7 @@ class MAVFTP:
         *,
         parents: bool = False,
         skip_crc_check: bool = False,
+        window: int = _MAVFTP_WRITE_WINDOW,
     ) -> AsyncGenerator[Progress[None], None]:
         """Uploads a file at a local path to the given remote path.
 
@@ -641,11 +828,13 @@ class MAVFTP:
                 This is useful when uploading "virtual files" like ArduPilot's
                 `@PARAM/param.pck` where the content of the file after the
                 upload is not expected to match the uploaded content.
+            window: maximum number of write requests in flight at the same
+                time; 1 means that each chunk is acknowledged before the next
+                one is sent
 
         Yields:
             progress updates about the state of the upload process
         """
-        fp = BytesIO(data)
         total_length = len(data)
 
         remote_path = self._resolve(remote_path)
@@ -658,26 +847,29 @@ class MAVFTP:
         message = MAVFTPMessage(MAVFTPOpCode.CREATE_FILE, data=remote_path)
         reply = await self._send_and_wait(message)
 
-        expected_crc = 0
-        offset = 0
+        expected_crc = crc32(data)
+        chunks = [
+            (offset, data[offset : offset + _MAVFTP_CHUNK_SIZE])
+            for offset in range(0, total_length, _MAVFTP_CHUNK_SIZE)
+        ]
+        written = 0
 
         yield Progress(percentage=0)
         previous_progress = 0
 
         async with self._open_session(reply.session_id) as session:
-            while True:
-                data = fp.read(_MAVFTP_CHUNK_SIZE)
-                if data:
-                    offset += await session.write(data=data, offset=offset)
-                    expected_crc = crc32(data, expected_crc)
-                    progress = offset * 100 // total_length
+            acked_tx, acked_rx = open_memory_channel[int](inf)
+            async with acked_rx, open_nursery() as nursery:
+                nursery.start_soon(
+                    partial(session.write_many, chunks, acked_tx, window=window)
+                )
+                async for length in acked_rx:
+                    written += length
+                    progress = written * 100 // total_length
                     if progress > previous_progress:
                         yield Progress(percentage=progress)
                         previous_progress = progress
 
-                else:
-                    break
-
         if not skip_crc_check:
             observed_crc = await self.crc32(remote_path)
             if observed_crc != expected_crc:
@@ -689,6 +881,81 @@ class MAVFTP:
 
         yield Progress(percentage=100)
 
+    async def patch(
+        self,
+        data: bytes,
+        remote_path: FTPPath,
+        ranges: Iterable[tuple[int, int]],
+        *,
+        truncate: bool = False,
+        window: int = _MAVFTP_WRITE_WINDOW,
+        progress: Callable[[int], None] | None = None,
+    ) -> None:
+        """Turns an existing remote file into the given data by writing only
+        the given byte ranges of the data into the file.
+
+        The caller is responsible for ensuring that the remote file differs
+        from the data only in the given ranges and in its length. The CRC32
+        checksum of the remote file is checked at the end.
+
+        Parameters:
+            data: the desired contents of the remote file
+            remote_path: the path of the remote file
+            ranges: the start and end offsets of the byte ranges of the data
+                to write into the remote file
+            truncate: whether to truncate the remote file to the length of
+                the data; needed when the remote file may be longer than the
+                data
+            window: maximum number of write requests in flight at the same
+                time
+            progress: optional function to call with the percentage of the
+                bytes in the given ranges written so far
+
+        Raises:
+            OperationNotAcknowledgedError: if the remote file cannot be opened
+                for writing or truncated
+            RuntimeError: if the CRC32 checksum of the remote file does not
+                match the checksum of the data at the end
+        """
+        remote_path = self._resolve(remote_path)
+
+        chunks = [
+            (offset, data[offset : min(offset + _MAVFTP_CHUNK_SIZE, end)])
+            for start, end in ranges
+            for offset in range(start, end, _MAVFTP_CHUNK_SIZE)
+        ]
+        total_length = sum(len(chunk) for _, chunk in chunks)
+        written = 0
+
+        message = MAVFTPMessage(MAVFTPOpCode.OPEN_FILE_WO, data=remote_path)
+        reply = await self._send_and_wait(message)
+
+        async with self._open_session(reply.session_id) as session:
+            acked_tx, acked_rx = open_memory_channel[int](inf)
+            async with acked_rx, open_nursery() as nursery:
+                nursery.start_soon(
+                    partial(session.write_many, chunks, acked_tx, window=window)
+                )
+                async for length in acked_rx:
+                    written += length
+                    if progress is not None:
+                        progress(written * 100 // total_length)
+
+        if truncate:
+            message = MAVFTPMessage(
+                MAVFTPOpCode.TRUNCATE_FILE, offset=len(data), data=remote_path
+            )
+            await self._send_and_wait(message)
+
+        expected_crc = crc32(data)
+        observed_crc = await self.crc32(remote_path)
+        if observed_crc != expected_crc:
+            raise RuntimeError(
+                "CRC mismatch, expected {0:08X}, got {1:08X}".format(
+                    expected_crc, observed_crc
+                )
+            )
+
     async def rm(self, path: FTPPath) -> None:
         """Removes a file at the given path in the MAVFTP session."""
         path = self._resolve(path)
@@ -704,6 +971,142 @@ class MAVFTP:
         async with aclosing(session):
             yield session
 
+    @contextmanager
+    def _open_burst_receiver(self) -> Iterator[ReceiveChannel[MAVLinkMessage] | None]:
+        """Context manager that opens a channel yielding the MAVFTP messages
+        received from the drone for a burst read.
+
+        Yields ``None`` if burst reads are not supported by the connection or
+        if another burst read is already in progress with the same drone; the
+        caller should read the file chunk by chunk in this case.
+        """
+        with ExitStack() as stack:
+            messages = None
+            if self._receiver is not None:
+                try:
+                    messages = stack.enter_context(self._receiver())
+                except MAVFTPBurstTransferInProgressError:
+                    pass
+            yield messages
+
+    async def _read_burst(
+        self,
+        session_id: int,
+        fp,
+        size: int,
+        messages: ReceiveChannel[MAVLinkMessage],
+    ) -> None:
+        """Downloads the contents of a file that is open in the given session
+        using burst reads, and writes it into the given async file-like object.
+
+        The drone streams consecutive chunks of the file in response to a
+        single burst read request. Chunks arriving out of order are kept in
+        memory until the gap before them is filled; lost chunks are requested
+        again with a new burst read when the drone stops streaming, starting
+        from the first missing offset.
+
+        The remaining replies of the last burst are consumed before returning
+        so they cannot be mistaken for the replies of subsequent requests.
+
+        Parameters:
+            session_id: the ID of the session in which the file is open
+            fp: async file-like object to write the downloaded data to
+            size: the size of the file as reported by the drone
+            messages: channel yielding the MAVFTP messages received from the
+                drone
+        """
+        offset = 0
+        pending: dict[int, bytes] = {}
+        ready: list[bytes] = []
+        retries = 0
+        streaming = False
+        got_eof = False
+
+        while offset < size and not got_eof:
+            request = MAVFTPMessage(
+                MAVFTPOpCode.BURST_READ_FILE,
+                session_id=session_id,
+                offset=offset,
+                size=_MAVFTP_CHUNK_SIZE,
+            )
+            await self._send(request)
+            streaming = True
+            received = False
+
+            with move_on_after(_MAVFTP_BURST_TIMEOUT) as cancel_scope:
+                async for message in messages:
+                    reply = self._decode_burst_reply(message, session_id)
+                    if reply is None:
+                        continue
+
+                    cancel_scope.deadline = current_time() + _MAVFTP_BURST_TIMEOUT
+
+                    if reply.is_nak:
+                        streaming = False
+                        if reply.error_code == MAVFTPErrorCode.EOF:
+                            # The burst ended at the end of the file. If it
+                            # did not yield any data, the file is shorter
+                            # than reported and we are done.
+                            got_eof = not received
+                            break
+                        reply.raise_error(replies_to=request)
+
+                    if offset <= reply.offset < size and reply.data:
+                        pending[reply.offset] = reply.data
+                        received = True
+
+                    while offset in pending:
+                        chunk = pending.pop(offset)
+                        ready.append(chunk)
+                        offset += len(chunk)
+
+                    if reply.burst_complete:
+                        streaming = False
+                        break
+
+                    if offset >= size:
+                        break
+
+            if cancel_scope.cancelled_caught:
+                # The drone stopped streaming without completing the burst
+                streaming = False
+
+            if ready:
+                for chunk in ready:
+                    await fp.write(chunk)
+                ready.clear()
+                retries = 0
+            elif not got_eof:
+                retries += 1
+                if retries > _MAVFTP_BURST_MAX_RETRIES:
+                    raise TooSlowError(
+                        "No response received for MAVFTP burst read in time"
+                    )
+
+        if streaming:
+            with move_on_after(_MAVFTP_BURST_TIMEOUT) as cancel_scope:
+                async for message in messages:
+                    reply = self._decode_burst_reply(message, session_id)
+                    if reply is None:
+                        continue
+                    if reply.is_nak or reply.burst_complete:
+                        break
+                    cancel_scope.deadline = current_time() + _MAVFTP_BURST_TIMEOUT
+
+    @staticmethod
+    def _decode_burst_reply(
+        message: MAVLinkMessage, session_id: int
+    ) -> MAVFTPMessage | None:
+        """Decodes the given MAVFTP message if it is a reply to a burst read in
+        the given session; returns ``None`` otherwise.
+        """
+        reply = MAVFTPMessage.decode(message.payload)
+        if (
+            reply.req_opcode == MAVFTPOpCode.BURST_READ_FILE
+            and reply.session_id == session_id
+        ):
+            return reply
+
     def _parents_of(self, path: FTPPath) -> Iterable[FTPPath]:
         if isinstance(path, str):
             path_as_str = path
@@ -728,6 +1131,15 @@ class MAVFTP:
         assert isinstance(name, str)
         return self._to_ftp_path(self._path / name)
 
+    async def _send(self, message: MAVFTPMessage) -> None:
+        """Sends a raw FTP message over the connection without waiting for a
+        response.
+        """
+        encoded_message = message.encode(next(self._seq)).ljust(251, b"\x00")
+        await self._sender(
+            spec.file_transfer_protocol(target_network=0, payload=encoded_message)
+        )
+
     async def _send_and_wait(
         self,
         message: MAVFTPMessage,
@@ -750,16 +1162,29 @@ class MAVFTP:
         """
         encoded_message = message.encode(next(self._seq)).ljust(251, b"\x00")
         expected_seq_no = next(self._seq)
+        matcher = partial(
+            MAVFTPMessage.matches_reply_to, expected_seq_no, message.opcode
+        )
         sender = self._sender
+        estimator = self._rtt_estimator
+        attempts = 0
 
         async def do_send():
+            nonlocal attempts
+
+            attempts += 1
+            sent_at = monotonic()
             reply = await sender(
                 spec.file_transfer_protocol(target_network=0, payload=encoded_message),
-                wait_for_response=spec.file_transfer_protocol(
-                    partial(MAVFTPMessage.matches_sequence_no, expected_seq_no)
-                ),
+                wait_for_response=spec.file_transfer_protocol(matcher),
             )
             assert reply is not None
+
+            # Replies to retransmitted requests are ambiguous so they are not
+            # used for round-trip time estimation
+            if estimator is not None and attempts == 1:
+                estimator.add_sample(monotonic() - sent_at)
+
             return reply
 
         while True:
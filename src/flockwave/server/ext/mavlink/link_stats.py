@@ -0,0 +1,450 @@
+"""Rolling statistics of the MAVLink links of a network.
+
+The counters in this module are updated from the inbound message loop of a
+MAVLink network, which is the innermost hot loop of the server, so updating
+them costs a few integer additions and dictionary lookups per message. Rates
+are derived from the counters in a separate task once per second, and the
+outbound counters are polled from the low-level MAVLink objects of the
+connections at the same time instead of being updated for every packet.
+"""
+
+from __future__ import annotations
+
+from math import exp
+from typing import TYPE_CHECKING, Any
+from weakref import WeakKeyDictionary
+
+if TYPE_CHECKING:
+    from flockwave.protocols.mavlink.types import MinimalMAVLinkInterface
+
+    from .parsers import MAVLinkParserTable
+    from .types import MAVLinkMessage
+
+__all__ = ("MAVLinkLinkStatistics", "MAVLinkNetworkLinkStatistics")
+
+
+RATE_WINDOW = 5.0
+"""Time constant of the exponential smoothing of the rates, in seconds."""
+
+
+class MAVLinkLinkStatistics:
+    """Rolling statistics of a single MAVLink connection or of the traffic of a
+    single MAVLink system.
+    """
+
+    __slots__ = (
+        "crc_errors",
+        "duplicates",
+        "lost",
+        "packet_loss",
+        "parsers",
+        "rx_byte_rate",
+        "rx_bytes",
+        "rx_packets",
+        "rx_rate",
+        "systems",
+        "tx_byte_rate",
+        "tx_bytes",
+        "tx_packets",
+        "tx_rate",
+        "_last_seq",
+        "_links",
+        "_previous",
+        "_previous_rx_by_type",
+        "_rx_by_type",
+        "_rx_rate_by_type",
+        "_skipped",
+        "_updated_at",
+    )
+
+    crc_errors: int
+    """Number of inbound frames that were dropped because they failed the CRC
+    check or could not be decoded. Noise between frames is not counted here.
+    """
+
+    duplicates: int
+    """Number of inbound packets whose sequence number was the same as the
+    sequence number of the previous packet of the same sender.
+    """
+
+    lost: int
+    """Number of inbound packets that were inferred to be lost from the gaps in
+    the sequence numbers of the senders.
+    """
+
+    packet_loss: float
+    """Smoothed ratio of lost inbound packets, between 0 and 1."""
+
+    parsers: MAVLinkParserTable | None
+    """Table of the low-level MAVLink objects of the connection, keyed by the
+    addresses of the peers; ``None`` if the connection is not datagram-based
+    or if the statistics belong to a MAVLink system.
+    """
+
+    rx_byte_rate: float
+    """Smoothed number of bytes received per second."""
+
+    rx_bytes: int
+    """Number of bytes received, including corrupted frames."""
+
+    rx_packets: int
+    """Number of valid packets received."""
+
+    rx_rate: float
+    """Smoothed number of valid packets received per second."""
+
+    systems: dict[int, MAVLinkLinkStatistics] | None
+    """Statistics of the MAVLink systems, keyed by system ID, that should also
+    be notified about the inbound frames dropped on this connection before
+    parsing; ``None`` if the statistics belong to a MAVLink system.
+    """
+
+    tx_byte_rate: float | None
+    """Smoothed number of bytes sent per second; ``None`` if the number of
+    bytes sent is not tracked.
+    """
+
+    tx_bytes: int | None
+    """Number of bytes sent; ``None`` if the number of bytes sent is not
+    tracked. Only the statistics of connections track the bytes sent.
+    """
+
+    tx_packets: int
+    """Number of packets sent."""
+
+    tx_rate: float
+    """Smoothed number of packets sent per second."""
+
+    _last_seq: dict[int, int]
+    """Sequence number of the last packet of each sender, keyed by the system
+    ID and the component ID of the sender.
+    """
+
+    _links: WeakKeyDictionary[MinimalMAVLinkInterface, tuple[int, int]]
+    """Low-level MAVLink objects whose outbound counters are polled, mapped to
+    the values of the counters when they were last polled.
+    """
+
+    _previous: tuple[int, int, int, int, int]
+    """Values of the counters at the time of the last update of the rates."""
+
+    _previous_rx_by_type: dict[str, int]
+    """Values of the per-type packet counters at the time of the last update
+    of the rates.
+    """
+
+    _rx_by_type: dict[str, int]
+    """Number of valid packets received, keyed by MAVLink message type."""
+
+    _rx_rate_by_type: dict[str, float]
+    """Smoothed number of valid packets received per second, keyed by MAVLink
+    message type.
+    """
+
+    _skipped: dict[int, int]
+    """Number of inbound frames of each sender that were dropped before
+    parsing and whose sequence numbers were not seen yet, keyed by the system
+    ID and the component ID of the sender.
+    """
+
+    _updated_at: float | None
+    """Timestamp of the last update of the rates; ``None`` if the rates have
+    not been updated yet.
+    """
+
+    def __init__(self):
+        self.crc_errors = 0
+        self.duplicates = 0
+        self.lost = 0
+        self.packet_loss = 0.0
+        self.parsers = None
+        self.rx_byte_rate = 0.0
+        self.rx_bytes = 0
+        self.rx_packets = 0
+        self.rx_rate = 0.0
+        self.systems = None
+        self.tx_byte_rate = None
+        self.tx_bytes = None
+        self.tx_packets = 0
+        self.tx_rate = 0.0
+
+        self._last_seq = {}
+        self._links = WeakKeyDictionary()
+        self._previous = (0, 0, 0, 0, 0)
+        self._previous_rx_by_type = {}
+        self._rx_by_type = {}
+        self._rx_rate_by_type = {}
+        self._skipped = {}
+        self._updated_at = None
+
+    @property
+    def json(self) -> dict[str, Any]:
+        """Returns the JSON representation of the statistics."""
+        rates = self._rx_rate_by_type
+        return {
+            "rx": {
+                "packets": self.rx_packets,
+                "bytes": self.rx_bytes,
+                "rate": round(self.rx_rate, 2),
+                "byteRate": round(self.rx_byte_rate, 2),
+                "byType": {
+                    type: {"count": count, "rate": round(rates.get(type, 0.0), 2)}
+                    for type, count in sorted(self._rx_by_type.items())
+                },
+            },
+            "tx": {
+                "packets": self.tx_packets,
+                "bytes": self.tx_bytes,
+                "rate": round(self.tx_rate, 2),
+                "byteRate": (
+                    round(self.tx_byte_rate, 2)
+                    if self.tx_byte_rate is not None
+                    else None
+                ),
+            },
+            "lost": self.lost,
+            "duplicates": self.duplicates,
+            "crcErrors": self.crc_errors,
+            "packetLoss": round(self.packet_loss, 4),
+            "parsers": self.parsers.json if self.parsers is not None else None,
+        }
+
+    def attach(self, link: MinimalMAVLinkInterface) -> None:
+        """Attaches a low-level MAVLink object to the statistics so the packets
+        and bytes it sends are counted when the rates are updated the next
+        time.
+
+        The object is referenced weakly; packets sent by the object since the
+        last update are not counted when the object is discarded.
+        """
+        self._links[link] = (link.total_packets_sent, link.total_bytes_sent)
+        if self.tx_bytes is None:
+            self.tx_bytes = 0
+            self.tx_byte_rate = 0.0
+
+    def describe(self) -> str:
+        """Returns a human-readable description of the statistics."""
+        parts = [
+            f"RX {self.rx_packets} packets ({self.rx_rate:.1f}/s)",
+            f"TX {self.tx_packets} packets ({self.tx_rate:.1f}/s)",
+            f"{self.lost} lost ({self.packet_loss * 100:.1f}%)",
+            f"{self.duplicates} duplicates",
+            f"{self.crc_errors} CRC errors",
+        ]
+        return ", ".join(parts)
+
+    def notify_dropped(self, system_id: int, component_id: int) -> None:
+        """Notifies the statistics that an inbound frame was dropped before
+        it was parsed, so the gap that it leaves in the sequence numbers of its
+        sender is not counted as packet loss.
+
+        Parameters:
+            system_id: the MAVLink system ID of the sender of the frame
+            component_id: the MAVLink component ID of the sender of the frame
+        """
+        key = (system_id << 8) | component_id
+        skipped = self._skipped
+        skipped[key] = min(skipped.get(key, 0) + 1, 0xFF)
+
+        systems = self.systems
+        if systems is not None:
+            stats = systems.get(system_id)
+            if stats is not None:
+                stats.notify_dropped(system_id, component_id)
+
+    def notify_received(
+        self, message: MAVLinkMessage, type: str, *, track_sequence: bool = True
+    ) -> None:
+        """Updates the counters with an inbound MAVLink message.
+
+        Parameters:
+            message: the message that was received
+            type: the type of the message
+            track_sequence: whether to track the sequence number of the message
+                to detect lost and duplicate packets. Must be ``False`` if some
+                of the frames of the senders are dropped before they are
+                parsed without calling notify_dropped().
+        """
+        self.rx_bytes += len(message.get_msgbuf() or b"")
+
+        if type == "BAD_DATA":
+            if getattr(message, "reason", None) != "Bad prefix":
+                self.crc_errors += 1
+            return
+
+        self.rx_packets += 1
+        by_type = self._rx_by_type
+        by_type[type] = by_type.get(type, 0) + 1
+
+        if track_sequence:
+            key = (message.get_srcSystem() << 8) | message.get_srcComponent()
+            seq = message.get_seq()
+            last = self._last_seq.get(key)
+            self._last_seq[key] = seq
+            if last is not None:
+                gap = (seq - last - 1) & 0xFF
+                if gap == 0xFF:
+                    self.duplicates += 1
+                else:
+                    if gap:
+                        # Frames dropped before parsing are not lost
+                        skipped = self._skipped.get(key)
+                        if skipped:
+                            used = min(gap, skipped)
+                            self._skipped[key] = skipped - used
+                            gap -= used
+                    self.lost += gap
+
+    def notify_sent(self) -> None:
+        """Updates the counters with an outbound packet."""
+        self.tx_packets += 1
+
+    def update(self, now: float) -> None:
+        """Polls the attached MAVLink objects and updates the smoothed rates.
+
+        Parameters:
+            now: the current time, in seconds, from a monotonic clock
+        """
+        for link, (packets, nbytes) in list(self._links.items()):
+            sent_packets, sent_bytes = link.total_packets_sent, link.total_bytes_sent
+            self.tx_packets += sent_packets - packets
+            self.tx_bytes = (self.tx_bytes or 0) + sent_bytes - nbytes
+            self._links[link] = (sent_packets, sent_bytes)
+
+        tx_bytes = self.tx_bytes or 0
+        current = (self.rx_packets, self.rx_bytes, self.tx_packets, tx_bytes, self.lost)
+        previous, self._previous = self._previous, current
+        previous_by_type, self._previous_rx_by_type = (
+            self._previous_rx_by_type,
+            dict(self._rx_by_type),
+        )
+
+        updated_at, self._updated_at = self._updated_at, now
+        if updated_at is None or now <= updated_at:
+            return
+
+        dt = now - updated_at
+        alpha = 1 - exp(-dt / RATE_WINDOW)
+
+        def smooth(rate: float, delta: int) -> float:
+            return rate + alpha * (delta / dt - rate)
+
+        rx_packets, rx_bytes, tx_packets, tx_bytes, lost = (
+            x - y for x, y in zip(current, previous)
+        )
+        self.rx_rate = smooth(self.rx_rate, rx_packets)
+        self.rx_byte_rate = smooth(self.rx_byte_rate, rx_bytes)
+        self.tx_rate = smooth(self.tx_rate, tx_packets)
+        if self.tx_byte_rate is not None:
+            self.tx_byte_rate = smooth(self.tx_byte_rate, tx_bytes)
+
+        expected = rx_packets + lost
+        if expected > 0:
+            self.packet_loss += alpha * (lost / expected - self.packet_loss)
+
+        rates = self._rx_rate_by_type
+        for type, count in self._rx_by_type.items():
+            delta = count - previous_by_type.get(type, 0)
+            rates[type] = smooth(rates.get(type, 0.0), delta)
+
+
+class MAVLinkNetworkLinkStatistics:
+    """Rolling statistics of all the connections of a MAVLink network and of
+    all the MAVLink systems seen in the network.
+    """
+
+    by_connection: dict[str, MAVLinkLinkStatistics]
+    """Statistics of the connections of the network, keyed by connection ID."""
+
+    by_system_id: dict[int, MAVLinkLinkStatistics]
+    """Statistics of the MAVLink systems seen in the network, keyed by system
+    ID. When a system is reachable on multiple connections, its packets are
+    counted once for each connection, and the copies of the same packet are
+    counted as duplicates.
+    """
+
+    track_sequence_numbers: bool
+    """Whether to infer lost and duplicate packets from the sequence numbers
+    of the inbound packets.
+    """
+
+    def __init__(self, *, track_sequence_numbers: bool = True):
+        """Constructor.
+
+        Parameters:
+            track_sequence_numbers: whether to infer lost and duplicate packets
+                from the sequence numbers of the inbound packets. Must be
+                ``False`` if frames are dropped before they are parsed without
+                notifying the statistics of the connection, as they would be
+                counted as lost.
+        """
+        self.by_connection = {}
+        self.by_system_id = {}
+        self.track_sequence_numbers = bool(track_sequence_numbers)
+
+    @property
+    def json(self) -> dict[str, Any]:
+        """Returns the JSON representation of the statistics."""
+        return {
+            "connections": {
+                name: stats.json for name, stats in self.by_connection.items()
+            },
+            "systems": {
+                str(system_id): stats.json
+                for system_id, stats in sorted(self.by_system_id.items())
+            },
+        }
+
+    def for_connection(self, connection_id: str) -> MAVLinkLinkStatistics:
+        """Returns the statistics of the connection with the given ID, creating
+        it if needed.
+        """
+        stats = self.by_connection.get(connection_id)
+        if stats is None:
+            stats = self.by_connection[connection_id] = MAVLinkLinkStatistics()
+            stats.systems = self.by_system_id
+        return stats
+
+    def for_system_id(self, system_id: int) -> MAVLinkLinkStatistics:
+        """Returns the statistics of the MAVLink system with the given ID,
+        creating it if needed.
+        """
+        stats = self.by_system_id.get(system_id)
+        if stats is None:
+            stats = self.by_system_id[system_id] = MAVLinkLinkStatistics()
+        return stats
+
+    def notify_received(
+        self, connection_id: str, message: MAVLinkMessage, type: str
+    ) -> None:
+        """Updates the statistics with an inbound MAVLink message.
+
+        Parameters:
+            connection_id: ID of the connection that the message was received on
+            message: the message that was received
+            type: the type of the message
+        """
+        track_sequence = self.track_sequence_numbers
+
+        stats = self.by_connection.get(connection_id)
+        if stats is None:
+            stats = self.for_connection(connection_id)
+        stats.notify_received(message, type, track_sequence=track_sequence)
+
+        if type != "BAD_DATA":
+            system_id = message.get_srcSystem()
+            stats = self.by_system_id.get(system_id)
+            if stats is None:
+                stats = self.for_system_id(system_id)
+            stats.notify_received(message, type, track_sequence=track_sequence)
+
+    def update(self, now: float) -> None:
+        """Updates the smoothed rates of all the statistics.
+
+        Parameters:
+            now: the current time, in seconds, from a monotonic clock
+        """
+        for stats in self.by_connection.values():
+            stats.update(now)
+        for stats in self.by_system_id.values():
+            stats.update(now)
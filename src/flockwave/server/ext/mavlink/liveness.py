@@ -0,0 +1,193 @@
+"""Event-driven tracking of the liveness of MAVLink UAVs based on the arrival
+times of their heartbeats.
+
+Each tracked UAV has a deadline by which its next heartbeat is expected.
+Heartbeats only move the deadline of the UAV forward, which is a single
+dictionary update; the deadlines themselves are kept in a heap and the
+tracker task sleeps until the earliest one, so it only ever touches the UAVs
+whose deadlines have expired instead of scanning all the UAVs periodically.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from heapq import heappop, heappush
+from itertools import count
+from math import inf
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from trio import Event, move_on_after
+
+if TYPE_CHECKING:
+    from .driver import MAVLinkUAV
+
+__all__ = ("UAVLivenessTracker",)
+
+
+class UAVLivenessTracker:
+    """Tracks whether MAVLink UAVs are still sending heartbeats, using a heap
+    of deadlines.
+
+    UAVs are marked as disconnected when no heartbeat has arrived from them for
+    `timeout` seconds. Optionally, UAVs that have not sent a heartbeat for
+    `prune_after` seconds are handed over to a pruning callback so they can be
+    removed from the system altogether.
+    """
+
+    on_prune: Callable[[MAVLinkUAV], None] | None
+    """Function to call with UAVs that have not sent a heartbeat for
+    `prune_after` seconds; ``None`` if such UAVs should not be pruned.
+    """
+
+    prune_after: float
+    """Number of seconds without heartbeats after which a UAV is pruned;
+    infinity if UAVs are never pruned.
+    """
+
+    timeout: float
+    """Number of seconds without heartbeats after which a UAV is considered
+    disconnected.
+    """
+
+    _counter: count
+    """Counter that breaks ties between heap entries with the same deadline."""
+
+    _heap: list[tuple[float, int, MAVLinkUAV]]
+    """Heap of the deadlines of the tracked UAVs. The deadline in an entry may
+    be earlier than the real deadline of the UAV, in which case the entry is
+    pushed back when it is popped. Entries whose deadline differs from the one
+    in `_scheduled` are stale and are skipped when popped.
+    """
+
+    _last_seen: dict[MAVLinkUAV, float]
+    """Time when the last heartbeat arrived from each tracked UAV."""
+
+    _scheduled: dict[MAVLinkUAV, float]
+    """Deadline of the live heap entry of each tracked UAV."""
+
+    _wakeup: Event
+    """Event that is set when a new deadline is pushed onto the heap, to wake
+    up the tracker task.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float = 5,
+        prune_after: float | None = None,
+        on_prune: Callable[[MAVLinkUAV], None] | None = None,
+    ):
+        """Constructor.
+
+        Parameters:
+            timeout: number of seconds without heartbeats after which a UAV is
+                considered disconnected
+            prune_after: number of seconds without heartbeats after which a UAV
+                is pruned; ``None`` or zero if UAVs should never be pruned
+            on_prune: function to call with the UAVs that are to be pruned
+        """
+        self.on_prune = on_prune
+        self.prune_after = float(prune_after) if prune_after else inf
+        self.timeout = float(timeout)
+
+        self._counter = count()
+        self._heap = []
+        self._last_seen = {}
+        self._scheduled = {}
+        self._wakeup = Event()
+
+    def __contains__(self, uav: MAVLinkUAV) -> bool:
+        return uav in self._last_seen
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def forget(self, uav: MAVLinkUAV) -> None:
+        """Stops tracking the given UAV. Its entry is removed from the heap
+        lazily, when its deadline expires.
+        """
+        self._last_seen.pop(uav, None)
+        self._scheduled.pop(uav, None)
+
+    def notify_heartbeat(self, uav: MAVLinkUAV, now: float | None = None) -> None:
+        """Notifies the tracker that a heartbeat has arrived from the given
+        UAV.
+
+        Parameters:
+            uav: the UAV that sent the heartbeat
+            now: the time when the heartbeat arrived, from a monotonic clock;
+                ``None`` to use the current time
+        """
+        if now is None:
+            now = monotonic()
+
+        self._last_seen[uav] = now
+
+        # In the steady state the UAV already has an entry in the heap with
+        # an earlier deadline so there is nothing else to do
+        deadline = now + self.timeout
+        if self._scheduled.get(uav, inf) > deadline:
+            self._push(uav, deadline)
+
+    def process_expired(self, now: float) -> float:
+        """Processes the UAVs whose deadlines have expired.
+
+        Parameters:
+            now: the current time, from a monotonic clock
+
+        Returns:
+            the time when the next deadline expires; infinity if no UAVs are
+            tracked
+        """
+        heap = self._heap
+        last_seen = self._last_seen
+        scheduled = self._scheduled
+
+        while heap and heap[0][0] <= now:
+            deadline, _, uav = heappop(heap)
+            if scheduled.get(uav) != deadline:
+                # UAV is not tracked any more or the entry is stale
+                continue
+
+            seen_at = last_seen[uav]
+
+            if now < seen_at + self.timeout:
+                # Heartbeat arrived since the entry was pushed
+                self._push(uav, seen_at + self.timeout)
+                continue
+
+            if uav.is_connected:
+                uav.notify_disconnection()
+
+            if now >= seen_at + self.prune_after:
+                self.forget(uav)
+                if self.on_prune:
+                    self.on_prune(uav)
+            else:
+                self._push(uav, seen_at + self.prune_after)
+
+        # Drop stale entries from the top of the heap so they do not cause
+        # spurious wakeups
+        while heap and scheduled.get(heap[0][2]) != heap[0][0]:
+            heappop(heap)
+
+        return heap[0][0] if heap else inf
+
+    async def run(self) -> None:
+        """Runs the tracker, marking UAVs as disconnected (and optionally
+        pruning them) when their deadlines expire.
+        """
+        while True:
+            deadline = self.process_expired(monotonic())
+            self._wakeup = Event()
+
+            # Sleep until the earliest deadline, or until a UAV gets a deadline
+            # that may be earlier (a new UAV or a reconnected one)
+            with move_on_after(max(deadline - monotonic(), 0)):
+                await self._wakeup.wait()
+
+    def _push(self, uav: MAVLinkUAV, deadline: float) -> None:
+        self._scheduled[uav] = deadline
+        heappush(self._heap, (deadline, next(self._counter), uav))
+        self._wakeup.set()
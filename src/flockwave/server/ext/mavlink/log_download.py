@@ -3,6 +3,10 @@
 from collections.abc import Callable
 from contextlib import aclosing
 from functools import partial
+from io import SEEK_END
+from pathlib import Path
+from tempfile import TemporaryFile
+from typing import BinaryIO
 
 from flockwave.concurrency import Future
 from flockwave.logger import Logger
@@ -77,13 +81,104 @@ class MAVLinkLogDownloader:
         log = uav.driver.log
         return cls(sender, log=log)
 
+    stall_timeout: float = 1
+    """Number of seconds to wait for the next LOG_DATA message of a requested
+    range before the missing part of the range is requested again.
+    """
+
     def __init__(self, sender: Callable, log: Logger | None = None):
         self._sender = sender
         self._log = log
         self._retries = 5
 
-    async def get_log(self, log_id: int) -> ProgressEvents[FlightLog | None]:
-        """Retrieves a single log with the given ID from the drone."""
+    async def download_log(
+        self, log_id: int, path: Path | str, *, resume: bool = True
+    ) -> ProgressEvents[FlightLogMetadata | None]:
+        """Downloads a single log with the given ID from the drone into a file.
+
+        The downloaded data is written to a partial file next to the target
+        file (with a ``.part`` suffix) as soon as it forms a contiguous prefix
+        of the log, so the log is never kept in memory. The partial file is
+        renamed to the target file when the download completes. When the
+        download is interrupted (e.g., because the drone disconnected), the
+        next download of the same log into the same file continues from the
+        end of the partial file.
+
+        Parameters:
+            log_id: ID of the log to download
+            path: path of the file to download the log into
+            resume: whether to continue downloading into an existing partial
+                file. The partial file is discarded if it does not seem to
+                belong to the same log.
+
+        Yields:
+            progress events, followed by the metadata of the downloaded log
+            or ``None`` if there is no log with the given ID
+        """
+        path = Path(path)
+        part_path = path.with_name(path.name + ".part")
+        mode = "r+b" if resume and part_path.exists() else "wb"
+        part_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with part_path.open(mode) as fp:
+            fp.seek(0, SEEK_END)
+            async with aclosing(self._download_log(log_id, fp)) as it:
+                async for item in it:
+                    if isinstance(item, FlightLogMetadata):
+                        fp.close()
+                        part_path.replace(path)
+                    yield item
+
+    async def get_log(
+        self, log_id: int, path: Path | str | None = None
+    ) -> ProgressEvents[FlightLog | None]:
+        """Retrieves a single log with the given ID from the drone.
+
+        The log is downloaded into a file first so it needs to be kept in
+        memory only once, when the final log object is constructed.
+
+        Parameters:
+            log_id: ID of the log to download
+            path: path of the file to download the log into. When it is given,
+                the log is downloaded with `download_log()` so an interrupted
+                download continues where it stopped the next time the same
+                log is retrieved into the same file; the file is removed when
+                the log object has been constructed. When it is ``None``, the
+                log is downloaded into a temporary file.
+
+        Yields:
+            progress events, followed by the downloaded log or ``None`` if
+            there is no log with the given ID
+        """
+        if path is not None:
+            path = Path(path)
+            async with aclosing(self.download_log(log_id, path)) as it:
+                async for item in it:
+                    if isinstance(item, FlightLogMetadata):
+                        body = path.read_bytes()
+                        path.unlink()
+                        yield FlightLog.create_from_metadata(item, body=body)
+                    else:
+                        yield item
+            return
+
+        with TemporaryFile() as fp:
+            async with aclosing(self._download_log(log_id, fp)) as it:
+                async for item in it:
+                    if isinstance(item, FlightLogMetadata):
+                        fp.seek(0)
+                        yield FlightLog.create_from_metadata(item, body=fp.read())
+                    else:
+                        yield item
+
+    async def _download_log(
+        self, log_id: int, fp: BinaryIO
+    ) -> ProgressEvents[FlightLogMetadata | None]:
+        """Downloads a single log with the given ID from the drone, appending
+        it to the given file from the current position of the file, which is
+        assumed to be at the end of the part of the log that was downloaded
+        earlier.
+        """
         if self._log_being_downloaded is not None:
             raise RuntimeError("Another log download is in progress")
 
@@ -95,7 +190,7 @@ class MAVLinkLogDownloader:
         self._log_being_downloaded = log_id
         self._message_channel, rx = open_memory_channel(128)
         try:
-            async with aclosing(self._get_log_inner(log_id, rx)) as it:
+            async with aclosing(self._download_log_inner(log_id, rx, fp)) as it:
                 async for item in it:
                     yield item
         finally:
@@ -142,9 +237,9 @@ class MAVLinkLogDownloader:
                 if self._log:
                     self._log.warning("Incoming log entry message dropped, queue full")
 
-    async def _get_log_inner(
-        self, log_id: int, rx: MemoryReceiveChannel[MAVLinkMessage]
-    ) -> ProgressEvents[FlightLog | None]:
+    async def _download_log_inner(
+        self, log_id: int, rx: MemoryReceiveChannel[MAVLinkMessage], fp: BinaryIO
+    ) -> ProgressEvents[FlightLogMetadata | None]:
         last_progress_at = current_time()
 
         # We are requesting at most 512 LOG_DATA messages at once to let the
@@ -164,34 +259,47 @@ class MAVLinkLogDownloader:
             if metadata.size is None:
                 raise RuntimeError("unknown log size")
 
-            chunks = ChunkAssembler(metadata.size)
-            log_data: list[bytes] = []
+            offset = fp.tell()
+            if offset > 0 and not await self._verify_partial_log(
+                log_id, fp, metadata.size
+            ):
+                fp.seek(0)
+                fp.truncate()
+                offset = 0
+
+            chunks = ChunkAssembler(metadata.size, offset)
             while not chunks.done:
                 next_range = chunks.get_next_range(max_size=MAX_CHUNK_SIZE)
                 response: MAVLinkMessage | None = await self._send_and_wait(
                     spec.log_request_data(
                         id=log_id, ofs=next_range.offset, count=next_range.size
                     ),
-                    spec.log_data(),
+                    spec.log_data(id=log_id),
                 )
 
                 # Process the response, and start processing any other LOG_DATA messages
                 # that we receive via the channel
                 while response is not None:
-                    if response.get_type() == "LOG_DATA":
-                        if response.id != log_id:
-                            # ignore
-                            pass
-
+                    range_finished = False
+                    if response.get_type() == "LOG_DATA" and response.id == log_id:
                         to_flush = chunks.add_chunk(
                             response.ofs, bytes(response.data[: response.count])
                         )
                         if to_flush:
-                            log_data.append(to_flush)
+                            fp.write(to_flush)
+
+                        # The drone streams the requested range in order so
+                        # if we have seen the end of the range, any gaps in
+                        # it are lost packets that we can request again
+                        # immediately instead of waiting for more data
+                        range_finished = (
+                            next_range.start <= response.ofs < next_range.end
+                            and response.ofs + response.count >= next_range.end
+                        )
 
                     response = None
-                    if not chunks.done_with(next_range):
-                        with move_on_after(3):
+                    if not range_finished and not chunks.done_with(next_range):
+                        with move_on_after(self.stall_timeout):
                             response = await rx.receive()
 
                     now = current_time()
@@ -202,10 +310,12 @@ class MAVLinkLogDownloader:
                         )
                         last_progress_at = current_time()
 
+            fp.flush()
+
         finally:
             await self._sender(spec.log_request_end())
 
-        yield FlightLog.create_from_metadata(metadata, body=b"".join(log_data))
+        yield metadata
 
     async def _get_log_list_inner(
         self, rx: MemoryReceiveChannel[MAVLinkMessage]
@@ -263,6 +373,33 @@ class MAVLinkLogDownloader:
         else:
             return None
 
+    async def _verify_partial_log(self, log_id: int, fp: BinaryIO, size: int) -> bool:
+        """Checks whether the given partially downloaded log belongs to the log
+        with the given ID and size on the drone by downloading the last few
+        bytes of the partial log again and comparing them with the file.
+
+        Logs on the drone may be erased and their IDs re-used so the size of
+        the partial log alone is not enough to decide whether it can be
+        resumed.
+        """
+        offset = fp.tell()
+        if offset > size:
+            return False
+
+        tail_offset = max(offset - 90, 0)
+        response = await self._send_and_wait(
+            spec.log_request_data(
+                id=log_id, ofs=tail_offset, count=offset - tail_offset
+            ),
+            spec.log_data(id=log_id, ofs=tail_offset),
+        )
+
+        fp.seek(tail_offset)
+        tail = fp.read(offset - tail_offset)
+        fp.seek(offset)
+
+        return bytes(response.data[: response.count]) == tail
+
     async def _send_and_wait(
         self,
         message: MAVLinkMessageSpecification,
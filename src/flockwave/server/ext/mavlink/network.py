@@ -15,9 +15,11 @@ from __future__ import annotations
 from collections import defaultdict
 from collections.abc import Awaitable, Callable, Iterable, Iterator, Sequence
 from contextlib import ExitStack, contextmanager
+from functools import partial
 from logging import Logger
-from time import time_ns
+from time import monotonic, perf_counter, time_ns
 from typing import TYPE_CHECKING, Any, cast
+from weakref import WeakKeyDictionary
 
 from flockwave.concurrency import Future, race
 from flockwave.connections import (
@@ -32,20 +34,37 @@ from trio import move_on_after, open_nursery, to_thread
 from trio.abc import ReceiveChannel
 from trio_util import periodic
 
-from flockwave.server.comm import CommunicationManager
+from flockwave.server.comm import CommunicationManager, TransmissionPriority
 from flockwave.server.ext.show.time import BinaryTimeAxisConfiguration
 from flockwave.server.model import ConnectionPurpose
-from flockwave.server.utils import nop, overridden
+from flockwave.server.utils import overridden
 
-from .channel import Channel
+from .channel import Channel, get_parser_table
 from .comm import create_communication_manager
+from .dispatch import (
+    MAVLinkMessageDispatchEntry,
+    MAVLinkMessageDispatchTable,
+    MAVLinkMessageProcessingStatistics,
+    MessageFilter,
+    NetworkMessageHandler,
+    UAVMessageHandler,
+)
 from .driver import MAVLinkDriver, MAVLinkUAV
-from .enums import MAVAutopilot, MAVComponent, MAVMessageType, MAVState, MAVType
+from .enums import (
+    MAVAutopilot,
+    MAVCommand,
+    MAVComponent,
+    MAVMessageType,
+    MAVState,
+    MAVType,
+)
 from .errors import InvalidSystemIdError
 from .led_lights import MAVLinkLEDLightConfigurationManager
+from .link_stats import MAVLinkNetworkLinkStatistics
 from .packets import DroneShowStatus
+from .prefilter import MAVLinkFrameFilter, resolve_message_types
 from .rssi import RSSIMode
-from .rtk import RTKCorrectionPacketEncoder
+from .rtk import RTKBandwidthLimiter
 from .signing import MAVLinkSigningConfiguration
 from .takeoff import MAVLinkScheduledTakeoffManager
 from .time import MAVLinkTimeAxisConfigurationManager
@@ -63,6 +82,7 @@ from .utils import (
     log_id_from_message,
     python_log_level_from_mavlink_severity,
 )
+from .workers import MAVLinkParserWorkerPool
 
 if TYPE_CHECKING:
     from flockwave.server.ext.show.config import DroneShowConfiguration
@@ -84,6 +104,105 @@ HEARTBEAT_SPEC = (
 to connected UAVs to keep them sending telemetry data."""
 
 
+_EMERGENCY_COMMANDS = frozenset(
+    (
+        MAVCommand.COMPONENT_ARM_DISARM,
+        MAVCommand.NAV_LAND,
+        MAVCommand.NAV_RETURN_TO_LAUNCH,
+    )
+)
+"""MAVLink commands that are sent with emergency priority, ahead of any other
+outbound traffic.
+"""
+
+_MESSAGE_TYPE_PRIORITIES: dict[str, TransmissionPriority] = {
+    "FILE_TRANSFER_PROTOCOL": TransmissionPriority.CONFIGURATION,
+    "GPS_RTCM_DATA": TransmissionPriority.RTK,
+    "HEARTBEAT": TransmissionPriority.HEARTBEAT,
+    "LED_CONTROL": TransmissionPriority.CONFIGURATION,
+    "LOG_REQUEST_DATA": TransmissionPriority.CONFIGURATION,
+    "LOG_REQUEST_END": TransmissionPriority.CONFIGURATION,
+    "LOG_REQUEST_LIST": TransmissionPriority.CONFIGURATION,
+    "MISSION_ACK": TransmissionPriority.CONFIGURATION,
+    "MISSION_COUNT": TransmissionPriority.CONFIGURATION,
+    "MISSION_ITEM_INT": TransmissionPriority.CONFIGURATION,
+    "MISSION_REQUEST_INT": TransmissionPriority.CONFIGURATION,
+    "MISSION_REQUEST_LIST": TransmissionPriority.CONFIGURATION,
+    "PARAM_REQUEST_READ": TransmissionPriority.CONFIGURATION,
+    "PARAM_SET": TransmissionPriority.CONFIGURATION,
+    "REQUEST_DATA_STREAM": TransmissionPriority.TELEMETRY,
+}
+"""Transmission priorities of outbound MAVLink message types that are not sent
+with the default command priority.
+"""
+
+_IGNORED_MESSAGE_TYPES = frozenset(
+    (
+        "BAD_DATA",
+        "COMMAND_ACK",
+        "FENCE_STATUS",
+        "GPS_GLOBAL_ORIGIN",
+        "HOME_POSITION",
+        "HWSTATUS",
+        "LOCAL_POSITION_NED",  # maybe later?
+        "MEMINFO",
+        "MISSION_ACK",  # used for mission and geofence download / upload
+        "MISSION_COUNT",  # used for mission and geofence download / upload
+        "MISSION_CURRENT",  # maybe later?
+        "MISSION_ITEM_INT",  # used for mission and geofence download / upload
+        "MISSION_REQUEST",  # used for mission and geofence download / upload
+        "NAV_CONTROLLER_OUTPUT",
+        "PARAM_VALUE",
+        "POSITION_TARGET_GLOBAL_INT",
+        "POWER_STATUS",
+        "RADIO_STATUS",
+    )
+)
+"""MAVLink message types that the network knows about but does not need to
+handle apart from resolving the futures that are waiting for them.
+"""
+
+_REPLY_MESSAGE_TYPES = frozenset(
+    (
+        "AUTOPILOT_VERSION",
+        "COMMAND_ACK",
+        "FILE_TRANSFER_PROTOCOL",
+        "LOG_DATA",
+        "LOG_ENTRY",
+        "MISSION_ACK",
+        "MISSION_COUNT",
+        "MISSION_ITEM_INT",
+        "MISSION_REQUEST",
+        "MISSION_REQUEST_INT",
+        "PARAM_VALUE",
+        "POSITION_TARGET_GLOBAL_INT",
+    )
+)
+"""MAVLink message types that the extension waits for as responses to its own
+requests. These are never dropped by the inbound frame filter of the network,
+no matter what the allow-list of message types says; new response types that
+the extension starts waiting for must be added here.
+"""
+
+
+def get_transmission_priority(
+    spec: MAVLinkMessageSpecification,
+) -> TransmissionPriority:
+    """Returns the priority class that an outbound MAVLink message belongs to
+    in the outbound queues of the communication manager.
+    """
+    type, fields = spec
+    if type == "COMMAND_LONG" or type == "COMMAND_INT":
+        command = fields.get("command")
+        if command in _EMERGENCY_COMMANDS:
+            return TransmissionPriority.EMERGENCY
+        elif command == MAVCommand.SET_MESSAGE_INTERVAL:
+            return TransmissionPriority.TELEMETRY
+        else:
+            return TransmissionPriority.COMMAND
+    return _MESSAGE_TYPE_PRIORITIES.get(type, TransmissionPriority.COMMAND)
+
+
 Matchers = dict[str, list[tuple[int | None, MAVLinkMessageMatcher, Future]]]
 
 
@@ -95,9 +214,22 @@ class MAVLinkNetwork:
     register_uav: Callable[[MAVLinkUAV], None]
     manager: CommunicationManager[MAVLinkMessageSpecification, Any]
 
+    _accepted_message_types: list[int | str] | None
+    """MAVLink message types (names or numeric IDs) that are decoded from the
+    inbound traffic of the network on top of the ones that the network
+    processes or waits for as responses; ``None`` if no extra message types
+    are decoded.
+    """
+
     _connections: list[Connection]
     _uav_addresses: dict[MAVLinkUAV, Any]
 
+    _dispatch_table: MAVLinkMessageDispatchTable
+    """Dispatch table mapping numeric MAVLink message IDs to the entries that
+    describe how messages of that type should be processed. Compiled lazily
+    by the inbound message handler task.
+    """
+
     _id: str
     """ID of the network."""
 
@@ -107,6 +239,11 @@ class MAVLinkNetwork:
     Skybrush.
     """
 
+    _link_statistics: MAVLinkNetworkLinkStatistics
+    """Rolling statistics of the connections of the network and of the MAVLink
+    systems seen in the network.
+    """
+
     _matchers: Matchers
     """Dictionary mapping MAVLink message types to lists of tuples consisting
     of an optional MAVLink system ID, a MAVLink message matching criterion and a
@@ -123,6 +260,17 @@ class MAVLinkNetwork:
     system choose the link on its own.
     """
 
+    _rtk_bandwidth_limit: float
+    """Maximum number of bytes of RTK correction data to send on each
+    connection of this network per second; zero if the bandwidth is not
+    limited.
+    """
+
+    _rtk_bandwidth_limiters: WeakKeyDictionary[Connection, RTKBandwidthLimiter]
+    """Token buckets that limit the bandwidth used by RTK correction packets,
+    keyed by the connections of the network they apply to.
+    """
+
     _rssi_mode: RSSIMode
     """Specifies how this network derives RSSI values for the drones in the
     network.
@@ -168,8 +316,11 @@ class MAVLinkNetwork:
         result = cls(
             spec.id,
             system_id=spec.system_id,
+            accepted_message_types=spec.accepted_message_types,
             id_formatter=spec.id_format.format,
             packet_loss=spec.packet_loss,
+            parser_workers=spec.parser_workers,
+            rtk_bandwidth_limit=spec.rtk_bandwidth_limit,
             statustext_targets=spec.statustext_targets,
             routing=spec.routing,
             rssi_mode=spec.rssi_mode,
@@ -190,8 +341,11 @@ class MAVLinkNetwork:
         id: str,
         *,
         system_id: int = 254,
+        accepted_message_types: Iterable[int | str] | None = None,
         id_formatter: Callable[[int, str], str] = "{0}".format,
         packet_loss: float = 0,
+        parser_workers: int = 0,
+        rtk_bandwidth_limit: float = 0,
         statustext_targets: MAVLinkStatusTextTargetSpecification = MAVLinkStatusTextTargetSpecification.DEFAULT,
         routing: MAVLinkMessageRoutingTable | None = None,
         rssi_mode: RSSIMode = RSSIMode.RADIO_STATUS,
@@ -209,11 +363,23 @@ class MAVLinkNetwork:
             id: the network ID
             system_id: the MAVLink system ID of the Skybrush server within the
                 network
+            accepted_message_types: MAVLink message types (names or numeric
+                IDs) to decode from the inbound traffic of the network on top
+                of the ones that the network processes or waits for as
+                responses. Frames of other message types are dropped based on
+                their headers, before they are parsed.
             id_formatter: function that can be called with a MAVLink system ID
                 and the network ID, and that must return a string that will be
                 used for the drone with the given system ID on the network
             packet_loss: when larger than zero, simulates packet loss on the
                 network by randomly dropping received and sent MAVLink messages
+            parser_workers: number of worker processes to use for parsing
+                inbound MAVLink messages; zero means to parse them in the
+                main process
+            rtk_bandwidth_limit: maximum number of bytes of RTK correction
+                data to send on each connection per second; zero means no
+                limit. RTK correction packets that would exceed the limit of a
+                connection are dropped as a whole from that connection.
             statustext_targets: specifies where to forward MAVLink status text
                 messages. When the set contains the string `"server"`, the
                 status messages will be sent to the server log. When the
@@ -242,9 +408,13 @@ class MAVLinkNetwork:
         self.log = None  # type: ignore
         self._matchers = None  # type: ignore
 
+        self._accepted_message_types = (
+            list(accepted_message_types) if accepted_message_types is not None else None
+        )
         self._id = id
         self._id_formatter = id_formatter
         self._packet_loss = max(float(packet_loss), 0.0)
+        self._parser_workers = max(int(parser_workers), 0)
         self._routing = routing or {}
         self._rssi_mode = rssi_mode
         self._signing = signing
@@ -255,6 +425,8 @@ class MAVLinkNetwork:
         self._use_broadcast_rate_limiting = bool(use_broadcast_rate_limiting)
 
         self._connections = []
+        self._dispatch_table = MAVLinkMessageDispatchTable()
+        self._link_statistics = MAVLinkNetworkLinkStatistics()
         self._uavs = {}
         self._uav_addresses = {}
 
@@ -265,7 +437,8 @@ class MAVLinkNetwork:
         self._time_axis_configuration_manager = MAVLinkTimeAxisConfigurationManager(
             self
         )
-        self._rtk_correction_packet_encoder = RTKCorrectionPacketEncoder()
+        self._rtk_bandwidth_limit = max(float(rtk_bandwidth_limit), 0.0)
+        self._rtk_bandwidth_limiters = WeakKeyDictionary()
 
     def add_connection(self, connection: Connection):
         """Adds the given connection object to this network.
@@ -388,6 +561,32 @@ class MAVLinkNetwork:
                     )
                 )
 
+            # Create the filter that drops unwanted frames before parsing
+            frame_filter = self._create_frame_filter(log)
+
+            # Create the worker pool for parsing inbound messages if needed.
+            # Signature verification needs state shared with the outbound
+            # direction so it cannot be moved to worker processes.
+            parser_pool: MAVLinkParserWorkerPool | None = None
+            if self._parser_workers > 0:
+                if self._signing.enabled:
+                    log.warning(
+                        "Parser worker processes cannot be used with MAVLink "
+                        "signing; parsing messages in the main process",
+                        extra={"id": self._id},
+                    )
+                else:
+                    parser_pool = MAVLinkParserWorkerPool(
+                        self._parser_workers,
+                        system_id=self._system_id,
+                        frame_filter=frame_filter,
+                    )
+
+            # The workers drop and decimate frames without telling the link
+            # statistics, so the gaps in the sequence numbers would show up as
+            # packet loss
+            self._link_statistics.track_sequence_numbers = parser_pool is None
+
             # Create the communication manager
             manager = create_communication_manager(
                 packet_loss=self._packet_loss,
@@ -395,6 +594,12 @@ class MAVLinkNetwork:
                 system_id=self._system_id,
                 signing=self._signing,
                 use_broadcast_rate_limiting=self._use_broadcast_rate_limiting,
+                parse_in_workers=parser_pool is not None,
+                frame_filter=frame_filter,
+                link_statistics={
+                    connection: self._link_statistics.for_connection(name)
+                    for connection, name in zip(self._connections, connection_names)
+                },
             )
 
             # Warn the user about the simulated packet loss setting
@@ -447,11 +652,27 @@ class MAVLinkNetwork:
                 nursery.start_soon(self._scheduled_takeoff_manager.run)
                 nursery.start_soon(self._led_light_configuration_manager.run)
                 nursery.start_soon(self._time_axis_configuration_manager.run)
+                nursery.start_soon(
+                    self._update_link_statistics,
+                    dict(zip(connection_names, self._connections)),
+                )
+
+                # Start the communication manager. When parser workers are
+                # used, the inbound messages pass through the worker pool
+                # before reaching our own message handler.
+                if parser_pool is not None:
+                    consumer = partial(
+                        parser_pool.run,
+                        consumer=self._handle_inbound_messages,
+                        log=log,
+                        log_extra={"id": self._id},
+                    )
+                else:
+                    consumer = self._handle_inbound_messages
 
-                # Start the communication manager
                 try:
                     await manager.run(
-                        consumer=self._handle_inbound_messages,
+                        consumer=consumer,
                         supervisor=supervisor,
                         log=log,
                         tasks=[self._generate_heartbeats],
@@ -474,7 +695,9 @@ class MAVLinkNetwork:
             channel: specifies the channel that the packet should be sent on;
                 defaults to the primary channel of the network
         """
-        await self.manager.broadcast_packet(spec, destination=channel)
+        await self.manager.broadcast_packet(
+            spec, destination=channel, priority=get_transmission_priority(spec)
+        )
 
     def enqueue_rc_override_packet(self, spec: MAVLinkMessageSpecification) -> None:
         """Enqueues a message containing a MAVLink RC override packet to the network,
@@ -484,25 +707,42 @@ class MAVLinkNetwork:
             spec, destination=Channel.RC, allow_failure=True
         )
 
-    def enqueue_rtk_correction_packet(self, packet: bytes) -> None:
-        """Handles an RTK correction packet that the server wishes to forward
-        to the drones in this network.
+    def enqueue_rtk_correction_messages(
+        self, messages: Sequence[MAVLinkMessageSpecification]
+    ) -> None:
+        """Enqueues the GPS_RTCM_DATA messages of a single RTK correction
+        packet for transmission to the drones in this network.
+
+        The messages may be shared with other networks; they are not modified
+        by the network. All the messages are dropped from a connection if they
+        do not fit into the RTK bandwidth budget of that connection.
 
         Parameters:
-            packet: the raw RTK correction packet to forward to the drones in
-                this network
+            messages: the GPS_RTCM_DATA messages that make up a single RTK
+                correction packet
         """
-        if not self.manager:
+        if not self.manager or not messages:
             return
 
         # Do not send the RTK correction packet if the network has no drones yet
         if self.num_uavs == 0:
             return
 
-        for message in self._rtk_correction_packet_encoder.encode(packet):
-            self.manager.enqueue_broadcast_packet(
-                message, destination=Channel.RTK, allow_failure=True
-            )
+        accept = (
+            partial(self._try_consume_rtk_bandwidth, messages)
+            if self._rtk_bandwidth_limit > 0
+            else None
+        )
+
+        # The messages are enqueued as a group so a full RTK queue drops whole
+        # correction packets and never leaves partial ones behind
+        self.manager.enqueue_broadcast_packets(
+            messages,
+            destination=Channel.RTK,
+            allow_failure=True,
+            priority=TransmissionPriority.RTK,
+            accept=accept,
+        )
 
     def notify_led_light_config_changed(self, config: LightConfiguration):
         """Notifies the network that the LED light configuration of the drones
@@ -532,6 +772,21 @@ class MAVLinkNetwork:
         """
         self._time_axis_configuration_manager.notify_time_axis_config_changed(config)
 
+    def get_message_processing_statistics(
+        self,
+    ) -> list[MAVLinkMessageProcessingStatistics]:
+        """Returns the number of inbound MAVLink messages processed so far and
+        the total time spent on processing them, for each MAVLink message type,
+        sorted by the total processing time in decreasing order.
+        """
+        return self._dispatch_table.get_statistics()
+
+    def get_link_statistics(self) -> MAVLinkNetworkLinkStatistics:
+        """Returns the rolling statistics of the connections of the network and
+        of the MAVLink systems seen in the network.
+        """
+        return self._link_statistics
+
     @property
     def num_uavs(self) -> int:
         """Returns the number of UAVs in this network."""
@@ -559,7 +814,10 @@ class MAVLinkNetwork:
             raise RuntimeError("UAV has no address in this network")
 
         destination = (Channel.PRIMARY, address)
-        await self.manager.send_packet(spec, destination)
+        target.link_statistics.notify_sent()
+        await self.manager.send_packet(
+            spec, destination, priority=TransmissionPriority.HEARTBEAT
+        )
 
     async def send_packet(
         self,
@@ -643,11 +901,13 @@ class MAVLinkNetwork:
         # From this point onwards, spec is not None, i.e. we are definitely
         # sending something
 
+        priority = get_transmission_priority(spec)
         spec[1].update(
             target_system=target.system_id,
             target_component=MAVComponent.AUTOPILOT1,
             _mavlink_version=target.mavlink_version,
         )
+        target.link_statistics.notify_sent()
 
         if wait_for_response:
             response_type, response_fields = wait_for_response
@@ -656,7 +916,7 @@ class MAVLinkNetwork:
             ) as future:
                 # TODO(ntamas): in theory, we could be getting a matching packet
                 # _before_ we sent ours. Sort this out if it causes problems.
-                await self.manager.send_packet(spec, destination)
+                await self.manager.send_packet(spec, destination, priority=priority)
                 return await future.wait()
 
         elif wait_for_one_of:
@@ -675,11 +935,24 @@ class MAVLinkNetwork:
 
                 # Now send the message and wait for _any_ of the futures to
                 # succeed
-                await self.manager.send_packet(spec, destination)
+                await self.manager.send_packet(spec, destination, priority=priority)
                 return await race(tasks)
 
         else:
-            await self.manager.send_packet(spec, destination)
+            await self.manager.send_packet(spec, destination, priority=priority)
+
+    def remove_uav(self, uav: MAVLinkUAV) -> None:
+        """Removes the given UAV from this network.
+
+        The UAV is created again from scratch if a message arrives from its
+        system ID later on.
+
+        Parameters:
+            uav: the UAV to remove
+        """
+        if self._uavs.get(uav.system_id) is uav:
+            del self._uavs[uav.system_id]
+        self._uav_addresses.pop(uav, None)
 
     def uavs(self) -> Iterable[MAVLinkUAV]:
         """Returns an iterator that iterates over the UAVs in this network.
@@ -689,6 +962,88 @@ class MAVLinkNetwork:
         """
         return self._uavs.values() if self._uavs else []
 
+    def _create_frame_filter(self, log: Logger) -> MAVLinkFrameFilter:
+        """Creates the filter that drops the inbound MAVLink frames that this
+        network would ignore anyway, based on their headers.
+
+        The filter accepts the message types that the network dispatches to its
+        handlers or waits for as responses to its own requests, and the ones in
+        the allow-list of message types configured for the network.
+        """
+        uav_handlers, network_handlers = self._create_message_handlers()
+        message_ids, _ = resolve_message_types(
+            {*uav_handlers, *network_handlers, *_REPLY_MESSAGE_TYPES}
+        )
+
+        if self._accepted_message_types is not None:
+            extra_ids, unknown = resolve_message_types(self._accepted_message_types)
+            if unknown:
+                log.warning(
+                    f"Unknown MAVLink message types in allow-list: {', '.join(unknown)}",
+                    extra={"id": self._id},
+                )
+            message_ids |= extra_ids
+
+        log.info(
+            f"Decoding only {len(message_ids)} MAVLink message type(s)",
+            extra={"id": self._id},
+        )
+
+        return MAVLinkFrameFilter(
+            message_ids=message_ids, system_id_range=self._uav_system_id_range
+        )
+
+    def _create_message_handlers(
+        self,
+    ) -> tuple[dict[str, UAVMessageHandler], dict[str, NetworkMessageHandler]]:
+        """Creates the handlers of the inbound MAVLink message types that the
+        network processes.
+
+        Returns:
+            a dictionary of handlers that are called with the UAV that sent the
+            message and the message itself, and a dictionary of handlers that
+            are called with the message and the connection ID and address as
+            keyword arguments, both keyed by MAVLink message type names
+        """
+        # Handlers that are called with the UAV that sent the message and the
+        # message itself. The UAV is resolved once per message by the dispatcher.
+        uav_handlers: dict[str, UAVMessageHandler] = {
+            "AUTOPILOT_VERSION": MAVLinkUAV.handle_message_autopilot_version,
+            "BATTERY_STATUS": MAVLinkUAV.handle_message_battery_status,
+            "COMMAND_LONG": MAVLinkUAV.handle_message_command_long,
+            "DATA16": MAVLinkUAV.handle_message_drone_show_status,
+            "DATA32": MAVLinkUAV.handle_message_drone_show_status,
+            "DATA64": MAVLinkUAV.handle_message_drone_show_status,
+            "DATA96": MAVLinkUAV.handle_message_drone_show_status,
+            "FILE_TRANSFER_PROTOCOL": MAVLinkUAV.handle_message_file_transfer_protocol,
+            "GLOBAL_POSITION_INT": MAVLinkUAV.handle_message_global_position_int,
+            "GPS_RAW_INT": MAVLinkUAV.handle_message_gps_raw_int,
+            "HEARTBEAT": MAVLinkUAV.handle_message_heartbeat,
+            "LOG_DATA": MAVLinkUAV.handle_message_log_data,
+            "LOG_ENTRY": MAVLinkUAV.handle_message_log_entry,
+            "MAG_CAL_PROGRESS": MAVLinkUAV.handle_message_mag_cal_progress,
+            "MAG_CAL_REPORT": MAVLinkUAV.handle_message_mag_cal_report,
+            "SCALED_IMU": MAVLinkUAV.handle_message_scaled_imu,  # common handler for all IMUs
+            "SCALED_IMU2": MAVLinkUAV.handle_message_scaled_imu,  # common handler for all IMUs
+            "SCALED_IMU3": MAVLinkUAV.handle_message_scaled_imu,  # common handler for all IMUs
+            "SYS_STATUS": MAVLinkUAV.handle_message_sys_status,
+        }
+
+        # We need to respond to RADIO_STATUS messages only if we are parsing the
+        # RSSI values from there, otherwise they can be ignored
+        if self._rssi_mode is RSSIMode.RADIO_STATUS:
+            uav_handlers["RADIO_STATUS"] = MAVLinkUAV.handle_message_radio_status
+
+        # Handlers that are called with the message and the connection ID and
+        # address as keyword arguments
+        network_handlers: dict[str, NetworkMessageHandler] = {
+            "STATUSTEXT": self._handle_message_statustext,
+            "TIMESYNC": self._handle_message_timesync,
+            "V2_EXTENSION": self._handle_message_v2_extension,
+        }
+
+        return uav_handlers, network_handlers
+
     def _create_uav(self, system_id: int) -> MAVLinkUAV:
         """Creates a new UAV with the given system ID in this network and
         registers it in the UAV registry.
@@ -705,6 +1060,7 @@ class MAVLinkNetwork:
         self._uavs[system_id] = uav = self.driver.create_uav(uav_id)
         uav.assign_to_network_and_system_id(self.id, system_id)
         uav._rssi_mode = self._rssi_mode
+        uav.link_statistics = self._link_statistics.for_system_id(system_id)
 
         self.register_uav(uav)
 
@@ -747,7 +1103,10 @@ class MAVLinkNetwork:
         """
         async for _ in periodic(1):
             await manager.broadcast_packet(
-                HEARTBEAT_SPEC, destination=Channel.PRIMARY, allow_failure=True
+                HEARTBEAT_SPEC,
+                destination=Channel.PRIMARY,
+                allow_failure=True,
+                priority=TransmissionPriority.HEARTBEAT,
             )
 
     async def _handle_inbound_messages(
@@ -759,59 +1118,62 @@ class MAVLinkNetwork:
         Parameters:
             channel: a Trio receive channel that yields inbound MAVLink messages.
         """
-        # We need to respond to RADIO_STATUS messages only if we are parsing the
-        # RSSI values from there, otherwise they can be ignored
-        radio_status_handler = (
-            self._handle_message_radio_status
-            if self._rssi_mode is RSSIMode.RADIO_STATUS
-            else nop
-        )
-
-        handlers = {
-            "AUTOPILOT_VERSION": self._handle_message_autopilot_version,
-            "BAD_DATA": nop,
-            "BATTERY_STATUS": self._handle_message_battery_status,
-            "COMMAND_ACK": nop,
-            "COMMAND_LONG": self._handle_message_command_long,
-            "DATA16": self._handle_message_data,
-            "DATA32": self._handle_message_data,
-            "DATA64": self._handle_message_data,
-            "DATA96": self._handle_message_data,
-            "FENCE_STATUS": nop,
-            "FILE_TRANSFER_PROTOCOL": nop,
-            "GLOBAL_POSITION_INT": self._handle_message_global_position_int,
-            "GPS_GLOBAL_ORIGIN": nop,
-            "GPS_RAW_INT": self._handle_message_gps_raw_int,
-            "HEARTBEAT": self._handle_message_heartbeat,
-            "HOME_POSITION": nop,
-            "HWSTATUS": nop,
-            "LOCAL_POSITION_NED": nop,  # maybe later?
-            "LOG_DATA": self._handle_message_log_data,
-            "LOG_ENTRY": self._handle_message_log_entry,
-            "MAG_CAL_PROGRESS": self._handle_message_mag_cal_progress,
-            "MAG_CAL_REPORT": self._handle_message_mag_cal_report,
-            "MEMINFO": nop,
-            "MISSION_ACK": nop,  # used for mission and geofence download / upload
-            "MISSION_COUNT": nop,  # used for mission and geofence download / upload
-            "MISSION_CURRENT": nop,  # maybe later?
-            "MISSION_ITEM_INT": nop,  # used for mission and geofence download / upload
-            "MISSION_REQUEST": nop,  # used for mission and geofence download / upload
-            "NAV_CONTROLLER_OUTPUT": nop,
-            "PARAM_VALUE": nop,
-            "POSITION_TARGET_GLOBAL_INT": nop,
-            "POWER_STATUS": nop,
-            "RADIO_STATUS": radio_status_handler,
-            "SCALED_IMU": self._handle_message_scaled_imu,  # common handler for all IMUs
-            "SCALED_IMU2": self._handle_message_scaled_imu,  # common handler for all IMUs
-            "SCALED_IMU3": self._handle_message_scaled_imu,  # common handler for all IMUs
-            "STATUSTEXT": self._handle_message_statustext,
-            "SYS_STATUS": self._handle_message_sys_status,
-            "TIMESYNC": self._handle_message_timesync,
-            "V2_EXTENSION": self._handle_message_v2_extension,
+        uav_handlers, network_handlers = self._create_message_handlers()
+
+        # Filters that must pass before the handler of the message is called.
+        # These are checked _before_ resolving the UAV so we do not create
+        # UAVs for messages that we are not interested in.
+        filters: dict[str, MessageFilter] = {
+            "DATA16": _is_drone_show_status_message,
+            "DATA32": _is_drone_show_status_message,
+            "DATA64": _is_drone_show_status_message,
+            "DATA96": _is_drone_show_status_message,
+            "HEARTBEAT": _is_vehicle_heartbeat,  # ignore non-vehicle heartbeats
         }
 
-        autopilot_component_id = MAVComponent.AUTOPILOT1
-        udp_bridge_id = MAVComponent.UDP_BRIDGE
+        # SiK radios use system ID = 51 and component ID = 68
+        # (MAV_COMP_ID_TELEMETRY_RADIO)
+        # mavesp8266 uses the correct system ID and component ID = 0xf0
+        # (MAV_COMP_ID_UDP_BRIDGE)
+        autopilot_only = (MAVComponent.AUTOPILOT1,)
+        autopilot_or_udp_bridge = (MAVComponent.AUTOPILOT1, MAVComponent.UDP_BRIDGE)
+
+        # Unhandled message types that we have not warned about yet because
+        # the messages of these types came from components that we ignore
+        unwarned_types: set[str] = set()
+
+        def warn_about_unhandled_message(message: MAVLinkMessage) -> None:
+            self.log.warning(
+                f"Unhandled MAVLink message type: {message.get_type()}",
+                extra=self._log_extra_from_message(message),
+            )
+
+        def compile_entry(message: MAVLinkMessage) -> MAVLinkMessageDispatchEntry:
+            type = message.get_type()
+            components = (
+                autopilot_or_udp_bridge if type == "RADIO_STATUS" else autopilot_only
+            )
+
+            handler = uav_handlers.get(type)
+            to_uav = handler is not None
+            if handler is None:
+                handler = network_handlers.get(type)
+                if handler is None and type not in _IGNORED_MESSAGE_TYPES:
+                    if message.get_srcComponent() in components:
+                        warn_about_unhandled_message(message)
+                    else:
+                        unwarned_types.add(type)
+
+            return MAVLinkMessageDispatchEntry(
+                type,
+                components=components,
+                matchers=self._matchers[type],
+                handler=handler,
+                filter=filters.get(type),
+                to_uav=to_uav,
+            )
+
+        self._dispatch_table = dispatch_table = MAVLinkMessageDispatchTable()
 
         # Many third-party MAVLink-based drones do not respond to broadcast
         # messages sent to them with an IP address of 255.255.255.255 as they
@@ -819,39 +1181,46 @@ class MAVLinkNetwork:
         # Therefore, we need to re-bind the broadcast address of the channel
         # as soon as we have received the first packet from it, based on the
         # address of that packet and the netmasks of the network interfaces.
-        # The following dict stores whether a link was already switched to its
-        # subnet-specific broadcast address
-        broadcast_address_updated: dict[str, bool] = defaultdict(bool)
+        # The following set stores the links that were already switched to
+        # their subnet-specific broadcast address
+        broadcast_address_updated: set[str] = set()
+
+        find_uav = self._find_uav_from_message
+        update_link_statistics = self._link_statistics.notify_received
 
         async for connection_id, (message, address) in channel:
             # Uncomment this for debugging
             # self.log.info(repr(message))
 
-            # SiK radios use system ID = 51 and component ID = 68
-            # (MAV_COMP_ID_TELEMETRY_RADIO)
-            # mavesp8266 uses the correct system ID and component ID = 0xf0
-            # (MAV_COMP_ID_UDP_BRIDGE)
+            # Look up the dispatch entry of the message type, compiling it if
+            # this is the first time we see this message type
+            msg_id: int = message.get_msgId()
+            entry = dispatch_table.get(msg_id)
+            if entry is None:
+                dispatch_table[msg_id] = entry = compile_entry(message)
 
-            # Get the source component and the message type
-            src_component = message.get_srcComponent()
-            type = message.get_type()
+            update_link_statistics(connection_id, message, entry.type)
 
             # Determine whether we should process this message
-            should_process = src_component == autopilot_component_id or (
-                src_component == udp_bridge_id and type == "RADIO_STATUS"
-            )
-            if not should_process:
+            if message.get_srcComponent() not in entry.components:
+                continue
+            if unwarned_types and entry.type in unwarned_types:
+                unwarned_types.remove(entry.type)
+                warn_about_unhandled_message(message)
+            if entry.is_idle:
                 continue
 
             # Update the broadcast address to a subnet-specific one if needed
-            if not broadcast_address_updated[connection_id]:
+            if connection_id not in broadcast_address_updated:
+                broadcast_address_updated.add(connection_id)
                 await self._update_broadcast_address_of_channel_to_subnet(
                     connection_id, address
                 )
-                broadcast_address_updated[connection_id] = True
+
+            started_at = perf_counter()
 
             # Resolve all futures that are waiting for this message
-            for system_id, params, future in self._matchers[type]:
+            for system_id, params, future in entry.matchers:
                 # Check system ID early on and skip if it does not match
                 if system_id is not None and message.get_srcSystem() != system_id:
                     continue
@@ -876,126 +1245,22 @@ class MAVLinkNetwork:
                     future.set_result(message)
 
             # Call the message handler if we have one
-            handler = handlers.get(type)
-            if handler:
+            handler = entry.handler
+            if handler is not None and (entry.filter is None or entry.filter(message)):
                 try:
-                    handler(message, connection_id=connection_id, address=address)
+                    if entry.to_uav:
+                        uav = find_uav(message, address)
+                        if uav:
+                            handler(uav, message)
+                    else:
+                        handler(message, connection_id=connection_id, address=address)
                 except Exception:
                     self.log.exception(
-                        f"Error while handling MAVLink message of type {type}"
+                        f"Error while handling MAVLink message of type {entry.type}"
                     )
-            else:
-                self.log.warning(
-                    f"Unhandled MAVLink message type: {type}",
-                    extra=self._log_extra_from_message(message),
-                )
-                handlers[type] = nop
-
-    def _handle_message_autopilot_version(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_autopilot_version(message)
-
-    def _handle_message_battery_status(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        """Handles an incoming MAVLink BATTERY_STATUS message."""
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_battery_status(message)
-
-    def _handle_message_command_long(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        """Handles an incoming MAVLink COMMAND_LONG message."""
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_command_long(message)
-
-    def _handle_message_data(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        if message.type == DroneShowStatus.TYPE:
-            uav = self._find_uav_from_message(message, address)
-            if uav:
-                uav.handle_message_drone_show_status(message)
-
-    def _handle_message_global_position_int(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_global_position_int(message)
-
-    def _handle_message_gps_raw_int(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_gps_raw_int(message)
-
-    def _handle_message_heartbeat(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        """Handles an incoming MAVLink HEARTBEAT message."""
-        if not MAVType(message.type).is_vehicle:
-            # Ignore non-vehicle heartbeats
-            return
-
-        # Forward heartbeat to the appropriate UAV
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_heartbeat(message)
 
-    def _handle_message_log_data(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        """Handles an incoming MAVLink LOG_DATA message."""
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_log_data(message)
-
-    def _handle_message_log_entry(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        """Handles an incoming MAVLink LOG_ENTRY message."""
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_log_entry(message)
-
-    def _handle_message_mag_cal_progress(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        """Handles an incoming MAVLink MAG_CAL_PROGRESS message."""
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_mag_cal_progress(message)
-
-    def _handle_message_mag_cal_report(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        """Handles an incoming MAVLink MAG_CAL_REPORT message."""
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_mag_cal_report(message)
-
-    def _handle_message_radio_status(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        """Handles an incoming MAVLink RADIO_STATUS message."""
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_radio_status(message)
-
-    def _handle_message_scaled_imu(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        """Handles an incoming MAVLink SCALED_IMU, SCALED_IMU2 or SCALED_IMU3 message."""
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_scaled_imu(message)
+            entry.count += 1
+            entry.elapsed += perf_counter() - started_at
 
     def _handle_message_statustext(
         self, message: MAVLinkMessage, *, connection_id: str, address: Any
@@ -1028,20 +1293,21 @@ class MAVLinkNetwork:
                 severity=flockwave_severity_from_mavlink_severity(message.severity),
             )
 
-    def _handle_message_sys_status(
-        self, message: MAVLinkMessage, *, connection_id: str, address: Any
-    ):
-        uav = self._find_uav_from_message(message, address)
-        if uav:
-            uav.handle_message_sys_status(message)
-
     def _handle_message_timesync(
         self, message: MAVLinkMessage, *, connection_id: str, address: Any
     ):
         """Handles an incoming MAVLink TIMESYNC message."""
         if message.tc1 != 0:
             now = time_ns() // 1000
-            self.log.info(f"Roundtrip time: {(now - message.ts1) // 1000} msec")
+            rtt_usec = now - message.ts1
+            self.log.info(f"Roundtrip time: {rtt_usec // 1000} msec")
+
+            # Feed the round-trip time into the estimator of the UAV if the
+            # response is plausible
+            if 0 <= rtt_usec < 60_000_000:
+                uav = self._find_uav_from_message(message, address)
+                if uav is not None:
+                    uav.get_rtt_estimator().add_sample(rtt_usec / 1e6)
         else:
             # Timesync request, ignore it.
             pass
@@ -1233,6 +1499,60 @@ class MAVLinkNetwork:
                 "Failed to update broadcast address to a subnet-specific one"
             )
 
+    def _try_consume_rtk_bandwidth(
+        self, messages: Sequence[MAVLinkMessageSpecification], connection: Connection
+    ) -> bool:
+        """Attempts to take the bytes needed to send the given GPS_RTCM_DATA
+        messages from the RTK bandwidth budget of the given connection.
+
+        Returns:
+            whether the messages fit into the budget of the connection
+        """
+        limiter = self._rtk_bandwidth_limiters.get(connection)
+        if limiter is None:
+            limiter = self._rtk_bandwidth_limiters[connection] = RTKBandwidthLimiter(
+                self._rtk_bandwidth_limit
+            )
+        return limiter.try_consume(messages)
+
+    async def _update_link_statistics(self, connections: dict[str, Connection]) -> None:
+        """Updates the rates of the link statistics once per second and
+        publishes the statistics of the UAVs in the device tree.
+
+        Also evicts the idle entries from the tables of the low-level MAVLink
+        objects of the datagram-based connections.
+
+        Parameters:
+            connections: the connections of the network, keyed by their names
+        """
+        async for _ in periodic(1):
+            now = monotonic()
+            for name, connection in connections.items():
+                table = get_parser_table(connection)
+                if table is not None:
+                    table.evict_idle(now)
+                self._link_statistics.for_connection(name).parsers = table
+
+            self._link_statistics.update(now)
+            if self._uavs:
+                with self.driver.create_device_tree_mutator() as mutator:
+                    for uav in self._uavs.values():
+                        uav.update_link_statistics_in_device_tree(mutator)
+
+
+def _is_drone_show_status_message(message: MAVLinkMessage) -> bool:
+    """Returns whether the given MAVLink DATA16, DATA32, DATA64 or DATA96
+    message is a Skybrush-specific drone show status message.
+    """
+    return message.type == DroneShowStatus.TYPE
+
+
+def _is_vehicle_heartbeat(message: MAVLinkMessage) -> bool:
+    """Returns whether the given MAVLink HEARTBEAT message was sent by a
+    vehicle.
+    """
+    return MAVType(message.type).is_vehicle
+
 
 def format_channel_ids(ids: Sequence[str]) -> str:
     """Formats a list of communication channel IDs in a way that is suitable for
@@ -0,0 +1,183 @@
+"""Bounded table of the low-level MAVLink objects of a datagram-based
+connection, keyed by the addresses of the peers.
+
+Datagram-based connections need a separate MAVLink object for each address
+they talk to, both for the sequence numbers of the outbound packets and for
+keeping track of partially parsed inbound frames. Addresses come and go on
+long-running networks (DHCP leases expire, drones roam between access points,
+stray broadcasts arrive from unrelated devices), so the table evicts the
+objects of addresses that have been idle for a while and keeps the number of
+objects bounded. The bound grows when all the addresses in the table are in
+active use so large fleets do not keep evicting the objects of live drones.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from flockwave.protocols.mavlink.types import MinimalMAVLinkInterface
+
+__all__ = ("MAVLinkParserTable",)
+
+
+class MAVLinkParserTable:
+    """Bounded table of low-level MAVLink objects keyed by address, with
+    idle eviction.
+
+    Looking up an address that is not in the table creates a new entry for
+    it, so the table can be used in place of a ``defaultdict``.
+    """
+
+    created: int
+    """Number of MAVLink objects constructed by the table."""
+
+    evicted: int
+    """Number of entries evicted from the table, either because they were idle
+    or because the table was full.
+    """
+
+    idle_timeout: float
+    """Number of seconds after which an entry that has not been looked up is
+    evicted.
+    """
+
+    max_size: int
+    """Maximum number of entries in the table. Doubled, up to `size_limit`,
+    when a new address is looked up while the table is full and none of its
+    entries are idle.
+    """
+
+    size_limit: int
+    """Upper bound of `max_size`."""
+
+    _clock: Callable[[], float]
+    """Monotonic clock used to determine when the entries were used."""
+
+    _entries: OrderedDict[Hashable, tuple[MinimalMAVLinkInterface, float]]
+    """MAVLink objects and the time when they were last looked up, keyed by
+    address, from the least recently used one to the most recently used one.
+    """
+
+    _factory: Callable[[], MinimalMAVLinkInterface]
+    """Function that constructs a new MAVLink object."""
+
+    _next_idle_check_at: float
+    """Time when the table is checked for idle entries the next time when a
+    new address is looked up.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], MinimalMAVLinkInterface],
+        *,
+        max_size: int = 1024,
+        size_limit: int = 65536,
+        idle_timeout: float = 300,
+        clock: Callable[[], float] = monotonic,
+    ):
+        """Constructor.
+
+        Parameters:
+            factory: function that constructs a new MAVLink object
+            max_size: initial maximum number of entries in the table. The
+                least recently used entry is evicted when a new address is
+                looked up in a full table, unless all the entries are in
+                active use; the table grows in this case instead.
+            size_limit: upper bound of the maximum number of entries when the
+                table grows
+            idle_timeout: number of seconds after which an entry that has not
+                been looked up is evicted
+            clock: monotonic clock used to determine when the entries were used
+        """
+        self.created = 0
+        self.evicted = 0
+        self.idle_timeout = float(idle_timeout)
+        self.max_size = max(int(max_size), 1)
+        self.size_limit = max(int(size_limit), self.max_size)
+
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._factory = factory
+        self._next_idle_check_at = clock() + self.idle_timeout
+
+    def __contains__(self, address: Hashable) -> bool:
+        return address in self._entries
+
+    def __getitem__(self, address: Hashable) -> MinimalMAVLinkInterface:
+        now = self._clock()
+        entries = self._entries
+
+        entry = entries.get(address)
+        if entry is not None:
+            link = entry[0]
+            entries[address] = (link, now)
+            entries.move_to_end(address)
+            return link
+
+        if now >= self._next_idle_check_at:
+            self.evict_idle(now)
+        while len(entries) >= self.max_size:
+            oldest, (_, used_at) = next(iter(entries.items()))
+            if used_at > now - self.idle_timeout and self.max_size < self.size_limit:
+                # All the entries are in active use so the table is too small
+                # for the number of peers in the network
+                self.max_size = min(self.max_size * 2, self.size_limit)
+            else:
+                self._evict(oldest)
+
+        link = self._factory()
+        self.created += 1
+
+        entries[address] = (link, now)
+        return link
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """Evicts the entries that have not been looked up for at least
+        `idle_timeout` seconds.
+
+        Parameters:
+            now: the current time according to the clock of the table; ``None``
+                to query the clock
+
+        Returns:
+            the number of evicted entries
+        """
+        if now is None:
+            now = self._clock()
+
+        self._next_idle_check_at = now + self.idle_timeout / 4
+
+        # Entries are ordered by the time of their last use so we can stop at
+        # the first entry that is not idle
+        entries = self._entries
+        threshold = now - self.idle_timeout
+        count = 0
+        while entries:
+            address, (_, used_at) = next(iter(entries.items()))
+            if used_at > threshold:
+                break
+            self._evict(address)
+            count += 1
+
+        return count
+
+    @property
+    def json(self) -> dict[str, Any]:
+        """Returns the JSON representation of the state of the table."""
+        return {
+            "active": len(self._entries),
+            "maxSize": self.max_size,
+            "created": self.created,
+            "evicted": self.evicted,
+        }
+
+    def _evict(self, address: Hashable) -> None:
+        del self._entries[address]
+        self.evicted += 1
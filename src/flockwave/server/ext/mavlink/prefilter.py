@@ -0,0 +1,241 @@
+"""Filtering of inbound MAVLink frames based on their raw headers, before they
+are decoded by the MAVLink parser.
+
+Drones typically stream lots of telemetry that the server never looks at,
+and most of it comes from components that the server ignores anyway. Decoding
+a MAVLink message (checksum calculation, payload unpacking and message object
+construction) is fairly expensive in Python, while inspecting the message ID,
+the system ID and the component ID in the header of a frame is cheap. The
+filter in this module drops the unwanted frames from the inbound data before
+it reaches the parser.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING
+
+from .enums import MAVComponent, MAVMessageType
+
+if TYPE_CHECKING:
+    from flockwave.protocols.mavlink.types import MinimalMAVLinkInterface
+
+__all__ = ("ESSENTIAL_MESSAGE_TYPES", "MAVLinkFrameFilter", "resolve_message_types")
+
+
+ESSENTIAL_MESSAGE_TYPES: frozenset[int] = frozenset(
+    (
+        MAVMessageType.HEARTBEAT,
+        MAVMessageType.COMMAND_ACK,
+        MAVMessageType.AUTOPILOT_VERSION,
+    )
+)
+"""MAVLink message types that are always let through by the filter because
+the server cannot communicate with the drones without them.
+"""
+
+_MAVLINK_V1_MAGIC = 0xFE
+_MAVLINK_V2_MAGIC = 0xFD
+_MAVLINK_V2_SIGNED_FLAG = 0x01
+_MAVLINK_V2_SIGNATURE_LENGTH = 13
+
+
+class MAVLinkFrameFilter:
+    """Filter that drops complete MAVLink frames from a buffer based on the
+    message ID, the system ID and the component ID in their headers.
+
+    Only frames at the start of the buffer are examined, up to the first
+    incomplete frame or the first byte that is not the start of a MAVLink
+    frame. The rest of the buffer is left intact and is handed over to the
+    parser as is, which takes care of resynchronizing on noisy links and of
+    frames spanning multiple chunks of data.
+    """
+
+    __slots__ = ("_components", "_message_ids", "_system_ids")
+
+    _components: frozenset[int]
+    """Component IDs whose frames are accepted."""
+
+    _message_ids: frozenset[int] | None
+    """Message IDs whose frames are accepted; ``None`` if all message IDs are
+    accepted.
+    """
+
+    _system_ids: range | None
+    """Range of system IDs whose frames are accepted; ``None`` if all system
+    IDs are accepted.
+    """
+
+    def __init__(
+        self,
+        *,
+        message_ids: Iterable[int] | None = None,
+        system_id_range: tuple[int, int] | None = None,
+    ):
+        """Constructor.
+
+        Parameters:
+            message_ids: the MAVLink message IDs to accept; ``None`` means to
+                accept all message IDs. Essential message types are always
+                accepted.
+            system_id_range: the range of MAVLink system IDs to accept, closed
+                from the left and open from the right; ``None`` means to
+                accept all system IDs
+        """
+        self._components = frozenset((MAVComponent.AUTOPILOT1, MAVComponent.UDP_BRIDGE))
+        self._message_ids = (
+            frozenset(message_ids) | ESSENTIAL_MESSAGE_TYPES
+            if message_ids is not None
+            else None
+        )
+        self._system_ids = (
+            range(*system_id_range) if system_id_range is not None else None
+        )
+
+    def accepts(self, message_id: int, system_id: int, component_id: int) -> bool:
+        """Returns whether a frame with the given header fields is accepted by
+        the filter.
+        """
+        if component_id not in self._components:
+            return False
+
+        # Only RADIO_STATUS messages are accepted from the UDP bridge
+        if (
+            component_id == MAVComponent.UDP_BRIDGE
+            and message_id != MAVMessageType.RADIO_STATUS
+        ):
+            return False
+
+        if self._system_ids is not None and system_id not in self._system_ids:
+            return False
+
+        return self._message_ids is None or message_id in self._message_ids
+
+    def filter(
+        self, data: bytes, on_dropped: Callable[[int, int], None] | None = None
+    ) -> bytes:
+        """Removes the frames not accepted by the filter from the start of the
+        given buffer.
+
+        Parameters:
+            data: the buffer to filter
+            on_dropped: optional function to call with the system ID and the
+                component ID of each frame that was removed
+
+        Returns:
+            the filtered buffer; the same object as the input if no frames were
+            removed
+        """
+        length = len(data)
+        index = 0
+        kept: list[bytes] = []
+        dropped = False
+
+        while index < length:
+            magic = data[index]
+            if magic == _MAVLINK_V2_MAGIC:
+                if index + 10 > length:
+                    break
+                end = index + 12 + data[index + 1]
+                if data[index + 2] & _MAVLINK_V2_SIGNED_FLAG:
+                    end += _MAVLINK_V2_SIGNATURE_LENGTH
+                system_id = data[index + 5]
+                component_id = data[index + 6]
+                message_id = (
+                    data[index + 7] | (data[index + 8] << 8) | (data[index + 9] << 16)
+                )
+            elif magic == _MAVLINK_V1_MAGIC:
+                if index + 6 > length:
+                    break
+                end = index + 8 + data[index + 1]
+                system_id = data[index + 3]
+                component_id = data[index + 4]
+                message_id = data[index + 5]
+            else:
+                break
+
+            if end > length:
+                break
+
+            if self.accepts(message_id, system_id, component_id):
+                kept.append(data[index:end])
+            else:
+                dropped = True
+                if on_dropped is not None:
+                    on_dropped(system_id, component_id)
+
+            index = end
+
+        if not dropped:
+            return data
+
+        kept.append(data[index:])
+        return b"".join(kept)
+
+    def patch(
+        self,
+        link: MinimalMAVLinkInterface,
+        on_dropped: Callable[[int, int], None] | None = None,
+    ) -> None:
+        """Patches the `parse_buffer()` method of a MAVLink object such that
+        the inbound data is filtered before it reaches the parser.
+
+        The filter is bypassed while the parser holds a partially received
+        frame from an earlier chunk of data, because the start of the next
+        chunk is not aligned to a frame boundary in this case.
+
+        Parameters:
+            link: the MAVLink object to patch
+            on_dropped: optional function to call with the system ID and the
+                component ID of each frame that the filter removed
+        """
+        parse_buffer = link.parse_buffer
+        buf_len = getattr(link, "buf_len", None)
+
+        def filtered_parse_buffer(data: bytes):
+            if buf_len is None or buf_len() == 0:
+                data = self.filter(data, on_dropped)
+                if not data:
+                    return None
+            return parse_buffer(data)
+
+        link.parse_buffer = filtered_parse_buffer  # type: ignore
+
+
+def resolve_message_types(
+    types: Iterable[int | str], dialect: str = "ardupilotmega"
+) -> tuple[set[int], list[str]]:
+    """Resolves a list of MAVLink message type names or numeric IDs to numeric
+    message IDs.
+
+    Parameters:
+        types: the MAVLink message type names or numeric IDs
+        dialect: the MAVLink dialect to use for resolving the names
+
+    Returns:
+        the resolved message IDs and the list of names that could not be
+        resolved
+    """
+    from flockwave.protocols.mavlink.introspection import import_dialect
+
+    module = import_dialect(dialect)
+    result: set[int] = set()
+    unknown: list[str] = []
+
+    for type in types:
+        if isinstance(type, int):
+            result.add(type)
+            continue
+
+        name = str(type).strip().upper()
+        if name.isdigit():
+            result.add(int(name))
+            continue
+
+        message_id = getattr(module, f"MAVLINK_MSG_ID_{name}", None)
+        if message_id is None:
+            unknown.append(str(type))
+        else:
+            result.add(int(message_id))
+
+    return result, unknown
@@ -1,13 +1,99 @@
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Sequence
 from contextlib import contextmanager
 from itertools import cycle
 from logging import Logger
+from time import monotonic
 
 from flockwave.server.ext.signals import SignalsExtensionAPI
 
 from .types import MAVLinkMessageSpecification, spec
 
-__all__ = ("RTKCorrectionPacketEncoder",)
+__all__ = (
+    "RTKBandwidthLimiter",
+    "RTKCorrectionPacketEncoder",
+    "SharedRTKCorrectionPacketEncoder",
+)
+
+
+_GPS_RTCM_DATA_OVERHEAD = 14
+"""Number of bytes that a MAVLink 2 frame of a GPS_RTCM_DATA message takes on
+top of the RTCM fragment that it carries (header, flags, length and CRC).
+"""
+
+
+class RTKBandwidthLimiter:
+    """Token bucket that limits the number of bytes of RTK correction data
+    sent on a link per second.
+    """
+
+    burst: float
+    """Maximum number of bytes that can be sent at once after the link has been
+    idle for a while.
+    """
+
+    dropped: int
+    """Number of RTK correction packets dropped because they did not fit into
+    the budget.
+    """
+
+    rate: float
+    """Number of bytes that can be sent per second on average."""
+
+    _clock: Callable[[], float]
+    """Monotonic clock used to refill the bucket."""
+
+    _tokens: float
+    """Number of bytes that can be sent right now."""
+
+    _updated_at: float
+    """Timestamp of the last refill of the bucket."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        *,
+        clock: Callable[[], float] = monotonic,
+    ):
+        """Constructor.
+
+        Parameters:
+            rate: number of bytes that can be sent per second on average
+            burst: maximum number of bytes that can be sent at once; defaults
+                to one second worth of data
+            clock: monotonic clock used to refill the bucket
+        """
+        self.rate = float(rate)
+        self.burst = float(burst) if burst is not None else self.rate
+        self.dropped = 0
+
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated_at = clock()
+
+    def try_consume(self, messages: Sequence[MAVLinkMessageSpecification]) -> bool:
+        """Attempts to take the bytes needed to send the given GPS_RTCM_DATA
+        messages from the budget.
+
+        The messages of a fragmented RTCM packet are useless on their own so
+        either all of them fit into the budget or none of them.
+
+        Returns:
+            whether the messages fit into the budget and may be sent
+        """
+        now = self._clock()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+        size = sum(kwds["len"] + _GPS_RTCM_DATA_OVERHEAD for _, kwds in messages)
+        if size > self._tokens:
+            self.dropped += 1
+            return False
+
+        self._tokens -= size
+        return True
 
 
 class RTKCorrectionPacketEncoder:
@@ -58,17 +144,98 @@ class RTKCorrectionPacketEncoder:
             )
 
 
+class SharedRTKCorrectionPacketEncoder:
+    """RTK correction packet encoder whose output is shared by all the
+    MAVLink networks and connections of the extension.
+
+    The MAVLink message specifications produced by this encoder carry a cache
+    of the encoded MAVLink frames so each fragment is packed into bytes only
+    once for each distinct combination of source system ID, component ID and
+    MAVLink version, and the same buffer is then sent on every unsigned
+    connection that uses the same combination. Identical RTCM packets arriving
+    within a short time window are dropped.
+    """
+
+    duplicates: int
+    """Number of RTCM packets dropped because they were identical to a packet
+    seen shortly before.
+    """
+
+    _clock: Callable[[], float]
+    """Monotonic clock used for deduplication."""
+
+    _dedup_window: float
+    """Length of the time window within which identical RTCM packets are
+    considered duplicates, in seconds.
+    """
+
+    _encoder: RTKCorrectionPacketEncoder
+    """Encoder that breaks up RTCM packets into GPS_RTCM_DATA messages."""
+
+    _recent: dict[bytes, float]
+    """RTCM packets seen recently, mapped to the time they were seen, in the
+    order they were seen.
+    """
+
+    def __init__(
+        self,
+        log: Logger | None = None,
+        *,
+        dedup_window: float = 0.5,
+        clock: Callable[[], float] = monotonic,
+    ):
+        """Constructor.
+
+        Parameters:
+            log: logger to use for logging messages
+            dedup_window: length of the time window within which identical
+                RTCM packets are considered duplicates, in seconds; zero
+                disables deduplication
+            clock: monotonic clock used for deduplication
+        """
+        self.duplicates = 0
+
+        self._clock = clock
+        self._dedup_window = max(float(dedup_window), 0.0)
+        self._encoder = RTKCorrectionPacketEncoder(log)
+        self._recent = {}
+
+    def encode(self, packet: bytes) -> list[MAVLinkMessageSpecification]:
+        """Encodes an RTCM packet into GPS_RTCM_DATA message specifications
+        that can be shared between networks and connections.
+
+        Returns:
+            the message specifications; empty if the packet is a duplicate or
+            if it is too large to be sent
+        """
+        if self._dedup_window > 0:
+            now = self._clock()
+            recent = self._recent
+            threshold = now - self._dedup_window
+            while recent:
+                oldest = next(iter(recent))
+                if recent[oldest] > threshold:
+                    break
+                del recent[oldest]
+
+            if packet in recent:
+                self.duplicates += 1
+                return []
+
+            recent[packet] = now
+
+        result = list(self._encoder.encode(packet))
+        for _, kwds in result:
+            kwds["_encoded"] = {}
+        return result
+
+
 class RTKCorrectionPacketSignalManager:
     """Object whose responsibility is to dispatch signals whenever an RTK
     correction packet is enqueued for transmission on the MAVLink networks
     managed by the extension.
     """
 
-    _rtk_correction_packet_encoder: RTKCorrectionPacketEncoder
-    """Encoder that is responsible for breaking up an RTK correction packet
-    into individual MAVLink packets.
-    """
-
     _log: Logger | None = None
     """Logger to use for logging messages."""
 
@@ -76,47 +243,44 @@ class RTKCorrectionPacketSignalManager:
 
     def __init__(self):
         """Constructor."""
-        self._rtk_correction_packet_encoder = RTKCorrectionPacketEncoder()
         self._sender = None
 
-    def _handle_packet(self, sender, packet: bytes):
-        """Handles an RTK correction packet that the server wishes to forward
-        to the drones in all the networks belonging to the extension.
+    def send(self, messages: Sequence[MAVLinkMessageSpecification]) -> None:
+        """Dispatches a signal with the GPS_RTCM_DATA messages of an RTK
+        correction packet that is being forwarded to the drones in all the
+        networks belonging to the extension.
 
         Parameters:
-            packet: the raw RTK correction packet to forward to the drones in
-                all the networks belonging to the extension
+            messages: the GPS_RTCM_DATA messages that make up a single RTK
+                correction packet, as encoded for the networks of the extension
         """
-        if not self._sender:
+        if not self._sender or not messages:
             return
 
-        messages = list(self._rtk_correction_packet_encoder.encode(packet))
-        if messages:
-            try:
-                self._sender(messages)
-            except Exception:
-                # We do not take responsibility for exceptions thrown in the
-                # signal handlers
-                if self._log:
-                    self._log.exception(
-                        "RTK packet fragment signal handler threw an exception"
-                    )
+        try:
+            self._sender(messages)
+        except Exception:
+            # We do not take responsibility for exceptions thrown in the
+            # signal handlers
+            if self._log:
+                self._log.exception(
+                    "RTK packet fragment signal handler threw an exception"
+                )
 
     @contextmanager
     def use(self, signals: SignalsExtensionAPI, *, log: Logger | None = None):
         rtk_packet_fragments_signal = signals.get("mavlink:rtk_fragments")
-        with signals.use({"rtk:packet": self._handle_packet}):
-            if rtk_packet_fragments_signal:
+        if rtk_packet_fragments_signal:
 
-                def sender(messages: Iterable[MAVLinkMessageSpecification]):
-                    rtk_packet_fragments_signal.send(self, messages=messages)
+            def sender(messages: Iterable[MAVLinkMessageSpecification]):
+                rtk_packet_fragments_signal.send(self, messages=messages)
 
-                self._sender = sender
+            self._sender = sender
 
-            old_log = self._log
-            self._log = log or old_log
-            try:
-                yield
-            finally:
-                self._log = old_log
-                self._sender = None
+        old_log = self._log
+        self._log = log or old_log
+        try:
+            yield
+        finally:
+            self._log = old_log
+            self._sender = None
@@ -0,0 +1,146 @@
+"""Round-trip time estimation for request-response exchanges with MAVLink
+drones.
+
+The estimator follows the algorithm of RFC 6298 that TCP uses to derive its
+retransmission timeout: it maintains a smoothed round-trip time (SRTT) and
+its mean deviation (RTTVAR), and derives the timeout as SRTT + 4 * RTTVAR.
+Timeouts back off exponentially when a request has to be retransmitted, and
+samples are taken only from requests that were answered without a
+retransmission (Karn's algorithm).
+"""
+
+from __future__ import annotations
+
+__all__ = ("RTTEstimator",)
+
+
+class RTTEstimator:
+    """Round-trip time estimator of a single link between the server and a
+    drone.
+    """
+
+    __slots__ = (
+        "_initial_timeout",
+        "_max_timeout",
+        "_min_timeout",
+        "_rttvar",
+        "_srtt",
+        "_timeout",
+    )
+
+    _ALPHA = 0.125
+    _BETA = 0.25
+    _K = 4
+
+    _initial_timeout: float
+    """Timeout to use until the first round-trip time sample arrives."""
+
+    _max_timeout: float
+    """Upper bound of the timeout, also when backing off."""
+
+    _min_timeout: float
+    """Lower bound of the timeout."""
+
+    _rttvar: float
+    """Mean deviation of the round-trip time samples, in seconds."""
+
+    _srtt: float | None
+    """Smoothed round-trip time, in seconds; ``None`` if no samples have been
+    taken yet.
+    """
+
+    _timeout: float
+    """Current retransmission timeout, in seconds."""
+
+    def __init__(
+        self,
+        *,
+        initial_timeout: float = 2,
+        min_timeout: float = 0.5,
+        max_timeout: float = 5,
+    ):
+        """Constructor.
+
+        Parameters:
+            initial_timeout: timeout to use until the first round-trip time
+                sample arrives, in seconds
+            min_timeout: lower bound of the timeout, in seconds. Accounts for
+                the time the drone needs to process a request on top of the
+                round-trip time of the link.
+            max_timeout: upper bound of the timeout, also when backing off, in
+                seconds
+        """
+        self._min_timeout = max(float(min_timeout), 0.0)
+        self._max_timeout = max(float(max_timeout), self._min_timeout)
+        self._initial_timeout = self._clamp(float(initial_timeout))
+        self.reset()
+
+    @property
+    def rttvar(self) -> float | None:
+        """Mean deviation of the round-trip time samples, in seconds; ``None``
+        if no samples have been taken yet.
+        """
+        return self._rttvar if self._srtt is not None else None
+
+    @property
+    def srtt(self) -> float | None:
+        """Smoothed round-trip time, in seconds; ``None`` if no samples have
+        been taken yet.
+        """
+        return self._srtt
+
+    @property
+    def timeout(self) -> float:
+        """Current retransmission timeout, in seconds."""
+        return self._timeout
+
+    @property
+    def json(self) -> dict[str, float | None]:
+        """Returns the JSON representation of the state of the estimator."""
+        return {"srtt": self.srtt, "rttvar": self.rttvar, "timeout": self._timeout}
+
+    def add_sample(self, rtt: float) -> None:
+        """Updates the estimator with a new round-trip time sample.
+
+        Samples must be taken only from requests that were answered without
+        a retransmission because the response to a retransmitted request
+        cannot be matched unambiguously to one of the transmissions.
+
+        Parameters:
+            rtt: the round-trip time that was measured, in seconds
+        """
+        if rtt < 0:
+            return
+
+        if self._srtt is None:
+            self._srtt = rtt
+            self._rttvar = rtt / 2
+        else:
+            self._rttvar += self._BETA * (abs(self._srtt - rtt) - self._rttvar)
+            self._srtt += self._ALPHA * (rtt - self._srtt)
+
+        self._timeout = self._clamp(self._srtt + self._K * self._rttvar)
+
+    def back_off(self) -> float:
+        """Doubles the current timeout after a request timed out, up to the
+        upper bound of the timeout.
+
+        The increased timeout is kept for subsequent requests until the next
+        round-trip time sample arrives.
+
+        Returns:
+            the new timeout, in seconds
+        """
+        self._timeout = self._clamp(self._timeout * 2)
+        return self._timeout
+
+    def reset(self) -> None:
+        """Resets the estimator to its initial state, forgetting all the
+        samples taken so far.
+        """
+        self._srtt = None
+        self._rttvar = 0.0
+        self._timeout = self._initial_timeout
+
+    def _clamp(self, value: float) -> float:
+        return min(max(value, self._min_timeout), self._max_timeout)
@@ -26,6 +26,21 @@ RSSI_MODE_SCHEMA: dict[str, Any] = {
 
 
 NETWORK_PROPERTIES = {
+    "accepted_message_types": {
+        "title": "Additional decoded MAVLink message types",
+        "type": "array",
+        "format": "table",
+        "items": {"type": "string"},
+        "default": [],
+        "description": (
+            "Names of additional MAVLink message types (e.g., ATTITUDE) to "
+            "decode from the inbound traffic of this network. Message types "
+            "that the server processes or waits for as responses (e.g., "
+            "HEARTBEAT, PARAM_VALUE or FILE_TRANSFER_PROTOCOL) are always "
+            "decoded; packets of other message types are dropped before they "
+            "are decoded, which saves CPU time with large fleets."
+        ),
+    },
     "connections": {
         "title": "Connection URLs",
         "type": "array",
@@ -69,6 +84,21 @@ NETWORK_PROPERTIES = {
             "drones within the network."
         ),
     },
+    "parser_workers": {
+        "type": "integer",
+        "title": "Parser worker processes",
+        "minimum": 0,
+        "default": 0,
+        "description": (
+            "Number of worker processes to use for parsing inbound MAVLink "
+            "messages in this network. Zero means that messages are parsed in "
+            "the main server process. Use worker processes only if you have "
+            "thousands of drones and the server is limited by the speed of a "
+            "single CPU core. Not supported with MAVLink message signing. "
+            "Lost packets are not counted in the link statistics when worker "
+            "processes are used."
+        ),
+    },
     "system_id": {
         "title": "System ID",
         "description": (
@@ -126,6 +156,18 @@ NETWORK_PROPERTIES = {
         RSSI_MODE_SCHEMA,
         description="Specifies how RSSI values are derived for the drones in this network",
     ),
+    "rtk_bandwidth_limit": {
+        "type": "number",
+        "title": "RTK bandwidth limit (bytes/s)",
+        "minimum": 0,
+        "default": 0,
+        "description": (
+            "Maximum number of bytes of RTK correction data to send on each "
+            "connection of this network per second. RTK correction packets "
+            "that would exceed the limit of a connection are dropped from "
+            "that connection. Zero means no limit."
+        ),
+    },
     "signing": {
         "type": "object",
         "title": "Message signing",
@@ -292,6 +334,73 @@ schema = {
             "format": "checkbox",
             "propertyOrder": 14000,
         },
+        "skip_unchanged_show_uploads": {
+            "type": "boolean",
+            "title": "Upload show files only if they have changed",
+            "description": (
+                "If enabled, the driver compares the CRC32 checksum of the "
+                "show file on the drone with the one to be uploaded and skips "
+                "the transfer if they match. The show origin, orientation and "
+                "geofence are configured even if the transfer is skipped."
+            ),
+            "default": False,
+            "format": "checkbox",
+            "propertyOrder": 15000,
+        },
+        "incremental_show_uploads": {
+            "type": "boolean",
+            "title": "Upload only the changed parts of show files",
+            "description": (
+                "If enabled, the driver remembers the show file it uploaded "
+                "to each drone most recently, and in the next upload it "
+                "transfers only the parts of the show file that have changed "
+                "(e.g., only the light program) if the drone still has the "
+                "earlier show file. Falls back to uploading the entire show "
+                "file if the firmware does not support this."
+            ),
+            "default": True,
+            "format": "checkbox",
+            "propertyOrder": 15500,
+        },
+        "max_concurrent_show_uploads": {
+            "type": "integer",
+            "title": "Maximum number of concurrent show uploads",
+            "minimum": 0,
+            "default": 20,
+            "description": (
+                "Maximum number of drones that a show file is uploaded to at "
+                "the same time in a single MAVLink network. Further uploads "
+                "are queued; drones with stronger links are served first and "
+                "failed uploads are retried automatically. Zero means no limit."
+            ),
+            "propertyOrder": 16000,
+        },
+        "cache_show_files_on_disk": {
+            "type": "boolean",
+            "title": "Cache encoded show files on disk",
+            "description": (
+                "If enabled, show files encoded for the drones are also cached "
+                "on disk, not only in memory, so repeated uploads of the same "
+                "show do not need to encode the show again even after the "
+                "server is restarted."
+            ),
+            "default": True,
+            "format": "checkbox",
+            "propertyOrder": 17000,
+        },
+        "prune_disconnected_uavs_after": {
+            "type": "number",
+            "title": "Remove disconnected UAVs after",
+            "minimum": 0,
+            "default": 0,
+            "description": (
+                "Number of seconds without heartbeats after which a UAV is "
+                "removed from the server altogether. Useful for long-running "
+                "servers where drones come and go. Zero means that "
+                "disconnected UAVs are kept forever."
+            ),
+            "propertyOrder": 18000,
+        },
         # packet_loss is an advanced setting and is not included here
     }
 }
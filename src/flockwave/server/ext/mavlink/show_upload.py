@@ -0,0 +1,496 @@
+"""Scheduler that coordinates the upload of show files to the drones managed
+by the MAVLink extension.
+
+Show uploads are requested by the clients one drone at a time. Without
+coordination, uploading to a large fleet either floods the radio links with
+hundreds of concurrent transfers or leaves bandwidth unused, depending on how
+the client batches the requests. The scheduler in this module limits the
+number of concurrent uploads in each MAVLink network, prefers drones with
+better link quality when a slot becomes free, retries failed uploads
+automatically and keeps track of the overall progress of the fleet. It can
+also validate the shows of a batch of uploads together before any of the
+transfers start.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterator, Mapping
+from dataclasses import dataclass
+from enum import Enum
+from itertools import count
+from math import inf
+from operator import attrgetter
+from typing import TYPE_CHECKING
+
+from trio import (
+    Event,
+    MemorySendChannel,
+    TooSlowError,
+    as_safe_channel,
+    open_memory_channel,
+    open_nursery,
+    sleep,
+)
+
+from flockwave.server.model.commands import Progress
+from flockwave.server.show.parse_cache import ShowParseCache
+
+from .ftp import MAVFTPError
+
+if TYPE_CHECKING:
+    from logging import Logger
+
+    from flockwave.server.show import ShowSpecification
+
+    from .driver import MAVLinkUAV
+
+__all__ = ("ShowUploadScheduler", "ShowUploadSummary", "ShowValidator")
+
+
+ShowValidator = Callable[[Mapping[str, "ShowSpecification"]], Awaitable[None]]
+"""Type specification for asynchronous functions that validate the show
+specifications of a batch of uploads, keyed by the IDs of the UAVs, and raise
+an exception if the shows must not be uploaded.
+"""
+
+RETRIABLE_ERRORS: tuple[type[BaseException], ...] = (MAVFTPError, TooSlowError)
+"""Exception types that cause a failed show upload to be retried."""
+
+
+class ShowUploadState(Enum):
+    """State of a single show upload job."""
+
+    QUEUED = "queued"
+    UPLOADING = "uploading"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class ShowUploadSummary:
+    """Summary of the state of all the show uploads that the scheduler has
+    seen since it became idle the last time.
+    """
+
+    queued: int = 0
+    """Number of uploads waiting for a free slot or a retry."""
+
+    uploading: int = 0
+    """Number of uploads in progress."""
+
+    completed: int = 0
+    """Number of uploads that completed successfully."""
+
+    failed: int = 0
+    """Number of uploads that failed even after retries."""
+
+    @property
+    def total(self) -> int:
+        """Total number of uploads."""
+        return self.queued + self.uploading + self.completed + self.failed
+
+    def describe(self) -> str:
+        """Returns a human-readable description of the summary."""
+        result = f"{self.completed}/{self.total} uploaded"
+        if self.uploading:
+            result += f", {self.uploading} in progress"
+        if self.failed:
+            result += f", {self.failed} failed"
+        return result
+
+
+class _ShowUploadJob:
+    """A single show upload job handled by the scheduler."""
+
+    __slots__ = ("attempt", "error", "granted", "seq", "state", "uav")
+
+    attempt: int
+    """Index of the current attempt, starting from zero."""
+
+    error: Exception | None
+    """The error raised by the last attempt; ``None`` if it succeeded."""
+
+    granted: Event
+    """Event that is set when the job is allowed to start uploading."""
+
+    seq: int
+    """Sequence number of the job; used to break ties in the scheduling order."""
+
+    state: ShowUploadState
+    """State of the job."""
+
+    uav: MAVLinkUAV
+    """The UAV to upload the show to."""
+
+    def __init__(self, uav: MAVLinkUAV, seq: int):
+        self.attempt = 0
+        self.error = None
+        self.granted = Event()
+        self.seq = seq
+        self.state = ShowUploadState.QUEUED
+        self.uav = uav
+
+    @property
+    def priority(self) -> tuple[int, float, int]:
+        """Scheduling priority of the job; jobs with smaller priority values
+        are started first.
+
+        Jobs being retried come after jobs being attempted for the first time.
+        Otherwise UAVs with stronger links come first so the weaker links do
+        not hold up the fleet.
+        """
+        rssi = max(self.uav.status.rssi, default=-1)
+        return (self.attempt, -rssi if rssi >= 0 else inf, self.seq)
+
+
+class _ShowValidationBatch:
+    """A batch of show uploads that are validated together."""
+
+    __slots__ = ("closed", "done", "error", "finished")
+
+    closed: bool
+    """Whether the validation of the batch has started; new uploads cannot
+    join the batch after that.
+    """
+
+    done: Event
+    """Event that is set when the validation of the batch has finished or
+    was cancelled.
+    """
+
+    error: Exception | None
+    """The error raised by the validator; ``None`` if the shows are valid."""
+
+    finished: bool
+    """Whether the validator ran to completion; ``False`` if the task that
+    was running it was cancelled.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self.done = Event()
+        self.error = None
+        self.finished = False
+
+
+class ShowUploadScheduler:
+    """Scheduler that coordinates the upload of show files to multiple UAVs."""
+
+    log: Logger | None
+    """Logger to write summaries to when a batch of uploads finishes."""
+
+    max_concurrent_uploads: int
+    """Maximum number of concurrent uploads in a single MAVLink network; zero
+    means no limit.
+    """
+
+    max_retries: int
+    """Maximum number of retries for a failed upload (not counting the first
+    attempt).
+    """
+
+    parse_cache: ShowParseCache
+    """Cache of the parsed parts of the show specifications of the current
+    batch of uploads; cleared when the scheduler becomes idle.
+    """
+
+    retry_delay: float
+    """Number of seconds to wait before retrying a failed upload; multiplied by
+    the index of the retry.
+    """
+
+    validation_delay: float
+    """Number of seconds to wait for more uploads to arrive before validating
+    a batch of uploads.
+    """
+
+    validator: ShowValidator | None
+    """Function that validates the shows of a batch of uploads before any of
+    the transfers start; ``None`` if the shows are not validated. The function
+    receives the shows of all the uploads since the scheduler became idle the
+    last time, not only the ones in the batch, so uploads arriving later are
+    validated together with the earlier ones.
+    """
+
+    _active: dict[str, int]
+    """Number of uploads in progress in each MAVLink network."""
+
+    _counts: Counter[ShowUploadState]
+    """Number of jobs in each state since the scheduler became idle the last
+    time.
+    """
+
+    _batch: _ShowValidationBatch | None
+    """The batch of uploads that is being validated or that is waiting for
+    more uploads to arrive before its validation.
+    """
+
+    _seq: Iterator[int]
+    """Iterator yielding sequence numbers for new jobs."""
+
+    _shows: dict[str, ShowSpecification]
+    """The shows of the uploads since the scheduler became idle the last
+    time, keyed by the IDs of the UAVs.
+    """
+
+    _waiting: dict[str, list[_ShowUploadJob]]
+    """Jobs waiting for a free slot in each MAVLink network."""
+
+    def __init__(
+        self,
+        *,
+        max_concurrent_uploads: int = 20,
+        max_retries: int = 3,
+        retry_delay: float = 1,
+        validator: ShowValidator | None = None,
+        validation_delay: float = 1,
+        log: Logger | None = None,
+    ):
+        """Constructor.
+
+        Parameters:
+            max_concurrent_uploads: maximum number of concurrent uploads in a
+                single MAVLink network; zero means no limit
+            max_retries: maximum number of retries for a failed upload
+            retry_delay: number of seconds to wait before retrying a failed
+                upload; multiplied by the index of the retry
+            validator: function that validates the shows of a batch of
+                uploads before any of the transfers start; ``None`` if the
+                shows are not validated
+            validation_delay: number of seconds to wait for more uploads to
+                arrive before validating a batch of uploads
+            log: logger to write summaries to when a batch of uploads finishes
+        """
+        self.log = log
+        self.max_concurrent_uploads = max(int(max_concurrent_uploads), 0)
+        self.max_retries = max(int(max_retries), 0)
+        self.retry_delay = max(float(retry_delay), 0)
+        self.validation_delay = max(float(validation_delay), 0)
+        self.validator = validator
+        self.parse_cache = ShowParseCache()
+
+        self._active = {}
+        self._batch = None
+        self._counts = Counter()
+        self._seq = count()
+        self._shows = {}
+        self._waiting = {}
+
+    @property
+    def summary(self) -> ShowUploadSummary:
+        """Summary of the uploads that the scheduler has seen since it became
+        idle the last time.
+        """
+        counts = self._counts
+        return ShowUploadSummary(
+            queued=counts[ShowUploadState.QUEUED],
+            uploading=counts[ShowUploadState.UPLOADING],
+            completed=counts[ShowUploadState.COMPLETED],
+            failed=counts[ShowUploadState.FAILED],
+        )
+
+    @as_safe_channel
+    async def upload(
+        self, uav: MAVLinkUAV, show: ShowSpecification
+    ) -> AsyncGenerator[Progress[None], None]:
+        """Schedules the upload of a show to the given UAV and waits for it to
+        complete, retrying it if needed.
+
+        Must be used as a context manager first before iterating over the
+        progress updates.
+
+        Yields:
+            progress updates about the state of the upload; the message of each
+            update also summarizes the state of all the uploads in the fleet
+
+        Raises:
+            Exception: the exception raised by the validator if the show was
+                rejected, or the exception raised by the last attempt if the
+                upload failed even after retries
+        """
+        job = _ShowUploadJob(uav, next(self._seq))
+        self._counts[job.state] += 1
+        self.parse_cache.reserve(self.summary.total)
+
+        try:
+            if self.validator is not None:
+                yield Progress(message=f"Validating ({self.summary.describe()})")
+                await self._validate(job, show)
+
+            while True:
+                yield Progress(message=f"Waiting ({self.summary.describe()})")
+                await self._acquire(job)
+
+                error: Exception | None = None
+                try:
+                    self._set_state(job, ShowUploadState.UPLOADING)
+
+                    # The upload runs in a separate task so we can report the
+                    # progress of the file transfer while it is running
+                    tx, rx = open_memory_channel[int](inf)
+                    async with open_nursery() as nursery:
+                        nursery.start_soon(self._upload, job, show, tx)
+                        async with rx:
+                            async for percentage in rx:
+                                yield Progress(
+                                    percentage=percentage,
+                                    message=f"Uploading ({self.summary.describe()})",
+                                )
+                    error = job.error
+                finally:
+                    self._release(job)
+
+                if error is None:
+                    self._set_state(job, ShowUploadState.COMPLETED)
+                    yield Progress.done(f"Uploaded ({self.summary.describe()})")
+                    break
+                elif (
+                    not isinstance(error, RETRIABLE_ERRORS)
+                    or job.attempt >= self.max_retries
+                ):
+                    raise error
+
+                job.attempt += 1
+                self._set_state(job, ShowUploadState.QUEUED)
+                yield Progress(message=f"Retrying (attempt {job.attempt + 1})")
+                await sleep(self.retry_delay * job.attempt)
+
+        except BaseException:
+            if job.state is not ShowUploadState.COMPLETED:
+                self._set_state(job, ShowUploadState.FAILED)
+                if self._shows.get(uav.id) is show:
+                    # The UAV keeps its earlier show, if any
+                    del self._shows[uav.id]
+            raise
+
+        finally:
+            self._forget_jobs_if_idle()
+
+    async def _acquire(self, job: _ShowUploadJob) -> None:
+        """Waits until the given job is allowed to start uploading in its
+        MAVLink network.
+        """
+        key = job.uav.network_id
+        limit = self.max_concurrent_uploads
+        active = self._active.get(key, 0)
+        waiting = self._waiting.setdefault(key, [])
+
+        if not waiting and (limit <= 0 or active < limit):
+            self._active[key] = active + 1
+            return
+
+        job.granted = Event()
+        waiting.append(job)
+        try:
+            await job.granted.wait()
+        except BaseException:
+            if job.granted.is_set():
+                self._release(job)
+            else:
+                waiting.remove(job)
+            raise
+
+    def _forget_jobs_if_idle(self) -> None:
+        """Resets the job counters if all the jobs have finished so the summary
+        of the next batch of uploads starts from scratch.
+        """
+        summary = self.summary
+        if summary.queued or summary.uploading:
+            return
+
+        if self.log and summary.total:
+            self.log.info(f"Show upload finished: {summary.describe()}")
+
+        self._counts.clear()
+        self._shows.clear()
+        self.parse_cache.clear()
+
+    def _release(self, job: _ShowUploadJob) -> None:
+        """Releases the slot held by the given job and passes it on to the
+        waiting job with the highest priority in the same network.
+        """
+        key = job.uav.network_id
+        waiting = self._waiting.get(key)
+        if waiting:
+            best = min(waiting, key=_get_priority)
+            waiting.remove(best)
+            best.granted.set()
+        else:
+            self._active[key] = max(self._active.get(key, 0) - 1, 0)
+
+    def _set_state(self, job: _ShowUploadJob, state: ShowUploadState) -> None:
+        self._counts[job.state] -= 1
+        self._counts[state] += 1
+        job.state = state
+
+    async def _validate(self, job: _ShowUploadJob, show: ShowSpecification) -> None:
+        """Validates the show of the given job together with the shows of the
+        other uploads, waiting for more uploads to arrive first.
+
+        The first upload of a batch waits for the validation delay and runs
+        the validator; the uploads arriving in the meantime wait for its
+        result. Uploads arriving while the validator is running form a new
+        batch.
+
+        Raises:
+            Exception: the exception raised by the validator if the shows
+                were rejected
+        """
+        validator = self.validator
+        if validator is None:
+            return
+
+        self._shows[job.uav.id] = show
+
+        while True:
+            batch = self._batch
+            if batch is not None and not batch.closed:
+                await batch.done.wait()
+                if batch.finished:
+                    break
+                else:
+                    # The task running the validator was cancelled; try again
+                    # with a new batch
+                    continue
+
+            batch = self._batch = _ShowValidationBatch()
+            try:
+                await sleep(self.validation_delay)
+                batch.closed = True
+                try:
+                    await validator(dict(self._shows))
+                except Exception as ex:
+                    batch.error = ex
+                batch.finished = True
+            finally:
+                batch.closed = True
+                batch.done.set()
+                if self._batch is batch:
+                    self._batch = None
+            break
+
+        if batch.error is not None:
+            raise batch.error
+
+    async def _upload(
+        self,
+        job: _ShowUploadJob,
+        show: ShowSpecification,
+        progress: MemorySendChannel[int],
+    ) -> None:
+        """Uploads the show to the UAV of the given job, sending the percentage
+        of the show file transferred so far to the given channel.
+
+        Errors are stored in the job instead of being raised so they do not get
+        wrapped in an exception group by the enclosing nursery.
+        """
+        job.error = None
+        async with progress:
+            try:
+                await job.uav.upload_show(show, progress=progress.send_nowait)
+            except Exception as ex:
+                job.error = ex
+
+
+_get_priority = attrgetter("priority")
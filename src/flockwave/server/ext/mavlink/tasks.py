@@ -1,12 +1,12 @@
 """Background tasks related to the MAVLink extension."""
 
 from collections import defaultdict
-from time import monotonic
 
+from trio import open_nursery
 from trio_util import periodic
 
 from .driver import MAVLinkUAV
-from .enums import MAVMessageType
+from .liveness import UAVLivenessTracker
 
 __all__ = ("check_uavs_alive",)
 
@@ -16,40 +16,48 @@ def _create_state_summary() -> list[int | None]:
 
 
 async def check_uavs_alive(
-    uavs: list[MAVLinkUAV], signal, log, *, delay: float = 0.5, timeout: float = 5
+    uavs: list[MAVLinkUAV],
+    signal,
+    log,
+    *,
+    tracker: UAVLivenessTracker | None = None,
+    delay: float = 0.5,
 ) -> None:
-    """Worker task that runs in the background and checks whether we are
-    receiving heartbeats for all the UAVs in the given UAV array. Updates the
-    `is_connected` flags of the UAVs accordingly.
+    """Worker task that runs in the background and marks the UAVs in the given
+    UAV array as disconnected when we stop receiving heartbeats from them.
+
+    Heartbeats are tracked by the given liveness tracker, which is notified
+    by the UAVs themselves when a heartbeat arrives. The tracker sleeps until
+    the earliest heartbeat deadline so this task does not need to scan all
+    the UAVs periodically. Reconnections are handled by the heartbeat handler
+    of the UAVs.
 
     Parameters:
-        uavs: the list of UAVs to check. THe list may be mutable; it is iterated
-            periodically so you can simply add or remove the UAVs you are
-            interested in from this list while the worker task is running.
+        uavs: the list of UAVs to summarize. THe list may be mutable; it is
+            iterated periodically so you can simply add or remove the UAVs you
+            are interested in from this list while the worker task is running.
         signal: a signal that interested parties may subscribe to to receive a
             periodic summary of the status of active UAVs. This is typically
             meant for communication with Skybrush Sidekick.
-        delay: number of seconds to wait between consecutive checks
-        timeout: number of seconds to wait after a heartbeat to consider a UAV
-            as disconnected
+        tracker: the liveness tracker that the UAVs notify about their
+            heartbeats; ``None`` if only the status summaries are needed
+        delay: number of seconds to wait between consecutive status summaries
+    """
+    async with open_nursery() as nursery:
+        if tracker is not None:
+            nursery.start_soon(tracker.run)
+        await _send_state_summaries(uavs, signal, log, delay=delay)
+
+
+async def _send_state_summaries(
+    uavs: list[MAVLinkUAV], signal, log, *, delay: float
+) -> None:
+    """Worker task that periodically sends a status summary of the given UAVs
+    to the subscribers of the given signal, if there are any.
     """
     state_summaries: dict[str, list[int | None]] = defaultdict(_create_state_summary)
 
-    # TODO(ntamas): remove UAVs that have been disconnected for a long while?
     async for _ in periodic(delay):
-        now = monotonic()
-        for uav in uavs:
-            heartbeat_age = uav.get_age_of_message(MAVMessageType.HEARTBEAT, now)
-            if uav.is_connected:
-                if heartbeat_age >= timeout:
-                    uav.notify_disconnection()
-            else:
-                if heartbeat_age < timeout:
-                    # UAV may still be in a sleep state so let's get the heartbeat
-                    # and test it
-                    message = uav.get_last_message(MAVMessageType.HEARTBEAT)
-                    uav.notify_reconnection(message)
-
         if uavs and signal.receivers:
             try:
                 send_state_summary_signal(uavs, signal, state_summaries)
@@ -323,6 +323,14 @@ class MAVLinkNetworkSpecification:
     `create_connection()` function.
     """
 
+    accepted_message_types: list[int | str] | None = None
+    """Additional MAVLink message types (names or numeric IDs) to decode from
+    the inbound traffic of this network. Frames of message types that the
+    network neither processes nor waits for as responses are dropped before
+    they are parsed unless they are listed here. ``None`` means that no
+    additional message types are decoded.
+    """
+
     routing: MAVLinkMessageRoutingTable = field(default_factory=dict)
     """Specifies where certain types of packets should be routed if the
     network has multiple connections.
@@ -353,6 +361,17 @@ class MAVLinkNetworkSpecification:
     it is interpreted as the probability of a lost MAVLink message.
     """
 
+    parser_workers: int = 0
+    """Number of worker processes to use for parsing the inbound MAVLink
+    messages of this network. Zero means that the messages are parsed in the
+    main process of the server.
+    """
+
+    rtk_bandwidth_limit: float = 0
+    """Maximum number of bytes of RTK correction data to send on each
+    connection of this network per second. Zero means no limit.
+    """
+
     use_broadcast_rate_limiting: bool = False
     """Whether to apply a small delay between consecutive broadcast packets
     to work around packet loss issues on links without proper flow control in
@@ -384,15 +403,25 @@ class MAVLinkNetworkSpecification:
         if "connections" in obj:
             result.connections = obj["connections"]
 
+        if "accepted_message_types" in obj:
+            types = obj["accepted_message_types"]
+            result.accepted_message_types = list(types) if types else None
+
         if "packet_loss" in obj:
             result.packet_loss = float(obj["packet_loss"])
 
+        if "parser_workers" in obj:
+            result.parser_workers = max(int(obj["parser_workers"]), 0)
+
         if "routing" in obj and isinstance(obj["routing"], dict):
             result.routing.clear()
             result.routing.update(
                 {k: cls._process_routing_entry(v) for k, v in obj["routing"].items()}
             )
 
+        if "rtk_bandwidth_limit" in obj:
+            result.rtk_bandwidth_limit = max(float(obj["rtk_bandwidth_limit"]), 0.0)
+
         if "rssi_mode" in obj and isinstance(obj["rssi_mode"], str):
             result.rssi_mode = RSSIMode(obj["rssi_mode"])
 
@@ -421,9 +450,12 @@ class MAVLinkNetworkSpecification:
             "network_size": self.network_size,
             "system_id": self.system_id,
             "connections": self.connections,
+            "accepted_message_types": self.accepted_message_types,
             "packet_loss": self.packet_loss,
+            "parser_workers": self.parser_workers,
             "routing": self.routing,
             "rssi_mode": self.rssi_mode.value,
+            "rtk_bandwidth_limit": self.rtk_bandwidth_limit,
             "signing": self.signing,
             "statustext_targets": self.statustext_targets,
             "use_broadcast_rate_limiting": bool(self.use_broadcast_rate_limiting),
@@ -242,11 +242,18 @@ class ChunkAssembler:
     because there are gaps in front of them.
     """
 
-    def __init__(self, size: int):
-        """Constructor."""
+    def __init__(self, size: int, offset: int = 0):
+        """Constructor.
+
+        Arguments:
+            size: the size of the file being downloaded
+            offset: number of bytes at the start of the file that were already
+                flushed to the disk earlier, e.g., when resuming an interrupted
+                download
+        """
         self._size = size
         self._pending = []
-        self._num_flushed = 0
+        self._num_flushed = offset
         self._num_pending = 0
 
     def add_chunk(self, offset: int, data: bytes) -> bytes | None:
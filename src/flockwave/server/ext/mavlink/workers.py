@@ -0,0 +1,399 @@
+"""Worker processes that offload the parsing of inbound MAVLink traffic from
+the main thread of the server.
+
+Parsing MAVLink messages (including the checksum calculation) is pure Python
+CPU work, and with thousands of drones it easily saturates the single core
+that runs the Trio event loop. When a MAVLink network is configured to use
+parser workers, its connections do not parse the inbound data; they yield
+UnparsedMAVLinkData_ chunks instead, which are then sharded across a set of
+worker processes by connection and source address. The workers parse the
+data, drop messages that the network would ignore anyway, decimate
+high-rate telemetry and send the parsed messages back to the main process
+over a pipe.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable, Iterable
+from multiprocessing import get_context
+from multiprocessing.connection import Connection as PipeConnection
+from typing import TYPE_CHECKING, Any
+
+from trio import (
+    CancelScope,
+    WouldBlock,
+    move_on_after,
+    open_memory_channel,
+    open_nursery,
+    sleep,
+    to_thread,
+)
+from trio.abc import ReceiveChannel, SendChannel
+
+from .enums import MAVComponent, MAVMessageType
+from .parsers import MAVLinkParserTable
+
+if TYPE_CHECKING:
+    from logging import Logger
+
+    from .prefilter import MAVLinkFrameFilter
+    from .types import MAVLinkMessage
+
+__all__ = ("MAVLinkParserWorkerPool", "UnparsedMAVLinkData")
+
+
+DECIMATED_MESSAGE_TYPES: frozenset[int] = frozenset(
+    (
+        MAVMessageType.GPS_RAW_INT,
+        MAVMessageType.GLOBAL_POSITION_INT,
+        MAVMessageType.RADIO_STATUS,
+    )
+)
+"""MAVLink message types where only the most recent message from each
+component needs to be processed if multiple messages of the same type arrive
+in the same batch. These messages carry state information only so older
+copies are superseded by newer ones.
+"""
+
+InboundItem = tuple[str, tuple[Any, Any]]
+"""Type alias for items received from the inbound queue of a communication
+manager: a connection ID and a pair of a message and its source address.
+"""
+
+
+class UnparsedMAVLinkData:
+    """Chunk of raw MAVLink data received from a connection whose parsing was
+    deferred to a worker process.
+    """
+
+    __slots__ = ("data",)
+
+    data: bytes
+    """The raw data."""
+
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+
+
+def defer_parsing(data: bytes) -> tuple[UnparsedMAVLinkData]:
+    """Replacement for the `parse_buffer()` method of MAVLink parser objects
+    that does not parse the data but wraps it in an UnparsedMAVLinkData_
+    object so it can be forwarded to a worker process.
+    """
+    return (UnparsedMAVLinkData(data),)
+
+
+class MAVLinkParserWorkerPool:
+    """Pool of worker processes that parse inbound MAVLink traffic on behalf of
+    a MAVLink network.
+    """
+
+    _dialect: str
+    """The MAVLink dialect that the workers use for parsing."""
+
+    _frame_filter: MAVLinkFrameFilter | None
+    """Optional filter that the workers apply on the raw data before parsing."""
+
+    _num_workers: int
+    """Number of worker processes in the pool."""
+
+    _system_id: int
+    """The MAVLink system ID of the ground station in the network."""
+
+    def __init__(
+        self,
+        num_workers: int,
+        *,
+        dialect: str = "ardupilotmega",
+        system_id: int = 255,
+        frame_filter: MAVLinkFrameFilter | None = None,
+    ):
+        """Constructor.
+
+        Parameters:
+            num_workers: the number of worker processes to start
+            dialect: the MAVLink dialect to use for parsing
+            system_id: the MAVLink system ID of the ground station
+            frame_filter: optional filter that drops unwanted MAVLink frames
+                based on their headers before they are parsed
+        """
+        if num_workers < 1:
+            raise ValueError("at least one worker process is needed")
+
+        self._dialect = dialect
+        self._frame_filter = frame_filter
+        self._num_workers = int(num_workers)
+        self._system_id = int(system_id)
+
+    @property
+    def num_workers(self) -> int:
+        """The number of worker processes in the pool."""
+        return self._num_workers
+
+    async def run(
+        self,
+        channel: ReceiveChannel[InboundItem],
+        *,
+        consumer: Callable[[ReceiveChannel[InboundItem]], Awaitable[None]],
+        log: Logger,
+        log_extra: dict[str, Any] | None = None,
+    ) -> None:
+        """Starts the worker processes, forwards unparsed inbound data from the
+        given channel to the workers and calls the consumer with a channel
+        that yields the parsed messages.
+
+        Items in the input channel that are not UnparsedMAVLinkData_ objects
+        (e.g., messages from custom channel factories that parse the data on
+        their own) are forwarded to the consumer intact.
+
+        Parameters:
+            channel: the channel yielding inbound items from the communication
+                manager of the network
+            consumer: async function to call with the channel of parsed
+                messages
+            log: logger to use for logging messages
+            log_extra: extra information to attach to log messages
+        """
+        parsed_tx, parsed_rx = open_memory_channel[InboundItem](256)
+        queues = [open_memory_channel[Any](1024) for _ in range(self._num_workers)]
+
+        async with parsed_tx, parsed_rx, open_nursery() as nursery:
+            for index, (_, queue_rx) in enumerate(queues):
+                nursery.start_soon(
+                    self._supervise_worker,
+                    index,
+                    queue_rx,
+                    parsed_tx.clone(),
+                    log,
+                    log_extra,
+                )
+
+            nursery.start_soon(
+                self._distribute,
+                channel,
+                [queue_tx for queue_tx, _ in queues],
+                parsed_tx.clone(),
+            )
+
+            await consumer(parsed_rx)
+            nursery.cancel_scope.cancel()
+
+    async def _supervise_worker(
+        self,
+        index: int,
+        queue: ReceiveChannel[Any],
+        parsed: SendChannel[InboundItem],
+        log: Logger,
+        log_extra: dict[str, Any] | None,
+    ) -> None:
+        """Runs a single worker process, forwarding the items of the given
+        queue to the worker and the parsed messages from the worker to the
+        given channel.
+
+        The worker process is restarted when it terminates unexpectedly. Data
+        that was sent to the worker but not parsed yet is lost, along with
+        the partially parsed messages of the worker.
+        """
+        context = get_context("spawn")
+
+        async with parsed:
+            while True:
+                ours, theirs = context.Pipe()
+                process = context.Process(
+                    target=_run_worker,
+                    args=(theirs, self._dialect, self._system_id, self._frame_filter),
+                    name=f"mavlink-parser-{index}",
+                    daemon=True,
+                )
+
+                try:
+                    await to_thread.run_sync(process.start)
+                except BaseException:
+                    theirs.close()
+                    ours.close()
+                    raise
+
+                try:
+                    theirs.close()
+                    log.info(f"Started MAVLink parser worker #{index}", extra=log_extra)
+
+                    async with open_nursery() as nursery:
+                        nursery.start_soon(
+                            _send_to_worker, ours, queue, nursery.cancel_scope
+                        )
+                        nursery.start_soon(
+                            _receive_from_worker, ours, parsed, nursery.cancel_scope
+                        )
+
+                finally:
+                    process.terminate()
+                    with move_on_after(5) as cancel_scope:
+                        cancel_scope.shield = True
+                        await to_thread.run_sync(process.join, 1)
+                    theirs.close()
+                    ours.close()
+
+                log.error(
+                    f"MAVLink parser worker #{index} terminated, restarting",
+                    extra=log_extra,
+                )
+                await sleep(1)
+
+    async def _distribute(
+        self,
+        channel: ReceiveChannel[InboundItem],
+        queues: list[SendChannel[Any]],
+        passthrough: SendChannel[InboundItem],
+    ) -> None:
+        """Forwards unparsed inbound data to the appropriate worker queues.
+
+        Data from the same connection and address is always forwarded to the
+        same worker as the worker keeps track of partially parsed messages
+        between chunks.
+        """
+        num_queues = len(queues)
+        async with passthrough:
+            async for connection_id, (data, address) in channel:
+                if isinstance(data, UnparsedMAVLinkData):
+                    index = hash((connection_id, address)) % num_queues
+                    await queues[index].send((connection_id, data.data, address))
+                else:
+                    await passthrough.send((connection_id, (data, address)))
+
+
+async def _send_to_worker(
+    pipe: PipeConnection, queue: ReceiveChannel[Any], cancel_scope: CancelScope
+) -> None:
+    """Sends items from the given queue to a worker process through the given
+    pipe, batching together the items that accumulated while the previous
+    batch was being sent.
+
+    Cancels the given cancel scope when the worker process is gone.
+    """
+    async for item in queue:
+        batch = [item]
+        while True:
+            try:
+                batch.append(queue.receive_nowait())
+            except WouldBlock:
+                break
+
+        try:
+            await to_thread.run_sync(pipe.send, batch, abandon_on_cancel=True)
+        except OSError:
+            cancel_scope.cancel()
+            return
+
+
+async def _receive_from_worker(
+    pipe: PipeConnection, parsed: SendChannel[InboundItem], cancel_scope: CancelScope
+) -> None:
+    """Receives batches of parsed MAVLink messages from a worker process
+    through the given pipe and forwards them to the given channel.
+
+    Cancels the given cancel scope when the worker process is gone.
+    """
+    while True:
+        try:
+            batch = await to_thread.run_sync(pipe.recv, abandon_on_cancel=True)
+        except (EOFError, OSError):
+            cancel_scope.cancel()
+            return
+
+        for item in batch:
+            await parsed.send(item)
+
+
+def _run_worker(
+    pipe: PipeConnection,
+    dialect: str,
+    system_id: int,
+    frame_filter: MAVLinkFrameFilter | None = None,
+) -> None:
+    """Main function of a worker process.
+
+    Receives batches of (connection ID, data, address) triplets from the
+    given pipe, parses them and sends back lists of (connection ID,
+    (message, address)) items.
+    """
+    from .channel import _get_mavlink_factory
+
+    factory = _get_mavlink_factory(dialect, system_id, frame_filter=frame_filter)
+    parsers = MAVLinkParserTable(factory)
+
+    while True:
+        try:
+            batch = pipe.recv()
+
+            # Process everything that has accumulated in the pipe in one go;
+            # this is what makes the decimation effective when the main
+            # process falls behind
+            while pipe.poll():
+                batch.extend(pipe.recv())
+        except (EOFError, OSError, KeyboardInterrupt):
+            break
+
+        result = _parse_batch(batch, parsers)
+        if result:
+            try:
+                pipe.send(result)
+            except (OSError, KeyboardInterrupt):
+                break
+
+
+def _parse_batch(
+    batch: Iterable[tuple[str, bytes, Any]],
+    parsers: MAVLinkParserTable,
+) -> list[InboundItem]:
+    """Parses a batch of raw MAVLink data chunks, drops messages that the
+    MAVLink network would ignore anyway and decimates high-rate telemetry
+    messages.
+
+    Parameters:
+        batch: the raw data chunks to parse, along with the IDs of the
+            connections and the addresses they were received from
+        parsers: table mapping connection IDs and addresses to the MAVLink
+            parser objects that keep track of partially parsed messages
+
+    Returns:
+        the parsed messages, along with the connection IDs and addresses they
+        were received from, in the order they were received
+    """
+    autopilot = MAVComponent.AUTOPILOT1
+    udp_bridge = MAVComponent.UDP_BRIDGE
+    radio_status = MAVMessageType.RADIO_STATUS
+
+    messages: list[InboundItem] = []
+    for connection_id, data, address in batch:
+        parser = parsers[connection_id, address]
+        for message in parser.parse_buffer(data) or ():
+            component = message.get_srcComponent()
+            if component == autopilot or (
+                component == udp_bridge and message.get_msgId() == radio_status
+            ):
+                messages.append((connection_id, (message, address)))
+
+    return _decimate(messages)
+
+
+def _decimate(messages: list[InboundItem]) -> list[InboundItem]:
+    """Removes all but the most recent message of each decimated message type
+    from each MAVLink component in the given list, keeping the order of the
+    remaining messages intact.
+    """
+    seen: set[tuple[int, int, int]] = set()
+    result: list[InboundItem] = []
+    decimated = DECIMATED_MESSAGE_TYPES
+
+    for item in reversed(messages):
+        message: MAVLinkMessage = item[1][0]
+        msg_id = message.get_msgId()
+        if msg_id in decimated:
+            key = (message.get_srcSystem(), message.get_srcComponent(), msg_id)
+            if key in seen:
+                continue
+            seen.add(key)
+        result.append(item)
+
+    result.reverse()
+    return result
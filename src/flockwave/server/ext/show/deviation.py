@@ -0,0 +1,444 @@
+"""Monitoring of the deviations of the drones from their expected positions
+and light colors while the show clock is running.
+"""
+
+from __future__ import annotations
+
+from logging import Logger
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from trio import to_thread
+from trio_util import periodic
+
+from flockwave.server.model import Client, FlockwaveMessage
+from flockwave.server.model.log import Severity
+from flockwave.server.show import (
+    LightKeyframes,
+    ShowSpecification,
+    TrajectorySpecification,
+)
+from flockwave.server.show.deviation import (
+    ExpectedColorMonitor,
+    ExpectedPositionMonitor,
+    ShowFrame,
+)
+from flockwave.server.show.parse_cache import ShowParseCache
+from flockwave.server.tasks.led_lights import LightConfiguration, LightEffectType
+from flockwave.server.utils.system_time import get_current_unix_timestamp_msec
+
+if TYPE_CHECKING:
+    from flockwave.server.app import SkybrushServer
+    from flockwave.server.model.uav import UAV, UAVStatusInfo
+
+    from .clock import ShowClock
+
+__all__ = ("ShowDeviationMonitor",)
+
+
+_UNKNOWN_STATUS = (None, None, None, None, None)
+"""Row of the status table for drones with no recent status information."""
+
+
+class ShowDeviationMonitor:
+    """Object that collects the show specifications of the drones from the
+    show upload requests passing through the message hub and compares the
+    positions and the light colors of the drones with the ones they are
+    expected to have while the show clock is running.
+
+    Instances of this class act as request middleware for the message hub,
+    and their `on_response()` method acts as response middleware. A show
+    specification is used for a drone only after the server has reported
+    that the upload to the drone succeeded. The monitoring itself is
+    performed by the `run()` method.
+    """
+
+    broadcast_interval: float
+    """Number of seconds between consecutive deviation notifications sent to
+    the clients.
+    """
+
+    check_lights: bool
+    """Whether to compare the light colors reported by the drones with the
+    colors of their light programs.
+    """
+
+    max_age: float
+    """Maximum age of the status information of a drone, in seconds, for its
+    position to be used in the comparison.
+    """
+
+    pending_timeout: float
+    """Number of seconds after which show uploads that were not reported to
+    have finished are forgotten.
+    """
+
+    recovery_ratio: float
+    """A deviating drone is considered to have recovered when its distance
+    from the expected position drops below this fraction of the threshold.
+    """
+
+    threshold: float
+    """Distance from the expected position above which a drone is considered
+    to be deviating, in meters.
+    """
+
+    _colors: ExpectedColorMonitor | None
+    """The monitor that compares the light colors of the drones with the
+    colors of their light programs; ``None`` if no show specification was
+    collected yet.
+    """
+
+    _indices: dict[str, int]
+    """Mapping from the IDs of the drones in the current monitor to their
+    indices in the arrays of the monitor.
+    """
+
+    _log: Logger
+    """Logger that the monitor will write to."""
+
+    _monitor: ExpectedPositionMonitor | None
+    """The monitor that compares the positions of the drones with their
+    expected positions; ``None`` if no show specification was collected yet.
+    """
+
+    _monitor_version: int
+    """Value of `_version` when the current monitor was created."""
+
+    _parse_cache: ShowParseCache
+    """Cache of the parsed trajectories and compiled light programs of the
+    collected show specifications, so only the new shows are parsed when the
+    monitor is re-created.
+    """
+
+    _pending_receipts: dict[str, tuple[str, ShowSpecification, float]]
+    """The drone IDs and show specifications of the show uploads that are
+    being executed asynchronously, and the times when their receipts were
+    issued, keyed by the receipt IDs of the uploads.
+    """
+
+    _pending_uploads: dict[str, tuple[list[str], ShowSpecification, float]]
+    """The drone IDs and show specifications of the show upload requests
+    that have not been responded to yet, and the times when they were
+    requested, keyed by the IDs of the requests.
+    """
+
+    _shows: dict[str, ShowSpecification]
+    """The show specifications of the drones that were uploaded successfully,
+    keyed by the IDs of the drones.
+    """
+
+    _uavs: list[UAV | None]
+    """The UAVs being monitored, in the order of the arrays of the monitor;
+    ``None`` for UAVs that have to be looked up again.
+    """
+
+    _version: int
+    """Counter that is incremented whenever the collected show specifications
+    change.
+    """
+
+    def __init__(
+        self,
+        log: Logger,
+        *,
+        threshold: float = 5.0,
+        recovery_ratio: float = 0.8,
+        broadcast_interval: float = 1.0,
+        max_age: float = 2.0,
+        pending_timeout: float = 3600.0,
+        check_lights: bool = True,
+    ):
+        """Constructor.
+
+        Parameters:
+            log: logger that the monitor will write to
+            threshold: distance from the expected position above which a
+                drone is considered to be deviating, in meters
+            recovery_ratio: a deviating drone is considered to have
+                recovered when its distance from the expected position drops
+                below this fraction of the threshold
+            broadcast_interval: number of seconds between consecutive
+                deviation notifications sent to the clients
+            max_age: maximum age of the status information of a drone, in
+                seconds, for its position to be used in the comparison
+            pending_timeout: number of seconds after which show uploads that
+                were not reported to have finished are forgotten
+            check_lights: whether to compare the light colors reported by
+                the drones with the colors of their light programs
+        """
+        self.threshold = threshold
+        self.recovery_ratio = recovery_ratio
+        self.broadcast_interval = broadcast_interval
+        self.max_age = max_age
+        self.pending_timeout = pending_timeout
+        self.check_lights = check_lights
+
+        self._colors = None
+        self._indices = {}
+        self._log = log
+        self._monitor = None
+        self._monitor_version = 0
+        self._parse_cache = ShowParseCache()
+        self._pending_receipts = {}
+        self._pending_uploads = {}
+        self._shows = {}
+        self._uavs = []
+        self._version = 0
+
+    def __call__(self, message: FlockwaveMessage, sender: Client) -> FlockwaveMessage:
+        if message.get_type() == "OBJ-CMD":
+            body = message.body
+            if body.get("command", "") == "__show_upload":
+                kwds = body.get("kwds")
+                ids = body.get("ids")
+                if isinstance(kwds, dict) and isinstance(ids, list):
+                    show = kwds.get("show")
+                    if isinstance(show, dict) and message.id:
+                        self._expire_pending_uploads()
+                        self._pending_uploads[message.id] = (ids, show, monotonic())
+        return message
+
+    def on_response(
+        self,
+        message: FlockwaveMessage,
+        to: Client | None,
+        in_response_to: FlockwaveMessage | None,
+    ) -> FlockwaveMessage:
+        """Response middleware that records the show specifications of the
+        drones whose show uploads succeeded.
+        """
+        body = message.body
+        type = body.get("type")
+        if in_response_to is not None:
+            # Rejected requests are answered with other message types; the
+            # pending upload is forgotten in that case, too
+            pending = self._pending_uploads.pop(in_response_to.id, None)
+            if pending is not None and type == "OBJ-CMD":
+                self._on_upload_response(body, pending[0], pending[1])
+        elif type == "ASYNC-RESP":
+            pending = self._pending_receipts.pop(body.get("id"), None)
+            if pending is not None and "error" not in body:
+                self._add_show(pending[0], pending[1])
+        elif type == "ASYNC-TIMEOUT":
+            receipt_ids = body.get("ids")
+            if isinstance(receipt_ids, list):
+                for receipt_id in receipt_ids:
+                    self._pending_receipts.pop(receipt_id, None)
+        return message
+
+    async def run(
+        self,
+        app: SkybrushServer,
+        clock: ShowClock,
+        rate: float,
+        lights: LightConfiguration | None = None,
+    ) -> None:
+        """Monitors the deviations of the drones from their expected positions
+        and light colors while the show clock is running.
+
+        Parameters:
+            app: the application that the monitor belongs to
+            clock: the show clock
+            rate: number of comparisons to perform per second
+            lights: the LED light configuration of the show; light colors are
+                not compared while the GCS controls the lights of the drones
+        """
+        next_broadcast_at = 0.0
+
+        async for _ in periodic(1 / rate):
+            self._expire_pending_uploads()
+
+            # The monitor is re-created in a worker thread as soon as the
+            # shows change so it is ready by the time the show clock starts
+            if self._monitor_version != self._version:
+                await self._update_monitor()
+
+            monitor, colors = self._monitor, self._colors
+            if monitor is None or colors is None:
+                continue
+
+            if not clock.running:
+                # Start with a clean state when the clock is started again
+                monitor.reset()
+                colors.reset()
+                continue
+
+            time = clock.seconds
+            start, end = monitor.time_range
+            if time < start or time > end:
+                continue
+
+            lat, lon, amsl, ahl, light = self._get_status(app, monitor.ids)
+            snapshot = monitor.update(time, lat, lon, amsl, ahl)
+
+            if self.check_lights and (
+                lights is None or lights.effect is LightEffectType.OFF
+            ):
+                for uav_id in colors.update(time, light):
+                    self._log.warning(
+                        f"Drone does not show the color of its light program "
+                        f"at T={time:.1f}s",
+                        extra={"id": uav_id},
+                    )
+            else:
+                colors.reset()
+
+            for uav_id in snapshot.newly_deviating:
+                index = self._indices[uav_id]
+                message = (
+                    f"Drone is {snapshot.total[index]:.1f}m away from its "
+                    f"expected position at T={time:.1f}s"
+                )
+                self._log.warning(message, extra={"id": uav_id})
+                app.request_to_send_SYS_MSG_message(
+                    message, severity=Severity.WARNING, sender=uav_id
+                )
+
+            now = monotonic()
+            if now >= next_broadcast_at or snapshot.newly_deviating:
+                next_broadcast_at = now + self.broadcast_interval
+                body = {
+                    "type": "X-SHOW-DEV",
+                    **snapshot.json,
+                    "lights": colors.num_mismatching,
+                }
+                app.message_hub.enqueue_broadcast_message(
+                    app.message_hub.create_notification(body)
+                )
+
+    def _add_show(self, uav_id: str, show: ShowSpecification) -> None:
+        """Records the show specification of the drone with the given ID,
+        replacing the show specification uploaded to it earlier.
+        """
+        self._shows[uav_id] = show
+        self._version += 1
+
+    def _create_monitor(
+        self, shows: dict[str, ShowSpecification]
+    ) -> tuple[ExpectedPositionMonitor, ExpectedColorMonitor] | None:
+        """Creates the monitors that compare the positions and the light
+        colors of the drones with the ones expected from the given show
+        specifications; runs in a worker thread.
+        """
+        cache = self._parse_cache
+        cache.reserve(len(shows))
+
+        ids: list[str] = []
+        trajectories: list[TrajectorySpecification] = []
+        frames: list[ShowFrame] = []
+        keyframes: list[LightKeyframes] = []
+        for uav_id, show in shows.items():
+            try:
+                trajectory = cache.get_trajectory(show)
+                frame = ShowFrame.from_show_specification(show)
+                light_keyframes = cache.get_light_keyframes(show)
+            except Exception:
+                # Indoor shows and invalid shows cannot be monitored
+                continue
+            ids.append(uav_id)
+            trajectories.append(trajectory)
+            frames.append(frame)
+            keyframes.append(light_keyframes)
+
+        if not ids:
+            return None
+
+        monitor = ExpectedPositionMonitor(
+            ids,
+            trajectories,
+            frames,
+            threshold=self.threshold,
+            recovery_ratio=self.recovery_ratio,
+        )
+        return monitor, ExpectedColorMonitor(ids, keyframes)
+
+    def _expire_pending_uploads(self) -> None:
+        """Forgets the show uploads that were requested too long ago without
+        being reported to have finished, e.g., because the client that
+        requested them disconnected before the response was sent.
+        """
+        deadline = monotonic() - self.pending_timeout
+        for pending in (self._pending_uploads, self._pending_receipts):
+            expired = [key for key, item in pending.items() if item[2] < deadline]
+            for key in expired:
+                del pending[key]
+
+    def _get_status(
+        self, app: SkybrushServer, ids: list[str]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the latitudes, longitudes, AMSL and AHL altitudes and the
+        light colors of the drones with the given IDs, using NaN for unknown
+        values.
+        """
+        uavs = self._uavs
+        if None in uavs:
+            for index, uav in enumerate(uavs):
+                if uav is None:
+                    uavs[index] = app.find_uav_by_id(ids[index])
+
+        oldest = get_current_unix_timestamp_msec() - self.max_age * 1000
+        statuses = [
+            status if status is not None and status.timestamp >= oldest else None
+            for status in (uav.status if uav is not None else None for uav in uavs)
+        ]
+        table = np.array(
+            [_get_status_row(status) for status in statuses], dtype=np.float64
+        ).reshape(-1, 5)
+
+        # Drones with no recent status are looked up again next time; they
+        # may have been replaced in the object registry in the meanwhile
+        for index in np.flatnonzero(np.isnan(table[:, 4])).tolist():
+            uavs[index] = None
+
+        return table[:, 0], table[:, 1], table[:, 2], table[:, 3], table[:, 4]
+
+    def _on_upload_response(
+        self, body: dict[str, Any], ids: list[str], show: ShowSpecification
+    ) -> None:
+        """Processes the response to a show upload request, recording the show
+        specification of the drones that the show was uploaded to
+        successfully, and remembering the receipts of the uploads that are
+        executed asynchronously.
+        """
+        results = body.get("result")
+        receipts = body.get("receipt")
+        now = monotonic()
+        for uav_id in ids:
+            if not isinstance(uav_id, str):
+                continue
+            if isinstance(results, dict) and uav_id in results:
+                self._add_show(uav_id, show)
+            elif isinstance(receipts, dict) and uav_id in receipts:
+                self._pending_receipts[receipts[uav_id]] = (uav_id, show, now)
+
+    async def _update_monitor(self) -> None:
+        """Re-creates the monitor from the collected show specifications in a
+        worker thread.
+        """
+        version = self._version
+        monitors = await to_thread.run_sync(
+            self._create_monitor, dict(self._shows), abandon_on_cancel=True
+        )
+
+        self._monitor, self._colors = monitors or (None, None)
+        self._monitor_version = version
+
+        ids = self._monitor.ids if self._monitor else []
+        self._indices = {uav_id: index for index, uav_id in enumerate(ids)}
+        self._uavs = [None] * len(ids)
+
+
+def _get_status_row(status: UAVStatusInfo | None) -> tuple[float | None, ...]:
+    """Returns the row of the status table of the deviation monitor that
+    corresponds to the given status information of a drone.
+    """
+    if status is None:
+        return _UNKNOWN_STATUS
+
+    position = status.position
+    if position is None:
+        return (None, None, None, None, status.light)
+    else:
+        return (position.lat, position.lon, position.amsl, position.ahl, status.light)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import Awaitable, Callable, Mapping, Sequence
 from contextlib import ExitStack
 from logging import Logger
 from math import inf
@@ -14,11 +14,14 @@ from flockwave.server.ext.base import Extension
 from flockwave.server.ext.clocks import ClocksExtensionAPI
 from flockwave.server.ext.signals import SignalsExtensionAPI
 from flockwave.server.model.clock import Clock
+from flockwave.server.show import ShowSpecification
 from flockwave.server.tasks import wait_for_dict_items, wait_until
 
 from .clock import ClockSynchronizationHandler, ShowClock, ShowEndClock
 from .config import DroneShowConfiguration, LightConfiguration, StartMethod
+from .deviation import ShowDeviationMonitor
 from .logging import ShowUploadLoggingMiddleware
+from .separation import ShowSeparationChecker
 
 __all__ = ("construct", "dependencies", "description")
 
@@ -41,8 +44,12 @@ class DroneShowExtension(Extension):
     _end_clock: ShowEndClock | None
     _end_clock_sync: ClockSynchronizationHandler
 
+    _deviation_monitor: ShowDeviationMonitor | None
+
     _log_middleware: ShowUploadLoggingMiddleware | None
 
+    _separation_checker: ShowSeparationChecker | None
+
     _nursery: Nursery | None
     _show_tasks: CancellableTaskGroup | None
 
@@ -55,20 +62,39 @@ class DroneShowExtension(Extension):
         self._end_clock = None
         self._end_clock_sync = ClockSynchronizationHandler()
 
+        self._deviation_monitor = None
         self._log_middleware = None
 
+        self._separation_checker = None
+
         self._nursery = None
         self._show_tasks = None
 
         self._config = DroneShowConfiguration()
         self._lights = LightConfiguration()
 
+    def configure(self, configuration: dict[str, Any]) -> None:
+        super().configure(configuration)
+
+        # The separation checker is set up here and not in run() because the
+        # extensions that upload shows ask for it when they start
+        separation_config = configuration.get("separation", {})
+        if separation_config.get("enabled", False):
+            self._separation_checker = ShowSeparationChecker(
+                self.log,
+                min_distance=float(separation_config.get("min_distance", 0)),
+                processes=int(separation_config.get("processes", 0)),
+            )
+        else:
+            self._separation_checker = None
+
     def exports(self) -> dict[str, Any]:
         return {
             "get_clock": self._get_clock,
             "get_configuration": self._get_configuration,
             "get_last_uploaded_show_metadata": self._get_last_uploaded_show_metadata,
             "get_light_configuration": self._get_light_configuration,
+            "get_show_validator": self._get_show_validator,
         }
 
     def handle_SHOW_CFG(self, message, sender, hub):
@@ -157,6 +183,18 @@ class DroneShowExtension(Extension):
 
         self._clock_sync.point_of_no_return_seconds = point_of_no_return_seconds
 
+        deviation_config = configuration.get("deviation", {})
+        deviation_rate = float(deviation_config.get("rate", 5))
+        if deviation_config.get("enabled", False) and deviation_rate > 0:
+            self._deviation_monitor = ShowDeviationMonitor(
+                self.log,
+                threshold=float(deviation_config.get("threshold", 5)),
+                broadcast_interval=float(deviation_config.get("broadcast_interval", 1)),
+                check_lights=bool(deviation_config.get("lights", True)),
+            )
+        else:
+            self._deviation_monitor = None
+
         self.log.info(
             "Default show start method: %s", self._config.start_method.describe()
         )
@@ -171,6 +209,15 @@ class DroneShowExtension(Extension):
             self._log_middleware = ShowUploadLoggingMiddleware(self.log)
             self._show_tasks = CancellableTaskGroup(self._nursery)
 
+            if self._deviation_monitor is not None:
+                self._nursery.start_soon(
+                    self._deviation_monitor.run,
+                    app,
+                    self._clock,
+                    deviation_rate,
+                    self._lights,
+                )
+
             with ExitStack() as stack:
                 stack.enter_context(
                     self._config.updated_v2.connected_to(
@@ -209,6 +256,15 @@ class DroneShowExtension(Extension):
                 stack.enter_context(
                     app.message_hub.use_request_middleware(self._log_middleware)
                 )
+                if self._deviation_monitor is not None:
+                    stack.enter_context(
+                        app.message_hub.use_request_middleware(self._deviation_monitor)
+                    )
+                    stack.enter_context(
+                        app.message_hub.use_response_middleware(
+                            self._deviation_monitor.on_response
+                        )
+                    )
                 stack.enter_context(self._clock_sync.use_secondary_clock(self._clock))
                 stack.enter_context(
                     self._end_clock_sync.use_secondary_clock(self._end_clock)
@@ -231,6 +287,15 @@ class DroneShowExtension(Extension):
         """Returns a copy of the current LED lgiht configuration."""
         return self._lights.clone()
 
+    def _get_show_validator(
+        self,
+    ) -> Callable[[Mapping[str, ShowSpecification]], Awaitable[None]] | None:
+        """Returns an async function that validates the show specifications
+        of a batch of show uploads, keyed by the IDs of the drones, before the
+        transfers start, or ``None`` if the shows need no validation.
+        """
+        return self._validate_shows if self._separation_checker else None
+
     def _on_config_updated(self, sender, changed: Sequence[str]) -> None:
         """Handler that is called when the configuration of the start settings
         of the show was updated from any source.
@@ -350,6 +415,23 @@ class DroneShowExtension(Extension):
                 self._clock_sync.disable_and_stop()
                 self._end_clock_sync.disable_and_stop()
 
+    async def _validate_shows(self, shows: Mapping[str, ShowSpecification]) -> None:
+        """Validates the show specifications of a batch of show uploads.
+
+        Raises:
+            RuntimeError: if the drones get closer to each other than the
+                required minimum distance during the show
+        """
+        if self._separation_checker is None:
+            return
+
+        report = await self._separation_checker.check(shows)
+        if report is not None and not report.ok:
+            raise RuntimeError(
+                f"Drones get closer than {report.threshold:g}m to each other "
+                "during the show"
+            )
+
     async def _start_show_when_needed(self) -> None:
         assert self.app is not None
         start_signal = self.app.import_api("signals", SignalsExtensionAPI).get(
@@ -458,5 +540,107 @@ schema = {
             ),
             "default": -10,
         },
+        "deviation": {
+            "type": "object",
+            "title": "Deviation monitoring",
+            "description": (
+                "Settings of the monitor that compares the positions of the "
+                "drones with their expected positions while the show clock "
+                "is running."
+            ),
+            "properties": {
+                "enabled": {
+                    "type": "boolean",
+                    "title": "Monitor deviations from the expected positions",
+                    "format": "checkbox",
+                    "default": False,
+                },
+                "threshold": {
+                    "type": "number",
+                    "title": "Deviation threshold (meters)",
+                    "description": (
+                        "Drones farther than this distance from their "
+                        "expected positions trigger a warning."
+                    ),
+                    "minimum": 0,
+                    "default": 5,
+                },
+                "rate": {
+                    "type": "number",
+                    "title": "Comparisons per second",
+                    "description": (
+                        "Number of times per second the positions of the "
+                        "drones are compared with their expected positions. "
+                        "Zero turns off deviation monitoring."
+                    ),
+                    "minimum": 0,
+                    "default": 5,
+                },
+                "lights": {
+                    "type": "boolean",
+                    "title": "Compare light colors with the light programs",
+                    "description": (
+                        "Drones that do not show the colors of their light "
+                        "programs trigger a warning. Light colors are not "
+                        "compared while the lights are controlled from the "
+                        "GCS."
+                    ),
+                    "format": "checkbox",
+                    "default": True,
+                },
+                "broadcast_interval": {
+                    "type": "number",
+                    "title": "Notification interval (seconds)",
+                    "description": (
+                        "Number of seconds between consecutive deviation "
+                        "notifications sent to the clients."
+                    ),
+                    "minimum": 0,
+                    "default": 1,
+                },
+            },
+        },
+        "separation": {
+            "type": "object",
+            "title": "Minimum separation check",
+            "description": (
+                "Settings of the check that verifies whether the drones keep "
+                "the required minimum distance from each other, using the "
+                "shows being uploaded to the drones."
+            ),
+            "properties": {
+                "enabled": {
+                    "type": "boolean",
+                    "title": "Check minimum separation before show uploads",
+                    "description": (
+                        "Show uploads are refused when the drones get closer "
+                        "to each other than the minimum distance."
+                    ),
+                    "format": "checkbox",
+                    "default": False,
+                },
+                "min_distance": {
+                    "type": "number",
+                    "title": "Default minimum distance (meters)",
+                    "description": (
+                        "Minimum distance to use when the show does not "
+                        "specify the minimum distance it was validated "
+                        "against. Zero skips the check for these shows."
+                    ),
+                    "minimum": 0,
+                    "default": 0,
+                },
+                "processes": {
+                    "type": "integer",
+                    "title": "Worker processes",
+                    "description": (
+                        "Number of worker processes to use for the check. "
+                        "Zero runs the check in the server process."
+                    ),
+                    "minimum": 0,
+                    "default": 0,
+                },
+            },
+        },
     }
 }
@@ -0,0 +1,135 @@
+"""Verification of the minimum distance between the drones of the fleet
+before the show uploads.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from functools import partial
+from logging import Logger
+
+from trio import to_thread
+
+from flockwave.server.show import (
+    SeparationReport,
+    ShowSpecification,
+    TrajectoryEvaluator,
+    TrajectorySpecification,
+    check_minimum_separation,
+    get_minimum_separation_from_show_specification,
+    get_trajectory_from_show_specification,
+)
+
+__all__ = ("ShowSeparationChecker",)
+
+
+class ShowSeparationChecker:
+    """Object that checks whether the drones keep the required minimum
+    distance from each other, given the show specifications being uploaded
+    to the drones of the fleet.
+    """
+
+    min_distance: float
+    """Minimum distance between drones to use when the show specifications
+    do not specify one; zero or negative means that these shows are not
+    checked.
+    """
+
+    processes: int
+    """Number of worker processes to use for the check; zero to run the
+    check in a worker thread of the current process.
+    """
+
+    _log: Logger
+    """Logger that the checker will write to."""
+
+    def __init__(
+        self,
+        log: Logger,
+        *,
+        min_distance: float = 0.0,
+        processes: int = 0,
+    ):
+        """Constructor.
+
+        Parameters:
+            log: logger that the checker will write to
+            min_distance: minimum distance between drones to use when the
+                show specifications do not specify one; zero or negative
+                means that these shows are not checked
+            processes: number of worker processes to use for the check; zero
+                to run the check in a worker thread of the current process
+        """
+        self.min_distance = min_distance
+        self.processes = processes
+
+        self._log = log
+
+    async def check(
+        self, shows: Mapping[str, ShowSpecification]
+    ) -> SeparationReport | None:
+        """Checks whether the drones keep the required minimum distance from
+        each other and logs a warning if they do not.
+
+        Parameters:
+            shows: the show specifications of the drones, keyed by the IDs of
+                the drones
+
+        Returns:
+            the result of the check, or ``None`` if the shows could not be
+            checked
+        """
+        ids: list[str] = []
+        trajectories: list[TrajectorySpecification] = []
+        min_distance: float | None = None
+        for uav_id, show in shows.items():
+            try:
+                trajectory = get_trajectory_from_show_specification(show)
+                if min_distance is None:
+                    min_distance = get_minimum_separation_from_show_specification(show)
+            except Exception:
+                # Invalid shows are rejected by the upload itself
+                continue
+            ids.append(uav_id)
+            trajectories.append(trajectory)
+
+        if min_distance is None or min_distance <= 0:
+            min_distance = self.min_distance
+        if len(ids) < 2 or min_distance <= 0:
+            return None
+
+        report = await to_thread.run_sync(
+            partial(
+                _check_trajectories,
+                trajectories,
+                min_distance,
+                processes=self.processes,
+            ),
+            abandon_on_cancel=True,
+        )
+
+        if report.ok:
+            self._log.info(
+                f"Drones keep a distance of at least {min_distance:g}m from "
+                "each other during the show"
+            )
+        else:
+            closest = report.violations[0]
+            self._log.warning(
+                f"{report.num_violating_pairs} pair(s) of drones get closer than "
+                f"{min_distance:g}m to each other; the closest pair is "
+                f"{ids[closest.first]} and {ids[closest.second]} at "
+                f"{closest.distance:.2f}m at T={closest.time:.1f}s"
+            )
+
+        return report
+
+
+def _check_trajectories(
+    trajectories: list[TrajectorySpecification], min_distance: float, **kwds
+) -> SeparationReport:
+    """Checks the minimum distance between the given trajectories; runs in a
+    worker thread.
+    """
+    evaluator = TrajectoryEvaluator(trajectories)
+    return check_minimum_separation(evaluator, min_distance, **kwds)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from collections.abc import Awaitable, Callable, Mapping
 from typing import TYPE_CHECKING, Protocol
 
 if TYPE_CHECKING:
+    from flockwave.server.show import ShowSpecification
     from flockwave.server.tasks.led_lights import LightConfiguration
 
     from .clock import ShowClock
@@ -19,3 +21,6 @@ class ShowExtensionAPI(Protocol):
     def get_configuration(self) -> DroneShowConfiguration: ...
     def get_light_configuration(self) -> LightConfiguration: ...
     def get_last_uploaded_show_metadata(self) -> ShowMetadata | None: ...
+    def get_show_validator(
+        self,
+    ) -> Callable[[Mapping[str, ShowSpecification]], Awaitable[None]] | None: ...
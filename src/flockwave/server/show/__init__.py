@@ -2,12 +2,30 @@
 Skybrush-related file formats, until we find a better place for them.
 """
 
+from .evaluator import TrajectoryEvaluator
 from .flight_area import get_flight_area_configuration_from_show_specification
-from .formats import SkybrushBinaryShowFile
+from .formats import (
+    MappedSkybrushBinaryShowFile,
+    SkybrushBinaryShowFile,
+    SkybrushBinaryShowFileDigest,
+    SkybrushBinaryShowFileWriter,
+)
 from .geofence import get_geofence_configuration_from_show_specification
-from .lights import get_light_program_from_show_specification
+from .kinematics import KinematicLimits, KinematicReport, check_kinematic_limits
+from .lights import (
+    LightKeyframes,
+    LightProgramEvaluator,
+    compile_light_program,
+    get_light_keyframes_from_show_specification,
+    get_light_program_from_show_specification,
+)
 from .player import LightPlayer, TrajectoryPlayer
 from .safety import get_safety_configuration_from_show_specification
+from .separation import (
+    SeparationReport,
+    check_minimum_separation,
+    get_minimum_separation_from_show_specification,
+)
 from .specification import (
     ShowSpecification,
     get_altitude_reference_from_show_specification,
@@ -21,6 +39,9 @@ from .specification import (
 from .trajectory import TrajectorySpecification
 
 __all__ = (
+    "check_kinematic_limits",
+    "check_minimum_separation",
+    "compile_light_program",
     "get_altitude_reference_from_show_specification",
     "get_coordinate_system_from_show_specification",
     "get_drone_count_from_show_specification",
@@ -28,13 +49,24 @@ __all__ = (
     "get_geofence_configuration_from_show_specification",
     "get_group_index_from_show_specification",
     "get_home_position_from_show_specification",
+    "get_light_keyframes_from_show_specification",
     "get_light_program_from_show_specification",
+    "get_minimum_separation_from_show_specification",
     "get_safety_configuration_from_show_specification",
     "get_trajectory_from_show_specification",
     "is_coordinate_system_in_show_specification_geodetic",
+    "KinematicLimits",
+    "KinematicReport",
+    "LightKeyframes",
     "LightPlayer",
+    "LightProgramEvaluator",
+    "MappedSkybrushBinaryShowFile",
+    "SeparationReport",
     "ShowSpecification",
     "SkybrushBinaryShowFile",
+    "SkybrushBinaryShowFileDigest",
+    "SkybrushBinaryShowFileWriter",
+    "TrajectoryEvaluator",
     "TrajectoryPlayer",
     "TrajectorySpecification",
 )
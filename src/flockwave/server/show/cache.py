@@ -0,0 +1,302 @@
+"""Content-addressed cache of encoded Skybrush binary show files.
+
+Encoding the show specification of a drone into a Skybrush binary show file
+is pure CPU work that yields the same result for the same input. The cache in
+this module stores the encoded files keyed by a hash of the show
+specification so retries, reconnects and repeated uploads of the same show
+do not need to encode the same data again.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Awaitable, Callable, Iterable
+from hashlib import sha256
+from json import dumps
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+from cachetools import LRUCache
+from trio import to_thread
+
+from flockwave.server.version import __version__ as server_version
+
+from .specification import ShowSpecification
+
+__all__ = ("ShowFileCache",)
+
+
+SHOW_FILE_CACHE_VERSION = 1
+"""Version number of the encoding of the cached show files; must be increased
+whenever the encoder changes in a way that is not reflected in the version
+number of the server.
+"""
+
+
+class ShowFileCache:
+    """Content-addressed cache of encoded Skybrush binary show files.
+
+    Encoded show files are kept in an in-memory LRU cache and optionally in a
+    folder on disk so they survive the reloading of the extension that owns
+    the cache and the restarts of the server.
+
+    The number of show files on disk is counted once and then tracked as new
+    files are written. When it exceeds the limit, the least recently used
+    files are removed until only 90% of the limit remains, so the folder is
+    not scanned again on every write.
+    """
+
+    max_disk_entries: int
+    """Maximum number of show files to keep on disk. The least recently
+    modified files are removed when the limit is exceeded.
+    """
+
+    _disk_lock: Lock
+    """Lock that protects the number of show files on disk; files are written
+    from worker threads.
+    """
+
+    _folder: Path | None
+    """Folder where the encoded show files are stored on disk; ``None`` if
+    the cache is kept in memory only.
+    """
+
+    _memory: LRUCache[str, bytes]
+    """In-memory LRU cache of the encoded show files, keyed by their hash."""
+
+    _num_disk_entries: int | None
+    """Number of show files in the folder on disk; ``None`` if the folder has
+    not been scanned yet.
+    """
+
+    def __init__(
+        self,
+        *,
+        folder: Path | None = None,
+        max_memory_size: int = 32 * 1024 * 1024,
+        max_disk_entries: int = 1024,
+    ):
+        """Constructor.
+
+        Parameters:
+            folder: folder where the encoded show files are stored on disk;
+                ``None`` to keep the cache in memory only
+            max_memory_size: maximum total size of the show files kept in
+                memory, in bytes
+            max_disk_entries: maximum number of show files to keep on disk
+        """
+        self.max_disk_entries = max(int(max_disk_entries), 0)
+
+        self._disk_lock = Lock()
+        self._folder = folder
+        self._memory = LRUCache(maxsize=max(int(max_memory_size), 1), getsizeof=len)
+        self._num_disk_entries = None
+
+    @property
+    def folder(self) -> Path | None:
+        """Folder where the encoded show files are stored on disk; ``None`` if
+        the cache is kept in memory only.
+        """
+        return self._folder
+
+    @folder.setter
+    def folder(self, value: Path | None) -> None:
+        with self._disk_lock:
+            self._folder = value
+            self._num_disk_entries = None
+
+    def clear(self) -> None:
+        """Clears the in-memory part of the cache."""
+        self._memory.clear()
+
+    async def get(self, key: str) -> bytes | None:
+        """Returns the encoded show file with the given key from the cache.
+
+        Parameters:
+            key: the key of the show file, as returned by `key_for()`
+
+        Returns:
+            the encoded show file or ``None`` if it is not in the cache
+        """
+        data = self._memory.get(key)
+        if data is None and self.folder is not None:
+            data = await to_thread.run_sync(self._read_from_disk, key)
+            if data is not None:
+                self._store_in_memory(key, data)
+        return data
+
+    async def get_or_create(
+        self,
+        show: ShowSpecification,
+        factory: Callable[[], Awaitable[bytes]],
+        *,
+        version: int,
+        extra: Iterable[str] = (),
+    ) -> bytes:
+        """Returns the encoded show file for the given show specification from
+        the cache, encoding it with the given factory function if needed.
+
+        Parameters:
+            show: the show specification of a single drone
+            factory: async function that encodes the show specification into a
+                Skybrush binary show file when it is not in the cache
+            version: version of the Skybrush binary file format that the
+                factory encodes the show specification into
+            extra: additional strings that affect the output of the encoder
+                and hence must be part of the cache key
+
+        Returns:
+            the encoded show file
+        """
+        key = self.key_for(show, extra, version=version)
+        if key is None:
+            return await factory()
+
+        data = await self.get(key)
+        if data is None:
+            data = await factory()
+            await self.put(key, data)
+
+        return data
+
+    def key_for(
+        self, show: ShowSpecification, extra: Iterable[str] = (), *, version: int
+    ) -> str | None:
+        """Returns the cache key of the given show specification.
+
+        The key depends on the version of the server, the version of the
+        encoding of the cached files (`SHOW_FILE_CACHE_VERSION`) and the
+        version of the Skybrush binary file format, too.
+
+        Parameters:
+            show: the show specification of a single drone
+            extra: additional strings that affect the output of the encoder
+                and hence must be part of the cache key
+            version: version of the Skybrush binary file format that the show
+                specification is encoded into
+
+        Returns:
+            the cache key or ``None`` if the show specification cannot be
+            hashed because it is not JSON-serializable
+        """
+        try:
+            encoded = dumps(
+                show, sort_keys=True, separators=(",", ":"), allow_nan=True
+            ).encode("utf-8")
+        except (TypeError, ValueError):
+            return None
+
+        hasher = sha256()
+        hasher.update(
+            f"{server_version}:{SHOW_FILE_CACHE_VERSION}:{version}".encode("ascii")
+        )
+        for item in extra:
+            hasher.update(b"\x00")
+            hasher.update(item.encode("utf-8"))
+        hasher.update(b"\x00")
+        hasher.update(encoded)
+        return hasher.hexdigest()
+
+    async def put(self, key: str, data: bytes) -> None:
+        """Stores an encoded show file in the cache.
+
+        Parameters:
+            key: the key of the show file, as returned by `key_for()`
+            data: the encoded show file
+        """
+        self._store_in_memory(key, data)
+        if self.folder is not None:
+            await to_thread.run_sync(self._write_to_disk, key, data)
+
+    def _path_for(self, key: str) -> Path:
+        assert self.folder is not None
+        return self.folder / f"{key}.skyb"
+
+    def _prune_disk(self, folder: Path) -> int:
+        """Removes the least recently modified show files from the given folder
+        if there are more of them than the limit, keeping 90% of the limit.
+
+        Returns:
+            the number of show files left in the folder
+        """
+        entries: list[tuple[float, Path]] = []
+        for path in folder.glob("*.skyb"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                pass
+
+        if len(entries) <= self.max_disk_entries:
+            return len(entries)
+
+        entries.sort()
+        keep = self.max_disk_entries - self.max_disk_entries // 10
+        remaining = len(entries)
+        for _, path in entries[: len(entries) - keep]:
+            try:
+                path.unlink()
+                remaining -= 1
+            except OSError:
+                pass
+
+        return remaining
+
+    def _read_from_disk(self, key: str) -> bytes | None:
+        path = self._path_for(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+
+        # Mark the file as recently used so it is pruned last
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return data
+
+    def _store_in_memory(self, key: str, data: bytes) -> None:
+        try:
+            self._memory[key] = data
+        except ValueError:
+            # Show file is larger than the entire in-memory cache
+            pass
+
+    def _write_to_disk(self, key: str, data: bytes) -> None:
+        folder = self.folder
+        assert folder is not None
+
+        # Failures are not fatal here; the show file is simply not cached on
+        # disk
+        path = self._path_for(key)
+        temp_path: str | None = None
+        try:
+            folder.mkdir(parents=True, exist_ok=True)
+            existed = path.exists()
+            with NamedTemporaryFile(
+                dir=folder, prefix=".", suffix=".tmp", delete=False
+            ) as fp:
+                temp_path = fp.name
+                fp.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            if temp_path is not None:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+            return
+
+        with self._disk_lock:
+            if folder != self._folder:
+                return
+
+            if self._num_disk_entries is None:
+                # First write into this folder; scan it once
+                self._num_disk_entries = self._prune_disk(folder)
+            elif not existed:
+                self._num_disk_entries += 1
+                if self._num_disk_entries > self.max_disk_entries:
+                    self._num_disk_entries = self._prune_disk(folder)
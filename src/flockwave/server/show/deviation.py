@@ -0,0 +1,533 @@
+"""Comparison of the live positions of the drones of a show with the positions
+where they are expected to be according to their trajectories, and of the
+colors of their lights with the colors of their light programs.
+
+The expected positions of the entire fleet are evaluated at once with a
+`TrajectoryEvaluator`, and the live GPS positions of the drones are projected
+into the local coordinate systems of their shows with array operations, using
+the same flat Earth approximation that the show coordinate systems use. The
+expected colors are evaluated in the same manner with a
+`LightProgramEvaluator`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from math import cos, radians, sin, sqrt
+from typing import Any
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from .evaluator import TrajectoryEvaluator
+from .lights import LightKeyframes, LightProgramEvaluator
+from .specification import (
+    ShowSpecification,
+    get_altitude_reference_from_show_specification,
+    get_coordinate_system_from_show_specification,
+    get_trajectory_from_show_specification,
+)
+from .trajectory import TrajectorySpecification
+
+__all__ = (
+    "DeviationSnapshot",
+    "ExpectedColorMonitor",
+    "ExpectedPositionMonitor",
+    "ShowFrame",
+)
+
+
+_WGS84_EQUATORIAL_RADIUS = 6378137.0
+"""Equatorial radius of the WGS84 ellipsoid, in meters."""
+
+_WGS84_ECCENTRICITY_SQUARED = 6.69437999014e-3
+"""Square of the first eccentricity of the WGS84 ellipsoid."""
+
+
+@dataclass(frozen=True)
+class ShowFrame:
+    """Local coordinate system of the show of a single drone."""
+
+    origin_lat: float
+    """Latitude of the origin of the coordinate system, in degrees."""
+
+    origin_lon: float
+    """Longitude of the origin of the coordinate system, in degrees."""
+
+    orientation: float = 0.0
+    """Orientation of the X axis of the coordinate system, in degrees,
+    clockwise from North.
+    """
+
+    type: str = "nwu"
+    """Type of the coordinate system; one of ``neu``, ``nwu``, ``ned`` or
+    ``nwd``.
+    """
+
+    amsl_reference: float | None = None
+    """Altitude above mean sea level that the Z coordinates of the show are
+    relative to; ``None`` if the Z coordinates are relative to the home
+    altitude of the drone.
+    """
+
+    @classmethod
+    def from_show_specification(cls, show: ShowSpecification) -> ShowFrame:
+        """Creates a frame from the coordinate system and the altitude
+        reference of a show specification.
+        """
+        coordinate_system = get_coordinate_system_from_show_specification(show)
+        return cls(
+            origin_lat=coordinate_system.origin.lat,
+            origin_lon=coordinate_system.origin.lon,
+            orientation=float(coordinate_system.orientation),
+            type=coordinate_system.type,
+            amsl_reference=get_altitude_reference_from_show_specification(show),
+        )
+
+
+@dataclass
+class DeviationSnapshot:
+    """Deviations of the drones of a show from their expected positions at a
+    given time instant.
+    """
+
+    time: float
+    """The time on the show clock, in seconds."""
+
+    ids: Sequence[str]
+    """IDs of the drones, in the order of the deviation arrays."""
+
+    horizontal: NDArray[np.float64]
+    """Horizontal deviations of the drones, in meters; NaN for drones with
+    no known position.
+    """
+
+    vertical: NDArray[np.float64]
+    """Vertical deviations of the drones, in meters; NaN for drones with no
+    known altitude.
+    """
+
+    deviating: NDArray[np.bool_]
+    """Whether each drone is currently considered to be too far from its
+    expected position.
+    """
+
+    newly_deviating: list[str] = field(default_factory=list)
+    """IDs of the drones that got too far from their expected positions since
+    the previous snapshot.
+    """
+
+    recovered: list[str] = field(default_factory=list)
+    """IDs of the drones that got back close to their expected positions
+    since the previous snapshot.
+    """
+
+    @property
+    def json(self) -> dict[str, Any]:
+        """Returns a compact JSON representation of the snapshot. Deviations
+        are rounded to centimeters; unknown deviations are ``None``.
+        """
+        return {
+            "time": round(self.time, 3),
+            "ids": list(self.ids),
+            "horizontal": _to_centimeters(self.horizontal),
+            "vertical": _to_centimeters(self.vertical),
+            "max": round(self.max_deviation * 100),
+            "mean": round(self.mean_deviation * 100),
+            "deviating": self.num_deviating,
+        }
+
+    @property
+    def max_deviation(self) -> float:
+        """The largest deviation among the drones with known positions, in
+        meters; zero if no position is known.
+        """
+        total = self.total
+        known = total[np.isfinite(total)]
+        return float(known.max()) if known.size else 0.0
+
+    @property
+    def mean_deviation(self) -> float:
+        """The mean deviation of the drones with known positions, in meters;
+        zero if no position is known.
+        """
+        total = self.total
+        known = total[np.isfinite(total)]
+        return float(known.mean()) if known.size else 0.0
+
+    @property
+    def num_deviating(self) -> int:
+        """Number of drones that are too far from their expected positions."""
+        return int(np.count_nonzero(self.deviating))
+
+    @property
+    def total(self) -> NDArray[np.float64]:
+        """Distances of the drones from their expected positions, in meters.
+        Drones with a known horizontal position but no altitude are compared
+        horizontally only.
+        """
+        return np.hypot(self.horizontal, np.nan_to_num(self.vertical))
+
+
+class ExpectedPositionMonitor:
+    """Compares the live positions of the drones of a show with the positions
+    where they are expected to be according to their trajectories.
+    """
+
+    threshold: float
+    """Distance from the expected position above which a drone is considered
+    to be deviating, in meters.
+    """
+
+    recovery_ratio: float
+    """A deviating drone is considered to have recovered when its distance
+    from the expected position drops below this fraction of the threshold.
+    """
+
+    _deviating: NDArray[np.bool_]
+    """Whether each drone was deviating in the last snapshot."""
+
+    _evaluator: TrajectoryEvaluator
+    """Evaluator of the trajectories of the drones."""
+
+    _ids: list[str]
+    """IDs of the drones being monitored."""
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        trajectories: Sequence[TrajectorySpecification],
+        frames: Sequence[ShowFrame],
+        *,
+        threshold: float = 5.0,
+        recovery_ratio: float = 0.8,
+    ):
+        """Constructor.
+
+        Parameters:
+            ids: the IDs of the drones
+            trajectories: the trajectories of the drones
+            frames: the local coordinate systems of the shows of the drones
+            threshold: distance from the expected position above which a
+                drone is considered to be deviating, in meters
+            recovery_ratio: a deviating drone is considered to have
+                recovered when its distance from the expected position drops
+                below this fraction of the threshold
+        """
+        if not len(ids) == len(trajectories) == len(frames):
+            raise ValueError("ids, trajectories and frames must have the same length")
+
+        self.threshold = float(threshold)
+        self.recovery_ratio = float(recovery_ratio)
+
+        self._ids = list(ids)
+        self._evaluator = TrajectoryEvaluator(trajectories)
+        self._deviating = np.zeros(len(self._ids), dtype=bool)
+        self._prepare_frames(frames)
+
+    @classmethod
+    def from_show_specifications(
+        cls, shows: Mapping[str, ShowSpecification], **kwds
+    ) -> ExpectedPositionMonitor:
+        """Creates a monitor from the show specifications of the drones.
+
+        Parameters:
+            shows: mapping from drone IDs to their show specifications
+            kwds: additional keyword arguments to forward to the constructor
+        """
+        ids = list(shows.keys())
+        trajectories = [get_trajectory_from_show_specification(shows[id]) for id in ids]
+        frames = [ShowFrame.from_show_specification(shows[id]) for id in ids]
+        return cls(ids, trajectories, frames, **kwds)
+
+    @property
+    def ids(self) -> list[str]:
+        """The IDs of the drones being monitored."""
+        return self._ids
+
+    @property
+    def time_range(self) -> tuple[float, float]:
+        """The time of the earliest takeoff and the time of the latest landing
+        in the fleet, relative to the start of the show.
+        """
+        return self._evaluator.time_range
+
+    def expected_positions_at(self, time: float) -> NDArray[np.float64]:
+        """Returns the expected positions of the drones at the given time on
+        the show clock, in the local coordinate systems of their shows, in an
+        array of shape ``(num_drones, 3)``.
+        """
+        return self._evaluator.positions_at(time)
+
+    def reset(self) -> None:
+        """Forgets which drones were deviating in the last snapshot."""
+        self._deviating = np.zeros(len(self._ids), dtype=bool)
+
+    def to_local(
+        self,
+        lat: ArrayLike,
+        lon: ArrayLike,
+        amsl: ArrayLike,
+        ahl: ArrayLike,
+    ) -> NDArray[np.float64]:
+        """Projects the GPS positions of the drones into the local coordinate
+        systems of their shows.
+
+        Parameters:
+            lat: the latitudes of the drones, in degrees
+            lon: the longitudes of the drones, in degrees
+            amsl: the altitudes of the drones above mean sea level, in meters
+            ahl: the altitudes of the drones above their home positions, in
+                meters
+
+        Returns:
+            the local coordinates of the drones in an array of shape
+            ``(num_drones, 3)``; NaN where the input is not known
+        """
+        lat = np.radians(np.asarray(lat, dtype=np.float64))
+        lon = np.radians(np.asarray(lon, dtype=np.float64))
+
+        north = (lat - self._origin_lat) * self._north_scale
+        east = (lon - self._origin_lon) * self._east_scale
+        up = np.where(
+            np.isnan(self._amsl_reference),
+            np.asarray(ahl, dtype=np.float64),
+            np.asarray(amsl, dtype=np.float64) - self._amsl_reference,
+        )
+
+        result = np.empty((len(self._ids), 3))
+        result[:, 0] = north * self._cos + east * self._sin
+        result[:, 1] = (east * self._cos - north * self._sin) * self._y_sign
+        result[:, 2] = up * self._z_sign
+        return result
+
+    def update(
+        self,
+        time: float,
+        lat: ArrayLike,
+        lon: ArrayLike,
+        amsl: ArrayLike,
+        ahl: ArrayLike,
+    ) -> DeviationSnapshot:
+        """Compares the live positions of the drones with their expected
+        positions at the given time on the show clock.
+
+        Parameters:
+            time: the time on the show clock, in seconds
+            lat: the latitudes of the drones, in degrees; NaN if not known
+            lon: the longitudes of the drones, in degrees; NaN if not known
+            amsl: the altitudes of the drones above mean sea level, in meters;
+                NaN if not known
+            ahl: the altitudes of the drones above their home positions, in
+                meters; NaN if not known
+
+        Returns:
+            the deviations of the drones from their expected positions
+        """
+        diff = self.to_local(lat, lon, amsl, ahl) - self.expected_positions_at(time)
+        horizontal = np.hypot(diff[:, 0], diff[:, 1])
+        vertical = np.abs(diff[:, 2])
+        snapshot = DeviationSnapshot(
+            time=time,
+            ids=self._ids,
+            horizontal=horizontal,
+            vertical=vertical,
+            deviating=self._deviating,
+        )
+
+        # Drones with unknown positions keep their previous state
+        total = snapshot.total
+        was_deviating = self._deviating
+        with np.errstate(invalid="ignore"):
+            deviating = np.where(
+                was_deviating,
+                ~(total < self.threshold * self.recovery_ratio),
+                total > self.threshold,
+            )
+
+        ids = self._ids
+        snapshot.deviating = deviating
+        snapshot.newly_deviating = [
+            ids[i] for i in np.flatnonzero(deviating & ~was_deviating).tolist()
+        ]
+        snapshot.recovered = [
+            ids[i] for i in np.flatnonzero(was_deviating & ~deviating).tolist()
+        ]
+        self._deviating = deviating
+
+        return snapshot
+
+    def _prepare_frames(self, frames: Sequence[ShowFrame]) -> None:
+        """Precalculates the parameters of the projection from GPS coordinates
+        to the local coordinate systems of the drones.
+        """
+        num_drones = len(frames)
+        self._origin_lat = np.empty(num_drones)
+        self._origin_lon = np.empty(num_drones)
+        self._north_scale = np.empty(num_drones)
+        self._east_scale = np.empty(num_drones)
+        self._sin = np.empty(num_drones)
+        self._cos = np.empty(num_drones)
+        self._y_sign = np.empty(num_drones)
+        self._z_sign = np.empty(num_drones)
+        self._amsl_reference = np.empty(num_drones)
+
+        for index, frame in enumerate(frames):
+            if frame.type not in ("neu", "nwu", "ned", "nwd"):
+                raise ValueError(f"unknown coordinate system type: {frame.type!r}")
+
+            origin_lat = radians(frame.origin_lat)
+            x = 1 - _WGS84_ECCENTRICITY_SQUARED * sin(origin_lat) ** 2
+            orientation = radians(frame.orientation)
+
+            self._origin_lat[index] = origin_lat
+            self._origin_lon[index] = radians(frame.origin_lon)
+            self._north_scale[index] = (
+                _WGS84_EQUATORIAL_RADIUS * (1 - _WGS84_ECCENTRICITY_SQUARED) / x**1.5
+            )
+            self._east_scale[index] = (
+                _WGS84_EQUATORIAL_RADIUS / sqrt(x) * cos(origin_lat)
+            )
+            self._sin[index] = sin(orientation)
+            self._cos[index] = cos(orientation)
+            self._y_sign[index] = -1.0 if frame.type[1] == "w" else 1.0
+            self._z_sign[index] = -1.0 if frame.type[2] == "d" else 1.0
+            self._amsl_reference[index] = (
+                np.nan if frame.amsl_reference is None else frame.amsl_reference
+            )
+
+
+class ExpectedColorMonitor:
+    """Compares the colors of the lights reported by the drones of a show
+    with the colors that their light programs prescribe.
+
+    Drones report the colors of their lights with some delay and in RGB565
+    encoding, so a drone is considered to show the wrong color only if one
+    of the color channels is off by more than a tolerance for longer than a
+    grace period.
+    """
+
+    grace_period: float
+    """Number of seconds for which the color of a drone has to differ from
+    the expected color before it is considered to be wrong.
+    """
+
+    tolerance: int
+    """Largest difference between the reported and the expected value of a
+    color channel, on a scale of 0-255, that is still considered a match.
+    """
+
+    _evaluator: LightProgramEvaluator
+    """Evaluator of the light programs of the drones."""
+
+    _ids: list[str]
+    """IDs of the drones being monitored."""
+
+    _mismatching: NDArray[np.bool_]
+    """Whether each drone was considered to show the wrong color in the last
+    update.
+    """
+
+    _since: NDArray[np.float64]
+    """Time on the show clock since when the color of each drone differs
+    from the expected color; NaN if it does not.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        keyframes: Sequence[LightKeyframes],
+        *,
+        tolerance: int = 48,
+        grace_period: float = 1.0,
+    ):
+        """Constructor.
+
+        Parameters:
+            ids: the IDs of the drones
+            keyframes: the compiled light programs of the drones
+            tolerance: largest difference between the reported and the
+                expected value of a color channel, on a scale of 0-255, that
+                is still considered a match
+            grace_period: number of seconds for which the color of a drone
+                has to differ from the expected color before it is considered
+                to be wrong
+        """
+        if len(ids) != len(keyframes):
+            raise ValueError("ids and keyframes must have the same length")
+
+        self.tolerance = int(tolerance)
+        self.grace_period = float(grace_period)
+
+        self._ids = list(ids)
+        self._evaluator = LightProgramEvaluator(keyframes)
+        self.reset()
+
+    @property
+    def ids(self) -> list[str]:
+        """The IDs of the drones being monitored."""
+        return self._ids
+
+    @property
+    def num_mismatching(self) -> int:
+        """Number of drones that were considered to show the wrong color in
+        the last update.
+        """
+        return int(np.count_nonzero(self._mismatching))
+
+    def reset(self) -> None:
+        """Forgets which drones were showing the wrong color."""
+        self._mismatching = np.zeros(len(self._ids), dtype=bool)
+        self._since = np.full(len(self._ids), np.nan)
+
+    def update(self, time: float, colors: ArrayLike) -> list[str]:
+        """Compares the colors reported by the drones with the expected
+        colors at the given time on the show clock.
+
+        Parameters:
+            time: the time on the show clock, in seconds
+            colors: the colors of the lights reported by the drones, in
+                RGB565 encoding; NaN if not known
+
+        Returns:
+            the IDs of the drones that started showing the wrong color since
+            the previous update
+        """
+        reported = np.asarray(colors, dtype=np.float64)
+        known = np.isfinite(reported)
+        encoded = np.where(known, reported, 0).astype(np.int64)
+        actual = np.stack(
+            (
+                ((encoded >> 11) & 0x1F) * (255 / 31),
+                ((encoded >> 5) & 0x3F) * (255 / 63),
+                (encoded & 0x1F) * (255 / 31),
+            ),
+            axis=-1,
+        )
+        expected = self._evaluator.colors_at(time).astype(np.float64)
+        different = known & (
+            np.abs(actual - expected).max(axis=-1, initial=0) > self.tolerance
+        )
+
+        self._since = np.where(
+            different, np.where(np.isnan(self._since), time, self._since), np.nan
+        )
+        was_mismatching = self._mismatching
+        with np.errstate(invalid="ignore"):
+            mismatching = different & (time - self._since >= self.grace_period)
+        self._mismatching = mismatching
+
+        ids = self._ids
+        return [ids[i] for i in np.flatnonzero(mismatching & ~was_mismatching).tolist()]
+
+
+def _to_centimeters(values: NDArray[np.float64]) -> list[int | None]:
+    """Converts an array of distances in meters to a list of integers in
+    centimeters, replacing unknown values with ``None``.
+    """
+    known = np.isfinite(values)
+    rounded = np.round(np.where(known, values, 0.0) * 100).astype(np.int64)
+    return [
+        value if ok else None for value, ok in zip(rounded.tolist(), known.tolist())
+    ]
@@ -0,0 +1,417 @@
+"""Vectorized evaluation of the trajectories of an entire fleet.
+
+`TrajectoryPlayer` answers the question "where should this drone be at time
+t" for a single drone and a single timestamp. Collision checks, simulations
+and monitoring tasks need the same answer for every drone in the show, many
+times per second, so this module converts the trajectories of the fleet into
+packed arrays of polynomial coefficients once and evaluates all of them at a
+batch of timestamps with a handful of NumPy operations.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from math import comb
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from .trajectory import TrajectorySpecification
+
+__all__ = ("TrajectoryEvaluator",)
+
+
+def _horner(
+    coeffs: NDArray[np.float64], ratios: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    """Evaluates polynomials with the Horner scheme.
+
+    Parameters:
+        coeffs: the coefficients of the polynomials; the second to last axis
+            is the exponent and the last axis is the coordinate axis
+        ratios: the points to evaluate the polynomials at; must be broadcastable
+            to the shape of `coeffs` without its last two axes
+
+    Returns:
+        the values of the polynomials
+    """
+    shape = np.broadcast_shapes(coeffs.shape[:-2], ratios.shape)
+    result = np.broadcast_to(coeffs[..., -1, :], (*shape, 3)).copy()
+    for k in range(coeffs.shape[-2] - 2, -1, -1):
+        result *= ratios[..., None]
+        result += coeffs[..., k, :]
+    return result
+
+
+def _bernstein_to_power_basis_matrix(degree: int) -> NDArray[np.float64]:
+    """Returns the matrix that converts the control points of a Bézier curve
+    of the given degree to the coefficients of the same curve in the power
+    basis.
+
+    Row `k` of the matrix contains the weights of the control points in the
+    coefficient of ``u ** k``.
+    """
+    n = degree
+    result = np.zeros((n + 1, n + 1))
+    for k in range(n + 1):
+        for i in range(k + 1):
+            result[k, i] = comb(n, k) * comb(k, i) * (-1) ** (k - i)
+    return result
+
+
+class TrajectoryEvaluator:
+    """Evaluates the trajectories of multiple drones at a batch of timestamps
+    at once.
+
+    Each segment of each trajectory is converted into a polynomial of the
+    relative time within the segment, and the coefficients of all the
+    polynomials are packed into a single array, padded to the highest degree
+    in the fleet. Evaluating the fleet at a batch of timestamps then boils
+    down to a binary search for the segments and a Horner scheme on the
+    gathered coefficients.
+
+    The semantics of the evaluation are identical to `TrajectoryPlayer`:
+    drones stay at the first point of their trajectory before takeoff, stay at
+    the last point after landing, and drones with empty trajectories stay at
+    the origin.
+    """
+
+    _coeffs: NDArray[np.float64]
+    """Power basis coefficients of the segments, indexed by segment, then by
+    the exponent, then by the coordinate axis.
+    """
+
+    _keys: NDArray[np.float64]
+    """Start times of the segments, shifted by a multiple of `_stride`
+    according to the index of the drone the segment belongs to, so the
+    segments of all the drones can be searched with a single sorted array.
+    """
+
+    _lengths: NDArray[np.float64]
+    """Lengths of the segments in seconds; zero for the constant segments at
+    the end of each trajectory.
+    """
+
+    _num_drones: int
+    """Number of drones in the fleet."""
+
+    _offsets: NDArray[np.intp]
+    """Index of the first segment of each drone in the segment arrays."""
+
+    _start_times: NDArray[np.float64]
+    """Start times of the segments, relative to the start of the show."""
+
+    _stride: float
+    """Time offset added to the start times of the segments of consecutive
+    drones in `_keys`.
+    """
+
+    _time_range: tuple[float, float]
+    """The earliest and the latest segment start time in the fleet. Timestamps
+    are clamped to this range before the segments are looked up.
+    """
+
+    def __init__(self, trajectories: Iterable[TrajectorySpecification]):
+        """Constructor.
+
+        Parameters:
+            trajectories: the trajectories of the drones, in the order in which
+                the drones should appear in the results
+        """
+        start_times: list[float] = []
+        lengths: list[float] = []
+        points: list[Sequence[Sequence[float]]] = []
+        offsets: list[int] = []
+
+        for trajectory in trajectories:
+            offsets.append(len(start_times))
+
+            takeoff_time = trajectory.takeoff_time
+            segments = trajectory.get_segments()
+            if not segments:
+                # Empty trajectory; the drone stays at the origin forever
+                start_times.append(-np.inf)
+                lengths.append(0.0)
+                points.append([(0.0, 0.0, 0.0)])
+                continue
+
+            # Segment lengths are derived from the start times of the
+            # subsequent segments, just like in TrajectoryPlayer
+            segment_start_times = [
+                segment.start_time + takeoff_time for segment in segments
+            ]
+            segment_start_times.append(segments[-1].end_time + takeoff_time)
+
+            for index, segment in enumerate(segments):
+                start_times.append(segment_start_times[index])
+                lengths.append(
+                    segment_start_times[index + 1] - segment_start_times[index]
+                )
+                points.append(segment.points)
+
+            # Constant segment at the end so we return the exact last point
+            # after landing
+            start_times.append(segment_start_times[-1])
+            lengths.append(0.0)
+            points.append([segments[-1].end])
+
+        offsets.append(len(start_times))
+
+        self._num_drones = len(offsets) - 1
+        self._offsets = np.array(offsets, dtype=np.intp)
+        self._start_times = np.array(start_times, dtype=np.float64)
+        self._lengths = np.array(lengths, dtype=np.float64)
+        self._coeffs = self._create_coefficients(points)
+
+        finite = self._start_times[np.isfinite(self._start_times)]
+        if finite.size:
+            lo, hi = float(finite.min()), float(finite.max())
+        else:
+            lo, hi = 0.0, 0.0
+        self._time_range = lo, hi
+
+        # Timestamps are clamped to the time range so any stride larger than
+        # the time range keeps the segments of different drones apart. Start
+        # times of empty trajectories are clamped to slightly before the
+        # range so they precede every timestamp.
+        self._stride = (hi - lo) + 2.0
+        drone_indices = np.repeat(
+            np.arange(self._num_drones), np.diff(self._offsets)
+        ).astype(np.float64)
+        self._keys = (
+            np.clip(self._start_times, lo - 1.0, hi) - lo + drone_indices * self._stride
+        )
+
+    @property
+    def degree(self) -> int:
+        """The highest polynomial degree among the segments of the fleet."""
+        return self._coeffs.shape[1] - 1
+
+    @property
+    def num_drones(self) -> int:
+        """The number of drones in the fleet."""
+        return self._num_drones
+
+    @property
+    def num_segments(self) -> int:
+        """The total number of segments in the fleet, including the constant
+        segments that represent the drones after landing.
+        """
+        return self._start_times.shape[0]
+
+    @property
+    def segment_drone_indices(self) -> NDArray[np.intp]:
+        """The index of the drone that each segment belongs to."""
+        return np.repeat(np.arange(self._num_drones), np.diff(self._offsets))
+
+    @property
+    def segment_lengths(self) -> NDArray[np.float64]:
+        """The lengths of the segments, in seconds."""
+        return self._lengths
+
+    @property
+    def segment_offsets(self) -> NDArray[np.intp]:
+        """The index of the first segment of each drone, followed by the total
+        number of segments.
+        """
+        return self._offsets
+
+    @property
+    def segment_start_times(self) -> NDArray[np.float64]:
+        """The start times of the segments, relative to the start of the
+        show.
+        """
+        return self._start_times
+
+    @property
+    def time_range(self) -> tuple[float, float]:
+        """The time of the earliest takeoff and the time of the latest landing
+        in the fleet, relative to the start of the show.
+        """
+        return self._time_range
+
+    def accelerations_at(self, times: ArrayLike) -> NDArray[np.float64]:
+        """Returns the expected accelerations of all the drones at the given
+        timestamps.
+
+        See `positions_at()` for the interpretation of the arguments and the
+        shape of the result.
+        """
+        return self.evaluate(times, order=2)
+
+    def evaluate(self, times: ArrayLike, order: int = 0) -> NDArray[np.float64]:
+        """Evaluates the trajectories or their derivatives at the given
+        timestamps.
+
+        Parameters:
+            times: a single timestamp or an array of timestamps, relative to
+                the start of the show
+            order: the order of the derivative to evaluate; zero for
+                positions, one for velocities and two for accelerations
+
+        Returns:
+            an array of shape ``(num_drones, num_times, 3)`` if `times` is an
+            array, or an array of shape ``(num_drones, 3)`` if `times` is a
+            single timestamp
+        """
+        if order < 0:
+            raise ValueError("order must be non-negative")
+
+        times = np.asarray(times, dtype=np.float64)
+        scalar = times.ndim == 0
+        times = np.atleast_1d(times).ravel()
+
+        indices, ratios = self._locate(times)
+
+        coeffs = self._coeffs
+        if order > 0:
+            coeffs = self._differentiate(order)
+
+        result = _horner(coeffs[indices], ratios)
+
+        if order > 0:
+            # Derivatives were taken with respect to the relative time within
+            # the segment. Zero-length segments (and the time before takeoff,
+            # where the ratio is clamped) have zero derivatives.
+            lengths = self._lengths[indices]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = np.where(lengths > 0, lengths ** (-order), 0.0)
+            before_start = times[None, :] < self._start_times[indices]
+            scale[before_start] = 0.0
+            result *= scale[..., None]
+
+        return result[:, 0, :] if scalar else result
+
+    def evaluate_segments(
+        self,
+        ratios: ArrayLike,
+        order: int = 0,
+        segments: slice | None = None,
+    ) -> NDArray[np.float64]:
+        """Evaluates the segments of the fleet or their derivatives at the
+        given relative times within the segments.
+
+        Parameters:
+            ratios: array of relative times within the segments, between 0
+                and 1, inclusive
+            order: the order of the derivative to evaluate; zero for
+                positions, one for velocities and two for accelerations
+            segments: the range of segments to evaluate; ``None`` means all
+                the segments. See the ``segment_*`` properties for the drones
+                and the timing of the segments.
+
+        Returns:
+            an array of shape ``(num_segments, num_ratios, 3)``
+        """
+        if order < 0:
+            raise ValueError("order must be non-negative")
+
+        if segments is None:
+            segments = slice(None)
+
+        ratios = np.atleast_1d(np.asarray(ratios, dtype=np.float64)).ravel()
+        coeffs = self._coeffs if order == 0 else self._differentiate(order)
+        coeffs = coeffs[segments]
+
+        result = _horner(coeffs[:, None, :, :], ratios[None, :])
+
+        if order > 0:
+            lengths = self._lengths[segments]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = np.where(lengths > 0, lengths ** (-order), 0.0)
+            result *= scale[:, None, None]
+
+        return result
+
+    def positions_at(self, times: ArrayLike) -> NDArray[np.float64]:
+        """Returns the expected positions of all the drones at the given
+        timestamps.
+
+        Parameters:
+            times: a single timestamp or an array of timestamps, relative to
+                the start of the show
+
+        Returns:
+            an array of shape ``(num_drones, num_times, 3)`` if `times` is an
+            array, or an array of shape ``(num_drones, 3)`` if `times` is a
+            single timestamp
+        """
+        return self.evaluate(times)
+
+    def velocities_at(self, times: ArrayLike) -> NDArray[np.float64]:
+        """Returns the expected velocities of all the drones at the given
+        timestamps.
+
+        See `positions_at()` for the interpretation of the arguments and the
+        shape of the result.
+        """
+        return self.evaluate(times, order=1)
+
+    @staticmethod
+    def _create_coefficients(
+        points: list[Sequence[Sequence[float]]],
+    ) -> NDArray[np.float64]:
+        """Converts the control points of the segments into an array of power
+        basis coefficients, padded with zeros to the highest degree.
+        """
+        max_degree = max((len(p) - 1 for p in points), default=0)
+        result = np.zeros((len(points), max_degree + 1, 3), dtype=np.float64)
+
+        # Convert all the segments with the same degree in one step
+        by_degree: dict[int, list[int]] = {}
+        for index, segment_points in enumerate(points):
+            by_degree.setdefault(len(segment_points) - 1, []).append(index)
+
+        for degree, indices in by_degree.items():
+            control_points = np.array([points[i] for i in indices], dtype=np.float64)
+            matrix = _bernstein_to_power_basis_matrix(degree)
+            result[indices, : degree + 1, :] = np.einsum(
+                "ki,sid->skd", matrix, control_points
+            )
+
+        return result
+
+    def _differentiate(self, order: int) -> NDArray[np.float64]:
+        """Returns the coefficients of the given derivative of the segments
+        with respect to the relative time within the segment.
+        """
+        coeffs = self._coeffs
+        for _ in range(order):
+            if coeffs.shape[1] <= 1:
+                return np.zeros_like(self._coeffs[:, :1, :])
+            exponents = np.arange(1, coeffs.shape[1], dtype=np.float64)
+            coeffs = coeffs[:, 1:, :] * exponents[None, :, None]
+        return coeffs
+
+    def _locate(
+        self, times: NDArray[np.float64]
+    ) -> tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """Finds the segment of each drone that contains each of the given
+        timestamps.
+
+        Returns:
+            the indices of the segments and the relative times within the
+            segments (between 0 and 1, inclusive), both as arrays of shape
+            ``(num_drones, num_times)``
+        """
+        lo, hi = self._time_range
+        clamped = np.clip(times, lo, hi) - lo
+        drone_offsets = np.arange(self._num_drones, dtype=np.float64) * self._stride
+        keys = clamped[None, :] + drone_offsets[:, None]
+
+        indices = np.searchsorted(self._keys, keys, side="right") - 1
+
+        # Timestamps before the first segment of a drone select the first
+        # segment of the drone and get clamped to its start below
+        indices = np.maximum(indices, self._offsets[:-1, None])
+
+        lengths = self._lengths[indices]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = np.where(
+                lengths > 0,
+                (times[None, :] - self._start_times[indices]) / lengths,
+                0.0,
+            )
+        np.clip(ratios, 0.0, 1.0, out=ratios)
+
+        return indices, ratios
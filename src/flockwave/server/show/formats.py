@@ -1,19 +1,38 @@
 """Classes representing various Skybrush show file formats."""
 
-from collections.abc import AsyncGenerator, Awaitable, Callable, Iterable, Sequence
+from collections.abc import (
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Sequence,
+)
 from contextlib import aclosing
+from dataclasses import dataclass
 from enum import IntEnum, IntFlag
 from functools import partial
+from hashlib import blake2b
 from io import SEEK_END, BytesIO
 from math import floor
+from mmap import ACCESS_READ, ACCESS_WRITE, mmap
+from os import PathLike, fstat
 from struct import Struct
 from typing import IO, ClassVar, cast
 
+import numpy as np
+from numpy.typing import ArrayLike
+
 from .trajectory import TrajectorySegment, TrajectorySpecification
 from .utils import Point
 from .utils import crc32_mavftp as crc32
 
-__all__ = ("SkybrushBinaryShowFile",)
+__all__ = (
+    "MappedSkybrushBinaryShowFile",
+    "SkybrushBinaryShowFileDigest",
+    "SkybrushBinaryShowFile",
+    "SkybrushBinaryShowFileWriter",
+)
 
 
 _SKYBRUSH_BINARY_FILE_MARKER: bytes = b"skyb"
@@ -323,17 +342,16 @@ class SkybrushBinaryShowFile:
                 "Trajectory covers too large an area for a Skybrush binary show file"
             )
 
-        chunks = [bytes([scaling_factor])]  # MSB is reserved as zero
+        header = bytes([scaling_factor])  # MSB is reserved as zero
         encoder = SegmentEncoder(scaling_factor)
 
         # .skyb files need absolute timestamps so we need to add a constant
         # segment in front if the takeoff time is nonzero; that's why we have
         # absolute=True here
-        segments = trajectory.iter_segments(max_length=65, absolute=True)
-        chunks.extend(encoder.iter_encode_multiple_segments(segments))
+        body = encoder.encode_trajectory(trajectory, max_length=65, absolute=True)
 
         return await self.add_block(
-            SkybrushBinaryFormatBlockType.TRAJECTORY, b"".join(chunks)
+            SkybrushBinaryFormatBlockType.TRAJECTORY, header + body
         )
 
     async def add_encoded_yaw_setpoints(self, data: bytes) -> None:
@@ -568,6 +586,403 @@ class SkybrushBinaryShowFile:
             # await self._fp.seek(position)
 
 
+_SEGMENT_FORMATS: dict[int, tuple[int, int]] = {
+    # number of points: (format code, number of encoded coordinates)
+    1: (0, 0),
+    2: (1, 1),
+    3: (2, 3),
+    4: (2, 3),
+    8: (3, 7),
+}
+"""Segment format codes and the number of coordinates encoded per axis in
+non-constant segments, indexed by the number of points in the segment
+(including the start point). Quadratic segments are promoted to cubic ones.
+"""
+
+
+class SkybrushBinaryShowFileWriter(SkybrushBinaryShowFile):
+    """Skybrush binary show file that is written sequentially to a file-like
+    object.
+
+    The checksum of the file is updated on the fly as the blocks are written
+    so the writer never needs to hold or re-read the contents of the file.
+    The file-like object needs to be seekable only if the file has a checksum
+    that needs to be filled in when the file is finalized.
+    """
+
+    _crc: int
+    """Running CRC32 checksum of the bytes written so far, with the CRC bytes
+    of the header treated as zeros.
+    """
+
+    def __init__(self, fp: IO[bytes], version: int = 2):
+        """Constructor.
+
+        Parameters:
+            fp: the file-like object to write the show file to; the header of
+                the show file is written immediately
+            version: the version number of the binary show file
+        """
+        if version < 1 or version >= len(_SKYBRUSH_BINARY_FILE_HEADER):
+            raise RuntimeError(f"Unsupported version number: {version}")
+
+        super().__init__(fp)
+
+        header = _SKYBRUSH_BINARY_FILE_HEADER[version]
+        self._fp.write(header)
+
+        self._version = version
+        if version >= 2:
+            self._features = SkybrushBinaryFileFeatures(header[5])
+        if self._features & SkybrushBinaryFileFeatures.CRC32:
+            self._start_of_crc_bytes = 6
+        self._start_of_first_block = len(header)
+        self._crc = crc32(header, 0)
+
+    async def add_block(self, type: SkybrushBinaryFormatBlockType, body: bytes) -> None:
+        """Appends a new block to the Skybrush file."""
+        if len(body) >= 65536:
+            raise ValueError(
+                f"body too large; maximum allowed length is 65535 bytes, got {len(body)}"
+            )
+
+        header = self._header_struct.pack(type, len(body))
+        self._fp.write(header)
+        self._fp.write(body)
+        self._crc = crc32(body, crc32(header, self._crc))
+
+    async def finalize(self) -> None:
+        """Finalizes the file by filling in its CRC bytes (if any)."""
+        if not self.features & SkybrushBinaryFileFeatures.CRC32:
+            return
+
+        if not self._fp.seekable():
+            raise RuntimeError("binary show file is not seekable")
+
+        assert self._start_of_crc_bytes is not None
+
+        position = self._fp.tell()
+        try:
+            self._fp.seek(self._start_of_crc_bytes)
+            self._fp.write(self._crc.to_bytes(4, "little", signed=False))
+        finally:
+            self._fp.seek(position)
+
+
+class MappedSkybrushBinaryShowFile:
+    """Read-only view of a Skybrush binary show file that is backed by a
+    memory-mapped file or an in-memory buffer.
+
+    The blocks of the file are indexed once upon construction. The bodies of
+    the blocks are returned as memoryviews into the underlying buffer so they
+    are not copied unless the caller asks for it. All the memoryviews
+    obtained from the file must be released before the file is closed.
+    """
+
+    _blocks: list[tuple[int, int, int]]
+    """The type, offset and length of the body of each block in the file."""
+
+    _features: SkybrushBinaryFileFeatures
+    """The optional features (checksum etc) of the file."""
+
+    _mmap: mmap | None
+    """The memory-mapped file backing the view, `None` if the view is backed
+    by an in-memory buffer.
+    """
+
+    _start_of_crc_bytes: int | None
+    """Byte index of the CRC bytes in the file, `None` if the file has no
+    CRC bytes.
+    """
+
+    _version: int
+    """The version number of the file."""
+
+    _view: memoryview
+    """View of the entire contents of the file."""
+
+    _header_struct: ClassVar[Struct] = Struct("<BH")
+
+    @classmethod
+    def open(
+        cls, path: str | PathLike[str], *, writable: bool = False
+    ) -> "MappedSkybrushBinaryShowFile":
+        """Memory-maps the Skybrush binary show file at the given path.
+
+        Parameters:
+            path: the path of the file
+            writable: whether to map the file in read-write mode. This is
+                needed only if the checksum of the file is to be updated with
+                `update_checksum()`.
+
+        Raises:
+            RuntimeError: if the file is not a Skybrush binary show file
+        """
+        with open(path, "r+b" if writable else "rb") as fp:
+            if fstat(fp.fileno()).st_size == 0:
+                # Empty files cannot be memory-mapped; let the constructor
+                # report them like any other invalid file
+                return cls(b"")
+
+            data = mmap(
+                fp.fileno(), 0, access=ACCESS_WRITE if writable else ACCESS_READ
+            )
+
+        try:
+            return cls(data)
+        except Exception:
+            data.close()
+            raise
+
+    def __init__(self, data: bytes | bytearray | memoryview | mmap):
+        """Constructor.
+
+        Parameters:
+            data: the contents of the show file. When it is a memory-mapped
+                file, it is closed when the show file is closed.
+        """
+        self._mmap = data if isinstance(data, mmap) else None
+        self._view = memoryview(data).cast("B")
+        try:
+            self._parse()
+        except Exception:
+            # Release the view so the caller can close the memory-mapped file
+            self._view.release()
+            raise
+
+    def __enter__(self) -> "MappedSkybrushBinaryShowFile":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    @property
+    def block_types(self) -> list[int]:
+        """Returns the types of the blocks in the file, in the order they
+        appear in the file.
+        """
+        return [type for type, _, _ in self._blocks]
+
+    def close(self) -> None:
+        """Closes the file and releases the underlying buffer.
+
+        Raises:
+            BufferError: if some of the memoryviews returned from the file are
+                still in use
+        """
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    @property
+    def features(self) -> SkybrushBinaryFileFeatures:
+        """Returns the feature flags of the file."""
+        return self._features
+
+    def find_block(self, type: SkybrushBinaryFormatBlockType) -> memoryview | None:
+        """Returns the body of the first block with the given type, or `None`
+        if the file has no such block.
+        """
+        for index, (block_type, _, _) in enumerate(self._blocks):
+            if block_type == type:
+                return self.get_block(index)
+        return None
+
+    def find_blocks(self, type: SkybrushBinaryFormatBlockType) -> list[memoryview]:
+        """Returns the bodies of all the blocks with the given type."""
+        return [
+            self.get_block(index)
+            for index, (block_type, _, _) in enumerate(self._blocks)
+            if block_type == type
+        ]
+
+    def get_block(self, index: int) -> memoryview:
+        """Returns the body of the block with the given index."""
+        _, offset, length = self._blocks[index]
+        return self._view[offset : offset + length]
+
+    def get_expected_crc32(self) -> bytes:
+        """Returns the expected CRC32 checksum of the file as bytes, in little
+        endian format, or all-zeros if the file header declares that the file
+        needs no checksum.
+        """
+        if self._start_of_crc_bytes is None:
+            return b"\x00\x00\x00\x00"
+
+        start = self._start_of_crc_bytes
+        expected_crc = crc32(self._view[:start], 0)
+        expected_crc = crc32(b"\x00\x00\x00\x00", expected_crc)
+        expected_crc = crc32(self._view[start + 4 :], expected_crc)
+        return expected_crc.to_bytes(4, "little", signed=False)
+
+    def iter_blocks(self) -> Iterator[tuple[int, memoryview]]:
+        """Iterates over the types and bodies of the blocks in the file."""
+        for index, (type, _, _) in enumerate(self._blocks):
+            yield type, self.get_block(index)
+
+    def update_checksum(self) -> None:
+        """Updates the checksum of the file in place if it has one.
+
+        Requires the underlying buffer to be writable.
+        """
+        if self._start_of_crc_bytes is None:
+            return
+
+        if self._view.readonly:
+            raise RuntimeError("binary show file is not writable")
+
+        start = self._start_of_crc_bytes
+        self._view[start : start + 4] = self.get_expected_crc32()
+
+    def validate_checksum(self) -> None:
+        """Validates the checksum of the file.
+
+        No-op if the file header declares that the file has no checksum.
+
+        Raises:
+            RuntimeError: if the checksum of the file does not match the
+                expected value
+        """
+        if self._start_of_crc_bytes is None:
+            return
+
+        start = self._start_of_crc_bytes
+        expected_crc = self.get_expected_crc32()
+        observed_crc = self._view[start : start + 4].tobytes()
+        if observed_crc != expected_crc:
+            expected = expected_crc.hex()
+            observed = observed_crc.hex()
+            raise RuntimeError(f"CRC error, expected {expected}, got {observed}")
+
+    @property
+    def version(self) -> int:
+        """Returns the version number of the file."""
+        return self._version
+
+    def _parse(self) -> None:
+        """Parses the header of the file and builds the index of its blocks."""
+        view = self._view
+        marker = view[:4].tobytes()
+        if marker != _SKYBRUSH_BINARY_FILE_MARKER:
+            raise RuntimeError(f"expected Skybrush binary file header, got {marker!r}")
+
+        if len(view) < 5:
+            raise IOError("unexpected end of Skybrush file header")
+
+        self._version = view[4]
+        self._start_of_crc_bytes = None
+        if self._version == 1:
+            self._features = SkybrushBinaryFileFeatures.NONE
+            offset = 5
+        elif self._version == 2:
+            if len(view) < 6:
+                raise IOError("unexpected end of Skybrush file header")
+            self._features = SkybrushBinaryFileFeatures(view[5])
+            offset = 6
+            if self._features & SkybrushBinaryFileFeatures.CRC32:
+                self._start_of_crc_bytes = offset
+                offset += 4
+        else:
+            raise RuntimeError(
+                f"unsupported Skybrush binary file version: {self._version}"
+            )
+
+        header_size = self._header_struct.size
+        end = len(view)
+        blocks: list[tuple[int, int, int]] = []
+        while offset < end:
+            if offset + header_size > end:
+                raise IOError("unexpected end of block in Skybrush file")
+            type, length = self._header_struct.unpack_from(view, offset)
+            offset += header_size
+            if offset + length > end:
+                raise IOError("unexpected end of block in Skybrush file")
+            blocks.append((type, offset, length))
+            offset += length
+
+        self._blocks = blocks
+
+
+@dataclass(frozen=True)
+class SkybrushBinaryShowFileDigest:
+    """Compact digest of a Skybrush binary show file that records where each
+    block of the file is and a hash of its contents.
+
+    Comparing the digest of a new version of a show file with the digest of
+    an earlier version tells which byte ranges of the new version need to be
+    written over the earlier version to turn it into the new one, without
+    keeping the earlier version around.
+    """
+
+    size: int
+    """Size of the file, in bytes."""
+
+    crc32: int
+    """CRC32 checksum of the entire file, as calculated by MAVFTP."""
+
+    header_length: int
+    """Length of the file header, including the CRC bytes, in bytes."""
+
+    blocks: tuple[tuple[int, int, bytes], ...]
+    """The start offset, the end offset and the hash of each block in the
+    file, including the block headers.
+    """
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SkybrushBinaryShowFileDigest":
+        """Creates the digest of the given Skybrush binary show file."""
+        with MappedSkybrushBinaryShowFile(data) as show_file:
+            header_size = show_file._header_struct.size
+            spans = [
+                (offset - header_size, offset + length)
+                for _, offset, length in show_file._blocks
+            ]
+
+        view = memoryview(data)
+        blocks = tuple(
+            (start, end, blake2b(view[start:end], digest_size=16).digest())
+            for start, end in spans
+        )
+        return cls(
+            size=len(data),
+            crc32=crc32(data),
+            header_length=spans[0][0] if spans else len(data),
+            blocks=blocks,
+        )
+
+    def get_changed_ranges(
+        self, previous: "SkybrushBinaryShowFileDigest"
+    ) -> list[tuple[int, int]]:
+        """Returns the byte ranges of the file that differ from an earlier
+        version of the same file with the given digest.
+
+        Blocks that have the same position and contents in both versions are
+        left out. The header is always included as the checksum in it changes
+        with the contents of the file. Adjacent ranges are merged.
+
+        Parameters:
+            previous: the digest of the earlier version of the file
+
+        Returns:
+            the start and end offsets of the byte ranges that have to be
+            written over the earlier version of the file, in increasing order
+        """
+        unchanged = set(previous.blocks)
+        ranges: list[tuple[int, int]] = [(0, self.header_length)]
+        for block in self.blocks:
+            start, end, _ = block
+            if block in unchanged or start == end:
+                continue
+            if ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+
 class SegmentEncoder:
     """Encoder class for trajectory segments in the Skybrush binary show file
     format.
@@ -692,6 +1107,152 @@ class SegmentEncoder:
             # Encode the segment without its start point
             yield self.encode_segment(segment)
 
+    def encode_trajectory(
+        self,
+        trajectory: TrajectorySpecification,
+        *,
+        max_length: float = 65,
+        absolute: bool = False,
+    ) -> bytes:
+        """Encodes all the segments of a trajectory in one go.
+
+        The result is identical to encoding the segments of the trajectory
+        with `encode_multiple_segments()`, but the coordinates of the entire
+        trajectory are scaled and encoded with array operations, which is
+        considerably faster for long trajectories.
+
+        Args:
+            trajectory: the trajectory to encode
+            max_length: maximum allowed length of a single segment, in seconds
+            absolute: whether to insert a constant segment in front of the
+                trajectory if its takeoff time is positive; see
+                `TrajectorySpecification.iter_segments()`
+
+        Returns:
+            the encoded representation of the segments of the trajectory
+        """
+        durations: list[float] = []
+        counts: list[int] = []
+        points: list[Point] = []
+        for segment in trajectory.get_segments(max_length, absolute):
+            durations.append(segment.duration)
+            counts.append(len(segment.points))
+            points.extend(segment.points)
+
+        return self.encode_segment_arrays(durations, counts, points)
+
+    def encode_segment_arrays(
+        self, durations: ArrayLike, counts: ArrayLike, points: ArrayLike
+    ) -> bytes:
+        """Encodes a continuous curve consisting of multiple segments, given
+        as arrays.
+
+        The result is identical to the one of `encode_multiple_segments()`
+        when called with the same segments.
+
+        Args:
+            durations: the durations of the segments, in seconds
+            counts: the number of points in each segment, including the start
+                and the end point
+            points: the points of all the segments, concatenated, in an array
+                of shape ``(sum(counts), 3)``
+
+        Returns:
+            the encoded representation of the segments
+        """
+        durations = np.asarray(durations, dtype=np.float64)
+        counts = np.asarray(counts, dtype=np.intp)
+        num_segments = counts.size
+        if not num_segments:
+            return b""
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+        # Durations are encoded in milliseconds
+        msecs = np.floor(durations * 1000).astype(np.int64)
+        invalid = np.flatnonzero((msecs < 0) | (msecs > 65535))
+        if invalid.size:
+            duration = int(msecs[invalid[0]])
+            raise RuntimeError(
+                f"trajectory segment must be in the range 0-65535 msec, got {duration} msec"
+            )
+
+        # Truncate towards zero when scaling; see _scale_point() for the
+        # reason
+        scaled = np.trunc(points * self._scale).astype(np.int64)
+        starts = np.cumsum(counts) - counts
+
+        # Find the encoded coordinates of each segment, padded to seven
+        # coordinates per axis, along with the format code and the number of
+        # coordinates per segment in non-constant axes
+        coords = np.zeros((num_segments, 7, 3), dtype=np.int64)
+        formats = np.zeros(num_segments, dtype=np.int64)
+        lengths = np.zeros(num_segments, dtype=np.int64)
+        changing = np.zeros((num_segments, 3), dtype=bool)
+
+        for count in np.unique(counts).tolist():
+            (group,) = np.nonzero(counts == count)
+            pts = scaled[starts[group, None] + np.arange(count)]
+            first, rest = pts[:, 0, :], pts[:, 1:, :]
+            group_changing = np.any(rest != first[:, None, :], axis=1)
+            changing[group] = group_changing
+
+            spec = _SEGMENT_FORMATS.get(count)
+            if spec is None:
+                if group_changing.any():
+                    raise NotImplementedError(
+                        f"{count - 1}D curves not implemented yet"
+                    )
+                continue
+
+            formats[group], lengths[group] = spec
+            if count == 3:
+                # Quadratic Bezier curve, promote it to cubic first. Rounding
+                # is done half-to-even, just like round() does.
+                rest = np.stack(
+                    (
+                        np.round((first + 2 * rest[:, 0]) / 3),
+                        np.round((2 * rest[:, 0] + rest[:, 1]) / 3),
+                        rest[:, 1],
+                    ),
+                    axis=1,
+                ).astype(np.int64)
+
+            coords[group, : rest.shape[1]] = rest
+
+        # Lay out the encoded segments in the output buffer, after the start
+        # point of the first segment
+        axis_lengths = np.where(changing, lengths[:, None], 0)
+        sizes = 3 + 2 * axis_lengths.sum(axis=1)
+        offsets = self._point_struct.size + np.cumsum(sizes) - sizes
+        buffer = np.zeros(int(offsets[-1] + sizes[-1]), dtype=np.uint8)
+
+        buffer[: self._point_struct.size] = np.frombuffer(
+            self.encode_point(points[0]), dtype=np.uint8
+        )
+
+        codes = np.where(changing, formats[:, None], 0) << np.array([0, 2, 4])
+        buffer[offsets] = codes.sum(axis=1)
+        buffer[offsets + 1] = msecs & 0xFF
+        buffer[offsets + 2] = msecs >> 8
+
+        # Scatter the coordinates of the non-constant axes after the headers,
+        # axis by axis
+        axis_offsets = offsets[:, None] + 3 + 2 * (np.cumsum(axis_lengths, axis=1))
+        axis_offsets -= 2 * axis_lengths
+        index = np.arange(7)
+        mask = index[None, :, None] < axis_lengths[:, None, :]
+        positions = (axis_offsets[:, None, :] + 2 * index[None, :, None])[mask]
+        values = coords[mask]
+        if values.size and (values.min() < -32768 or values.max() > 32767):
+            raise OverflowError("int too big to convert")
+
+        encoded = values.astype("<i2").view(np.uint8).reshape(-1, 2)
+        buffer[positions] = encoded[:, 0]
+        buffer[positions + 1] = encoded[:, 1]
+
+        return buffer.tobytes()
+
     def _encode_coordinate_series(self, xs: Sequence[int]) -> tuple[int, list[bytes]]:
         first, *xs = xs
         if all(x == first for x in xs):
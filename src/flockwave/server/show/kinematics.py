@@ -0,0 +1,316 @@
+"""Verification of the kinematic feasibility of show trajectories.
+
+The velocities and accelerations of each segment are derived analytically
+from the polynomial form of the segment (the derivatives of a Bézier curve
+are again polynomials of the relative time within the segment) and the
+derivative polynomials of all the segments of all the drones are evaluated
+on a dense grid of relative times at once.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from flockwave.server.utils import optional_float
+
+from .evaluator import TrajectoryEvaluator
+from .specification import ShowSpecification, get_trajectory_from_show_specification
+
+__all__ = (
+    "CRAZYFLIE_KINEMATIC_LIMITS",
+    "KinematicLimits",
+    "KinematicReport",
+    "KinematicViolation",
+    "MAVLINK_KINEMATIC_LIMITS",
+    "check_kinematic_limits",
+    "check_kinematic_limits_of_show",
+)
+
+
+_SEGMENTS_PER_BATCH = 16384
+"""Number of segments to evaluate in one step, to keep the size of the
+temporary arrays bounded for large shows.
+"""
+
+
+@dataclass(frozen=True)
+class KinematicLimits:
+    """Velocity and acceleration limits of a drone platform. Each limit may be
+    ``None`` if the corresponding quantity should not be checked.
+    """
+
+    max_velocity_xy: float | None = None
+    """Maximum horizontal velocity, in m/s."""
+
+    max_velocity_z: float | None = None
+    """Maximum vertical velocity in either direction, in m/s."""
+
+    max_acceleration: float | None = None
+    """Maximum magnitude of the acceleration, in m/s^2."""
+
+    @classmethod
+    def from_show_specification(
+        cls, show: dict, default: KinematicLimits | None = None
+    ) -> KinematicLimits:
+        """Creates a limit specification from the validation settings of a
+        show specification, falling back to the given defaults for limits
+        that are not specified in the show.
+        """
+        default = default or cls()
+        validation = show.get("validation")
+        if not validation or not isinstance(validation, dict):
+            return default
+
+        max_velocity_xy = optional_float(validation.get("maxVelocityXY"))
+        max_velocity_z = optional_float(validation.get("maxVelocityZ"))
+        max_acceleration = optional_float(validation.get("maxAcceleration"))
+
+        return cls(
+            max_velocity_xy=(
+                max_velocity_xy
+                if max_velocity_xy is not None
+                else default.max_velocity_xy
+            ),
+            max_velocity_z=(
+                max_velocity_z if max_velocity_z is not None else default.max_velocity_z
+            ),
+            max_acceleration=(
+                max_acceleration
+                if max_acceleration is not None
+                else default.max_acceleration
+            ),
+        )
+
+
+MAVLINK_KINEMATIC_LIMITS = KinematicLimits(
+    max_velocity_xy=12, max_velocity_z=5, max_acceleration=6
+)
+"""Default kinematic limits for MAVLink-based drones; used for the limits that
+are not specified in the validation settings of the show.
+"""
+
+CRAZYFLIE_KINEMATIC_LIMITS = KinematicLimits(
+    max_velocity_xy=2, max_velocity_z=1.5, max_acceleration=3
+)
+"""Default kinematic limits for Crazyflie drones; used for the limits that
+are not specified in the validation settings of the show.
+"""
+
+
+@dataclass(frozen=True)
+class KinematicViolation:
+    """A segment of a trajectory where a kinematic limit is exceeded."""
+
+    drone: int
+    """Index of the drone."""
+
+    segment: int
+    """Index of the segment within the trajectory of the drone."""
+
+    time: float
+    """The time when the quantity attains its maximum within the segment,
+    relative to the start of the show.
+    """
+
+    quantity: str
+    """The quantity that exceeds its limit; one of ``velocityXY``,
+    ``velocityZ`` or ``acceleration``.
+    """
+
+    value: float
+    """The maximum value of the quantity within the segment."""
+
+    limit: float
+    """The limit of the quantity."""
+
+    def describe(self) -> str:
+        """Returns a human-readable description of the violation."""
+        what = {
+            "velocityXY": "Horizontal velocity",
+            "velocityZ": "Vertical velocity",
+            "acceleration": "Acceleration",
+        }.get(self.quantity, self.quantity)
+        unit = "m/s²" if self.quantity == "acceleration" else "m/s"
+        return (
+            f"{what} reaches {self.value:.2f} {unit} at T={self.time:.1f}s, "
+            f"limit is {self.limit:.2f} {unit}"
+        )
+
+    @property
+    def json(self) -> dict[str, Any]:
+        """Returns the JSON representation of the violation."""
+        return {
+            "drone": self.drone,
+            "segment": self.segment,
+            "time": round(self.time, 3),
+            "quantity": self.quantity,
+            "value": round(self.value, 3),
+            "limit": self.limit,
+        }
+
+
+@dataclass
+class KinematicReport:
+    """Result of a kinematic feasibility check of a show."""
+
+    limits: KinematicLimits
+    """The limits that the show was checked against."""
+
+    max_velocity_xy: float = 0.0
+    """The largest horizontal velocity in the show."""
+
+    max_velocity_z: float = 0.0
+    """The largest vertical velocity in the show, in either direction."""
+
+    max_acceleration: float = 0.0
+    """The largest magnitude of the acceleration in the show."""
+
+    violations: list[KinematicViolation] = field(default_factory=list)
+    """The worst violations, at most one per segment and quantity, sorted by
+    the ratio of the value and the limit in decreasing order.
+    """
+
+    num_violations: int = 0
+    """Total number of violations; may be larger than the number of entries in
+    `violations`.
+    """
+
+    @property
+    def json(self) -> dict[str, Any]:
+        """Returns the JSON representation of the report."""
+        return {
+            "maxVelocityXY": round(self.max_velocity_xy, 3),
+            "maxVelocityZ": round(self.max_velocity_z, 3),
+            "maxAcceleration": round(self.max_acceleration, 3),
+            "numViolations": self.num_violations,
+            "violations": [violation.json for violation in self.violations],
+        }
+
+    @property
+    def ok(self) -> bool:
+        """Returns whether all the limits are satisfied."""
+        return self.num_violations == 0
+
+
+def check_kinematic_limits(
+    evaluator: TrajectoryEvaluator,
+    limits: KinematicLimits,
+    *,
+    samples_per_segment: int = 32,
+    tolerance: float = 1e-3,
+    max_violations: int = 10,
+) -> KinematicReport:
+    """Checks whether the trajectories of a show respect the given velocity
+    and acceleration limits.
+
+    Parameters:
+        evaluator: the evaluator of the trajectories of the show
+        limits: the limits to check
+        samples_per_segment: number of intervals to divide each segment into
+            when searching for the maxima of the derivatives within the
+            segment
+        tolerance: relative tolerance of the limits
+        max_violations: maximum number of violations to include in the report
+
+    Returns:
+        the result of the check
+    """
+    ratios = np.linspace(0.0, 1.0, max(int(samples_per_segment), 1) + 1)
+    drone_indices = evaluator.segment_drone_indices
+    offsets = evaluator.segment_offsets
+    start_times = evaluator.segment_start_times
+    lengths = evaluator.segment_lengths
+
+    quantities = (
+        ("velocityXY", limits.max_velocity_xy),
+        ("velocityZ", limits.max_velocity_z),
+        ("acceleration", limits.max_acceleration),
+    )
+    maxima = [0.0, 0.0, 0.0]
+    found: list[tuple[float, KinematicViolation]] = []
+    num_violations = 0
+
+    for start in range(0, evaluator.num_segments, _SEGMENTS_PER_BATCH):
+        segments = slice(start, start + _SEGMENTS_PER_BATCH)
+        velocities = evaluator.evaluate_segments(ratios, order=1, segments=segments)
+        accelerations = evaluator.evaluate_segments(ratios, order=2, segments=segments)
+
+        values: list[NDArray[np.float64]] = [
+            np.hypot(velocities[..., 0], velocities[..., 1]),
+            np.abs(velocities[..., 2]),
+            np.linalg.norm(accelerations, axis=-1),
+        ]
+
+        for index, ((quantity, limit), value) in enumerate(zip(quantities, values)):
+            if not value.size:
+                continue
+
+            where = np.argmax(value, axis=1)
+            segment_maxima = value[np.arange(value.shape[0]), where]
+            maxima[index] = max(maxima[index], float(segment_maxima.max()))
+
+            if limit is None:
+                continue
+
+            (violating,) = np.nonzero(segment_maxima > limit * (1 + tolerance))
+            num_violations += violating.size
+            if violating.size > max_violations:
+                # Only the worst ones can make it to the report
+                worst = np.argpartition(-segment_maxima[violating], max_violations)
+                violating = violating[worst[:max_violations]]
+
+            for local in violating.tolist():
+                segment = start + local
+                drone = int(drone_indices[segment])
+                violation = KinematicViolation(
+                    drone=drone,
+                    segment=segment - int(offsets[drone]),
+                    time=float(
+                        start_times[segment] + ratios[where[local]] * lengths[segment]
+                    ),
+                    quantity=quantity,
+                    value=float(segment_maxima[local]),
+                    limit=limit,
+                )
+                found.append((violation.value / limit, violation))
+
+        # Keep the number of candidates bounded
+        if len(found) > max_violations:
+            found.sort(key=lambda item: -item[0])
+            del found[max_violations:]
+
+    found.sort(key=lambda item: -item[0])
+
+    return KinematicReport(
+        limits=limits,
+        max_velocity_xy=maxima[0],
+        max_velocity_z=maxima[1],
+        max_acceleration=maxima[2],
+        violations=[violation for _, violation in found[:max_violations]],
+        num_violations=num_violations,
+    )
+
+
+def check_kinematic_limits_of_show(
+    show: ShowSpecification, default: KinematicLimits | None = None, **kwds
+) -> KinematicReport:
+    """Checks whether the trajectory in a show specification of a single
+    drone respects the limits in the validation settings of the show.
+
+    Parameters:
+        show: the show specification
+        default: the default limits to use for the limits that are not
+            specified in the validation settings of the show
+        kwds: additional keyword arguments to forward to
+            `check_kinematic_limits()`
+
+    Returns:
+        the result of the check
+    """
+    evaluator = TrajectoryEvaluator([get_trajectory_from_show_specification(show)])
+    limits = KinematicLimits.from_show_specification(dict(show), default)
+    return check_kinematic_limits(evaluator, limits, **kwds)
@@ -2,11 +2,31 @@
 Skybrush-related light programs, until we find a better place for them.
 """
 
+from __future__ import annotations
+
 from base64 import b64decode
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
 
 from .specification import ShowSpecification
 
-__all__ = ("get_light_program_from_show_specification",)
+__all__ = (
+    "LIGHT_PROGRAM_FPS",
+    "LightKeyframes",
+    "LightProgramEvaluator",
+    "compile_light_program",
+    "get_light_keyframes_from_show_specification",
+    "get_light_program_from_show_specification",
+)
+
+
+LIGHT_PROGRAM_FPS = 50
+"""Number of frames per second; durations and timestamps in light programs
+are expressed in frames.
+"""
 
 
 def get_light_program_from_show_specification(show: ShowSpecification) -> bytes:
@@ -25,3 +45,382 @@ def get_light_program_from_show_specification(show: ShowSpecification) -> bytes:
 
     light_data = b64decode(lights["data"])
     return light_data
+
+
+def get_light_keyframes_from_show_specification(
+    show: ShowSpecification,
+) -> LightKeyframes:
+    """Returns the keyframes of the light program in the given show
+    specification object.
+    """
+    return compile_light_program(get_light_program_from_show_specification(show))
+
+
+@dataclass(frozen=True)
+class LightKeyframes:
+    """Keyframes of a compiled light program.
+
+    The color of the light is interpolated linearly between consecutive
+    keyframes. Abrupt color changes are represented by two keyframes with the
+    same timestamp. The light stays black before the first keyframe and keeps
+    the color of the last keyframe after the end of the program.
+    """
+
+    times: NDArray[np.float64]
+    """Timestamps of the keyframes, in seconds, in non-decreasing order."""
+
+    colors: NDArray[np.uint8]
+    """Colors of the keyframes as RGB triplets, in an array of shape
+    ``(num_keyframes, 3)``.
+    """
+
+    @property
+    def duration(self) -> float:
+        """The timestamp of the last keyframe, in seconds."""
+        return float(self.times[-1]) if self.times.size else 0.0
+
+    def color_at(self, time: float) -> tuple[int, int, int]:
+        """Returns the color of the light at the given time, relative to the
+        start of the light program.
+        """
+        color = LightProgramEvaluator([self]).colors_at(time)[0]
+        return int(color[0]), int(color[1]), int(color[2])
+
+
+class _LightProgramCompiler:
+    """Interpreter of light program bytecode that records the keyframes of the
+    color of the light instead of playing the program in real time.
+    """
+
+    def __init__(self, bytecode: bytes, *, max_frames: int, max_steps: int):
+        self._bytecode = bytecode
+        self._max_frames = max_frames
+        self._max_steps = max_steps
+
+        self._pc = 0
+        self._time = 0
+        self._clock_origin = 0
+        self._color = (0, 0, 0)
+        self._keyframes: list[tuple[int, tuple[int, int, int]]] = [(0, self._color)]
+
+    def run(self) -> list[tuple[int, tuple[int, int, int]]]:
+        loops: list[tuple[int, int | None, int]] = []
+        steps = 0
+
+        while self._pc < len(self._bytecode) and self._time < self._max_frames:
+            steps += 1
+            if steps > self._max_steps:
+                break
+
+            command = self._next_byte()
+            if command == 0x00:
+                # END
+                break
+            elif command == 0x01:
+                # NOP
+                pass
+            elif command == 0x02:
+                # SLEEP
+                self._time += self._next_varint()
+            elif command == 0x03:
+                # WAIT_UNTIL
+                self._time = max(self._time, self._clock_origin + self._next_varint())
+            elif command == 0x04:
+                # SET_COLOR
+                color = self._next_color()
+                self._set_color(color, self._next_varint())
+            elif command == 0x05:
+                # SET_GRAY
+                gray = self._next_byte()
+                self._set_color((gray, gray, gray), self._next_varint())
+            elif command == 0x06:
+                # SET_BLACK
+                self._set_color((0, 0, 0), self._next_varint())
+            elif command == 0x07:
+                # SET_WHITE
+                self._set_color((255, 255, 255), self._next_varint())
+            elif command == 0x08:
+                # FADE_TO_COLOR
+                color = self._next_color()
+                self._fade_to_color(color, self._next_varint())
+            elif command == 0x09:
+                # FADE_TO_GRAY
+                gray = self._next_byte()
+                self._fade_to_color((gray, gray, gray), self._next_varint())
+            elif command == 0x0A:
+                # FADE_TO_BLACK
+                self._fade_to_color((0, 0, 0), self._next_varint())
+            elif command == 0x0B:
+                # FADE_TO_WHITE
+                self._fade_to_color((255, 255, 255), self._next_varint())
+            elif command == 0x0C:
+                # LOOP_BEGIN; zero iterations means an infinite loop
+                iterations = self._next_byte()
+                loops.append((self._pc, iterations or None, self._time))
+            elif command == 0x0D:
+                # LOOP_END
+                if not loops:
+                    raise RuntimeError("LOOP_END without LOOP_BEGIN in light program")
+                start, remaining, started_at = loops.pop()
+                if remaining is None or remaining > 1:
+                    if self._time == started_at:
+                        # Loop body takes no time; repeating it would not
+                        # change the output
+                        continue
+                    loops.append(
+                        (
+                            start,
+                            None if remaining is None else remaining - 1,
+                            self._time,
+                        )
+                    )
+                    self._pc = start
+            elif command == 0x0E:
+                # RESET_CLOCK
+                self._clock_origin = self._time
+            elif command in (0x10, 0x11):
+                # SET_COLOR_FROM_CHANNELS and FADE_TO_COLOR_FROM_CHANNELS;
+                # the color depends on RC channels so we keep the current one
+                self._next_color()
+                self._time += self._next_varint()
+            elif command == 0x12:
+                # JUMP
+                self._pc = self._next_varint()
+            elif command in (0x14, 0x15):
+                # SET_PYRO and SET_PYRO_ALL; no effect on the lights
+                self._next_byte()
+            else:
+                # TRIGGERED_JUMP and anything we do not know about; the rest
+                # of the program cannot be predicted
+                break
+
+        self._add_keyframe(self._time, self._color)
+        return self._keyframes
+
+    def _add_keyframe(self, time: int, color: tuple[int, int, int]) -> None:
+        keyframes = self._keyframes
+        last_time, last_color = keyframes[-1]
+        if last_time == time and last_color == color:
+            return
+        if len(keyframes) > 1 and last_color == color and keyframes[-2][1] == color:
+            # Constant color; the middle keyframe is redundant
+            keyframes[-1] = (time, color)
+        else:
+            keyframes.append((time, color))
+
+    def _fade_to_color(self, color: tuple[int, int, int], duration: int) -> None:
+        if duration <= 0:
+            return self._set_color(color, 0)
+        self._add_keyframe(self._time, self._color)
+        self._time += duration
+        self._color = color
+        self._add_keyframe(self._time, color)
+
+    def _next_byte(self) -> int:
+        try:
+            value = self._bytecode[self._pc]
+        except IndexError:
+            raise RuntimeError("unexpected end of light program") from None
+        self._pc += 1
+        return value
+
+    def _next_color(self) -> tuple[int, int, int]:
+        return self._next_byte(), self._next_byte(), self._next_byte()
+
+    def _next_varint(self) -> int:
+        result, shift = 0, 0
+        while True:
+            value = self._next_byte()
+            result |= (value & 0x7F) << shift
+            if value < 0x80:
+                return result
+            shift += 7
+
+    def _set_color(self, color: tuple[int, int, int], duration: int) -> None:
+        if color != self._color:
+            self._add_keyframe(self._time, self._color)
+            self._color = color
+            self._add_keyframe(self._time, color)
+        self._time += duration
+
+
+def compile_light_program(
+    bytecode: bytes,
+    *,
+    max_duration: float = 86400,
+    max_steps: int = 1000000,
+) -> LightKeyframes:
+    """Compiles a light program into a table of keyframes.
+
+    Colors that depend on RC channels are not known in advance; the light
+    keeps its previous color while such commands are executed. Execution
+    stops at triggered jumps as the rest of the program cannot be predicted.
+
+    Parameters:
+        bytecode: the light program as bytecode
+        max_duration: the maximum duration of the light program to compile,
+            in seconds; used to cut infinite loops
+        max_steps: the maximum number of commands to execute; used to cut
+            infinite loops
+
+    Returns:
+        the keyframes of the light program
+
+    Raises:
+        RuntimeError: if the light program is malformed
+    """
+    compiler = _LightProgramCompiler(
+        bytecode,
+        max_frames=int(max_duration * LIGHT_PROGRAM_FPS),
+        max_steps=max_steps,
+    )
+    keyframes = compiler.run()
+    if len(keyframes) > 1 and keyframes[1][0] == 0:
+        # The program sets its initial color right at the start
+        del keyframes[0]
+
+    return LightKeyframes(
+        times=np.array([time for time, _ in keyframes], dtype=np.float64)
+        / LIGHT_PROGRAM_FPS,
+        colors=np.array([color for _, color in keyframes], dtype=np.uint8).reshape(
+            -1, 3
+        ),
+    )
+
+
+class LightProgramEvaluator:
+    """Evaluates the light programs of multiple drones at a batch of
+    timestamps at once.
+
+    The keyframes of all the drones are packed into a single array so the
+    colors of the entire fleet can be looked up with a single binary search,
+    in the same manner as `TrajectoryEvaluator` does for trajectories.
+    """
+
+    _colors: NDArray[np.float64]
+    """Colors of the keyframes of all the drones."""
+
+    _keys: NDArray[np.float64]
+    """Timestamps of the keyframes, shifted by a multiple of `_stride`
+    according to the index of the drone the keyframe belongs to.
+    """
+
+    _num_drones: int
+    """Number of drones in the fleet."""
+
+    _offsets: NDArray[np.intp]
+    """Index of the first keyframe of each drone in the keyframe arrays,
+    followed by the total number of keyframes.
+    """
+
+    _stride: float
+    """Time offset added to the timestamps of the keyframes of consecutive
+    drones in `_keys`.
+    """
+
+    _times: NDArray[np.float64]
+    """Timestamps of the keyframes of all the drones."""
+
+    def __init__(self, keyframes: Iterable[LightKeyframes]):
+        """Constructor.
+
+        Parameters:
+            keyframes: the compiled light programs of the drones, in the order
+                in which the drones should appear in the results
+        """
+        times: list[NDArray[np.float64]] = []
+        colors: list[NDArray[np.uint8]] = []
+        offsets = [0]
+
+        for item in keyframes:
+            if item.times.size:
+                times.append(item.times)
+                colors.append(item.colors)
+            else:
+                times.append(np.zeros(1))
+                colors.append(np.zeros((1, 3), dtype=np.uint8))
+            offsets.append(offsets[-1] + times[-1].shape[0])
+
+        self._num_drones = len(offsets) - 1
+        self._offsets = np.array(offsets, dtype=np.intp)
+        self._times = np.concatenate(times) if times else np.zeros(0)
+        self._colors = (
+            np.concatenate(colors).astype(np.float64)
+            if colors
+            else np.zeros((0, 3), dtype=np.float64)
+        )
+
+        self._end = float(self._times.max()) if self._times.size else 0.0
+        self._stride = self._end + 2.0
+        drone_indices = np.repeat(np.arange(self._num_drones), np.diff(self._offsets))
+        self._keys = self._times + drone_indices * self._stride
+
+    @property
+    def duration(self) -> float:
+        """The timestamp of the last keyframe in the fleet, in seconds."""
+        return self._end
+
+    @property
+    def num_drones(self) -> int:
+        """The number of drones in the fleet."""
+        return self._num_drones
+
+    def colors_at(self, times: ArrayLike) -> NDArray[np.uint8]:
+        """Returns the colors of the lights of all the drones at the given
+        timestamps.
+
+        Parameters:
+            times: a single timestamp or an array of timestamps, relative to
+                the start of the light programs
+
+        Returns:
+            an array of RGB triplets of shape ``(num_drones, num_times, 3)``
+            if `times` is an array, or of shape ``(num_drones, 3)`` if
+            `times` is a single timestamp
+        """
+        times = np.asarray(times, dtype=np.float64)
+        scalar = times.ndim == 0
+        times = np.atleast_1d(times).ravel()
+
+        clamped = np.clip(times, 0.0, self._end)
+        drone_offsets = np.arange(self._num_drones, dtype=np.float64) * self._stride
+        keys = clamped[None, :] + drone_offsets[:, None]
+
+        first = self._offsets[:-1, None]
+        last = self._offsets[1:, None] - 1
+        indices = np.searchsorted(self._keys, keys, side="right") - 1
+        indices = np.clip(indices, first, last)
+        following = np.minimum(indices + 1, last)
+
+        start_times = self._times[indices]
+        lengths = self._times[following] - start_times
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = np.where(
+                lengths > 0, (clamped[None, :] - start_times) / lengths, 0.0
+            )
+        np.clip(ratios, 0.0, 1.0, out=ratios)
+
+        start_colors = self._colors[indices]
+        end_colors = self._colors[following]
+        result = start_colors + (end_colors - start_colors) * ratios[..., None]
+
+        # The lights are black before the light programs start
+        result[:, times < 0, :] = 0.0
+
+        result = np.round(result).astype(np.uint8)
+        return result[:, 0, :] if scalar else result
+
+    def rgb565_at(self, times: ArrayLike) -> NDArray[np.uint16]:
+        """Returns the colors of the lights of all the drones at the given
+        timestamps in RGB565 encoding, the same encoding that the drones use
+        to report the colors of their lights.
+
+        See `colors_at()` for the interpretation of the arguments and the
+        shape of the result.
+        """
+        colors = self.colors_at(times).astype(np.uint16)
+        return (
+            ((colors[..., 0] >> 3) << 11)
+            | ((colors[..., 1] >> 2) << 5)
+            | (colors[..., 2] >> 3)
+        )
@@ -0,0 +1,185 @@
+"""Cache of the parsed parts of show specifications during a show upload
+session.
+
+Show uploads arrive as one show specification per drone, and these
+specifications are mostly identical apart from the trajectory, the light
+program and a few other per-drone fields. The cache in this module parses the
+parts that are shared by the fleet (coordinate system, geofence) once, keyed
+by their contents, and parses the per-drone parts at most once for each show
+specification object so retried uploads do not parse them again.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from json import dumps
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from cachetools import LRUCache
+
+from .geofence import get_geofence_configuration_from_show_specification
+from .lights import (
+    LightKeyframes,
+    get_light_keyframes_from_show_specification,
+    get_light_program_from_show_specification,
+)
+from .specification import (
+    ShowSpecification,
+    get_coordinate_system_from_show_specification,
+    get_trajectory_from_show_specification,
+)
+
+if TYPE_CHECKING:
+    from flockwave.gps.vectors import FlatEarthToGPSCoordinateTransformation
+
+    from flockwave.server.model.geofence import GeofenceConfigurationRequest
+
+    from .trajectory import TrajectorySpecification
+
+__all__ = ("ShowParseCache",)
+
+
+T = TypeVar("T")
+
+
+class ShowParseCache:
+    """Cache of the parsed parts of show specifications.
+
+    The objects returned from the cache are shared between all the callers
+    that ask for the same part of the same show, so they must not be
+    modified.
+    """
+
+    _per_drone: LRUCache[int, tuple[ShowSpecification, dict[str, Any]]]
+    """Parsed per-drone parts of show specifications, keyed by the identity
+    of the show specification and then by the name of the part. Each entry
+    also holds a reference to the show specification so its identity cannot
+    be reused by another object while the entry is alive.
+    """
+
+    _shared: LRUCache[tuple[str, str], Any]
+    """Parsed shared parts of show specifications, keyed by the name of the
+    part and the JSON representation of the fields of the show specification
+    that the part depends on.
+    """
+
+    def __init__(self, *, max_shared_entries: int = 64, max_shows: int = 1024):
+        """Constructor.
+
+        Parameters:
+            max_shared_entries: maximum number of parsed shared parts to keep
+            max_shows: maximum number of show specifications to keep the
+                parsed per-drone parts of; see also `reserve()`
+        """
+        self._per_drone = LRUCache(maxsize=max(int(max_shows), 1))
+        self._shared = LRUCache(maxsize=max(int(max_shared_entries), 1))
+
+    def clear(self) -> None:
+        """Removes all the entries from the cache."""
+        self._per_drone.clear()
+        self._shared.clear()
+
+    def get(
+        self,
+        name: str,
+        show: ShowSpecification,
+        parser: Callable[[ShowSpecification], T],
+        *,
+        shared_by: Sequence[str] | None = None,
+    ) -> T:
+        """Returns a parsed part of a show specification, parsing it with the
+        given parser function if it is not in the cache yet.
+
+        Parameters:
+            name: the name of the part; parts with the same name must be
+                parsed with the same parser function
+            show: the show specification
+            parser: function that parses the part from the show specification
+            shared_by: the names of all the fields of the show specification
+                that the parser depends on if the part is shared by the
+                drones of the fleet; ``None`` if the part is specific to a
+                single drone
+
+        Returns:
+            the parsed part of the show specification
+        """
+        if shared_by is not None:
+            try:
+                encoded = dumps(
+                    [show.get(key) for key in shared_by],
+                    sort_keys=True,
+                    separators=(",", ":"),
+                    allow_nan=True,
+                )
+            except (TypeError, ValueError):
+                return parser(show)
+
+            shared_key = (name, encoded)
+            if shared_key in self._shared:
+                return self._shared[shared_key]
+
+            result = parser(show)
+            self._shared[shared_key] = result
+            return result
+
+        key = id(show)
+        entry = self._per_drone.get(key)
+        if entry is None or entry[0] is not show:
+            entry = self._per_drone[key] = (show, {})
+
+        parts = entry[1]
+        if name in parts:
+            return parts[name]
+
+        result = parts[name] = parser(show)
+        return result
+
+    def get_coordinate_system(
+        self, show: ShowSpecification
+    ) -> FlatEarthToGPSCoordinateTransformation:
+        """Returns the coordinate system of the show."""
+        return self.get(
+            "coordinateSystem",
+            show,
+            get_coordinate_system_from_show_specification,
+            shared_by=("coordinateSystem",),
+        )
+
+    def get_geofence_configuration(
+        self, show: ShowSpecification
+    ) -> GeofenceConfigurationRequest:
+        """Returns the geofence configuration of the show."""
+        return self.get(
+            "geofence",
+            show,
+            get_geofence_configuration_from_show_specification,
+            shared_by=("geofence", "coordinateSystem"),
+        )
+
+    def get_light_keyframes(self, show: ShowSpecification) -> LightKeyframes:
+        """Returns the compiled light program of a single drone."""
+        return self.get(
+            "lightKeyframes", show, get_light_keyframes_from_show_specification
+        )
+
+    def get_light_program(self, show: ShowSpecification) -> bytes:
+        """Returns the encoded light program of a single drone."""
+        return self.get("lights", show, get_light_program_from_show_specification)
+
+    def get_trajectory(self, show: ShowSpecification) -> TrajectorySpecification:
+        """Returns the trajectory of a single drone."""
+        return self.get("trajectory", show, get_trajectory_from_show_specification)
+
+    def reserve(self, num_shows: int) -> None:
+        """Ensures that the cache can keep the parsed per-drone parts of at
+        least the given number of show specifications, growing the cache if
+        needed.
+
+        Parameters:
+            num_shows: the number of show specifications in the current batch
+                of uploads
+        """
+        per_drone = self._per_drone
+        if num_shows > per_drone.maxsize:
+            self._per_drone = LRUCache(maxsize=max(num_shows, per_drone.maxsize * 2))
+            self._per_drone.update(per_drone)
@@ -3,7 +3,7 @@ trajectory.
 """
 
 from bisect import bisect
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from math import inf
 
 from pyledctrl.player import Player as LightPlayer
@@ -42,15 +42,16 @@ def _create_bezier_function_for_segment(
 ) -> Callable[[float], Point]:
     coords = list(segment.points)
 
-    def de_casteljau_step(start: int, length: int, ratio: float):
-        if length <= 0:
-            return coords[start]
-        else:
-            # Make sure to copy here so we don't alter coords
-            p = [(1 - ratio) * x for x in de_casteljau_step(start, length - 1, ratio)]
-            for i, x in enumerate(de_casteljau_step(start + 1, length - 1, ratio)):
-                p[i] += ratio * x
-            return p
+    def de_casteljau(ratio: float) -> list[float]:
+        # Iterative form of De Casteljau's algorithm; each pass replaces the
+        # points with the interpolations of consecutive pairs
+        points = [list(point) for point in coords]
+        inv_ratio = 1 - ratio
+        for length in range(len(points) - 1, 0, -1):
+            for i in range(length):
+                left, right = points[i], points[i + 1]
+                points[i] = [inv_ratio * a + ratio * b for a, b in zip(left, right)]
+        return points[0]
 
     def func(ratio: float) -> Point:
         if ratio == 0:
@@ -58,7 +59,7 @@ def _create_bezier_function_for_segment(
         elif ratio == 1:
             return tuple(coords[-1])
         else:
-            return tuple(de_casteljau_step(0, len(coords) - 1, ratio))
+            return tuple(de_casteljau(ratio))  # ty:ignore[invalid-return-type]
 
     return func
 
@@ -85,7 +86,7 @@ class TrajectoryPlayer:
     _current_segment_end_time: float
     _current_segment_length: float
 
-    _segments: list[TrajectorySegment]
+    _segments: Sequence[TrajectorySegment]
     _start_times: list[float]
     _takeoff_time: float
     _trajectory: TrajectorySpecification
@@ -103,7 +104,7 @@ class TrajectoryPlayer:
         # TODO: self._trajectory.takeoff_time taken into account later, hence we
         # now have absolute=False. We could probably refactor this to use
         # absolute=True and simplify the logic.
-        self._segments = list(self._trajectory.iter_segments(absolute=False))
+        self._segments = self._trajectory.get_segments(absolute=False)
         self._num_segments = len(self._segments)
         self._start_times = [
             segment.start_time + self._takeoff_time for segment in self._segments
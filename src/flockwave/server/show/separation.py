@@ -0,0 +1,361 @@
+"""Verification of the minimum distance between the drones of a show.
+
+The trajectories of the fleet are sampled on a regular time grid and the
+drones are bucketed into a grid of cubic cells whose size is equal to the
+required minimum distance at each sample. Drones closer to each other than
+the minimum distance are then necessarily in the same or in neighbouring
+cells, so only the pairs in neighbouring cells need to be checked instead of
+all the pairs of the fleet.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import product
+from math import ceil
+from multiprocessing import get_context
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .evaluator import TrajectoryEvaluator
+
+__all__ = (
+    "SeparationReport",
+    "SeparationViolation",
+    "check_minimum_separation",
+    "get_minimum_separation_from_show_specification",
+)
+
+
+_HALF_NEIGHBORHOOD = np.array(
+    [offset for offset in product((-1, 0, 1), repeat=3) if offset > (0, 0, 0)],
+    dtype=np.int64,
+)
+"""Offsets of the neighbouring cells that need to be checked for each cell so
+that each pair of neighbouring cells is checked exactly once.
+"""
+
+_SAMPLES_PER_BATCH = 64
+"""Number of time samples to evaluate the trajectories at in one step."""
+
+
+@dataclass(frozen=True)
+class SeparationViolation:
+    """A pair of drones that get closer to each other than the required
+    minimum distance.
+    """
+
+    first: int
+    """Index of the first drone of the pair."""
+
+    second: int
+    """Index of the second drone of the pair."""
+
+    time: float
+    """The time when the drones are the closest to each other, relative to the
+    start of the show.
+    """
+
+    distance: float
+    """The smallest distance between the drones."""
+
+    @property
+    def json(self) -> dict[str, Any]:
+        """Returns the JSON representation of the violation."""
+        return {
+            "drones": [self.first, self.second],
+            "time": round(self.time, 3),
+            "distance": round(self.distance, 3),
+        }
+
+
+@dataclass
+class SeparationReport:
+    """Result of a minimum separation check of a show."""
+
+    threshold: float
+    """The required minimum distance between drones."""
+
+    num_samples: int = 0
+    """Number of time samples that were checked."""
+
+    violations: list[SeparationViolation] = field(default_factory=list)
+    """The worst offending pairs of drones, at most one entry per pair, sorted
+    by the smallest distance between the drones of the pair.
+    """
+
+    num_violating_pairs: int = 0
+    """Total number of pairs that violate the minimum distance; may be larger
+    than the number of entries in `violations`.
+    """
+
+    @property
+    def json(self) -> dict[str, Any]:
+        """Returns the JSON representation of the report."""
+        return {
+            "threshold": self.threshold,
+            "numSamples": self.num_samples,
+            "numViolatingPairs": self.num_violating_pairs,
+            "violations": [violation.json for violation in self.violations],
+        }
+
+    @property
+    def ok(self) -> bool:
+        """Returns whether the minimum distance is satisfied everywhere."""
+        return self.num_violating_pairs == 0
+
+
+def get_minimum_separation_from_show_specification(show: dict) -> float | None:
+    """Returns the minimum distance between drones that the show was validated
+    against in Skybrush Live, or `None` if the show specification does not
+    contain this information.
+    """
+    validation = show.get("validation")
+    if not validation or not isinstance(validation, dict):
+        return None
+
+    min_distance = validation.get("minDistance")
+    return float(min_distance) if min_distance is not None else None
+
+
+def check_minimum_separation(
+    evaluator: TrajectoryEvaluator,
+    min_distance: float,
+    *,
+    time_step: float = 0.25,
+    start: float | None = None,
+    end: float | None = None,
+    max_violations: int = 10,
+    processes: int = 0,
+) -> SeparationReport:
+    """Checks whether the drones of a show keep the given minimum distance
+    from each other throughout the show.
+
+    Parameters:
+        evaluator: the evaluator of the trajectories of the show
+        min_distance: the required minimum distance between drones
+        time_step: time between consecutive samples of the trajectories, in
+            seconds
+        start: the first timestamp to check; ``None`` means the start of the
+            earliest trajectory
+        end: the last timestamp to check; ``None`` means the end of the
+            latest trajectory
+        max_violations: maximum number of offending pairs to include in the
+            report
+        processes: number of worker processes to distribute the samples
+            between; zero to run the check in the current process
+
+    Returns:
+        the result of the check
+    """
+    if min_distance <= 0:
+        raise ValueError("minimum distance must be positive")
+    if time_step <= 0:
+        raise ValueError("time step must be positive")
+
+    lo, hi = evaluator.time_range
+    start = lo if start is None else start
+    end = hi if end is None else end
+    num_samples = max(int(ceil((end - start) / time_step)) + 1, 1)
+    times = np.minimum(start + np.arange(num_samples) * time_step, end)
+
+    if processes > 0 and num_samples > _SAMPLES_PER_BATCH:
+        batches = np.array_split(times, processes * 4)
+        with ProcessPoolExecutor(
+            max_workers=processes, mp_context=get_context("spawn")
+        ) as executor:
+            results = list(
+                executor.map(
+                    _find_close_pairs,
+                    [evaluator] * len(batches),
+                    [min_distance] * len(batches),
+                    batches,
+                )
+            )
+    else:
+        results = [_find_close_pairs(evaluator, min_distance, times)]
+
+    worst = _merge_close_pairs(results)
+    violations = sorted(
+        (
+            SeparationViolation(first, second, time, distance)
+            for (first, second), (distance, time) in worst.items()
+        ),
+        key=lambda violation: (violation.distance, violation.time),
+    )
+
+    return SeparationReport(
+        threshold=min_distance,
+        num_samples=num_samples,
+        violations=violations[:max_violations],
+        num_violating_pairs=len(violations),
+    )
+
+
+def _find_close_pairs(
+    evaluator: TrajectoryEvaluator, min_distance: float, times: NDArray[np.float64]
+) -> dict[tuple[int, int], tuple[float, float]]:
+    """Finds the pairs of drones that are closer to each other than the given
+    distance at any of the given timestamps.
+
+    Returns:
+        a dictionary mapping pairs of drone indices to the smallest distance
+        between them and the time when it was attained
+    """
+    result: dict[tuple[int, int], tuple[float, float]] = {}
+    num_drones = evaluator.num_drones
+
+    for index in range(0, len(times), _SAMPLES_PER_BATCH):
+        batch = times[index : index + _SAMPLES_PER_BATCH]
+        first, second, samples, distances = _find_close_pairs_in_samples(
+            evaluator.positions_at(batch), min_distance
+        )
+        if not distances.size:
+            continue
+
+        # Keep only the closest approach of each pair within the batch
+        lower = np.minimum(first, second)
+        upper = np.maximum(first, second)
+        pair_keys = lower * num_drones + upper
+        order = np.lexsort((distances, pair_keys))
+        is_first = np.ones(order.size, dtype=bool)
+        is_first[1:] = pair_keys[order[1:]] != pair_keys[order[:-1]]
+        order = order[is_first]
+
+        for i, j, sample, distance in zip(
+            lower[order].tolist(),
+            upper[order].tolist(),
+            samples[order].tolist(),
+            distances[order].tolist(),
+        ):
+            existing = result.get((i, j))
+            if existing is None or distance < existing[0]:
+                result[i, j] = (distance, float(batch[sample]))
+
+    return result
+
+
+def _find_close_pairs_in_samples(
+    positions: NDArray[np.float64], min_distance: float
+) -> tuple[NDArray[np.intp], NDArray[np.intp], NDArray[np.intp], NDArray[np.float64]]:
+    """Finds the pairs of drones that are closer to each other than the given
+    distance in any of the given samples, using a uniform grid with the given
+    distance as the cell size.
+
+    All the samples are processed at once; the index of the sample is
+    treated as an extra coordinate of the cells so drones from different
+    samples never end up in neighbouring cells.
+
+    Parameters:
+        positions: the positions of the drones, in an array of shape
+            ``(num_drones, num_samples, 3)``
+
+    Returns:
+        the indices of the first and the second drones of the pairs, the
+        indices of the samples and the distances between the drones
+    """
+    num_drones, num_samples, _ = positions.shape
+    empty = np.empty(0, dtype=np.intp)
+    if num_drones < 2 or num_samples < 1:
+        return empty, empty, empty, np.empty(0)
+
+    # Flatten the points in sample-major order
+    points = positions.transpose(1, 0, 2).reshape(-1, 3)
+    num_points = points.shape[0]
+
+    # Assign the points to cells and pack the cell coordinates and the sample
+    # index into a single integer. Cell coordinates start from 1 so the
+    # neighbours of each cell have non-negative coordinates and the packing
+    # is unambiguous.
+    cells = np.floor(points / min_distance).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    dims = cells.max(axis=0) + 2
+    if int(dims[0]) * int(dims[1]) * int(dims[2]) * num_samples >= 2**62:
+        # Cell keys would overflow; process the samples one by one
+        results = [
+            _find_close_pairs_in_samples(positions[:, i : i + 1, :], min_distance)
+            for i in range(num_samples)
+        ]
+        return (
+            np.concatenate([r[0] for r in results]),
+            np.concatenate([r[1] for r in results]),
+            np.concatenate([r[2] + i for i, r in enumerate(results)]),
+            np.concatenate([r[3] for r in results]),
+        )
+
+    strides = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+    sample_stride = int(dims[0] * dims[1] * dims[2])
+    sample_indices = np.repeat(np.arange(num_samples, dtype=np.int64), num_drones)
+
+    keys = cells @ strides + sample_indices * sample_stride
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    sorted_cells = cells[order]
+    sorted_sample_offsets = sample_indices[order] * sample_stride
+
+    # Find the range of each occupied cell in the sorted array
+    unique_keys, run_starts, run_lengths = np.unique(
+        sorted_keys, return_index=True, return_counts=True
+    )
+    arange = np.arange(num_points)
+
+    firsts: list[NDArray[np.intp]] = []
+    seconds: list[NDArray[np.intp]] = []
+
+    for offset in [np.zeros(3, dtype=np.int64), *_HALF_NEIGHBORHOOD]:
+        neighbor_keys = (sorted_cells + offset) @ strides + sorted_sample_offsets
+        runs = np.searchsorted(unique_keys, neighbor_keys)
+        runs[runs == unique_keys.size] = 0
+        found = unique_keys[runs] == neighbor_keys
+
+        lo = run_starts[runs]
+        hi = lo + run_lengths[runs]
+        if not offset.any():
+            # Within the same cell, pair each point with the ones after it
+            lo = np.maximum(lo, arange + 1)
+
+        counts = np.where(found, np.maximum(hi - lo, 0), 0)
+        total = int(counts.sum())
+        if not total:
+            continue
+
+        first = np.repeat(arange, counts)
+        starts = np.cumsum(counts) - counts
+        second = lo[first] + (np.arange(total) - np.repeat(starts, counts))
+        firsts.append(first)
+        seconds.append(second)
+
+    if not firsts:
+        return empty, empty, empty, np.empty(0)
+
+    first = order[np.concatenate(firsts)]
+    second = order[np.concatenate(seconds)]
+    distances = np.linalg.norm(points[first] - points[second], axis=1)
+    close = distances < min_distance
+    first, second = first[close], second[close]
+
+    return (
+        first % num_drones,
+        second % num_drones,
+        first // num_drones,
+        distances[close],
+    )
+
+
+def _merge_close_pairs(
+    results: Iterable[dict[tuple[int, int], tuple[float, float]]],
+) -> dict[tuple[int, int], tuple[float, float]]:
+    """Merges the close pairs found in different batches of samples, keeping
+    the smallest distance for each pair.
+    """
+    merged: dict[tuple[int, int], tuple[float, float]] = {}
+    for result in results:
+        for key, value in result.items():
+            existing = merged.get(key)
+            if existing is None or value[0] < existing[0]:
+                merged[key] = value
+    return merged
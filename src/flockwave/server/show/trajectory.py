@@ -9,7 +9,7 @@ from math import ceil, inf
 
 from .utils import BoundingBoxCalculator, Point
 
-__all__ = ("TrajectorySpecification",)
+__all__ = ("TrajectorySpecification", "TrajectoryStatistics")
 
 
 @dataclass(frozen=True)
@@ -134,11 +134,53 @@ class TrajectorySegment:
         return left, right
 
 
+@dataclass(frozen=True)
+class TrajectoryStatistics:
+    """Summary statistics of a trajectory, calculated in a single pass over
+    its points.
+    """
+
+    bounding_box: tuple[Point, Point] | None
+    """The opposite corners of the axis-aligned bounding box of the points
+    and control points of the trajectory; ``None`` if the trajectory has no
+    points.
+    """
+
+    duration: float
+    """The time elapsed between the takeoff and the landing, in seconds."""
+
+    home_position: Point
+    """The home position of the drone, in meters."""
+
+    landing_height: float
+    """The height of the last point of the trajectory, in meters."""
+
+    num_points: int
+    """Number of points in the trajectory, not counting the control points."""
+
+    scaling_factor: int
+    """The scaling factor to use when storing the trajectory in a Skybrush
+    binary show file.
+    """
+
+
 class TrajectorySpecification:
     """Class representing a Skybrush trajectory specification received from the
     client during a show upload.
+
+    Statistics and segment lists derived from the trajectory are calculated
+    on first access and cached, so the underlying JSON data must not be
+    modified after the trajectory specification was constructed.
     """
 
+    _segments: dict[tuple[float, bool], tuple[TrajectorySegment, ...]]
+    """Cached segment lists of the trajectory, keyed by the maximum segment
+    length and whether the segments use absolute timestamps.
+    """
+
+    _statistics: TrajectoryStatistics | None
+    """Cached statistics of the trajectory; ``None`` if not calculated yet."""
+
     def __init__(self, data: dict):
         """Constructor.
 
@@ -146,6 +188,8 @@ class TrajectorySpecification:
             data: the raw JSON trajectory dictionary in the show specification
         """
         self._data = data
+        self._segments = {}
+        self._statistics = None
 
         version = self._data.get("version")
         if version is None:
@@ -173,12 +217,7 @@ class TrajectorySpecification:
         the time spent on the ground before takeoff. In other words, the returned
         duration is the time elapsed between the takeoff and the landing.
         """
-        points = self._data.get("points")
-        if points:
-            t, _, _ = points[-1]
-            return float(t)
-        else:
-            return 0.0
+        return self.statistics.duration
 
     @property
     def is_empty(self) -> bool:
@@ -190,19 +229,7 @@ class TrajectorySpecification:
         """Returns the home position of the drone within the show. Units are
         in meters.
         """
-        # TODO(ntamas): I think the 'home' is not here by default but one level
-        # higher in the original JSON structure. I think it's time we created a
-        # formal specification and stick to it. :-/
-        home = self._data.get("home")
-        if not home:
-            points = self._data.get("points")
-            if points:
-                _, home, _ = points[0]
-
-        if home and len(home) == 3:
-            return float(home[0]), float(home[1]), float(home[2])
-        else:
-            return 0.0, 0.0, 0.0
+        return self.statistics.home_position
 
     @property
     def landing_height(self) -> float:
@@ -213,15 +240,16 @@ class TrajectorySpecification:
         when we finally migrate to sending the entire trajectory from the client
         to the server.
         """
-        height = self._data.get("landingHeight")
-        if height is None:
-            points = self._data.get("points")
-            if points:
-                _, last_pos, _ = points[-1]
-                height = float(last_pos[2])
-            else:
-                height = 0.0
-        return height
+        return self.statistics.landing_height
+
+    @property
+    def statistics(self) -> TrajectoryStatistics:
+        """Returns the summary statistics of the trajectory, calculating them
+        on first access.
+        """
+        if self._statistics is None:
+            self._statistics = self._calculate_statistics()
+        return self._statistics
 
     @property
     def takeoff_time(self) -> float:
@@ -242,18 +270,39 @@ class TrajectorySpecification:
             ValueError: if the margin is negative or if the trajectory has no
                 points
         """
-        points = self._data.get("points", [])
-
-        bbox = BoundingBoxCalculator(dim=3)
-        for _, point, control_points in points:
-            bbox.add(point)
-            for control_point in control_points:
-                bbox.add(control_point)
+        bounding_box = self.statistics.bounding_box
+        if bounding_box is None:
+            raise ValueError("the bounding box is empty")
 
+        mins, maxs = bounding_box
         if margin > 0:
-            bbox.pad(margin)
+            mins = (mins[0] - margin, mins[1] - margin, mins[2] - margin)
+            maxs = (maxs[0] + margin, maxs[1] + margin, maxs[2] + margin)
+
+        return mins, maxs
 
-        return bbox.get_corners()  # type: ignore
+    def get_segments(
+        self, max_length: float = inf, absolute: bool = False
+    ) -> Sequence[TrajectorySegment]:
+        """Returns the segments of the trajectory.
+
+        The segment list is calculated on first access and cached, so
+        consumers of the same trajectory share the same segment objects.
+        The segments must not be modified.
+
+        Args:
+            max_length: maximum allowed length of a single segment, in seconds.
+                Segments longer than this will be split as needed.
+            absolute: whether to use absolute timestamps in the returned
+                segments; see `iter_segments()` for more details.
+        """
+        key = (max_length, bool(absolute))
+        segments = self._segments.get(key)
+        if segments is None:
+            segments = self._segments[key] = tuple(
+                self._iter_segments(max_length, absolute)
+            )
+        return segments
 
     def iter_segments(
         self, max_length: float = inf, absolute: bool = False
@@ -270,6 +319,78 @@ class TrajectorySpecification:
                 constant segment will be inserted in front of the first segment
                 if the takeoff time is positive.
         """
+        yield from self.get_segments(max_length, absolute)
+
+    def propose_scaling_factor(self) -> int:
+        """Proposes a scaling factor to use in a Skybrush binary show file when
+        storing the trajectory.
+        """
+        return self.statistics.scaling_factor
+
+    def _calculate_statistics(self) -> TrajectoryStatistics:
+        """Calculates the summary statistics of the trajectory in a single pass
+        over its points.
+        """
+        points = self._data.get("points") or []
+
+        bbox = BoundingBoxCalculator(dim=3)
+        for _, point, control_points in points:
+            bbox.add(point)
+            for control_point in control_points:
+                bbox.add(control_point)
+
+        bounding_box: tuple[Point, Point] | None
+        if bbox.is_empty:
+            bounding_box = None
+            scaling_factor = 1
+        else:
+            bounding_box = bbox.get_corners()  # type: ignore
+            mins, maxs = bounding_box  # type: ignore
+
+            coords = []
+            coords.extend(abs(x) for x in mins)
+            coords.extend(abs(x) for x in maxs)
+            extremum = ceil(max(coords) * 1000)
+
+            # With scale=1, we can fit values from 0 to 32767 into the binary
+            # show file, so we basically need to divide (extremum+1) by 32768
+            # and round up. This gives us scale = 1 for extrema in [0; 32767],
+            # scale = 2 for extrema in [32768; 65535] and so on.
+            scaling_factor = ceil((extremum + 1) / 32768)
+
+        # TODO(ntamas): I think the 'home' is not here by default but one level
+        # higher in the original JSON structure. I think it's time we created a
+        # formal specification and stick to it. :-/
+        home = self._data.get("home")
+        if not home and points:
+            _, home, _ = points[0]
+
+        if home and len(home) == 3:
+            home_position = float(home[0]), float(home[1]), float(home[2])
+        else:
+            home_position = 0.0, 0.0, 0.0
+
+        landing_height = self._data.get("landingHeight")
+        if landing_height is None:
+            if points:
+                _, last_pos, _ = points[-1]
+                landing_height = float(last_pos[2])
+            else:
+                landing_height = 0.0
+
+        return TrajectoryStatistics(
+            bounding_box=bounding_box,
+            duration=float(points[-1][0]) if points else 0.0,
+            home_position=home_position,
+            landing_height=landing_height,
+            num_points=len(points),
+            scaling_factor=scaling_factor,
+        )
+
+    def _iter_segments(
+        self, max_length: float, absolute: bool
+    ) -> Iterable[TrajectorySegment]:
+        """Iterates over the segments of the trajectory, without caching."""
         point_iter: Iterable[tuple[float, Point, list[Point]]] | None = self._data.get(
             "points"
         )
@@ -316,23 +437,3 @@ class TrajectorySpecification:
                         yield segment
 
             prev_t, start = t, point
-
-    def propose_scaling_factor(self) -> int:
-        """Proposes a scaling factor to use in a Skybrush binary show file when
-        storing the trajectory.
-        """
-        if self.is_empty:
-            return 1
-
-        mins, maxs = self.bounding_box
-
-        coords = []
-        coords.extend(abs(x) for x in mins)
-        coords.extend(abs(x) for x in maxs)
-        extremum = ceil(max(coords) * 1000)
-
-        # With scale=1, we can fit values from 0 to 32767 into the binary show
-        # file, so we basically need to divide (extremum+1) by 32768 and round
-        # up. This gives us scale = 1 for extrema in [0; 32767],
-        # scale = 2 for extrema in [32768; 65535] and so on.
-        return ceil((extremum + 1) / 32768)
@@ -0,0 +1,219 @@
+from trio import move_on_after, sleep
+
+from flockwave.server.comm import (
+    CommunicationManager,
+    DropPolicy,
+    OutboundQueue,
+    TransmissionPriority,
+    UnicastDelivery,
+)
+
+
+async def drain(queue: OutboundQueue) -> list:
+    result = []
+    while len(queue):
+        result.append(await queue.get())
+    return result
+
+
+class TestOutboundQueue:
+    async def test_priorities(self):
+        queue = OutboundQueue()
+        queue.put_nowait("rtk1", TransmissionPriority.RTK)
+        queue.put_nowait("heartbeat", TransmissionPriority.HEARTBEAT)
+        queue.put_nowait("rtk2", TransmissionPriority.RTK)
+        queue.put_nowait("command", TransmissionPriority.COMMAND)
+        queue.put_nowait("land", TransmissionPriority.EMERGENCY)
+
+        assert await drain(queue) == ["land", "command", "rtk1", "rtk2", "heartbeat"]
+
+    async def test_heartbeat_is_not_starved(self):
+        queue = OutboundQueue(heartbeat_slot_interval=3)
+        queue.put_nowait("heartbeat", TransmissionPriority.HEARTBEAT)
+        for index in range(5):
+            queue.put_nowait(f"rtk{index}", TransmissionPriority.RTK)
+
+        assert await drain(queue) == [
+            "rtk0",
+            "rtk1",
+            "rtk2",
+            "heartbeat",
+            "rtk3",
+            "rtk4",
+        ]
+
+    async def test_heartbeat_slot_is_reset_when_heartbeat_is_served(self):
+        queue = OutboundQueue(heartbeat_slot_interval=2)
+        queue.put_nowait("rtk0", TransmissionPriority.RTK)
+        assert await queue.get() == "rtk0"
+
+        # Items served while no heartbeat was waiting do not count
+        queue.put_nowait("heartbeat", TransmissionPriority.HEARTBEAT)
+        queue.put_nowait("rtk1", TransmissionPriority.RTK)
+        assert await drain(queue) == ["rtk1", "heartbeat"]
+
+    async def test_drop_policies(self):
+        queue = OutboundQueue(
+            sizes={
+                TransmissionPriority.COMMAND: 2,
+                TransmissionPriority.RTK: 2,
+                TransmissionPriority.TELEMETRY: 2,
+            }
+        )
+
+        for index in range(3):
+            queue.put_nowait(f"rtk{index}", TransmissionPriority.RTK)
+            queue.put_nowait(f"telemetry{index}", TransmissionPriority.TELEMETRY)
+
+        assert queue.put_nowait("command0")
+        assert queue.put_nowait("command1")
+        assert not queue.put_nowait("command2")
+
+        assert await drain(queue) == [
+            "command0",
+            "command1",
+            "rtk1",
+            "rtk2",
+            "telemetry0",
+            "telemetry1",
+        ]
+
+    async def test_groups_are_dropped_together(self):
+        rtk = TransmissionPriority.RTK
+        queue = OutboundQueue(sizes={rtk: 5})
+
+        assert queue.put_group_nowait(["a0", "a1", "a2"], rtk)
+        assert queue.put_group_nowait(["b0", "b1"], rtk)
+        assert len(queue) == 5
+
+        # The oldest group is dropped as a whole to make room for the new one
+        assert queue.put_group_nowait(["c0", "c1"], rtk)
+        assert len(queue) == 4
+
+        # A partially served group is dropped as a whole, too
+        assert await queue.get() == "b0"
+        assert queue.put_group_nowait(["d0", "d1", "d2"], rtk)
+        assert await drain(queue) == ["c0", "c1", "d0", "d1", "d2"]
+
+        # Groups that do not fit into the queue at all are refused
+        assert not queue.put_group_nowait(["e0", "e1", "e2", "e3", "e4", "e5"], rtk)
+        assert queue.put_group_nowait([], rtk)
+        assert len(queue) == 0
+
+        # Groups are not added to full priority classes that keep old items
+        queue = OutboundQueue(sizes={TransmissionPriority.COMMAND: 2})
+        assert queue.put_nowait("command0")
+        assert not queue.put_group_nowait(["command1", "command2"])
+        assert await drain(queue) == ["command0"]
+
+    async def test_blocking_put(self, nursery):
+        queue = OutboundQueue(
+            sizes={TransmissionPriority.COMMAND: 1},
+            policies={TransmissionPriority.COMMAND: DropPolicy.BLOCK},
+        )
+        await queue.put("first")
+
+        with move_on_after(0.1) as scope:
+            await queue.put("second")
+        assert scope.cancelled_caught
+
+        nursery.start_soon(queue.put, "second")
+        await sleep(0.01)
+        assert await queue.get() == "first"
+        await sleep(0.01)
+        assert await queue.get() == "second"
+
+    async def test_get_waits_for_items(self, nursery):
+        queue = OutboundQueue()
+
+        with move_on_after(0.1) as scope:
+            await queue.get()
+        assert scope.cancelled_caught
+
+        async def put_later():
+            await sleep(0.01)
+            queue.put_nowait("item")
+
+        nursery.start_soon(put_later)
+        assert await queue.get() == "item"
+
+        queue.put_nowait("stale")
+        queue.clear()
+        assert len(queue) == 0
+
+        queue.put_nowait("fresh")
+        assert await queue.get() == "fresh"
+
+
+class TestErrorCounting:
+    def create_manager(self) -> CommunicationManager:
+        manager = CommunicationManager(channel_factory=None)  # type: ignore
+        manager.log = None  # type: ignore
+        return manager
+
+    def test_failure_on_all_connections_is_counted(self):
+        manager = self.create_manager()
+
+        for count in range(2):
+            delivery = UnicastDelivery("mav", pending=2)
+            manager._notify_delivery_result(delivery, False)
+            assert manager._error_counters["mav"] == count
+            manager._notify_delivery_result(delivery, False)
+            assert manager._error_counters["mav"] == count + 1
+
+    def test_success_on_any_connection_resets_counter(self):
+        manager = self.create_manager()
+        manager._error_counters["mav"] = 3
+
+        delivery = UnicastDelivery("mav", pending=2)
+        manager._notify_delivery_result(delivery, False)
+        manager._notify_delivery_result(delivery, True)
+
+        assert manager._error_counters["mav"] == 0
+
+    def test_dropped_packets_are_not_counted_as_failures(self):
+        manager = self.create_manager()
+        manager._error_counters["mav"] = 3
+
+        delivery = UnicastDelivery("mav", pending=1)
+        manager._notify_delivery_result(delivery, None)
+
+        assert manager._error_counters["mav"] == 3
+
+
+class TestBroadcasting:
+    def create_manager(self, connections) -> CommunicationManager:
+        manager = CommunicationManager(channel_factory=None)  # type: ignore
+        manager.log = None  # type: ignore
+        for connection in connections:
+            manager.add(connection, name="rtk", can_send=True)
+        for entry in manager._entries_by_name["rtk"]:
+            entry.can_broadcast = True
+        manager._transmitting = True
+        return manager
+
+    async def test_packets_are_enqueued_as_groups(self):
+        first, second = object(), object()
+        manager = self.create_manager([first, second])
+
+        manager.enqueue_broadcast_packets(
+            ["a0", "a1"],
+            destination="rtk",
+            priority=TransmissionPriority.RTK,
+            accept=lambda connection: connection is first,
+        )
+        manager.enqueue_broadcast_packets(
+            ["b0", "b1"], destination="rtk", priority=TransmissionPriority.RTK
+        )
+
+        # Connections that do not accept the packets are skipped
+        first_queue, second_queue = (
+            entry.queue for entry in manager._entries_by_name["rtk"]
+        )
+        assert [packet for packet, _, _ in await drain(first_queue)] == [
+            "a0",
+            "a1",
+            "b0",
+            "b1",
+        ]
+        assert [packet for packet, _, _ in await drain(second_queue)] == ["b0", "b1"]
@@ -0,0 +1,192 @@
+from flockwave.gps.vectors import GPSCoordinate
+from flockwave.protocols.mavlink.dialects.v20.ardupilotmega import MAVLink
+from pytest import fixture, raises
+
+from flockwave.server.ext.mavlink.channel import encode_mavlink_message_from_spec
+from flockwave.server.ext.mavlink.emulator import EmulatedDrone, MAVLinkFleetEmulator
+from flockwave.server.ext.mavlink.enums import MAVCommand, MAVResult
+from flockwave.server.ext.mavlink.ftp import MAVFTP
+from flockwave.server.ext.mavlink.types import spec
+
+
+class GroundStation:
+    """Fake ground station that exchanges MAVLink messages with a single
+    emulated drone without any network in between.
+    """
+
+    def __init__(self, drone: EmulatedDrone):
+        self.drone = drone
+        self.link = MAVLink(None, srcSystem=255, srcComponent=190)
+        self.parser = MAVLink(None)
+
+    def request(self, message_spec) -> list:
+        _, fields = message_spec
+        fields.setdefault("target_system", self.drone.system_id)
+        fields.setdefault("target_component", 1)
+        data = encode_mavlink_message_from_spec(message_spec, self.link)
+        (message,) = self.parser.parse_buffer(data)
+
+        result = []
+        for reply in self.drone.handle_message(message):
+            result.extend(self.parser.parse_buffer(reply) or ())
+        return result
+
+    async def send(self, message_spec, wait_for_response=None):
+        replies = self.request(message_spec)
+        return replies[0] if wait_for_response else None
+
+
+@fixture
+def drone() -> EmulatedDrone:
+    return EmulatedDrone(17, GPSCoordinate(lat=47.5, lon=19, amsl=100))
+
+
+def test_telemetry(drone: EmulatedDrone):
+    parser = MAVLink(None)
+    messages = []
+    for packet in drone.get_telemetry():
+        messages.extend(parser.parse_buffer(packet) or ())
+
+    assert [message.get_type() for message in messages] == [
+        "HEARTBEAT",
+        "SYS_STATUS",
+        "GLOBAL_POSITION_INT",
+        "GPS_RAW_INT",
+        "DATA16",
+    ]
+    assert all(message.get_srcSystem() == 17 for message in messages)
+    assert messages[2].lat == 475000000
+    assert messages[4].type == 0x5B
+
+
+def test_commands_and_params(drone: EmulatedDrone):
+    gcs = GroundStation(drone)
+
+    ack, *_ = gcs.request(
+        spec.command_long(
+            command=MAVCommand.COMPONENT_ARM_DISARM,
+            confirmation=0,
+            param1=1,
+            param2=0,
+            param3=0,
+            param4=0,
+            param5=0,
+            param6=0,
+            param7=0,
+        )
+    )
+    assert ack.get_type() == "COMMAND_ACK"
+    assert ack.result == MAVResult.ACCEPTED
+    assert ack.target_system == 255
+    assert drone.armed
+
+    (value,) = gcs.request(
+        spec.param_set(param_id=b"SHOW_ORIGIN_LAT", param_value=42, param_type=9)
+    )
+    assert value.param_id == "SHOW_ORIGIN_LAT"
+    assert value.param_value == 42
+
+    (value,) = gcs.request(spec.param_request_read(param_id=b"FOO", param_index=-1))
+    assert value.param_id == "FOO"
+    assert value.param_value == 0
+
+
+async def test_mavftp_round_trip(drone: EmulatedDrone):
+    ftp = MAVFTP(GroundStation(drone).send)
+    data = bytes(range(256)) * 7
+
+    await ftp.put(data, "/collmot/show.skyb", parents=True)
+    assert await ftp.get("/collmot/show.skyb", burst=False) == data
+
+    await ftp.rm("/collmot/show.skyb")
+    assert drone.ftp.files == {}
+
+
+async def test_mavftp_patch(drone: EmulatedDrone):
+    ftp = MAVFTP(GroundStation(drone).send)
+    data = bytes(range(256)) * 7
+    await ftp.put(data, "/show.skyb")
+
+    # Change a few bytes and shrink the file
+    new_data = data[:300] + b"x" * 10 + data[310:1500]
+    await ftp.patch(new_data, "/show.skyb", [(300, 310)], truncate=True)
+    assert drone.ftp.files["/show.skyb"] == new_data
+
+    # Grow the file
+    new_data += b"abc" * 100
+    await ftp.patch(new_data, "/show.skyb", [(1500, len(new_data))])
+    assert drone.ftp.files["/show.skyb"] == new_data
+
+    # Missing ranges are detected by the CRC check
+    with raises(RuntimeError, match="CRC mismatch"):
+        await ftp.patch(data, "/show.skyb", [(0, 10)])
+
+
+def test_fleet_system_ids():
+    emulator = MAVLinkFleetEmulator(250)
+    (network,) = emulator.networks
+    assert sorted(network.drones) == list(range(1, 251))
+    assert network.server_address == ("127.0.0.1", 14550)
+    assert network.broadcast_port == 14555
+
+    # System IDs never exceed the network size and skip the system ID of the
+    # server; each MAVLink connection gets its own block of system IDs
+    emulator = MAVLinkFleetEmulator(
+        10,
+        server_addresses=[("127.0.0.1", 14550), ("127.0.0.1", 14560)],
+        first_system_id=250,
+        network_size=255,
+        gcs_system_id=254,
+    )
+    assert emulator.num_drones == 10
+    assert [sorted(network.drones) for network in emulator.networks] == [
+        [250, 251, 252, 253, 255],
+        [250, 251, 252, 253, 255],
+    ]
+    assert [network.broadcast_port for network in emulator.networks] == [14555, 0]
+
+    # Unused connections are left out
+    emulator = MAVLinkFleetEmulator(
+        3, server_addresses=[("127.0.0.1", 14550), ("127.0.0.1", 14560)]
+    )
+    assert len(emulator.networks) == 1
+
+    with raises(ValueError):
+        MAVLinkFleetEmulator(251)
+    with raises(ValueError):
+        MAVLinkFleetEmulator(1, first_system_id=251)
+    with raises(ValueError):
+        MAVLinkFleetEmulator(10, first_system_id=250, network_size=255)
+
+
+def test_fleet_dispatch():
+    emulator = MAVLinkFleetEmulator(4)
+    (network,) = emulator.networks
+
+    gcs = MAVLink(None, srcSystem=255, srcComponent=190)
+    parser = MAVLink(None)
+    command = {
+        "command": MAVCommand.COMPONENT_ARM_DISARM,
+        "confirmation": 0,
+        "param1": 1,
+        "param2": 0,
+        "param3": 0,
+        "param4": 0,
+        "param5": 0,
+        "param6": 0,
+        "param7": 0,
+    }
+
+    data = encode_mavlink_message_from_spec(
+        spec.command_long(target_system=0, target_component=0, **command), gcs
+    )
+    (message,) = parser.parse_buffer(data)
+    assert list(network.dispatch(message)) == []
+    assert all(drone.armed for drone in network.drones.values())
+
+    data = encode_mavlink_message_from_spec(
+        spec.command_long(target_system=2, target_component=1, **command), gcs
+    )
+    (message,) = parser.parse_buffer(data)
+    replies = list(network.dispatch(message))
+    assert [system_id for system_id, _ in replies] == [2]
@@ -0,0 +1,278 @@
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from pytest import fixture
+from trio import (
+    MemorySendChannel,
+    WouldBlock,
+    open_memory_channel,
+    open_nursery,
+    sleep,
+)
+
+from flockwave.server.ext.mavlink.emulator import EmulatedMAVFTPServer
+from flockwave.server.ext.mavlink.ftp import (
+    MAVFTP,
+    MAVFTPBurstTransferInProgressError,
+    MAVFTPMessage,
+    MAVFTPOpCode,
+)
+from flockwave.server.show.utils import crc32_mavftp
+
+CONTENTS = bytes(range(256)) * 8
+"""Contents of the test file; spans several MAVFTP chunks."""
+
+
+class FakeMAVFTPPeer:
+    """Fake drone that answers MAVFTP requests from an in-memory filesystem,
+    delivering the replies with a latency and a small delay between them like
+    a real link would.
+    """
+
+    latency: float = 0.05
+    """Delay between a request and its first reply."""
+
+    interval: float = 0.01
+    """Delay between consecutive replies to the same request."""
+
+    def __init__(self, nursery, server: EmulatedMAVFTPServer):
+        self.nursery = nursery
+        self.server = server
+
+        self.burst_requests: list[MAVFTPMessage] = []
+        self.channel: MemorySendChannel | None = None
+        self.delay: Callable[[MAVFTPMessage], float] = lambda request: self.latency
+        self.drop: Callable[[MAVFTPMessage], bool] = lambda reply: False
+        self.duplicate: Callable[[MAVFTPMessage], bool] = lambda request: False
+        self.max_waiters = 0
+        self.waiters: list[tuple[Callable, MemorySendChannel]] = []
+
+    def create_mavftp(self) -> MAVFTP:
+        return MAVFTP(self.send, receiver=self.receive)  # type: ignore
+
+    async def send(self, message_spec, wait_for_response=None):
+        _, fields = message_spec
+        payload = fields["payload"]
+        seq_no = payload[0] + (payload[1] << 8)
+
+        request = MAVFTPMessage.decode(payload)
+        if request.opcode == MAVFTPOpCode.BURST_READ_FILE:
+            self.burst_requests.append(request)
+
+        replies = [
+            SimpleNamespace(payload=reply.encode((seq_no + index + 1) & 0xFFFF))
+            for index, reply in enumerate(self.server.handle(request))
+            if not self.drop(reply)
+        ]
+        if self.duplicate(request):
+            replies *= 2
+        self.nursery.start_soon(self._deliver, replies, self.delay(request))
+
+        if wait_for_response:
+            _, matcher = wait_for_response
+            tx, rx = open_memory_channel(1)
+            waiter = (matcher, tx)
+            self.waiters.append(waiter)
+            self.max_waiters = max(self.max_waiters, len(self.waiters))
+            try:
+                return await rx.receive()
+            finally:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+
+    @contextmanager
+    def receive(self) -> Iterator:
+        if self.channel is not None:
+            raise MAVFTPBurstTransferInProgressError()
+
+        tx, rx = open_memory_channel(256)
+        self.channel = tx
+        try:
+            yield rx
+        finally:
+            self.channel = None
+
+    async def _deliver(self, replies, delay: float) -> None:
+        await sleep(delay)
+        for index, reply in enumerate(replies):
+            if index > 0:
+                await sleep(self.interval)
+
+            if self.channel is not None:
+                try:
+                    self.channel.send_nowait(reply)
+                except WouldBlock:
+                    pass
+
+            for waiter in self.waiters:
+                matcher, tx = waiter
+                if matcher(reply):
+                    self.waiters.remove(waiter)
+                    tx.send_nowait(reply)
+                    break
+
+
+def count_writes(server: EmulatedMAVFTPServer) -> Counter[int]:
+    """Counts the write requests received by the given server, keyed by their
+    offsets.
+    """
+    writes = Counter()
+    original_handle = server.handle
+
+    def handle(request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        if request.opcode == MAVFTPOpCode.WRITE_FILE:
+            writes[request.offset] += 1
+        return original_handle(request)
+
+    server.handle = handle  # type: ignore
+    return writes
+
+
+def drop_write_acks(offsets: Iterable[int]) -> Callable[[MAVFTPMessage], bool]:
+    """Returns a function that drops the first acknowledgment of the write
+    requests at the given offsets.
+    """
+    lost = set(offsets)
+
+    def drop(reply: MAVFTPMessage) -> bool:
+        if reply.req_opcode == MAVFTPOpCode.WRITE_FILE and reply.offset in lost:
+            lost.remove(reply.offset)
+            return True
+        return False
+
+    return drop
+
+
+@fixture
+def server() -> EmulatedMAVFTPServer:
+    server = EmulatedMAVFTPServer()
+    server.files["/show.skyb"] = bytearray(CONTENTS)
+    server.files["/other.skyb"] = bytearray(CONTENTS[::-1])
+    return server
+
+
+class TestBurstRead:
+    async def test_burst_read(self, server, autojump_clock):
+        async with open_nursery() as nursery:
+            peer = FakeMAVFTPPeer(nursery, server)
+            ftp = peer.create_mavftp()
+
+            assert await ftp.get("/show.skyb") == CONTENTS
+            assert len(peer.burst_requests) == 1
+
+            # The connection is still usable for subsequent requests
+            assert await ftp.get("/other.skyb", burst=False) == CONTENTS[::-1]
+
+    async def test_burst_read_with_gap(self, server, autojump_clock):
+        lost = {239 * 2}
+
+        def drop(reply: MAVFTPMessage) -> bool:
+            if (
+                reply.req_opcode == MAVFTPOpCode.BURST_READ_FILE
+                and reply.offset in lost
+            ):
+                lost.remove(reply.offset)
+                return True
+            return False
+
+        async with open_nursery() as nursery:
+            peer = FakeMAVFTPPeer(nursery, server)
+            peer.drop = drop
+            ftp = peer.create_mavftp()
+
+            assert await ftp.get("/show.skyb") == CONTENTS
+
+            # The missing chunk was requested again, and the replies of the
+            # second burst that were not needed any more were consumed and
+            # did not interfere with the requests that followed
+            assert [request.offset for request in peer.burst_requests] == [0, 239 * 2]
+            assert await ftp.crc32("/show.skyb") == crc32_mavftp(CONTENTS)
+            assert await ftp.get("/other.skyb") == CONTENTS[::-1]
+
+    async def test_burst_read_eof(self, server, autojump_clock):
+        async with open_nursery() as nursery:
+            peer = FakeMAVFTPPeer(nursery, server)
+            ftp = peer.create_mavftp()
+
+            # The file shrinks after it was opened so the drone reports EOF
+            # before the reported size is reached
+            original_handle = server.handle
+
+            def handle(request: MAVFTPMessage) -> list[MAVFTPMessage]:
+                if request.opcode == MAVFTPOpCode.BURST_READ_FILE:
+                    del server.files["/show.skyb"][1000:]
+                return original_handle(request)
+
+            server.handle = handle  # type: ignore
+            assert await ftp.get("/show.skyb") == CONTENTS[:1000]
+
+    async def test_overlapping_transfers(self, server, autojump_clock):
+        results = {}
+
+        async def download(path: str) -> None:
+            ftp = peer.create_mavftp()
+            results[path] = await ftp.get(path)
+
+        async with open_nursery() as nursery:
+            peer = FakeMAVFTPPeer(nursery, server)
+            async with open_nursery() as downloads:
+                downloads.start_soon(download, "/show.skyb")
+                downloads.start_soon(download, "/other.skyb")
+
+        # One of the transfers used burst reads, the other one fell back to
+        # reading the file chunk by chunk
+        assert results == {
+            "/show.skyb": CONTENTS,
+            "/other.skyb": CONTENTS[::-1],
+        }
+        assert len(peer.burst_requests) == 1
+
+
+class TestWindowedWrite:
+    async def test_put(self, server, autojump_clock):
+        lost = [239 * 2, 239 * 3, 239 * 7]
+        writes = count_writes(server)
+
+        async with open_nursery() as nursery:
+            peer = FakeMAVFTPPeer(nursery, server)
+            peer.drop = drop_write_acks(lost)
+
+            # The acknowledgments of every third chunk are late so they arrive
+            # out of order, and all of them are delivered twice
+            peer.delay = lambda request: 0.06 if request.offset % (239 * 3) else 0.01
+            peer.duplicate = lambda request: request.opcode == MAVFTPOpCode.WRITE_FILE
+
+            ftp = peer.create_mavftp()
+            async with ftp.put_gen(CONTENTS, "/new.skyb", window=4) as progress:
+                percentages = [item.percentage async for item in progress]
+
+        assert server.files["/new.skyb"] == CONTENTS
+        assert percentages == sorted(percentages)
+        assert percentages[-1] == 100
+        assert peer.max_waiters == 4
+
+        # Only the chunks whose acknowledgments were lost were sent again
+        assert writes == {
+            offset: 2 if offset in lost else 1
+            for offset in range(0, len(CONTENTS), 239)
+        }
+
+    async def test_patch(self, server, autojump_clock):
+        data = bytearray(CONTENTS)
+        data[100:110] = b"x" * 10
+        data[1000:1600] = b"y" * 600
+        lost = [1000 + 239]
+        writes = count_writes(server)
+
+        async with open_nursery() as nursery:
+            peer = FakeMAVFTPPeer(nursery, server)
+            peer.drop = drop_write_acks(lost)
+            peer.delay = lambda request: 0.06 if request.offset == 1000 else 0.01
+
+            ftp = peer.create_mavftp()
+            await ftp.patch(bytes(data), "/show.skyb", [(100, 110), (1000, 1600)])
+
+        assert server.files["/show.skyb"] == data
+        assert writes == {100: 1, 1000: 1, 1239: 2, 1478: 1}
@@ -0,0 +1,129 @@
+from flockwave.protocols.mavlink.dialects.v20.common import MAVLink
+
+from flockwave.server.ext.mavlink.channel import encode_mavlink_message_from_spec
+from flockwave.server.ext.mavlink.link_stats import (
+    MAVLinkLinkStatistics,
+    MAVLinkNetworkLinkStatistics,
+)
+
+
+def create_heartbeats(seqs: list[int], system_id: int = 1) -> list:
+    sender = MAVLink(None, srcSystem=system_id, srcComponent=1)
+    receiver = MAVLink(None)
+    result = []
+    for seq in seqs:
+        sender.seq = seq
+        data = sender.heartbeat_encode(1, 2, 3, 4, 5).pack(sender)
+        result.extend(receiver.parse_buffer(data) or ())
+    return result
+
+
+class TestMAVLinkLinkStatistics:
+    def test_sequence_tracking(self):
+        stats = MAVLinkLinkStatistics()
+        for message in create_heartbeats([254, 255, 2, 2, 3]):
+            stats.notify_received(message, "HEARTBEAT")
+
+        assert stats.rx_packets == 5
+        assert stats.lost == 2
+        assert stats.duplicates == 1
+        assert stats.json["rx"]["byType"]["HEARTBEAT"]["count"] == 5
+
+    def test_sequence_tracking_disabled(self):
+        stats = MAVLinkLinkStatistics()
+        for message in create_heartbeats([1, 5, 5]):
+            stats.notify_received(message, "HEARTBEAT", track_sequence=False)
+
+        assert stats.rx_packets == 3
+        assert stats.lost == 0
+        assert stats.duplicates == 0
+
+    def test_dropped_frames_are_not_lost(self):
+        stats = MAVLinkLinkStatistics()
+        messages = create_heartbeats([1, 2, 5, 9])
+        stats.notify_received(messages[0], "HEARTBEAT")
+        stats.notify_received(messages[1], "HEARTBEAT")
+
+        # Frames 3 and 4 were dropped before parsing, frames 6-8 were lost
+        stats.notify_dropped(1, 1)
+        stats.notify_dropped(1, 1)
+        stats.notify_received(messages[2], "HEARTBEAT")
+        assert stats.lost == 0
+
+        stats.notify_received(messages[3], "HEARTBEAT")
+        assert stats.lost == 3
+
+    def test_bad_data(self):
+        receiver = MAVLink(None)
+        receiver.robust_parsing = True
+        data = bytearray(
+            MAVLink(None, srcSystem=1, srcComponent=1)
+            .heartbeat_encode(1, 2, 3, 4, 5)
+            .pack(MAVLink(None))
+        )
+        data[-1] ^= 0xFF
+
+        stats = MAVLinkLinkStatistics()
+        for message in receiver.parse_buffer(bytes(data)) or ():
+            stats.notify_received(message, message.get_type())
+
+        assert stats.crc_errors == 1
+        assert stats.rx_packets == 0
+        assert stats.rx_bytes == len(data)
+
+    def test_rates_and_outbound_counters(self):
+        stats = MAVLinkLinkStatistics()
+        link = MAVLink(None, srcSystem=255, srcComponent=190)
+        stats.attach(link)
+        stats.update(0)
+
+        for message in create_heartbeats(list(range(10))):
+            stats.notify_received(message, "HEARTBEAT")
+        for _ in range(4):
+            encode_mavlink_message_from_spec(
+                (
+                    "HEARTBEAT",
+                    {
+                        "type": 6,
+                        "autopilot": 8,
+                        "base_mode": 0,
+                        "custom_mode": 0,
+                        "system_status": 0,
+                    },
+                ),
+                link,
+            )
+        stats.update(1)
+
+        assert stats.tx_packets == 4
+        assert stats.tx_bytes == link.total_bytes_sent
+        assert 0 < stats.rx_rate < 10
+        assert 0 < stats.tx_rate < 4
+
+
+class TestMAVLinkNetworkLinkStatistics:
+    def test_counts_per_connection_and_system(self):
+        stats = MAVLinkNetworkLinkStatistics()
+        for message in create_heartbeats([0, 1, 2], system_id=3):
+            stats.notify_received("mav/0", message, "HEARTBEAT")
+        for message in create_heartbeats([7], system_id=3):
+            stats.notify_received("mav/1", message, "HEARTBEAT")
+
+        assert stats.by_connection["mav/0"].rx_packets == 3
+        assert stats.by_connection["mav/1"].rx_packets == 1
+        assert stats.by_system_id[3].rx_packets == 4
+        assert stats.by_system_id[3].lost == 4
+        assert set(stats.json["systems"]) == {"3"}
+
+    def test_dropped_frames_are_reported_to_systems(self):
+        stats = MAVLinkNetworkLinkStatistics()
+        first, second = create_heartbeats([0, 3], system_id=3)
+        stats.notify_received("mav/0", first, "HEARTBEAT")
+
+        connection = stats.for_connection("mav/0")
+        connection.notify_dropped(3, 1)
+        connection.notify_dropped(3, 1)
+        stats.notify_received("mav/0", second, "HEARTBEAT")
+
+        assert connection.lost == 0
+        assert stats.by_system_id[3].lost == 0
@@ -0,0 +1,70 @@
+from math import inf
+
+from flockwave.server.ext.mavlink.liveness import UAVLivenessTracker
+
+
+class FakeUAV:
+    def __init__(self):
+        self.is_connected = True
+
+    def notify_disconnection(self) -> None:
+        self.is_connected = False
+
+
+def test_disconnection_after_timeout():
+    tracker = UAVLivenessTracker(timeout=5)
+    first, second = FakeUAV(), FakeUAV()
+
+    assert tracker.process_expired(0) == inf
+
+    tracker.notify_heartbeat(first, now=0)
+    tracker.notify_heartbeat(second, now=2)
+    assert len(tracker) == 2
+    assert tracker.process_expired(1) == 5
+
+    # Heartbeats of the first UAV keep on arriving
+    tracker.notify_heartbeat(first, now=4)
+    assert tracker.process_expired(5) == 7
+    assert first.is_connected and second.is_connected
+
+    assert tracker.process_expired(7) == 9
+    assert first.is_connected
+    assert not second.is_connected
+
+    # Disconnected UAVs stay in the tracker if they are not to be pruned
+    assert tracker.process_expired(9) == inf
+    assert not first.is_connected
+    assert second in tracker
+
+
+def test_reconnection_resets_deadline():
+    tracker = UAVLivenessTracker(timeout=5, prune_after=60)
+    uav = FakeUAV()
+
+    tracker.notify_heartbeat(uav, now=0)
+    assert tracker.process_expired(5) == 60
+    assert not uav.is_connected
+
+    # UAV comes back long before it would be pruned; the next deadline must
+    # be derived from the new heartbeat and not from the pruning deadline
+    uav.is_connected = True
+    tracker.notify_heartbeat(uav, now=10)
+    assert tracker.process_expired(10) == 15
+    assert tracker.process_expired(15) == 70
+    assert not uav.is_connected
+
+
+def test_pruning():
+    pruned = []
+    tracker = UAVLivenessTracker(timeout=5, prune_after=30, on_prune=pruned.append)
+    first, second = FakeUAV(), FakeUAV()
+
+    tracker.notify_heartbeat(first, now=0)
+    tracker.notify_heartbeat(second, now=0)
+    tracker.forget(second)
+
+    assert tracker.process_expired(5) == 30
+    assert tracker.process_expired(30) == inf
+    assert pruned == [first]
+    assert len(tracker) == 0
+    assert second.is_connected
@@ -0,0 +1,118 @@
+from base64 import b64decode
+from pathlib import Path
+
+from pytest import fixture
+
+from flockwave.server.ext.mavlink.log_download import MAVLinkLogDownloader
+from flockwave.server.model.log import FlightLog, FlightLogMetadata
+
+
+class FakeMessage:
+    def __init__(self, type: str, **kwds):
+        self._type = type
+        self.__dict__.update(kwds)
+
+    def get_type(self) -> str:
+        return self._type
+
+
+class FakeDrone:
+    """Fake drone that serves a single log over a simulated MAVLink link that
+    loses the LOG_DATA messages at the given offsets once.
+    """
+
+    def __init__(self, data: bytes, *, lost_offsets=()):
+        self.data = data
+        self.downloader = MAVLinkLogDownloader(self.send)
+        self.lost_offsets = set(lost_offsets)
+        self.requests: list[tuple[int, int]] = []
+
+    async def send(self, message, wait_for_response=None):
+        type, fields = message
+        if type == "LOG_REQUEST_LIST":
+            return FakeMessage(
+                "LOG_ENTRY", id=1, num_logs=1, size=len(self.data), time_utc=0
+            )
+        elif type == "LOG_REQUEST_DATA":
+            self.requests.append((fields["ofs"], fields["count"]))
+            replies = []
+            end = fields["ofs"] + fields["count"]
+            for offset in range(fields["ofs"], end, 90):
+                if offset in self.lost_offsets:
+                    self.lost_offsets.remove(offset)
+                    continue
+                chunk = self.data[offset : min(offset + 90, end)]
+                replies.append(
+                    FakeMessage(
+                        "LOG_DATA",
+                        id=1,
+                        ofs=offset,
+                        count=len(chunk),
+                        data=chunk.ljust(90, b"\x00"),
+                    )
+                )
+            for reply in replies[1:]:
+                self.downloader.handle_message_log_data(reply)
+            return replies[0]
+
+
+@fixture
+def data() -> bytes:
+    return bytes(range(256)) * 20
+
+
+async def test_get_log_requests_lost_chunks_again(data: bytes):
+    drone = FakeDrone(data, lost_offsets=(900, 1800))
+
+    items = [item async for item in drone.downloader.get_log(1)]
+    log = items[-1]
+    assert isinstance(log, FlightLog)
+    assert b64decode(log.body) == data
+
+    # Each lost chunk is requested again as soon as the end of the range
+    # arrives, up to the next chunk that was already received
+    assert drone.requests == [(0, len(data)), (900, 90), (1800, 90)]
+
+
+async def test_download_log_to_file_resumes(data: bytes, tmp_path: Path):
+    path = tmp_path / "1.bin"
+    path.with_name("1.bin.part").write_bytes(data[:1000])
+    drone = FakeDrone(data)
+
+    items = [item async for item in drone.downloader.download_log(1, path)]
+    assert isinstance(items[-1], FlightLogMetadata)
+    assert path.read_bytes() == data
+    assert not path.with_name("1.bin.part").exists()
+
+    # The tail of the partial file is verified first
+    assert drone.requests == [(910, 90), (1000, len(data) - 1000)]
+
+
+async def test_download_log_to_file_discards_unrelated_partial_file(
+    data: bytes, tmp_path: Path
+):
+    path = tmp_path / "1.bin"
+    path.with_name("1.bin.part").write_bytes(bytes(1000))
+    drone = FakeDrone(data)
+
+    async for _ in drone.downloader.download_log(1, path):
+        pass
+
+    assert path.read_bytes() == data
+    assert drone.requests == [(910, 90), (0, len(data))]
+
+
+async def test_get_log_into_file_resumes(data: bytes, tmp_path: Path):
+    path = tmp_path / "logs" / "1.bin"
+    path.parent.mkdir()
+    path.with_name("1.bin.part").write_bytes(data[:1000])
+    drone = FakeDrone(data)
+
+    items = [item async for item in drone.downloader.get_log(1, path)]
+    log = items[-1]
+    assert isinstance(log, FlightLog)
+    assert b64decode(log.body) == data
+    assert drone.requests == [(910, 90), (1000, len(data) - 1000)]
+
+    # The downloaded file is not kept once the log has been retrieved
+    assert list(path.parent.iterdir()) == []
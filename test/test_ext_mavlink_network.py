@@ -0,0 +1,104 @@
+from collections import defaultdict
+from logging import WARNING, getLogger
+
+from flockwave.protocols.mavlink.dialects.v20.ardupilotmega import MAVLink
+from pytest import fixture
+from trio import open_memory_channel
+
+from flockwave.server.ext.mavlink.enums import MAVComponent
+from flockwave.server.ext.mavlink.network import MAVLinkNetwork
+
+
+def create_message(encode, component_id: int = MAVComponent.AUTOPILOT1):
+    link = MAVLink(None, srcSystem=1, srcComponent=component_id)
+    (message,) = MAVLink(None).parse_buffer(encode(link).pack(link)) or ()
+    return message
+
+
+def create_attitude(component_id: int = MAVComponent.AUTOPILOT1):
+    return create_message(
+        lambda link: link.attitude_encode(0, 1, 2, 3, 4, 5, 6), component_id
+    )
+
+
+def create_power_status(component_id: int = MAVComponent.AUTOPILOT1):
+    return create_message(
+        lambda link: link.power_status_encode(5000, 0, 0), component_id
+    )
+
+
+def create_statustext(component_id: int = MAVComponent.AUTOPILOT1):
+    return create_message(lambda link: link.statustext_encode(6, b""), component_id)
+
+
+async def dispatch(network: MAVLinkNetwork, messages) -> None:
+    """Feeds the given messages to the inbound message handler of the network
+    and waits until all of them are processed.
+    """
+    tx, rx = open_memory_channel(len(messages))
+    async with tx:
+        for message in messages:
+            tx.send_nowait(("default", (message, ("127.0.0.1", 14550))))
+    await network._handle_inbound_messages(rx)
+
+
+@fixture
+def network() -> MAVLinkNetwork:
+    async def update_broadcast_address(*args, **kwds) -> None:
+        pass
+
+    result = MAVLinkNetwork("mav")
+    result.log = getLogger(__name__)
+    result._matchers = defaultdict(list)
+    result._update_broadcast_address_of_channel_to_subnet = update_broadcast_address  # type: ignore
+    return result
+
+
+def unhandled_types(caplog) -> list[str]:
+    prefix = "Unhandled MAVLink message type: "
+    return [
+        record.getMessage()[len(prefix) :]
+        for record in caplog.records
+        if record.levelno == WARNING and record.getMessage().startswith(prefix)
+    ]
+
+
+class TestInboundMessageDispatch:
+    async def test_unhandled_message_type_warning(self, network, caplog):
+        # Unhandled message types from components that we ignore and ignored
+        # message types are not warned about
+        await dispatch(
+            network,
+            [create_attitude(MAVComponent.MISSIONPLANNER), create_power_status()],
+        )
+        assert unhandled_types(caplog) == []
+
+    async def test_unhandled_message_type_warning_is_deferred(self, network, caplog):
+        # The warning is logged once for the first message of the type that
+        # comes from the autopilot, even if the dispatch entry of the type was
+        # compiled from a message of another component
+        await dispatch(
+            network,
+            [
+                create_attitude(MAVComponent.MISSIONPLANNER),
+                create_attitude(),
+                create_attitude(),
+            ],
+        )
+        assert unhandled_types(caplog) == ["ATTITUDE"]
+
+    async def test_processing_statistics(self, network):
+        await dispatch(
+            network,
+            [
+                create_attitude(),
+                create_statustext(),
+                create_statustext(),
+                create_statustext(MAVComponent.MISSIONPLANNER),
+            ],
+        )
+
+        # Idle message types and messages from other components are dropped
+        # before processing
+        stats = network.get_message_processing_statistics()
+        assert [(item.type, item.count) for item in stats] == [("STATUSTEXT", 2)]
@@ -0,0 +1,99 @@
+from flockwave.protocols.mavlink.dialects.v20.common import MAVLink
+from pytest import fixture
+
+from flockwave.server.ext.mavlink.parsers import MAVLinkParserTable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def create_table(clock: FakeClock, **kwds) -> MAVLinkParserTable:
+    return MAVLinkParserTable(lambda: MAVLink(None), clock=clock, **kwds)
+
+
+def test_lookup_creates_entries_once(clock: FakeClock):
+    table = create_table(clock)
+
+    first = table["10.0.0.1", 14550]
+    assert table["10.0.0.1", 14550] is first
+    assert table["10.0.0.2", 14550] is not first
+    assert len(table) == 2
+    assert table.created == 2
+
+
+def test_evicts_least_recently_used_entry_when_full(clock: FakeClock):
+    table = create_table(clock, max_size=2, size_limit=2)
+
+    table["a"]
+    clock.now = 1
+    table["b"]
+    clock.now = 2
+    table["a"]
+    table["c"]
+
+    assert "a" in table
+    assert "b" not in table
+    assert "c" in table
+    assert table.evicted == 1
+
+
+def test_grows_when_all_entries_are_active(clock: FakeClock):
+    table = create_table(clock, max_size=2, size_limit=5, idle_timeout=60)
+
+    for address in "abcde":
+        table[address]
+        clock.now += 1
+
+    # The table grew instead of evicting drones that are still talking to us
+    assert len(table) == 5
+    assert table.max_size == 5
+    assert table.evicted == 0
+
+    # Beyond the size limit, the least recently used entry is evicted
+    table["f"]
+    assert len(table) == 5
+    assert "a" not in table
+    assert table.evicted == 1
+
+    # Idle entries are evicted instead of growing the table
+    table = create_table(clock, max_size=2, size_limit=100, idle_timeout=60)
+    table["a"]
+    clock.now += 61
+    table["b"]
+    table["c"]
+    assert table.max_size == 2
+    assert "a" not in table
+
+
+def test_idle_eviction(clock: FakeClock):
+    table = create_table(clock, idle_timeout=60)
+
+    link = table["a"]
+    table["b"]
+
+    clock.now = 30
+    table["b"]
+    clock.now = 80
+    assert table.evict_idle() == 1
+    assert "a" not in table
+    assert "b" in table
+
+    # Evicted addresses get a fresh parser when they come back
+    assert table["a"] is not link
+
+    assert table.json == {
+        "active": 2,
+        "maxSize": 1024,
+        "created": 3,
+        "evicted": 1,
+    }
@@ -0,0 +1,181 @@
+from logging import getLogger
+
+from flockwave.gps.vectors import GPSCoordinate
+from flockwave.protocols.mavlink.dialects.v20.ardupilotmega import (
+    MAVLINK_MSG_ID_ATTITUDE,
+    MAVLINK_MSG_ID_FILE_TRANSFER_PROTOCOL,
+    MAVLINK_MSG_ID_LOG_DATA,
+    MAVLINK_MSG_ID_MISSION_REQUEST_INT,
+    MAVLINK_MSG_ID_STATUSTEXT,
+    MAVLINK_MSG_ID_SYS_STATUS,
+    MAVLINK_MSG_ID_TIMESYNC,
+    MAVLINK_MSG_ID_VFR_HUD,
+    MAVLink,
+)
+
+from flockwave.server.ext.mavlink.channel import encode_mavlink_message_from_spec
+from flockwave.server.ext.mavlink.emulator import EmulatedDrone
+from flockwave.server.ext.mavlink.enums import MAVParamType
+from flockwave.server.ext.mavlink.network import MAVLinkNetwork
+from flockwave.server.ext.mavlink.prefilter import MAVLinkFrameFilter
+from flockwave.server.ext.mavlink.types import spec
+
+
+def create_link(system_id: int = 1, component_id: int = 1) -> MAVLink:
+    return MAVLink(None, srcSystem=system_id, srcComponent=component_id)
+
+
+def encode_heartbeat(link: MAVLink) -> bytes:
+    return link.heartbeat_encode(1, 2, 3, 4, 5).pack(link)
+
+
+def encode_attitude(link: MAVLink) -> bytes:
+    return link.attitude_encode(0, 1, 2, 3, 4, 5, 6).pack(link)
+
+
+def parse(data: bytes) -> list[str]:
+    link = MAVLink(None)
+    link.robust_parsing = True
+    return [message.get_type() for message in link.parse_buffer(data) or ()]
+
+
+class TestMAVLinkFrameFilter:
+    def test_accepts_everything_from_autopilot(self):
+        link = create_link()
+        data = encode_heartbeat(link) + encode_attitude(link)
+
+        frame_filter = MAVLinkFrameFilter()
+        assert frame_filter.filter(data) is data
+
+    def test_drops_unwanted_components_and_systems(self):
+        autopilot = create_link(1, 1)
+        camera = create_link(1, 100)
+        stranger = create_link(42, 1)
+        data = (
+            encode_heartbeat(autopilot)
+            + encode_heartbeat(camera)
+            + encode_heartbeat(stranger)
+            + encode_attitude(autopilot)
+        )
+
+        frame_filter = MAVLinkFrameFilter(system_id_range=(1, 11))
+        assert parse(frame_filter.filter(data)) == ["HEARTBEAT", "ATTITUDE"]
+
+    def test_allow_list(self):
+        link = create_link()
+        data = (
+            encode_heartbeat(link)
+            + link.system_time_encode(1, 2).pack(link)
+            + encode_attitude(link)
+        )
+
+        frame_filter = MAVLinkFrameFilter(message_ids=[MAVLINK_MSG_ID_ATTITUDE])
+        assert parse(frame_filter.filter(data)) == ["HEARTBEAT", "ATTITUDE"]
+
+    def test_dropped_frames_are_reported(self):
+        autopilot = create_link(1, 1)
+        camera = create_link(2, 100)
+        data = (
+            encode_heartbeat(camera)
+            + encode_attitude(autopilot)
+            + encode_heartbeat(autopilot)
+        )
+
+        dropped = []
+        frame_filter = MAVLinkFrameFilter(message_ids=[])
+        data = frame_filter.filter(data, lambda *args: dropped.append(args))
+        assert parse(data) == ["HEARTBEAT"]
+        assert dropped == [(2, 100), (1, 1)]
+
+    def test_incomplete_frames_and_noise_are_kept(self):
+        link = create_link()
+        camera = create_link(1, 100)
+        attitude = encode_attitude(link)
+
+        frame_filter = MAVLinkFrameFilter()
+        data = encode_heartbeat(camera) + attitude[:5]
+        assert frame_filter.filter(data) == attitude[:5]
+
+        heartbeat = encode_heartbeat(camera)
+        data = encode_heartbeat(camera) + b"\x00\x01" + heartbeat
+        assert frame_filter.filter(data) == b"\x00\x01" + heartbeat
+
+    def test_patch(self):
+        autopilot = create_link(1, 1)
+        camera = create_link(1, 100)
+        data = encode_heartbeat(camera) + encode_attitude(autopilot)
+
+        link = MAVLink(None)
+        link.robust_parsing = True
+        MAVLinkFrameFilter().patch(link)
+
+        assert link.parse_buffer(encode_heartbeat(camera)) is None
+        messages = link.parse_buffer(data)
+        assert [message.get_type() for message in messages] == ["ATTITUDE"]
+
+
+class TestNetworkFrameFilter:
+    def create_filter(self) -> MAVLinkFrameFilter:
+        network = MAVLinkNetwork("mav", accepted_message_types=["ATTITUDE"])
+        return network._create_frame_filter(getLogger(__name__))
+
+    def test_required_message_types_are_accepted(self):
+        frame_filter = self.create_filter()
+
+        for message_id in (
+            MAVLINK_MSG_ID_ATTITUDE,
+            MAVLINK_MSG_ID_FILE_TRANSFER_PROTOCOL,
+            MAVLINK_MSG_ID_LOG_DATA,
+            MAVLINK_MSG_ID_MISSION_REQUEST_INT,
+            MAVLINK_MSG_ID_STATUSTEXT,
+            MAVLINK_MSG_ID_SYS_STATUS,
+            MAVLINK_MSG_ID_TIMESYNC,
+        ):
+            assert frame_filter.accepts(message_id, 1, 1)
+
+        assert not frame_filter.accepts(MAVLINK_MSG_ID_VFR_HUD, 1, 1)
+
+    def test_unhandled_message_types_are_dropped_by_default(self):
+        network = MAVLinkNetwork("mav")
+        frame_filter = network._create_frame_filter(getLogger(__name__))
+
+        assert frame_filter.accepts(MAVLINK_MSG_ID_FILE_TRANSFER_PROTOCOL, 1, 1)
+        assert frame_filter.accepts(MAVLINK_MSG_ID_STATUSTEXT, 1, 1)
+        assert frame_filter.accepts(MAVLINK_MSG_ID_SYS_STATUS, 1, 1)
+        assert not frame_filter.accepts(MAVLINK_MSG_ID_ATTITUDE, 1, 1)
+        assert not frame_filter.accepts(MAVLINK_MSG_ID_VFR_HUD, 1, 1)
+
+    def test_param_round_trip(self):
+        frame_filter = self.create_filter()
+        drone = EmulatedDrone(1, GPSCoordinate(lat=47.5, lon=19, amsl=100))
+        gcs = MAVLink(None, srcSystem=254, srcComponent=190)
+
+        request = encode_mavlink_message_from_spec(
+            spec.param_set(
+                target_system=1,
+                target_component=1,
+                param_id=b"SHOW_START_TIME",
+                param_value=1234,
+                param_type=MAVParamType.REAL32,
+            ),
+            gcs,
+        )
+        (message,) = MAVLink(None).parse_buffer(request)
+        replies = b"".join(drone.handle_message(message))
+
+        link = MAVLink(None)
+        link.robust_parsing = True
+        frame_filter.patch(link)
+
+        data = (
+            drone.encode(
+                spec.vfr_hud(
+                    airspeed=0, groundspeed=0, heading=0, throttle=0, alt=0, climb=0
+                )
+            )
+            + replies
+        )
+        messages = link.parse_buffer(data)
+        assert [message.get_type() for message in messages] == ["PARAM_VALUE"]
+        assert messages[0].param_id == "SHOW_START_TIME"
+        assert messages[0].param_value == 1234
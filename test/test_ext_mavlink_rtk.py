@@ -0,0 +1,93 @@
+from flockwave.protocols.mavlink.dialects.v20.ardupilotmega import MAVLink
+
+from flockwave.server.ext.mavlink.channel import encode_mavlink_message_from_spec
+from flockwave.server.ext.mavlink.rtk import (
+    RTKBandwidthLimiter,
+    RTKCorrectionPacketSignalManager,
+    SharedRTKCorrectionPacketEncoder,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_shared_encoder_fragments_and_deduplicates():
+    clock = FakeClock()
+    encoder = SharedRTKCorrectionPacketEncoder(clock=clock)
+
+    messages = encoder.encode(bytes(400))
+    assert [kwds["len"] for _, kwds in messages] == [180, 180, 40]
+    assert encoder.encode(bytes(400)) == []
+    assert encoder.duplicates == 1
+
+    clock.now = 1
+    assert len(encoder.encode(bytes(400))) == 3
+
+
+def test_shared_messages_are_encoded_once_per_link_type():
+    encoder = SharedRTKCorrectionPacketEncoder()
+    (message,) = encoder.encode(b"\xd3\x00\x13" + bytes(22))
+
+    first = MAVLink(None, srcSystem=254, srcComponent=190)
+    second = MAVLink(None, srcSystem=254, srcComponent=190)
+    third = MAVLink(None, srcSystem=254, srcComponent=190)
+    other = MAVLink(None, srcSystem=253, srcComponent=190)
+    second.seq = 42
+
+    data = encode_mavlink_message_from_spec(message, first)
+    assert encode_mavlink_message_from_spec(message, third) is data
+    assert encode_mavlink_message_from_spec(message, other) != data
+    assert len(message[1]["_encoded"]) == 2
+
+    # Frames taken from the cache get the sequence number of the link
+    patched = encode_mavlink_message_from_spec(message, second)
+    assert len(patched) == len(data)
+    assert second.seq == 43
+    assert second.total_bytes_sent == len(data)
+
+    for frame, seq in ((data, 0), (patched, 42)):
+        parsed = MAVLink(None).parse_buffer(frame)
+        assert [msg.get_type() for msg in parsed] == ["GPS_RTCM_DATA"]
+        assert parsed[0].get_seq() == seq
+        assert bytes(parsed[0].data[:3]) == b"\xd3\x00\x13"
+
+
+def test_bandwidth_limiter():
+    clock = FakeClock()
+    limiter = RTKBandwidthLimiter(1000, clock=clock)
+    encoder = SharedRTKCorrectionPacketEncoder(dedup_window=0)
+
+    messages = encoder.encode(bytes(500))
+    assert limiter.try_consume(messages)
+    assert not limiter.try_consume(messages)
+    assert limiter.dropped == 1
+
+    clock.now = 1
+    assert limiter.try_consume(messages)
+
+
+def test_signal_manager_forwards_encoded_messages():
+    sent = []
+
+    class FakeSignal:
+        def send(self, sender, messages):
+            sent.append(messages)
+
+    class FakeSignals:
+        def get(self, name):
+            return FakeSignal() if name == "mavlink:rtk_fragments" else None
+
+    manager = RTKCorrectionPacketSignalManager()
+    messages = SharedRTKCorrectionPacketEncoder().encode(bytes(10))
+
+    manager.send(messages)
+    with manager.use(FakeSignals()):  # type: ignore
+        manager.send(messages)
+    manager.send(messages)
+
+    assert sent == [messages]
@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+from pytest import approx
+from trio import current_time, sleep_forever
+
+from flockwave.server.ext.mavlink.channel import Channel
+from flockwave.server.ext.mavlink.driver import MAVLinkDriver
+from flockwave.server.ext.mavlink.enums import MAVCommand, MAVResult
+from flockwave.server.ext.mavlink.rtt import RTTEstimator
+
+
+class TestRTTEstimator:
+    def test_initial_state(self):
+        estimator = RTTEstimator(initial_timeout=2)
+        assert estimator.srtt is None
+        assert estimator.rttvar is None
+        assert estimator.timeout == 2
+
+    def test_samples(self):
+        estimator = RTTEstimator(min_timeout=0.1, max_timeout=10)
+
+        estimator.add_sample(1)
+        assert estimator.srtt == approx(1)
+        assert estimator.rttvar == approx(0.5)
+        assert estimator.timeout == approx(3)
+
+        estimator.add_sample(1)
+        assert estimator.srtt == approx(1)
+        assert estimator.rttvar == approx(0.375)
+        assert estimator.timeout == approx(2.5)
+
+    def test_bounds(self):
+        estimator = RTTEstimator(min_timeout=0.5, max_timeout=4)
+
+        estimator.add_sample(0.01)
+        assert estimator.timeout == 0.5
+
+        estimator.reset()
+        estimator.add_sample(3)
+        assert estimator.timeout == 4
+
+    def test_back_off(self):
+        estimator = RTTEstimator(initial_timeout=1, max_timeout=5)
+
+        assert estimator.back_off() == 2
+        assert estimator.back_off() == 4
+        assert estimator.back_off() == 5
+        assert estimator.timeout == 5
+
+        estimator.add_sample(0.2)
+        assert estimator.timeout == approx(0.6)
+
+        estimator.reset()
+        assert estimator.srtt is None
+        assert estimator.timeout == 1
+
+
+class FakeUAV:
+    def __init__(self, estimator: RTTEstimator):
+        self.estimator = estimator
+
+    def get_rtt_estimator(self, channel: str = Channel.PRIMARY) -> RTTEstimator:
+        return self.estimator
+
+
+class TestCommandTimeouts:
+    async def test_commands_keep_default_timeout_as_lower_bound(self, autojump_clock):
+        # Fast link, the estimated timeout is at its lower bound
+        estimator = RTTEstimator()
+        estimator.add_sample(0.01)
+        assert estimator.timeout < 2
+
+        sent_at = []
+
+        async def send_packet(message, target, wait_for_response=None, channel=None):
+            sent_at.append(current_time())
+            if len(sent_at) < 3:
+                await sleep_forever()
+            return SimpleNamespace(result=MAVResult.ACCEPTED)
+
+        driver = MAVLinkDriver()
+        driver.send_packet = send_packet  # type: ignore
+
+        uav = FakeUAV(estimator)
+        assert await driver.send_command_long(uav, MAVCommand.COMPONENT_ARM_DISARM)  # type: ignore
+        assert sent_at[1] - sent_at[0] == approx(2)
+        assert sent_at[2] - sent_at[1] == approx(2)
+
+        sent_at.clear()
+        estimator.add_sample(0.01)
+        assert await driver.send_command_int(uav, MAVCommand.DO_REPOSITION)  # type: ignore
+        assert sent_at[1] - sent_at[0] == approx(2)
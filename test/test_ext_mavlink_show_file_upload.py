@@ -0,0 +1,215 @@
+from io import BytesIO
+from logging import getLogger
+from types import SimpleNamespace
+
+from pytest import fixture
+
+from flockwave.server.ext.mavlink.driver import SHOW_FILE_PATH, MAVLinkUAV
+from flockwave.server.ext.mavlink.emulator import EmulatedMAVFTPServer
+from flockwave.server.ext.mavlink.ftp import MAVFTP, MAVFTPMessage, MAVFTPOpCode
+from flockwave.server.show.formats import (
+    SkybrushBinaryFormatBlockType,
+    SkybrushBinaryShowFileDigest,
+    SkybrushBinaryShowFileWriter,
+)
+
+
+class FakeDrone:
+    """Fake drone that answers MAVFTP requests from an in-memory filesystem
+    and records the opcodes of the requests it receives.
+    """
+
+    def __init__(self):
+        self.server = EmulatedMAVFTPServer()
+        self.opcodes: list[MAVFTPOpCode] = []
+
+    def create_mavftp(self) -> MAVFTP:
+        return MAVFTP(self.send)  # type: ignore
+
+    async def send(self, message_spec, wait_for_response=None):
+        _, fields = message_spec
+        payload = fields["payload"]
+        seq_no = payload[0] + (payload[1] << 8)
+
+        request = MAVFTPMessage.decode(payload)
+        self.opcodes.append(MAVFTPOpCode(request.opcode))
+        (reply,) = self.server.handle(request)
+        if wait_for_response:
+            return SimpleNamespace(payload=reply.encode((seq_no + 1) & 0xFFFF))
+
+    @property
+    def show_file(self) -> bytes | None:
+        data = self.server.files.get(SHOW_FILE_PATH)
+        return bytes(data) if data is not None else None
+
+
+class FakeUAV:
+    """Fake UAV that borrows the show file upload logic of MAVLinkUAV."""
+
+    _upload_show_file = MAVLinkUAV._upload_show_file
+
+    def __init__(self):
+        self.id = "1"
+        self.driver = SimpleNamespace(
+            incremental_show_uploads=True,
+            log=getLogger(__name__),
+            skip_unchanged_show_uploads=False,
+        )
+        self._last_show_file_digest = None
+
+
+async def create_show_file(light_program: bytes) -> bytes:
+    fp = BytesIO()
+    f = SkybrushBinaryShowFileWriter(fp)
+    await f.add_block(SkybrushBinaryFormatBlockType.TRAJECTORY, bytes(range(256)) * 8)
+    await f.add_block(SkybrushBinaryFormatBlockType.LIGHT_PROGRAM, light_program)
+    await f.finalize()
+    return fp.getvalue()
+
+
+@fixture
+def drone() -> FakeDrone:
+    return FakeDrone()
+
+
+@fixture
+def uav() -> FakeUAV:
+    return FakeUAV()
+
+
+async def upload(uav: FakeUAV, drone: FakeDrone, data: bytes) -> list[int]:
+    """Uploads the given show file to the drone and returns the progress
+    percentages reported during the upload.
+    """
+    progress: list[int] = []
+    drone.opcodes.clear()
+    await uav._upload_show_file(drone.create_mavftp(), data, progress.append)
+    return progress
+
+
+class TestShowFileUpload:
+    async def test_incremental_upload(self, uav, drone):
+        old = await create_show_file(b"\x04\xff\x00\x00\x32\x00")
+        new = await create_show_file(b"\x04\x00\xff\x00\x32\x00")
+
+        await upload(uav, drone, old)
+        assert MAVFTPOpCode.CREATE_FILE in drone.opcodes
+
+        progress = await upload(uav, drone, new)
+        assert drone.show_file == new
+        assert MAVFTPOpCode.OPEN_FILE_WO in drone.opcodes
+        assert MAVFTPOpCode.CREATE_FILE not in drone.opcodes
+        assert uav._last_show_file_digest == SkybrushBinaryShowFileDigest.from_bytes(
+            new
+        )
+
+        # Progress is reported in proportion to the bytes written
+        assert progress == sorted(progress)
+        assert len(progress) > 1
+        assert progress[-1] == 100
+
+    async def test_full_upload_when_remote_file_changed(self, uav, drone):
+        old = await create_show_file(b"\x04\xff\x00\x00\x32\x00")
+        new = await create_show_file(b"\x04\x00\xff\x00\x32\x00")
+
+        await upload(uav, drone, old)
+
+        # Someone else modified the show file on the drone in the meanwhile
+        drone.server.files[SHOW_FILE_PATH][-1] ^= 0xFF
+
+        await upload(uav, drone, new)
+        assert drone.show_file == new
+        assert MAVFTPOpCode.OPEN_FILE_WO not in drone.opcodes
+        assert MAVFTPOpCode.CREATE_FILE in drone.opcodes
+
+    async def test_full_upload_when_remote_file_is_missing(self, uav, drone):
+        old = await create_show_file(b"\x04\xff\x00\x00\x32\x00")
+        new = await create_show_file(b"\x04\x00\xff\x00\x32\x00")
+
+        await upload(uav, drone, old)
+        del drone.server.files[SHOW_FILE_PATH]
+
+        progress = await upload(uav, drone, new)
+        assert drone.show_file == new
+        assert MAVFTPOpCode.OPEN_FILE_WO not in drone.opcodes
+        assert MAVFTPOpCode.CREATE_FILE in drone.opcodes
+        assert progress[-1] == 100
+
+    async def test_full_upload_when_patch_fails(self, uav, drone):
+        old = await create_show_file(b"\x04\xff\x00\x00\x32\x00")
+        new = await create_show_file(b"\x04\x00\xff\x00\x32\x00")
+
+        await upload(uav, drone, old)
+
+        # The firmware does not support modifying files in place
+        drone.server._handle_OPEN_FILE_WO = None  # type: ignore
+
+        await upload(uav, drone, new)
+        assert drone.show_file == new
+        assert MAVFTPOpCode.OPEN_FILE_WO in drone.opcodes
+        assert MAVFTPOpCode.CREATE_FILE in drone.opcodes
+        assert uav._last_show_file_digest == SkybrushBinaryShowFileDigest.from_bytes(
+            new
+        )
+
+    async def test_full_upload_when_crc_check_fails_after_patch(self, uav, drone):
+        old = await create_show_file(b"\x04\xff\x00\x00\x32\x00")
+        new = await create_show_file(b"\x04\x00\xff\x00\x32\x00")
+
+        await upload(uav, drone, old)
+
+        # Pretend that the digest of the earlier upload was different so the
+        # patch misses some of the changed bytes
+        digest = uav._last_show_file_digest
+        uav._last_show_file_digest = SkybrushBinaryShowFileDigest(
+            size=digest.size,
+            crc32=digest.crc32,
+            header_length=digest.header_length,
+            blocks=digest.blocks[:1]
+            + SkybrushBinaryShowFileDigest.from_bytes(new).blocks[1:],
+        )
+
+        await upload(uav, drone, new)
+        assert drone.show_file == new
+        assert MAVFTPOpCode.OPEN_FILE_WO in drone.opcodes
+        assert MAVFTPOpCode.CREATE_FILE in drone.opcodes
+
+    async def test_skip_unchanged_upload(self, uav, drone):
+        uav.driver.incremental_show_uploads = False
+        uav.driver.skip_unchanged_show_uploads = True
+        data = await create_show_file(b"\x04\xff\x00\x00\x32\x00")
+
+        # The drone already has the same show file, e.g., from an earlier
+        # session of the server
+        drone.server.files[SHOW_FILE_PATH] = bytearray(data)
+
+        await upload(uav, drone, data)
+        assert drone.opcodes == [MAVFTPOpCode.CALC_FILE_CRC32]
+        assert uav._last_show_file_digest == SkybrushBinaryShowFileDigest.from_bytes(
+            data
+        )
+
+    async def test_skip_unchanged_upload_when_file_differs(self, uav, drone):
+        uav.driver.incremental_show_uploads = False
+        uav.driver.skip_unchanged_show_uploads = True
+        old = await create_show_file(b"\x04\xff\x00\x00\x32\x00")
+        new = await create_show_file(b"\x04\x00\xff\x00\x32\x00")
+
+        # Missing remote file counts as a mismatch
+        await upload(uav, drone, old)
+        assert drone.show_file == old
+        assert MAVFTPOpCode.CREATE_FILE in drone.opcodes
+
+        await upload(uav, drone, new)
+        assert drone.show_file == new
+        assert MAVFTPOpCode.CALC_FILE_CRC32 in drone.opcodes
+        assert MAVFTPOpCode.CREATE_FILE in drone.opcodes
+
+    async def test_no_crc_check_when_skipping_is_disabled(self, uav, drone):
+        uav.driver.incremental_show_uploads = False
+        data = await create_show_file(b"\x04\xff\x00\x00\x32\x00")
+        drone.server.files[SHOW_FILE_PATH] = bytearray(data)
+
+        await upload(uav, drone, data)
+        assert drone.opcodes[0] != MAVFTPOpCode.CALC_FILE_CRC32
+        assert MAVFTPOpCode.CREATE_FILE in drone.opcodes
@@ -0,0 +1,249 @@
+from collections import Counter
+from types import SimpleNamespace
+
+from pytest import raises
+from trio import CancelScope, open_nursery, sleep, sleep_forever
+
+from flockwave.server.ext.mavlink.ftp import MAVFTPError
+from flockwave.server.ext.mavlink.show_upload import ShowUploadScheduler
+
+SHOW = {"trajectory": None}
+
+
+class FakeUAV:
+    """Fake UAV that takes a fixed amount of time to upload a show and
+    optionally fails the first few attempts.
+    """
+
+    def __init__(
+        self,
+        id: str,
+        network_id: str = "mav",
+        *,
+        rssi: int = -1,
+        failures: int = 0,
+        error: type[Exception] = MAVFTPError,
+        duration: float = 1,
+    ):
+        self.id = id
+        self.network_id = network_id
+        self.status = SimpleNamespace(rssi=[rssi])
+
+        self.attempts = 0
+        self.duration = duration
+        self.error = error
+        self.failures = failures
+
+        self.active: Counter[str] | None = None
+        self.peak: Counter[str] | None = None
+
+    async def upload_show(self, show, *, progress) -> None:
+        self.attempts += 1
+
+        active, peak = self.active, self.peak
+        if active is not None and peak is not None:
+            active[self.network_id] += 1
+            peak[self.network_id] = max(peak[self.network_id], active[self.network_id])
+
+        try:
+            progress(0)
+            await sleep(self.duration)
+            if self.attempts <= self.failures:
+                raise self.error("Upload failed")
+            progress(100)
+        finally:
+            if active is not None:
+                active[self.network_id] -= 1
+
+
+async def upload(scheduler: ShowUploadScheduler, uav: FakeUAV, events=None) -> None:
+    async with scheduler.upload(uav, SHOW) as progress:  # type: ignore
+        async for event in progress:
+            if events is not None:
+                events.append(event)
+
+
+class TestShowUploadScheduler:
+    async def test_concurrency_limit(self, autojump_clock):
+        scheduler = ShowUploadScheduler(max_concurrent_uploads=2)
+        active, peak = Counter(), Counter()
+        uavs = [FakeUAV(str(index), "first") for index in range(5)]
+        uavs += [FakeUAV(str(index), "second") for index in range(5, 8)]
+        for uav in uavs:
+            uav.active, uav.peak = active, peak
+
+        async with open_nursery() as nursery:
+            for uav in uavs:
+                nursery.start_soon(upload, scheduler, uav)
+
+        # The limit applies to each network separately
+        assert peak == {"first": 2, "second": 2}
+        assert all(uav.attempts == 1 for uav in uavs)
+
+        # The counters were reset when the scheduler became idle
+        assert scheduler.summary.total == 0
+
+    async def test_unlimited_uploads(self, autojump_clock):
+        scheduler = ShowUploadScheduler(max_concurrent_uploads=0)
+        active, peak = Counter(), Counter()
+        uavs = [FakeUAV(str(index)) for index in range(10)]
+        for uav in uavs:
+            uav.active, uav.peak = active, peak
+
+        async with open_nursery() as nursery:
+            for uav in uavs:
+                nursery.start_soon(upload, scheduler, uav)
+
+        assert peak == {"mav": 10}
+
+    async def test_stronger_links_first(self, autojump_clock):
+        scheduler = ShowUploadScheduler(max_concurrent_uploads=1)
+        order = []
+
+        class RecordingUAV(FakeUAV):
+            async def upload_show(self, show, *, progress) -> None:
+                order.append(self.id)
+                await super().upload_show(show, progress=progress)
+
+        uavs = [
+            RecordingUAV("first", rssi=100),
+            RecordingUAV("weak", rssi=10),
+            RecordingUAV("unknown"),
+            RecordingUAV("strong", rssi=90),
+        ]
+        async with open_nursery() as nursery:
+            for uav in uavs:
+                nursery.start_soon(upload, scheduler, uav)
+                await sleep(0.01)
+
+        assert order == ["first", "strong", "weak", "unknown"]
+
+    async def test_retries(self, autojump_clock):
+        scheduler = ShowUploadScheduler(max_retries=3)
+        uav = FakeUAV("1", failures=2)
+        events = []
+
+        await upload(scheduler, uav, events)
+
+        assert uav.attempts == 3
+        assert events[-1].percentage == 100
+        assert sum(1 for event in events if event.message.startswith("Retrying")) == 2
+
+    async def test_retries_exhausted(self, autojump_clock):
+        scheduler = ShowUploadScheduler(max_retries=2)
+        uav = FakeUAV("1", failures=10)
+
+        with raises(MAVFTPError):
+            await upload(scheduler, uav)
+
+        assert uav.attempts == 3
+        assert scheduler.summary.total == 0
+
+    async def test_non_retriable_error(self, autojump_clock):
+        scheduler = ShowUploadScheduler(max_retries=3)
+        uav = FakeUAV("1", failures=1, error=RuntimeError)
+
+        with raises(RuntimeError):
+            await upload(scheduler, uav)
+
+        assert uav.attempts == 1
+
+    async def test_cancellation(self, autojump_clock):
+        scheduler = ShowUploadScheduler(max_concurrent_uploads=1)
+        blocked = FakeUAV("blocked", duration=10)
+        waiting = FakeUAV("waiting")
+        last = FakeUAV("last")
+
+        async def upload_cancellable(uav: FakeUAV, scope: CancelScope) -> None:
+            with scope:
+                await upload(scheduler, uav)
+
+        async with open_nursery() as nursery:
+            blocked_scope, waiting_scope = CancelScope(), CancelScope()
+            nursery.start_soon(upload_cancellable, blocked, blocked_scope)
+            await sleep(0.1)
+            nursery.start_soon(upload_cancellable, waiting, waiting_scope)
+            nursery.start_soon(upload, scheduler, last)
+            await sleep(0.1)
+
+            summary = scheduler.summary
+            assert (summary.uploading, summary.queued) == (1, 2)
+
+            # Cancelling a queued upload removes it from the queue
+            waiting_scope.cancel()
+            await sleep(0.1)
+            summary = scheduler.summary
+            assert (summary.uploading, summary.queued, summary.failed) == (1, 1, 1)
+
+            # Cancelling an upload in progress passes its slot on
+            blocked_scope.cancel()
+            await sleep(0.1)
+            assert scheduler.summary.uploading == 1
+
+        assert waiting.attempts == 0
+        assert last.attempts == 1
+        assert scheduler.summary.total == 0
+
+        # The slot was released properly so new uploads can start
+        with CancelScope(deadline=autojump_clock.current_time() + 5) as scope:
+            await upload(scheduler, FakeUAV("new"))
+        assert not scope.cancelled_caught
+
+    async def test_cancellation_while_sleeping(self, autojump_clock):
+        scheduler = ShowUploadScheduler(max_retries=3, retry_delay=100)
+        uav = FakeUAV("1", failures=10)
+
+        with CancelScope() as scope:
+            async with open_nursery() as nursery:
+                nursery.start_soon(upload, scheduler, uav)
+                await sleep(10)
+                scope.cancel()
+                await sleep_forever()
+
+        assert uav.attempts == 1
+        assert scheduler.summary.total == 0
+
+    async def test_validation(self, autojump_clock):
+        batches = []
+
+        async def validate(shows) -> None:
+            batches.append(sorted(shows))
+            await sleep(1)
+
+        scheduler = ShowUploadScheduler(validator=validate, validation_delay=0.5)
+        uavs = [FakeUAV(str(index), duration=10) for index in range(3)]
+
+        async with open_nursery() as nursery:
+            for uav in uavs:
+                nursery.start_soon(upload, scheduler, uav)
+                await sleep(0.1)
+
+            # Uploads arriving later are validated together with the earlier
+            # ones
+            await sleep(2)
+            nursery.start_soon(upload, scheduler, FakeUAV("3"))
+
+        assert batches == [["0", "1", "2"], ["0", "1", "2", "3"]]
+        assert all(uav.attempts == 1 for uav in uavs)
+
+    async def test_validation_failure(self, autojump_clock):
+        async def validate(shows) -> None:
+            raise RuntimeError("Drones are too close")
+
+        scheduler = ShowUploadScheduler(validator=validate)
+        uavs = [FakeUAV(str(index)) for index in range(3)]
+        errors = []
+
+        async def upload_and_catch(uav: FakeUAV) -> None:
+            try:
+                await upload(scheduler, uav)
+            except RuntimeError as ex:
+                errors.append(str(ex))
+
+        async with open_nursery() as nursery:
+            for uav in uavs:
+                nursery.start_soon(upload_and_catch, uav)
+
+        assert errors == ["Drones are too close"] * 3
+        assert all(uav.attempts == 0 for uav in uavs)
+        assert scheduler.summary.total == 0
@@ -0,0 +1,188 @@
+from logging import getLogger
+from multiprocessing import active_children
+
+from flockwave.protocols.mavlink.dialects.v20.common import MAVLink
+from pytest import fixture
+from trio import fail_after, open_memory_channel, open_nursery, sleep
+
+from flockwave.server.ext.mavlink.enums import MAVComponent
+from flockwave.server.ext.mavlink.parsers import MAVLinkParserTable
+from flockwave.server.ext.mavlink.workers import (
+    MAVLinkParserWorkerPool,
+    UnparsedMAVLinkData,
+    _decimate,
+    _parse_batch,
+    defer_parsing,
+)
+
+ADDRESS = ("10.0.0.1", 14550)
+
+
+def create_link(
+    system_id: int = 1, component_id: int = MAVComponent.AUTOPILOT1
+) -> MAVLink:
+    return MAVLink(None, srcSystem=system_id, srcComponent=component_id)
+
+
+def encode_heartbeat(link: MAVLink) -> bytes:
+    return link.heartbeat_encode(1, 2, 3, 4, 5).pack(link)
+
+
+def encode_global_position_int(link: MAVLink, time_boot_ms: int = 0) -> bytes:
+    return link.global_position_int_encode(time_boot_ms, 0, 0, 0, 0, 0, 0, 0, 0).pack(
+        link
+    )
+
+
+def encode_radio_status(link: MAVLink) -> bytes:
+    return link.radio_status_encode(200, 190, 100, 50, 40, 0, 0).pack(link)
+
+
+def summarize(items) -> list[tuple[str, int, int]]:
+    return [
+        (message.get_type(), message.get_srcSystem(), message.get_srcComponent())
+        for _, (message, _) in items
+    ]
+
+
+@fixture
+def parsers() -> MAVLinkParserTable:
+    return MAVLinkParserTable(lambda: MAVLink(None))
+
+
+def test_defer_parsing():
+    (chunk,) = defer_parsing(bytearray(b"\xfd\x09"))
+    assert isinstance(chunk, UnparsedMAVLinkData)
+    assert chunk.data == b"\xfd\x09"
+
+
+class TestParseBatch:
+    def test_drops_messages_from_other_components(self, parsers):
+        udp_bridge = create_link(component_id=MAVComponent.UDP_BRIDGE)
+        radio = create_link(51, MAVComponent.TELEMETRY_RADIO)
+        planner = create_link(component_id=MAVComponent.MISSIONPLANNER)
+
+        data = b"".join(
+            (
+                encode_heartbeat(create_link()),
+                encode_heartbeat(planner),
+                encode_heartbeat(udp_bridge),
+                encode_radio_status(udp_bridge),
+                encode_radio_status(radio),
+            )
+        )
+        items = _parse_batch([("default", data, ADDRESS)], parsers)
+
+        # RADIO_STATUS is accepted from UDP bridges, everything else only from
+        # autopilots
+        assert summarize(items) == [
+            ("HEARTBEAT", 1, MAVComponent.AUTOPILOT1),
+            ("RADIO_STATUS", 1, MAVComponent.UDP_BRIDGE),
+        ]
+        assert all(item[0] == "default" and item[1][1] == ADDRESS for item in items)
+
+    def test_keeps_parser_state_between_chunks(self, parsers):
+        first = encode_heartbeat(create_link(1))
+        second = encode_heartbeat(create_link(2))
+        other_address = ("10.0.0.2", 14550)
+
+        # Messages split across chunks are reassembled separately for each
+        # connection and address
+        batch = [
+            ("default", first[:5], ADDRESS),
+            ("default", second[:7], other_address),
+            ("default", first[5:], ADDRESS),
+        ]
+        assert summarize(_parse_batch(batch, parsers)) == [("HEARTBEAT", 1, 1)]
+
+        batch = [("default", second[7:], other_address)]
+        assert summarize(_parse_batch(batch, parsers)) == [("HEARTBEAT", 2, 1)]
+        assert len(parsers) == 2
+
+    def test_decimates_parsed_messages(self, parsers):
+        link = create_link()
+        batch = [
+            ("default", encode_global_position_int(link, time_boot_ms), ADDRESS)
+            for time_boot_ms in (100, 200, 300)
+        ]
+        items = _parse_batch(batch, parsers)
+        assert [message.time_boot_ms for _, (message, _) in items] == [300]
+
+
+def test_decimate():
+    first, second = create_link(1), create_link(2)
+    udp_bridge = create_link(1, MAVComponent.UDP_BRIDGE)
+    data = b"".join(
+        (
+            encode_global_position_int(first, 100),
+            encode_heartbeat(first),
+            encode_global_position_int(second, 150),
+            encode_radio_status(first),
+            encode_radio_status(udp_bridge),
+            encode_global_position_int(first, 200),
+            encode_heartbeat(first),
+            encode_radio_status(first),
+        )
+    )
+    items = [
+        ("default", (message, ADDRESS))
+        for message in MAVLink(None).parse_buffer(data) or ()
+    ]
+
+    # Only the most recent message of each decimated type is kept from each
+    # component; other message types are left intact and the order is
+    # preserved
+    result = _decimate(items)
+    assert summarize(result) == [
+        ("HEARTBEAT", 1, 1),
+        ("GLOBAL_POSITION_INT", 2, 1),
+        ("RADIO_STATUS", 1, MAVComponent.UDP_BRIDGE),
+        ("GLOBAL_POSITION_INT", 1, 1),
+        ("HEARTBEAT", 1, 1),
+        ("RADIO_STATUS", 1, 1),
+    ]
+    assert result[3][1][0].time_boot_ms == 200
+
+
+async def test_worker_pool():
+    pool = MAVLinkParserWorkerPool(2, dialect="common")
+    inbound_tx, inbound_rx = open_memory_channel(0)
+
+    async def feed(system_ids) -> None:
+        # Chunks sent to a dying worker are lost so they are sent repeatedly
+        while True:
+            for system_id in system_ids:
+                data = encode_heartbeat(create_link(system_id))
+                address = ("10.0.0.1", 14550 + system_id)
+                (chunk,) = defer_parsing(bytearray(data))
+                await inbound_tx.send(("default", (chunk, address)))
+            await sleep(0.05)
+
+    async def wait_for(parsed, system_ids) -> None:
+        async with open_nursery() as nursery:
+            nursery.start_soon(feed, system_ids)
+            # Messages parsed before the workers were killed may still arrive
+            remaining = set(system_ids)
+            async for _, (message, _) in parsed:
+                remaining.discard(message.get_srcSystem())
+                if not remaining:
+                    break
+            nursery.cancel_scope.cancel()
+
+    async def consume(parsed) -> None:
+        await wait_for(parsed, [1, 2, 3, 4])
+
+        # Dead workers are restarted
+        for process in active_children():
+            process.kill()
+        await wait_for(parsed, [5, 6, 7, 8])
+
+        # Items parsed elsewhere are passed through intact
+        await inbound_tx.send(("default", ("message", ADDRESS)))
+        async for _, (message, address) in parsed:
+            if isinstance(message, str):
+                assert (message, address) == ("message", ADDRESS)
+                break
+
+    with fail_after(60):
+        await pool.run(inbound_rx, consumer=consume, log=getLogger(__name__))
@@ -0,0 +1,154 @@
+from logging import getLogger
+from math import isnan
+from types import SimpleNamespace
+
+from pytest import fixture
+
+from flockwave.server.ext.show import deviation
+from flockwave.server.ext.show.deviation import ShowDeviationMonitor
+from flockwave.server.model.builders import FlockwaveMessageBuilder
+from flockwave.server.utils.system_time import get_current_unix_timestamp_msec
+
+SHOW_1 = {"mission": {"id": "first"}}
+SHOW_2 = {"mission": {"id": "second"}}
+OUTDOOR_SHOW = {
+    "coordinateSystem": {"origin": [19.0, 47.5], "orientation": 0, "type": "nwu"},
+    "trajectory": {"version": 1, "points": [[0, [0, 0, 0], []], [10, [0, 0, 10], []]]},
+}
+
+
+@fixture
+def builder() -> FlockwaveMessageBuilder:
+    return FlockwaveMessageBuilder()
+
+
+@fixture
+def monitor() -> ShowDeviationMonitor:
+    return ShowDeviationMonitor(getLogger(__name__))
+
+
+def upload(monitor, builder, ids, show, response):
+    request = builder.create_message(
+        {
+            "type": "OBJ-CMD",
+            "ids": ids,
+            "command": "__show_upload",
+            "kwds": {"show": show},
+        }
+    )
+    monitor(request, None)
+    reply = builder.create_response_to(request, {"type": "OBJ-CMD", **response})
+    monitor.on_response(reply, None, request)
+
+
+def test_successful_uploads_are_recorded(monitor, builder):
+    upload(monitor, builder, ["1", "2"], SHOW_1, {"result": {"1": True, "2": True}})
+    assert monitor._shows == {"1": SHOW_1, "2": SHOW_1}
+
+    # Re-uploading to a single drone replaces the show of that drone only
+    upload(monitor, builder, ["2"], SHOW_2, {"result": {"2": True}})
+    assert monitor._shows == {"1": SHOW_1, "2": SHOW_2}
+
+
+def test_failed_uploads_are_ignored(monitor, builder):
+    upload(
+        monitor,
+        builder,
+        ["1", "2"],
+        SHOW_1,
+        {"result": {"1": True}, "error": {"2": "Upload failed"}},
+    )
+    assert monitor._shows == {"1": SHOW_1}
+
+    # Requests that are rejected altogether are forgotten
+    request = builder.create_message(
+        {
+            "type": "OBJ-CMD",
+            "ids": ["3"],
+            "command": "__show_upload",
+            "kwds": {"show": SHOW_2},
+        }
+    )
+    monitor(request, None)
+    reply = builder.create_response_to(request, {"type": "ACK-NAK"})
+    monitor.on_response(reply, None, request)
+    assert monitor._pending_uploads == {}
+    assert monitor._shows == {"1": SHOW_1}
+
+
+def test_asynchronous_uploads(monitor, builder):
+    upload(
+        monitor,
+        builder,
+        ["1", "2", "3"],
+        SHOW_1,
+        {"receipt": {"1": "r1", "2": "r2", "3": "r3"}},
+    )
+    assert monitor._shows == {}
+
+    notification = builder.create_notification(
+        {"type": "ASYNC-RESP", "id": "r1", "result": True}
+    )
+    monitor.on_response(notification, None, None)
+    notification = builder.create_notification(
+        {"type": "ASYNC-RESP", "id": "r2", "error": "Upload failed"}
+    )
+    monitor.on_response(notification, None, None)
+    notification = builder.create_notification({"type": "ASYNC-TIMEOUT", "ids": ["r3"]})
+    monitor.on_response(notification, None, None)
+
+    assert monitor._shows == {"1": SHOW_1}
+    assert monitor._pending_receipts == {}
+
+
+def test_pending_uploads_expire(monitor, builder, monkeypatch):
+    request = builder.create_message(
+        {
+            "type": "OBJ-CMD",
+            "ids": ["1"],
+            "command": "__show_upload",
+            "kwds": {"show": SHOW_1},
+        }
+    )
+    monitor(request, None)
+    assert list(monitor._pending_uploads) == [request.id]
+
+    # The response never arrives, e.g., because the client disconnected
+    monkeypatch.setattr(deviation, "monotonic", lambda: 1e9)
+    monitor._expire_pending_uploads()
+    assert monitor._pending_uploads == {}
+
+
+async def test_monitor_and_positions(monitor, builder):
+    upload(monitor, builder, ["1", "2"], OUTDOOR_SHOW, {"result": {"1": 1, "2": 1}})
+    upload(monitor, builder, ["3"], SHOW_1, {"result": {"3": True}})
+
+    # Shows without a trajectory are not monitored
+    await monitor._update_monitor()
+    assert monitor._monitor is not None
+    assert monitor._monitor.ids == ["1", "2"]
+
+    now = get_current_unix_timestamp_msec()
+    position = SimpleNamespace(lat=47.5, lon=19.0, amsl=None, ahl=10.0)
+    uavs = {
+        "1": SimpleNamespace(
+            status=SimpleNamespace(timestamp=now, position=position, light=0xF800)
+        ),
+        "2": SimpleNamespace(
+            status=SimpleNamespace(timestamp=now - 60000, position=position, light=0)
+        ),
+    }
+    app = SimpleNamespace(find_uav_by_id=uavs.get)
+    lat, lon, amsl, ahl, light = monitor._get_status(app, monitor._monitor.ids)
+
+    assert (lat[0], lon[0], ahl[0], light[0]) == (47.5, 19.0, 10.0, 0xF800)
+    assert isnan(amsl[0])
+
+    # Outdated statuses are unknown, and the drone is looked up again later
+    assert isnan(lat[1]) and isnan(ahl[1]) and isnan(light[1])
+    assert monitor._uavs == [uavs["1"], None]
+
+    # The light programs of the shows are black
+    assert monitor._colors is not None
+    assert monitor._colors.update(5, light) == []
+    assert monitor._colors.update(7, light) == ["1"]
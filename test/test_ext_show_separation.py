@@ -0,0 +1,47 @@
+from logging import getLogger
+
+from flockwave.server.ext.show.separation import ShowSeparationChecker
+
+
+def create_show(x: float, *, min_distance: float | None = None) -> dict:
+    show = {
+        "trajectory": {
+            "version": 1,
+            "points": [[0, [x, 0, 0], []], [10, [x, 0, 10], []]],
+        }
+    }
+    if min_distance is not None:
+        show["validation"] = {"minDistance": min_distance}
+    return show
+
+
+async def test_separation_check(autojump_clock):
+    checker = ShowSeparationChecker(getLogger(__name__))
+
+    shows = {
+        "1": create_show(0, min_distance=2),
+        "2": create_show(1, min_distance=2),
+        "3": create_show(10, min_distance=2),
+    }
+    report = await checker.check(shows)
+    assert report is not None
+    assert report.threshold == 2
+    assert report.num_violating_pairs == 1
+    assert (report.violations[0].first, report.violations[0].second) == (0, 1)
+
+    report = await checker.check({"1": shows["1"], "3": shows["3"]})
+    assert report is not None and report.ok
+
+
+async def test_separation_check_default_distance(autojump_clock):
+    checker = ShowSeparationChecker(getLogger(__name__))
+    shows = {"1": create_show(0), "2": create_show(1), "3": {"trajectory": None}}
+
+    # Shows without a minimum distance are not checked by default
+    assert await checker.check(shows) is None
+
+    checker.min_distance = 3
+    report = await checker.check(shows)
+    assert report is not None
+    assert report.threshold == 3
+    assert report.num_violating_pairs == 1
@@ -0,0 +1,70 @@
+from flockwave.server.show.cache import ShowFileCache
+
+SHOW = {"trajectory": {"points": [[0, [0, 0, 0], []]], "version": 1}}
+
+
+class Encoder:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self) -> bytes:
+        self.calls += 1
+        return b"skyb\x02" + bytes([self.calls])
+
+
+class TestShowFileCache:
+    def test_key_for(self):
+        cache = ShowFileCache()
+        reordered = {"trajectory": {"version": 1, "points": [[0, [0, 0, 0], []]]}}
+
+        assert cache.key_for(SHOW, version=2) == cache.key_for(reordered, version=2)
+        assert cache.key_for(SHOW, version=2) != cache.key_for(
+            {"trajectory": None}, version=2
+        )
+        assert cache.key_for(SHOW, version=2) != cache.key_for(
+            SHOW, extra=("show_pro",), version=2
+        )
+        assert cache.key_for(SHOW, version=2) != cache.key_for(SHOW, version=1)
+        assert cache.key_for({"foo": object()}, version=2) is None  # type: ignore
+
+    async def test_memory_cache(self):
+        cache = ShowFileCache()
+        encoder = Encoder()
+
+        first = await cache.get_or_create(SHOW, encoder, version=2)
+        second = await cache.get_or_create(SHOW, encoder, version=2)
+        assert first == second
+        assert encoder.calls == 1
+
+        await cache.get_or_create(SHOW, encoder, version=2, extra=("show_pro",))
+        assert encoder.calls == 2
+
+    async def test_disk_cache(self, tmp_path):
+        encoder = Encoder()
+
+        cache = ShowFileCache(folder=tmp_path, max_disk_entries=1)
+        data = await cache.get_or_create(SHOW, encoder, version=2)
+
+        cache = ShowFileCache(folder=tmp_path, max_disk_entries=1)
+        assert await cache.get_or_create(SHOW, encoder, version=2) == data
+        assert encoder.calls == 1
+
+        await cache.get_or_create({"trajectory": None}, encoder, version=2)
+        assert len(list(tmp_path.glob("*.skyb"))) == 1
+
+    async def test_disk_cache_pruning(self, tmp_path):
+        encoder = Encoder()
+        cache = ShowFileCache(folder=tmp_path, max_disk_entries=10)
+
+        for index in range(10):
+            await cache.get_or_create({"index": index}, encoder, version=2)
+        assert len(list(tmp_path.glob("*.skyb"))) == 10
+
+        # Exceeding the limit prunes the folder to 90% of the limit
+        await cache.get_or_create({"index": 10}, encoder, version=2)
+        assert len(list(tmp_path.glob("*.skyb"))) == 9
+
+        # Existing files are counted when the folder is used the first time
+        cache = ShowFileCache(folder=tmp_path, max_disk_entries=5)
+        await cache.get_or_create({"index": 11}, encoder, version=2)
+        assert len(list(tmp_path.glob("*.skyb"))) == 5
@@ -0,0 +1,137 @@
+from math import cos, degrees, nan, radians, sin, sqrt
+
+from pytest import approx, raises
+
+from flockwave.server.show.deviation import (
+    ExpectedColorMonitor,
+    ExpectedPositionMonitor,
+    ShowFrame,
+)
+from flockwave.server.show.lights import compile_light_program
+from flockwave.server.show.trajectory import TrajectorySpecification
+
+ORIGIN = (47.5, 19.0)
+
+
+def create_trajectory(*points) -> TrajectorySpecification:
+    # Each point is a tuple of (time, position)
+    return TrajectorySpecification(
+        {
+            "version": 1,
+            "points": [[t, list(point), []] for t, point in points],
+        }
+    )
+
+
+def to_gps(north: float, east: float) -> tuple[float, float]:
+    lat = radians(ORIGIN[0])
+    x = 1 - 6.69437999014e-3 * sin(lat) ** 2
+    r1 = 6378137.0 * (1 - 6.69437999014e-3) / x**1.5
+    r2 = 6378137.0 / sqrt(x)
+    return (
+        ORIGIN[0] + degrees(north / r1),
+        ORIGIN[1] + degrees(east / (r2 * cos(lat))),
+    )
+
+
+def create_monitor(**kwds) -> ExpectedPositionMonitor:
+    trajectories = [
+        create_trajectory((0, (0, 0, 10)), (10, (10, 0, 10))),
+        create_trajectory((0, (0, 5, 10)), (10, (0, 5, 20))),
+    ]
+    frames = [
+        ShowFrame(*ORIGIN, orientation=0, type="nwu"),
+        ShowFrame(*ORIGIN, orientation=90, type="neu", amsl_reference=100),
+    ]
+    return ExpectedPositionMonitor(["01", "02"], trajectories, frames, **kwds)
+
+
+def test_to_local():
+    monitor = create_monitor()
+
+    lat, lon = zip(to_gps(3, -4), to_gps(3, -4))
+    local = monitor.to_local(lat, lon, [nan, 112], [7, nan])
+
+    # NWU frame: X points north, Y points west
+    assert local[0] == approx([3, 4, 7], abs=1e-3)
+
+    # NEU frame rotated by 90 degrees: X points east, Y points south
+    assert local[1] == approx([-4, -3, 12], abs=1e-3)
+
+
+def test_update_and_hysteresis():
+    monitor = create_monitor(threshold=2)
+    ids = monitor.ids
+
+    # Both drones on track at T=5
+    lat, lon = zip(to_gps(5, 0), to_gps(-5, 0))
+    snapshot = monitor.update(5, lat, lon, [nan, 115], [10, nan])
+    assert list(snapshot.ids) == ids
+    assert snapshot.horizontal == approx([0, 0], abs=1e-3)
+    assert snapshot.vertical == approx([0, 0], abs=1e-3)
+    assert snapshot.num_deviating == 0
+    assert snapshot.newly_deviating == []
+
+    # First drone is 3m behind, second drone has no known position
+    lat, lon = zip(to_gps(2, 0), (nan, nan))
+    snapshot = monitor.update(5, lat, lon, [nan, nan], [10, nan])
+    assert snapshot.horizontal[0] == approx(3, abs=1e-3)
+    assert snapshot.newly_deviating == ["01"]
+    assert snapshot.max_deviation == approx(3, abs=1e-3)
+    assert snapshot.json["horizontal"] == [300, None]
+    assert snapshot.json["vertical"] == [0, None]
+    assert snapshot.json["deviating"] == 1
+
+    # Back within the threshold but not below the recovery distance
+    lat, lon = zip(to_gps(3.3, 0), to_gps(-5, 0))
+    snapshot = monitor.update(5, lat, lon, [nan, 115], [10, nan])
+    assert snapshot.newly_deviating == []
+    assert snapshot.recovered == []
+    assert snapshot.num_deviating == 1
+
+    # Recovered
+    lat, lon = zip(to_gps(5, 0), to_gps(-5, 0))
+    snapshot = monitor.update(5, lat, lon, [nan, 115], [10, nan])
+    assert snapshot.recovered == ["01"]
+    assert snapshot.num_deviating == 0
+
+    # Resetting the monitor forgets the deviating drones
+    lat, lon = zip(to_gps(2, 0), to_gps(-5, 0))
+    monitor.update(5, lat, lon, [nan, 115], [10, nan])
+    monitor.reset()
+    snapshot = monitor.update(5, lat, lon, [nan, 115], [10, nan])
+    assert snapshot.newly_deviating == ["01"]
+
+
+def test_invalid_arguments():
+    with raises(ValueError):
+        ExpectedPositionMonitor(["01"], [], [])
+
+    with raises(ValueError):
+        ExpectedPositionMonitor(
+            ["01"],
+            [create_trajectory((0, (0, 0, 0)), (1, (0, 0, 0)))],
+            [ShowFrame(*ORIGIN, type="xyz")],
+        )
+
+
+def test_expected_colors():
+    # Red for one second, then fading to blue in two seconds
+    red = compile_light_program(b"\x04\xff\x00\x00\x32\x08\x00\x00\xff\x64\x00")
+    monitor = ExpectedColorMonitor(["01", "02"], [red, red], grace_period=1)
+
+    # Second drone is black and first one has no known color; colors that
+    # differ are only reported after the grace period
+    assert monitor.update(0.5, [nan, 0]) == []
+    assert monitor.update(1.4, [nan, 0]) == []
+    assert monitor.update(1.6, [nan, 0]) == ["02"]
+    assert monitor.num_mismatching == 1
+
+    # Halfway through the fade, purple-ish colors are accepted
+    purple = (16 << 11) | (0 << 5) | 16
+    assert monitor.update(2, [purple, purple]) == []
+    assert monitor.num_mismatching == 0
+
+    monitor.update(2.5, [0, 0])
+    monitor.reset()
+    assert monitor.update(3, [0, 0]) == []
@@ -0,0 +1,81 @@
+from numpy import array, linspace
+from numpy.testing import assert_allclose
+from pytest import fixture
+
+from flockwave.server.show.evaluator import TrajectoryEvaluator
+from flockwave.server.show.player import TrajectoryPlayer
+from flockwave.server.show.trajectory import TrajectorySpecification
+
+
+@fixture
+def trajectories() -> list[TrajectorySpecification]:
+    return [
+        TrajectorySpecification(
+            {
+                "version": 1,
+                "points": [
+                    [0, [0, 0, 0], []],
+                    [6, [0, 3, 0], [[0, 0, 0], [-0.6, 2, 0]]],
+                    [12, [3, 3, 0], [[0.6, 4, 0], [2.4, 4, 0]]],
+                    [18, [3, 0, 0], [[3.6, 2, 0], [3, 0, 0]]],
+                ],
+                "takeoffTime": 3,
+            }
+        ),
+        TrajectorySpecification({"version": 1, "points": []}),
+        TrajectorySpecification(
+            {
+                "version": 1,
+                "points": [
+                    [19, [-2.5, 10, 15], []],
+                    [19.5, [-2.5, 10, 15], []],
+                    [20, [-2.27, 10.17, 15.17], []],
+                    [21, [0.02, 11.86, 16.86], [[-1.5, 11, 16]]],
+                    [22, [2.79, 13.9, 18.9], []],
+                ],
+                "takeoffTime": 3,
+            }
+        ),
+    ]
+
+
+def test_positions_match_trajectory_player(trajectories):
+    evaluator = TrajectoryEvaluator(trajectories)
+    assert evaluator.num_drones == 3
+    assert evaluator.degree == 3
+
+    times = linspace(-5, 40, 451)
+    positions = evaluator.positions_at(times)
+    assert positions.shape == (3, 451, 3)
+
+    for index, trajectory in enumerate(trajectories):
+        player = TrajectoryPlayer(trajectory)
+        expected = array([player.position_at(t) for t in times])
+        assert_allclose(positions[index], expected, atol=1e-9)
+
+    assert_allclose(evaluator.positions_at(24), positions[:, 290, :])
+
+
+def test_derivatives(trajectories):
+    evaluator = TrajectoryEvaluator(trajectories)
+
+    # Compare with central differences inside the segments
+    times = array([4.5, 10.5, 16, 20, 23.2, 24.7])
+    eps = 1e-5
+    positions = [evaluator.positions_at(times + d) for d in (-eps, 0, eps)]
+    velocities = evaluator.velocities_at(times)
+    accelerations = evaluator.accelerations_at(times)
+
+    assert_allclose(velocities, (positions[2] - positions[0]) / (2 * eps), atol=1e-5)
+    assert_allclose(
+        accelerations,
+        (positions[2] - 2 * positions[1] + positions[0]) / eps**2,
+        atol=1e-3,
+    )
+
+    # Drones are stationary before takeoff, after landing and with empty
+    # trajectories
+    for order in (1, 2):
+        result = evaluator.evaluate([0, 50], order=order)
+        assert not result.any()
+    assert not evaluator.velocities_at(times)[1].any()
@@ -1,12 +1,22 @@
+from io import BytesIO
+from pathlib import Path
+
 from pytest import raises
 
 from flockwave.server.show.formats import (
+    MappedSkybrushBinaryShowFile,
     SegmentEncoder,
     SkybrushBinaryFileFeatures,
     SkybrushBinaryFormatBlockType,
     SkybrushBinaryShowFile,
+    SkybrushBinaryShowFileDigest,
+    SkybrushBinaryShowFileWriter,
+)
+from flockwave.server.show.trajectory import (
+    TrajectorySegment,
+    TrajectorySpecification,
 )
-from flockwave.server.show.trajectory import TrajectorySegment
+from flockwave.server.show.utils import crc32_mavftp
 
 SIMPLE_SKYB_FILE_V1 = (
     # Header, version 1
@@ -143,6 +153,40 @@ class TestSegmentEncoder:
             b" \x88\x13 N\x00\x00\x00\x00"
         )
 
+    def test_encode_trajectory(self):
+        trajectory = TrajectorySpecification(
+            {
+                "version": 1,
+                "takeoffTime": 2,
+                "points": [
+                    [0, [10, 20, 0], []],
+                    [5, [10, 20, 20], [[10, 20, 0], [10, 20, 20]]],
+                    [15, [20, 20, 20], [[15, 25, 20]]],
+                    [15.5, [20, 20, 20], []],
+                    [90, [-20, 10.5, 20], []],
+                    [92.25, [-21.2345, 10.5, 0], [[-20, 10, 20], [0, 0, 0]]],
+                ],
+            }
+        )
+
+        for scale in (1, 2, 5):
+            encoder = SegmentEncoder(scale=scale)
+            for absolute in (False, True):
+                segments = trajectory.iter_segments(max_length=65, absolute=absolute)
+                assert encoder.encode_trajectory(
+                    trajectory, absolute=absolute
+                ) == encoder.encode_multiple_segments(segments)
+
+        empty = TrajectorySpecification({"version": 1, "points": []})
+        assert encoder.encode_trajectory(empty) == b""
+
+    def test_encode_segment_arrays_long_segment_error(self):
+        encoder = SegmentEncoder(scale=5)
+        with raises(RuntimeError, match="trajectory segment must be"):
+            encoder.encode_segment_arrays(
+                [10, 66], [2, 2], [(0, 0, 0), (5, 10, 20), (5, 10, 20), (10, 20, 30)]
+            )
+
 
 class TestSkybrushBinaryFileFormat:
     async def test_reading_blocks_version_1(self):
@@ -240,3 +284,156 @@ class TestSkybrushBinaryFileFormat:
         with raises(RuntimeError, match="version"):
             async with SkybrushBinaryShowFile.from_bytes(b"skyb\xff") as f:
                 await f.read_all_blocks()
+
+
+class TestSkybrushBinaryShowFileWriter:
+    async def test_writing_blocks_version_2_with_checksum(self):
+        fp = BytesIO()
+        f = SkybrushBinaryShowFileWriter(fp)
+        await f.add_block(
+            SkybrushBinaryFormatBlockType.TRAJECTORY,
+            b"\n\x00\x00\x00\x00\x00\x00\x00\x00\x10\x10'\xe8\x03"
+            b"\x01\x10'\xe8\x03\x04\x10'\xe8\x03\x05\x10'\x00\x00\x00\x00"
+            b"\x10\x10'\x00\x00",
+        )
+        await f.add_comment("this is a test file")
+        await f.add_block(SkybrushBinaryFormatBlockType.YAW_CONTROL, b"\x01\x08\x02")
+        await f.finalize()
+        assert fp.getvalue() == SIMPLE_SKYB_FILE_V2
+
+    async def test_writing_blocks_version_1(self):
+        fp = BytesIO()
+        f = SkybrushBinaryShowFileWriter(fp, version=1)
+        await f.add_block(
+            SkybrushBinaryFormatBlockType.TRAJECTORY,
+            b"\n\x00\x00\x00\x00\x00\x00\x00\x00\x10\x10'\xe8\x03"
+            b"\x01\x10'\xe8\x03\x04\x10'\xe8\x03\x05\x10'\x00\x00\x00\x00"
+            b"\x10\x10'\x00\x00",
+        )
+        await f.add_comment("this is a test file")
+        await f.finalize()
+        assert fp.getvalue() == SIMPLE_SKYB_FILE_V1
+
+
+class TestMappedSkybrushBinaryShowFile:
+    def test_reading_blocks(self, tmp_path: Path):
+        path = tmp_path / "show.skyb"
+        path.write_bytes(SIMPLE_SKYB_FILE_V2)
+
+        with MappedSkybrushBinaryShowFile.open(path) as f:
+            assert f.version == 2
+            assert f.features == SkybrushBinaryFileFeatures.CRC32
+            assert f.block_types == [
+                SkybrushBinaryFormatBlockType.TRAJECTORY,
+                SkybrushBinaryFormatBlockType.COMMENT,
+                SkybrushBinaryFormatBlockType.YAW_CONTROL,
+            ]
+            f.validate_checksum()
+
+            with f.find_block(SkybrushBinaryFormatBlockType.COMMENT) as block:
+                assert block == b"this is a test file"
+            with f.get_block(2) as block:
+                assert block == b"\x01\x08\x02"
+            assert f.find_block(SkybrushBinaryFormatBlockType.LIGHT_PROGRAM) is None
+
+    def test_reading_blocks_version_1(self):
+        with MappedSkybrushBinaryShowFile(SIMPLE_SKYB_FILE_V1) as f:
+            assert f.version == 1
+            assert not f.features
+            assert len(f) == 2
+            assert [(type, bytes(body)) for type, body in f.iter_blocks()][1] == (
+                SkybrushBinaryFormatBlockType.COMMENT,
+                b"this is a test file",
+            )
+
+    def test_invalid_crc(self):
+        data = SIMPLE_SKYB_FILE_V2[:6] + b"\x00" + SIMPLE_SKYB_FILE_V2[7:]
+        with MappedSkybrushBinaryShowFile(data) as f:
+            with raises(RuntimeError, match="CRC error"):
+                f.validate_checksum()
+
+    def test_updating_checksum(self, tmp_path: Path):
+        path = tmp_path / "show.skyb"
+        path.write_bytes(SIMPLE_SKYB_FILE_V2[:6] + b"\x00" + SIMPLE_SKYB_FILE_V2[7:])
+
+        with MappedSkybrushBinaryShowFile.open(path) as f:
+            with raises(RuntimeError, match="not writable"):
+                f.update_checksum()
+
+        with MappedSkybrushBinaryShowFile.open(path, writable=True) as f:
+            f.update_checksum()
+
+        assert path.read_bytes() == SIMPLE_SKYB_FILE_V2
+
+    def test_truncated_block(self):
+        with raises(IOError, match="unexpected end of block"):
+            MappedSkybrushBinaryShowFile(SIMPLE_SKYB_FILE_V2[:-1])
+
+    def test_invalid_magic_marker(self):
+        with raises(RuntimeError, match="expected Skybrush binary file header"):
+            MappedSkybrushBinaryShowFile(b"not-a-skyb-file")
+
+    def test_opening_invalid_file(self, tmp_path: Path):
+        path = tmp_path / "show.skyb"
+        path.write_bytes(b"not-a-skyb-file")
+        with raises(RuntimeError, match="expected Skybrush binary file header"):
+            MappedSkybrushBinaryShowFile.open(path)
+
+    def test_opening_empty_file(self, tmp_path: Path):
+        path = tmp_path / "show.skyb"
+        path.write_bytes(b"")
+        with raises(RuntimeError, match="expected Skybrush binary file header"):
+            MappedSkybrushBinaryShowFile.open(path)
+        with raises(RuntimeError, match="expected Skybrush binary file header"):
+            MappedSkybrushBinaryShowFile.open(path, writable=True)
+
+
+class TestSkybrushBinaryShowFileDigest:
+    async def _create_file(self, light_program: bytes, yaw: bytes) -> bytes:
+        fp = BytesIO()
+        f = SkybrushBinaryShowFileWriter(fp)
+        await f.add_block(SkybrushBinaryFormatBlockType.TRAJECTORY, bytes(range(200)))
+        await f.add_block(SkybrushBinaryFormatBlockType.LIGHT_PROGRAM, light_program)
+        await f.add_block(SkybrushBinaryFormatBlockType.YAW_CONTROL, yaw)
+        await f.finalize()
+        return fp.getvalue()
+
+    async def test_digest(self):
+        data = await self._create_file(b"\x04\xff\x00\x00\x32\x00", b"\x01\x08\x02")
+        digest = SkybrushBinaryShowFileDigest.from_bytes(data)
+        assert digest.size == len(data)
+        assert digest.crc32 == crc32_mavftp(data)
+        assert digest.header_length == 10
+        assert [(start, end) for start, end, _ in digest.blocks] == [
+            (10, 213),
+            (213, 222),
+            (222, 228),
+        ]
+        assert digest.get_changed_ranges(digest) == [(0, 10)]
+
+    async def test_changed_ranges(self):
+        old = await self._create_file(b"\x04\xff\x00\x00\x32\x00", b"\x01\x08\x02")
+        old_digest = SkybrushBinaryShowFileDigest.from_bytes(old)
+
+        # Light program changes, same length
+        new = await self._create_file(b"\x04\x00\xff\x00\x32\x00", b"\x01\x08\x02")
+        ranges = SkybrushBinaryShowFileDigest.from_bytes(new).get_changed_ranges(
+            old_digest
+        )
+        assert ranges == [(0, 10), (213, 222)]
+
+        # Light program gets longer so the yaw block moves
+        new = await self._create_file(
+            b"\x04\x00\xff\x00\x32\x02\x32\x00", b"\x01\x08\x02"
+        )
+        ranges = SkybrushBinaryShowFileDigest.from_bytes(new).get_changed_ranges(
+            old_digest
+        )
+        assert ranges == [(0, 10), (213, 230)]
+
+        # Applying the changed ranges to the old file yields the new one
+        patched = bytearray(old)
+        patched.extend(bytes(len(new) - len(old)))
+        for start, end in ranges:
+            patched[start:end] = new[start:end]
+        assert patched == new
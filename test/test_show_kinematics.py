@@ -0,0 +1,113 @@
+from pytest import approx
+
+from flockwave.server.show.evaluator import TrajectoryEvaluator
+from flockwave.server.show.kinematics import (
+    MAVLINK_KINEMATIC_LIMITS,
+    KinematicLimits,
+    check_kinematic_limits,
+    check_kinematic_limits_of_show,
+)
+from flockwave.server.show.trajectory import TrajectorySpecification
+
+
+def create_trajectory(*points) -> TrajectorySpecification:
+    # Each point is a tuple of (time, position, control points)
+    return TrajectorySpecification(
+        {
+            "version": 1,
+            "points": [
+                [t, list(point), [list(c) for c in control]]
+                for t, point, control in points
+            ],
+        }
+    )
+
+
+def test_linear_segments():
+    evaluator = TrajectoryEvaluator(
+        [
+            create_trajectory((0, (0, 0, 0), ()), (2, (6, 8, 0), ())),
+            create_trajectory((0, (0, 0, 0), ()), (4, (0, 0, 6), ())),
+        ]
+    )
+
+    report = check_kinematic_limits(
+        evaluator, KinematicLimits(max_velocity_xy=4, max_velocity_z=2)
+    )
+    assert report.max_velocity_xy == approx(5)
+    assert report.max_velocity_z == approx(1.5)
+    assert report.max_acceleration == approx(0)
+
+    assert not report.ok
+    assert report.num_violations == 1
+    (violation,) = report.violations
+    assert violation.drone == 0
+    assert violation.segment == 0
+    assert violation.quantity == "velocityXY"
+    assert violation.value == approx(5)
+    assert report.json["violations"] == [
+        {
+            "drone": 0,
+            "segment": 0,
+            "time": 0,
+            "quantity": "velocityXY",
+            "value": 5,
+            "limit": 4,
+        }
+    ]
+
+
+def test_cubic_segment():
+    # Smooth vertical takeoff to 10 m in 4 seconds; the velocity peaks in the
+    # middle of the segment with 1.5 * 10 / 4 m/s and the acceleration is the
+    # largest at the endpoints with 6 * 10 / 16 m/s^2
+    evaluator = TrajectoryEvaluator(
+        [
+            create_trajectory(
+                (0, (0, 0, 0), ()),
+                (4, (0, 0, 10), ((0, 0, 0), (0, 0, 10))),
+            )
+        ]
+    )
+
+    report = check_kinematic_limits(
+        evaluator, KinematicLimits(max_velocity_z=4, max_acceleration=3)
+    )
+    assert report.max_velocity_xy == approx(0)
+    assert report.max_velocity_z == approx(3.75)
+    assert report.max_acceleration == approx(3.75)
+
+    (violation,) = report.violations
+    assert violation.quantity == "acceleration"
+    assert violation.time in (approx(0), approx(4))
+
+
+def test_limits_from_show_specification():
+    limits = KinematicLimits.from_show_specification(
+        {"validation": {"maxVelocityZ": 2, "maxAcceleration": None}},
+        MAVLINK_KINEMATIC_LIMITS,
+    )
+    assert limits == KinematicLimits(
+        max_velocity_xy=MAVLINK_KINEMATIC_LIMITS.max_velocity_xy,
+        max_velocity_z=2,
+        max_acceleration=MAVLINK_KINEMATIC_LIMITS.max_acceleration,
+    )
+
+    assert KinematicLimits.from_show_specification({}) == KinematicLimits()
+
+
+def test_check_show():
+    show = {
+        "trajectory": {
+            "version": 1,
+            "points": [[0, [0, 0, 0], []], [10, [0, 0, 30], []]],
+        },
+        "validation": {"maxVelocityZ": 2.5},
+    }
+
+    report = check_kinematic_limits_of_show(show, MAVLINK_KINEMATIC_LIMITS)
+    assert report.limits.max_velocity_z == 2.5
+    assert report.num_violations == 1
+    assert report.violations[0].describe() == (
+        "Vertical velocity reaches 3.00 m/s at T=0.0s, limit is 2.50 m/s"
+    )
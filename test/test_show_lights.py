@@ -0,0 +1,120 @@
+from base64 import b64encode
+
+from pytest import raises
+
+from flockwave.server.show.lights import (
+    LightProgramEvaluator,
+    compile_light_program,
+    get_light_keyframes_from_show_specification,
+)
+
+END = b"\x00"
+
+
+def set_color(r: int, g: int, b: int, frames: int) -> bytes:
+    return bytes([0x04, r, g, b]) + varint(frames)
+
+
+def fade_to_color(r: int, g: int, b: int, frames: int) -> bytes:
+    return bytes([0x08, r, g, b]) + varint(frames)
+
+
+def varint(value: int) -> bytes:
+    result = bytearray()
+    while value >= 0x80:
+        result.append((value & 0x7F) | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
+
+
+def test_empty_program():
+    keyframes = compile_light_program(END)
+    assert keyframes.times.tolist() == [0]
+    assert keyframes.colors.tolist() == [[0, 0, 0]]
+    assert keyframes.color_at(10) == (0, 0, 0)
+
+
+def test_set_and_fade():
+    # Red for 1s, then fade to blue in 2s, then sleep for 200 frames
+    program = (
+        set_color(255, 0, 0, 50)
+        + fade_to_color(0, 0, 255, 100)
+        + b"\x02"
+        + varint(200)
+        + END
+    )
+    keyframes = compile_light_program(program)
+
+    assert keyframes.times.tolist() == [0, 1, 3, 7]
+    assert keyframes.colors.tolist() == [
+        [255, 0, 0],
+        [255, 0, 0],
+        [0, 0, 255],
+        [0, 0, 255],
+    ]
+    assert keyframes.duration == 7
+
+    assert keyframes.color_at(-1) == (0, 0, 0)
+    assert keyframes.color_at(0) == (255, 0, 0)
+    assert keyframes.color_at(2) == (128, 0, 128)
+    assert keyframes.color_at(5) == (0, 0, 255)
+    assert keyframes.color_at(100) == (0, 0, 255)
+
+
+def test_loops_and_steps():
+    # Blink white and black three times, 0.5s each
+    program = (
+        bytes([0x0C, 3]) + b"\x07" + varint(25) + b"\x06" + varint(25) + b"\x0d" + END
+    )
+    keyframes = compile_light_program(program)
+    assert keyframes.duration == 3
+
+    evaluator = LightProgramEvaluator([keyframes])
+    colors = evaluator.colors_at([0.25, 0.75, 1.0, 2.25, 2.75, 3.5])
+    assert colors[0, :, 0].tolist() == [255, 0, 255, 255, 0, 0]
+
+
+def test_infinite_loop_is_cut():
+    program = bytes([0x0C, 0]) + set_color(255, 255, 255, 50) + b"\x06\x32\x0d"
+    keyframes = compile_light_program(program, max_duration=10)
+    assert keyframes.duration == 10
+    assert keyframes.color_at(9.5) == (0, 0, 0)
+    assert keyframes.color_at(8.5) == (255, 255, 255)
+
+
+def test_malformed_program():
+    with raises(RuntimeError):
+        compile_light_program(b"\x04\xff")
+    with raises(RuntimeError):
+        compile_light_program(b"\x0d")
+
+
+def test_fleet_evaluation():
+    evaluator = LightProgramEvaluator(
+        [
+            compile_light_program(set_color(255, 0, 0, 50) + END),
+            compile_light_program(fade_to_color(0, 255, 0, 500) + END),
+            compile_light_program(END),
+        ]
+    )
+    assert evaluator.num_drones == 3
+    assert evaluator.duration == 10
+
+    assert evaluator.colors_at(5).tolist() == [
+        [255, 0, 0],
+        [0, 128, 0],
+        [0, 0, 0],
+    ]
+    assert evaluator.colors_at([0, 20]).shape == (3, 2, 3)
+    assert evaluator.rgb565_at(20).tolist() == [0xF800, 0x07E0, 0]
+
+
+def test_keyframes_from_show_specification():
+    program = set_color(0, 0, 255, 50) + END
+    show = {"lights": {"version": 1, "data": b64encode(program).decode("ascii")}}
+    keyframes = get_light_keyframes_from_show_specification(show)
+    assert keyframes.color_at(0.5) == (0, 0, 255)
+
+    keyframes = get_light_keyframes_from_show_specification({})
+    assert keyframes.color_at(0.5) == (0, 0, 0)
@@ -0,0 +1,100 @@
+from flockwave.server.show.parse_cache import ShowParseCache
+
+
+def create_show(index: int) -> dict:
+    return {
+        "coordinateSystem": {"origin": [19.0, 47.5], "orientation": 0, "type": "nwu"},
+        "geofence": {"version": 1, "polygons": []},
+        "trajectory": {"version": 1, "points": [[0, [index, 0, 0], []]]},
+    }
+
+
+class CountingParser:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, show: dict):
+        self.calls += 1
+        return object()
+
+
+def test_shared_parts_are_parsed_once():
+    cache = ShowParseCache()
+    parser = CountingParser()
+
+    results = [
+        cache.get("geofence", create_show(i), parser, shared_by=("geofence",))
+        for i in range(10)
+    ]
+    assert parser.calls == 1
+    assert all(result is results[0] for result in results)
+
+    show = create_show(0)
+    show["geofence"]["version"] = 2
+    assert (
+        cache.get("geofence", show, parser, shared_by=("geofence",)) is not (results[0])
+    )
+    assert parser.calls == 2
+
+
+def test_per_drone_parts_are_parsed_once_per_show():
+    cache = ShowParseCache()
+    parser = CountingParser()
+
+    show = create_show(1)
+    first = cache.get("custom", show, parser)
+    assert cache.get("custom", show, parser) is first
+    assert parser.calls == 1
+
+    # Equal but distinct show specifications are parsed separately
+    cache.get("custom", create_show(1), parser)
+    assert parser.calls == 2
+
+    trajectory = cache.get_trajectory(show)
+    assert cache.get_trajectory(show) is trajectory
+    assert trajectory.home_position == (1, 0, 0)
+
+    keyframes = cache.get_light_keyframes(show)
+    assert cache.get_light_keyframes(show) is keyframes
+    assert keyframes.duration == 0
+
+
+def test_clear():
+    cache = ShowParseCache()
+    parser = CountingParser()
+    show = create_show(1)
+
+    cache.get("custom", show, parser)
+    cache.get("geofence", show, parser, shared_by=("geofence",))
+    cache.clear()
+    cache.get("custom", show, parser)
+    cache.get("geofence", show, parser, shared_by=("geofence",))
+    assert parser.calls == 4
+
+
+def test_reserve():
+    cache = ShowParseCache(max_shows=4)
+    parser = CountingParser()
+    shows = [create_show(i) for i in range(10)]
+
+    # Several parts of the same show count as a single entry
+    for show in shows[:4]:
+        cache.get("custom", show, parser)
+        cache.get_trajectory(show)
+    for show in shows[:4]:
+        cache.get("custom", show, parser)
+    assert parser.calls == 4
+
+    # Larger batches do not fit unless the cache is grown
+    for show in shows:
+        cache.get("custom", show, parser)
+    for show in shows[:4]:
+        cache.get("custom", show, parser)
+    assert parser.calls == 14
+
+    cache.reserve(len(shows))
+    for show in shows:
+        cache.get("custom", show, parser)
+    for show in shows:
+        cache.get("custom", show, parser)
+    assert parser.calls == 20
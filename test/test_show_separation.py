@@ -0,0 +1,78 @@
+from itertools import combinations
+
+from numpy.random import default_rng
+from pytest import approx
+
+from flockwave.server.show.evaluator import TrajectoryEvaluator
+from flockwave.server.show.separation import (
+    _find_close_pairs_in_samples,
+    check_minimum_separation,
+    get_minimum_separation_from_show_specification,
+)
+from flockwave.server.show.trajectory import TrajectorySpecification
+
+
+def create_trajectory(*points) -> TrajectorySpecification:
+    return TrajectorySpecification(
+        {"version": 1, "points": [[t, list(point), []] for t, point in points]}
+    )
+
+
+def test_close_pairs_match_brute_force():
+    rng = default_rng(42)
+    positions = rng.uniform(-20, 20, size=(300, 4, 3))
+
+    first, second, samples, distances = _find_close_pairs_in_samples(positions, 2.0)
+    found = {
+        (min(i, j), max(i, j), k): d
+        for i, j, k, d in zip(
+            first.tolist(), second.tolist(), samples.tolist(), distances.tolist()
+        )
+    }
+
+    expected = {}
+    for k in range(positions.shape[1]):
+        for i, j in combinations(range(positions.shape[0]), 2):
+            diff = positions[i, k] - positions[j, k]
+            distance = float((diff**2).sum() ** 0.5)
+            if distance < 2.0:
+                expected[i, j, k] = distance
+
+    assert expected
+    assert found == approx(expected)
+
+
+def test_check_minimum_separation():
+    trajectories = [
+        # Two drones crossing each other at T=5, one meter apart
+        create_trajectory((0, (0, 0, 10)), (10, (10, 0, 10))),
+        create_trajectory((0, (10, 1, 10)), (10, (0, 1, 10))),
+        # A third drone far away
+        create_trajectory((0, (0, 50, 10)), (10, (10, 50, 10))),
+    ]
+    evaluator = TrajectoryEvaluator(trajectories)
+
+    report = check_minimum_separation(evaluator, 2.0, time_step=0.5)
+    assert not report.ok
+    assert report.num_samples == 21
+    assert report.num_violating_pairs == 1
+
+    (violation,) = report.violations
+    assert (violation.first, violation.second) == (0, 1)
+    assert violation.time == approx(5)
+    assert violation.distance == approx(1)
+    assert report.json["violations"] == [
+        {"drones": [0, 1], "time": 5.0, "distance": 1.0}
+    ]
+
+    assert check_minimum_separation(evaluator, 0.5, time_step=0.5).ok
+
+
+def test_minimum_separation_from_show_specification():
+    assert get_minimum_separation_from_show_specification({}) is None
+    assert (
+        get_minimum_separation_from_show_specification(
+            {"validation": {"minDistance": 3}}
+        )
+        == 3.0
+    )
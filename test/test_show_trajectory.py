@@ -222,3 +222,22 @@ class TestTrajectorySpecification:
             TrajectorySpecification({})
         with raises(RuntimeError, match="version 1"):
             TrajectorySpecification({"version": 66})
+
+    def test_statistics(self):
+        stats = self.spec.statistics
+        assert stats.bounding_box == ((10, 10, 0), (20, 20, 20))
+        assert stats.duration == 30
+        assert stats.home_position == (10.0, 20.0, 0.0)
+        assert stats.landing_height == 0.0
+        assert stats.num_points == 5
+        assert stats.scaling_factor == 1
+        assert self.spec.statistics is stats
+
+        assert self.empty_spec.statistics.bounding_box is None
+
+    def test_get_segments(self):
+        segments = self.spec.get_segments()
+        assert list(segments) == list(self.spec.iter_segments())
+        assert self.spec.get_segments() is segments
+        assert self.spec.get_segments(absolute=True) is not segments
+        assert len(self.spec.get_segments(max_length=4)) == 10